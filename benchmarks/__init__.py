@@ -0,0 +1,6 @@
+"""
+Benchmarks de rendimiento del ciclo de riesgo contra un Postgres real.
+
+No forman parte de la suite de tests (pytest sólo recoge tests/); se lanzan con
+python -m benchmarks.run_benchmarks. Ver benchmarks/README.md.
+"""
@@ -0,0 +1,187 @@
+"""
+Bases de datos desechables para los benchmarks.
+
+Cada escenario se siembra una vez en una base plantilla; cada repetición de cada
+caso trabaja sobre una copia nueva (CREATE DATABASE ... TEMPLATE), de modo que
+todas parten exactamente del mismo estado sin volver a sembrar.
+
+El servidor puede ser el Postgres de docker-compose (variables BENCH_DB_*, por
+defecto las DB_* del .env) o un clúster temporal creado con initdb/pg_ctl.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import shutil
+import socket
+import subprocess
+import tempfile
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, Optional
+
+import psycopg
+from psycopg import sql
+from psycopg.conninfo import make_conninfo
+
+INIT_SQL = Path(__file__).resolve().parents[1] / "infra" / "init.sql"
+
+# Sentencias de init.sql que requieren TimescaleDB
+_TIMESCALE_LINE = re.compile(
+    r"^\s*(CREATE EXTENSION IF NOT EXISTS timescaledb|SELECT create_hypertable\().*$",
+    re.MULTILINE,
+)
+
+_ENV_KEYS = ("DB_HOST", "DB_PORT", "DB_NAME", "DB_USER", "DB_PASSWORD")
+
+
+def schema_sql(timescale: bool = False) -> str:
+    """init.sql completo, o sin extensión/hypertables para un Postgres sin TimescaleDB."""
+    script = INIT_SQL.read_text(encoding="utf-8")
+    if timescale:
+        return script
+    return _TIMESCALE_LINE.sub("", script)
+
+
+@dataclass(frozen=True)
+class BenchServer:
+    """Servidor Postgres donde se crean y destruyen las bases de benchmark."""
+
+    host: str
+    port: int
+    user: str
+    password: str
+    maintenance_db: str = "postgres"
+
+    @classmethod
+    def from_env(cls) -> "BenchServer":
+        return cls(
+            host=os.getenv("BENCH_DB_HOST", os.getenv("DB_HOST", "127.0.0.1")),
+            port=int(os.getenv("BENCH_DB_PORT", os.getenv("DB_PORT", "5432"))),
+            user=os.getenv("BENCH_DB_USER", os.getenv("DB_USER", "desk")),
+            password=os.getenv("BENCH_DB_PASSWORD", os.getenv("DB_PASSWORD", "desk_pass")),
+            maintenance_db=os.getenv("BENCH_DB_MAINTENANCE", "postgres"),
+        )
+
+    def _dsn(self, dbname: str) -> str:
+        return make_conninfo(
+            dbname=dbname,
+            user=self.user,
+            password=self.password,
+            host=self.host,
+            port=self.port,
+        )
+
+    def _admin(self, statement: sql.Composable) -> None:
+        with psycopg.connect(self._dsn(self.maintenance_db), autocommit=True) as conn:
+            conn.execute(statement)
+
+    def create_database(self, name: str, template: Optional[str] = None) -> None:
+        statement = sql.SQL("CREATE DATABASE {}").format(sql.Identifier(name))
+        if template:
+            statement += sql.SQL(" TEMPLATE {}").format(sql.Identifier(template))
+        self._admin(statement)
+
+    def drop_database(self, name: str) -> None:
+        # WITH (FORCE) (PG13+) corta conexiones que un caso haya dejado abiertas
+        self._admin(
+            sql.SQL("DROP DATABASE IF EXISTS {} WITH (FORCE)").format(sql.Identifier(name))
+        )
+
+    def load_schema(self, name: str, timescale: bool = False) -> None:
+        with psycopg.connect(self._dsn(name)) as conn:
+            conn.execute(schema_sql(timescale))
+            conn.commit()
+
+    def server_version(self) -> str:
+        with psycopg.connect(self._dsn(self.maintenance_db)) as conn:
+            return conn.execute("SHOW server_version").fetchone()[0]
+
+    @contextmanager
+    def use(self, name: str) -> Iterator[None]:
+        """Apunta desk_grade.db (variables DB_*) a la base name durante el bloque."""
+        previous = {key: os.environ.get(key) for key in _ENV_KEYS}
+        os.environ.update(
+            {
+                "DB_HOST": self.host,
+                "DB_PORT": str(self.port),
+                "DB_NAME": name,
+                "DB_USER": self.user,
+                "DB_PASSWORD": self.password,
+            }
+        )
+        try:
+            yield
+        finally:
+            for key, value in previous.items():
+                if value is None:
+                    os.environ.pop(key, None)
+                else:
+                    os.environ[key] = value
+
+    @contextmanager
+    def fresh_copy(self, template: str, name: str) -> Iterator[None]:
+        """Copia nueva de template, activa durante el bloque y borrada al salir."""
+        self.drop_database(name)
+        self.create_database(name, template=template)
+        try:
+            with self.use(name):
+                yield
+        finally:
+            self.drop_database(name)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _pg_tool(name: str) -> str:
+    bindir = os.getenv("PG_BIN")
+    path = str(Path(bindir) / name) if bindir else shutil.which(name)
+    if not path or not Path(path).exists():
+        raise RuntimeError(f"No se encontró {name}; instala PostgreSQL o define PG_BIN")
+    return path
+
+
+@contextmanager
+def temp_cluster(user: str = "desk") -> Iterator[BenchServer]:
+    """
+    Arranca un clúster Postgres temporal (initdb + pg_ctl) en un puerto libre.
+
+    Autenticación trust sólo en 127.0.0.1 (la contraseña se ignora, pero no
+    puede ir vacía en el DSN de desk_grade.db); el directorio se borra al salir.
+    """
+    datadir = tempfile.mkdtemp(prefix="desk_bench_pg_")
+    port = _free_port()
+    pg_ctl = _pg_tool("pg_ctl")
+    try:
+        subprocess.run(
+            [_pg_tool("initdb"), "-D", datadir, "-U", user, "--auth=trust", "-E", "UTF8"],
+            check=True,
+            capture_output=True,
+        )
+        subprocess.run(
+            [
+                pg_ctl,
+                "-D",
+                datadir,
+                "-l",
+                str(Path(datadir) / "server.log"),
+                "-o",
+                f"-p {port} -k {datadir} -c listen_addresses=127.0.0.1",
+                "-w",
+                "start",
+            ],
+            check=True,
+            capture_output=True,
+        )
+        try:
+            yield BenchServer(host="127.0.0.1", port=port, user=user, password="bench")
+        finally:
+            subprocess.run([pg_ctl, "-D", datadir, "-m", "fast", "-w", "stop"], capture_output=True)
+    finally:
+        shutil.rmtree(datadir, ignore_errors=True)
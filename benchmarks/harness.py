@@ -0,0 +1,175 @@
+"""
+Medición, resultados JSON y comparación con la línea base.
+
+Un resultado es un dict {"<escenario>/<caso>": {"median_s", "min_s", "max_s",
+"times_s", "queries"}}. compare() lo contrasta con el de la línea base y
+devuelve las regresiones: tiempo mediano por encima del umbral porcentual
+(y de un mínimo absoluto, para no saltar con el ruido de casos de pocos ms) o
+más consultas de las que había. missed_targets() comprueba además objetivos
+absolutos de latencia por caso, con o sin línea base.
+"""
+
+from __future__ import annotations
+
+import json
+import platform
+import statistics
+import subprocess
+import time
+from contextlib import AbstractContextManager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from desk_grade import api
+
+ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baseline.json"
+DEFAULT_RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+DEFAULT_THRESHOLD_PCT = 20.0
+# Diferencias de tiempo por debajo de esto se consideran ruido
+DEFAULT_MIN_DELTA_S = 0.005
+
+
+def measure(
+    prepare: Callable[[], Callable[[], object]],
+    fresh: Callable[[], AbstractContextManager],
+    repeats: int,
+) -> dict:
+    """
+    Ejecuta repeats veces, cada una dentro de fresh() (estado inicial nuevo).
+
+    prepare() se llama ya dentro de fresh() y fuera del cronómetro; devuelve la
+    función a medir. Se cuentan las consultas de la función medida.
+    """
+    times: List[float] = []
+    queries: List[int] = []
+    for _ in range(repeats):
+        with fresh():
+            fn = prepare()
+            with api.query_count() as counter:
+                t0 = time.perf_counter()
+                fn()
+                times.append(time.perf_counter() - t0)
+            queries.append(counter.value)
+    return {
+        "median_s": statistics.median(times),
+        "min_s": min(times),
+        "max_s": max(times),
+        "times_s": times,
+        "queries": max(queries),
+    }
+
+
+@dataclass(frozen=True)
+class Regression:
+    key: str
+    metric: str
+    baseline: float
+    current: float
+
+    @property
+    def change_pct(self) -> float:
+        if not self.baseline:
+            return float("inf")
+        return (self.current - self.baseline) / self.baseline * 100.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.key} {self.metric}: {self.baseline:.4g} -> {self.current:.4g} "
+            f"({self.change_pct:+.1f}%)"
+        )
+
+
+def compare(
+    current: Dict[str, dict],
+    baseline: Dict[str, dict],
+    threshold_pct: float = DEFAULT_THRESHOLD_PCT,
+    min_delta_s: float = DEFAULT_MIN_DELTA_S,
+) -> List[Regression]:
+    """Regresiones de current frente a baseline (casos sin línea base se ignoran)."""
+    regressions = []
+    for key, result in sorted(current.items()):
+        base = baseline.get(key)
+        if base is None:
+            continue
+        cur_s, base_s = result["median_s"], base["median_s"]
+        if cur_s - base_s > min_delta_s and cur_s > base_s * (1 + threshold_pct / 100.0):
+            regressions.append(Regression(key, "median_s", base_s, cur_s))
+        if result["queries"] > base["queries"]:
+            regressions.append(Regression(key, "queries", base["queries"], result["queries"]))
+    return regressions
+
+
+def missed_targets(current: Dict[str, dict], targets_s: Dict[str, float]) -> List[Regression]:
+    """Casos cuya mediana supera su objetivo absoluto (targets_s: caso -> segundos)."""
+    missed = []
+    for key, result in sorted(current.items()):
+        target_s = targets_s.get(key.split("/", 1)[-1])
+        if target_s is not None and result["median_s"] > target_s:
+            missed.append(Regression(key, "target_s", target_s, result["median_s"]))
+    return missed
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def build_report(results: Dict[str, dict], **meta) -> dict:
+    """Resultados más el contexto necesario para interpretarlos más adelante."""
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        **meta,
+        "results": results,
+    }
+
+
+def save_report(report: dict, path: Path) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, indent=2, sort_keys=True), encoding="utf-8")
+    return path
+
+
+def load_results(path: Path) -> Optional[Dict[str, dict]]:
+    """Resultados de un informe guardado (None si el fichero no existe)."""
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))["results"]
+
+
+def _fmt_time(seconds: float) -> str:
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.2f}µs"
+    if seconds < 1:
+        return f"{seconds * 1e3:.1f}ms"
+    return f"{seconds:.2f}s"
+
+
+def format_table(results: Dict[str, dict], baseline: Optional[Dict[str, dict]] = None) -> str:
+    width = max([32, *(len(key) for key in results)])
+    lines = [f"{'caso':<{width}} {'mediana':>10} {'mín':>10} {'consultas':>10} {'vs base':>9}"]
+    for key, r in sorted(results.items()):
+        delta = ""
+        base = (baseline or {}).get(key)
+        if base and base["median_s"]:
+            delta = f"{(r['median_s'] / base['median_s'] - 1) * 100:+.1f}%"
+        lines.append(
+            f"{key:<{width}} {_fmt_time(r['median_s']):>10} {_fmt_time(r['min_s']):>10} "
+            f"{r['queries']:>10d} {delta:>9}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,5 @@
+"""
+Micro-benchmarks de las funciones puras del camino caliente del ciclo.
+
+Se ejecutan con pytest (pytest benchmarks/micro); ver benchmarks/README.md.
+"""
@@ -0,0 +1,87 @@
+"""
+Configuración de los micro-benchmarks.
+
+Con pytest-benchmark instalado se usa su fixture benchmark (y su histórico:
+--benchmark-autosave / --benchmark-compare). Sin él, la fixture de
+benchmarks.micro.timer guarda los resultados en benchmarks/results/micro_*.json
+y los compara con benchmarks/micro_baseline.json (--micro-save-baseline la fija).
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from benchmarks.harness import (
+    DEFAULT_RESULTS_DIR,
+    DEFAULT_THRESHOLD_PCT,
+    build_report,
+    compare,
+    format_table,
+    load_results,
+    save_report,
+)
+
+from .timer import BenchmarkTimer
+
+try:
+    import pytest_benchmark  # noqa: F401
+
+    PYTEST_BENCHMARK_AVAILABLE = True
+except ImportError:
+    PYTEST_BENCHMARK_AVAILABLE = False
+
+DEFAULT_MICRO_BASELINE = Path(__file__).resolve().parents[1] / "micro_baseline.json"
+# Las funciones medidas tardan µs: el mínimo absoluto de harness (5 ms) lo taparía todo
+MICRO_MIN_DELTA_S = 0.0
+
+_RESULTS: dict = {}
+
+
+if not PYTEST_BENCHMARK_AVAILABLE:
+
+    def pytest_addoption(parser):
+        group = parser.getgroup("micro-benchmarks")
+        group.addoption("--micro-baseline", type=Path, default=DEFAULT_MICRO_BASELINE)
+        group.addoption("--micro-save-baseline", action="store_true")
+        group.addoption(
+            "--micro-threshold",
+            type=float,
+            default=float(os.getenv("BENCH_REGRESSION_PCT", str(DEFAULT_THRESHOLD_PCT))),
+        )
+
+    @pytest.fixture
+    def benchmark(request):
+        return BenchmarkTimer(f"micro/{request.node.name}", _RESULTS)
+
+    def pytest_sessionfinish(session, exitstatus):
+        if not _RESULTS:
+            return
+        config = session.config
+        report = build_report(dict(_RESULTS), kind="micro")
+        save_report(report, DEFAULT_RESULTS_DIR / f"micro_{time.strftime('%Y%m%dT%H%M%S')}.json")
+
+        baseline_path = config.getoption("--micro-baseline")
+        baseline = load_results(baseline_path)
+        lines = [format_table(_RESULTS, baseline)]
+        if config.getoption("--micro-save-baseline"):
+            save_report(report, baseline_path)
+            lines.append(f"Línea base actualizada en {baseline_path}")
+        elif baseline is not None:
+            regressions = compare(
+                _RESULTS, baseline, config.getoption("--micro-threshold"), MICRO_MIN_DELTA_S
+            )
+            lines.extend(f"REGRESIÓN {r}" for r in regressions)
+            if regressions and exitstatus == 0:
+                session.exitstatus = 1
+        config._micro_summary = lines
+
+    def pytest_terminal_summary(terminalreporter, exitstatus, config):
+        lines = getattr(config, "_micro_summary", None)
+        if lines:
+            terminalreporter.section("micro-benchmarks")
+            for line in lines:
+                terminalreporter.write_line(line)
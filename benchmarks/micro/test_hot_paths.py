@@ -0,0 +1,244 @@
+"""
+Micro-benchmarks de las funciones puras que corren en cada ciclo.
+
+Los tamaños reproducen cargas reales: un trade intradía de 10k barras 1m para
+MAE/MFE, 10 años de rendimientos diarios para Sharpe/drawdown, y un ciclo con
+1000 operaciones abiertas para exits, gates, sizing y logging. Cada test comprueba
+además el resultado, para que la medida no se quede midiendo un atajo.
+"""
+
+from __future__ import annotations
+
+import io
+import logging
+
+import numpy as np
+import pytest
+
+from desk_grade.logging_config import JsonFormatter, build_queue_logging, log_context
+from portfolio import advanced_metrics, exits, metrics
+from portfolio.correlation import RollingCovariance
+from portfolio.risk_layer import RiskEngine, RiskLimits
+
+PATH_BARS = 10_000
+DAILY_RETURNS = 252 * 10
+OPEN_TRADES = 1_000
+SECTORS = [
+    "Energy",
+    "Materials",
+    "Industrials",
+    "ConsumerDiscretionary",
+    "ConsumerStaples",
+    "HealthCare",
+    "Financials",
+    "InformationTechnology",
+    "CommunicationServices",
+    "Utilities",
+    "RealEstate",
+]
+
+
+@pytest.fixture(scope="module")
+def rng():
+    return np.random.default_rng(20240101)
+
+
+@pytest.fixture(scope="module")
+def price_path(rng):
+    """Cierres 1m de un trade largo (lista de float, como llega desde la base de datos)."""
+    log_ret = rng.normal(0.0, 0.0008, PATH_BARS)
+    return (100.0 * np.exp(np.cumsum(log_ret))).tolist()
+
+
+@pytest.fixture(scope="module")
+def daily_returns(rng):
+    return rng.normal(0.0004, 0.01, DAILY_RETURNS).tolist()
+
+
+@pytest.fixture(scope="module")
+def open_trades(rng):
+    """(side, entry, atr, current_price) de un ciclo con OPEN_TRADES operaciones."""
+    entry = rng.uniform(10.0, 500.0, OPEN_TRADES)
+    atr = entry * rng.uniform(0.005, 0.03, OPEN_TRADES)
+    current = entry * (1 + rng.normal(0.0, 0.02, OPEN_TRADES))
+    sides = np.where(rng.random(OPEN_TRADES) < 0.5, "BUY", "SELL")
+    return list(zip(sides.tolist(), entry.tolist(), atr.tolist(), current.tolist()))
+
+
+def _limits(sizing_mode: str) -> RiskLimits:
+    return RiskLimits(
+        max_drawdown_pct=0.2,
+        daily_loss_limit_pct=0.03,
+        weekly_loss_limit_pct=0.06,
+        vol_target=0.15,
+        sector_cap_pct=0.25,
+        sizing_mode=sizing_mode,
+        fixed_fractional=0.01,
+        atr_multiplier=2.0,
+    )
+
+
+# -------------------------
+# portfolio.metrics
+# -------------------------
+def test_mae_mfe_r_10k_barras(benchmark, price_path):
+    mae, mfe = benchmark(metrics.mae_mfe_r, "BUY", 100.0, 98.0, price_path)
+    moves = (np.asarray(price_path) - 100.0) / 2.0
+    assert mae == pytest.approx(min(0.0, moves.min()))
+    assert mfe == pytest.approx(max(0.0, moves.max()))
+
+
+def test_r_multiple_y_pnl_por_ciclo(benchmark, open_trades):
+    def journal():
+        return [
+            (
+                metrics.r_multiple(side, entry, entry - atr if side == "BUY" else entry + atr, px),
+                metrics.realized_pnl(side, entry, px, 10.0),
+            )
+            for side, entry, atr, px in open_trades
+        ]
+
+    assert len(benchmark(journal)) == OPEN_TRADES
+
+
+# -------------------------
+# portfolio.advanced_metrics
+# -------------------------
+def test_sharpe_ratio_10_anios_diarios(benchmark, daily_returns):
+    sharpe = benchmark(advanced_metrics.sharpe_ratio, daily_returns)
+    rets = np.asarray(daily_returns)
+    assert sharpe == pytest.approx(rets.mean() / rets.std(ddof=1) * np.sqrt(252))
+
+
+def test_max_drawdown_10_anios_diarios(benchmark, daily_returns):
+    equity = (100_000.0 * np.cumprod(1 + np.asarray(daily_returns))).tolist()
+    dd = benchmark(advanced_metrics.max_drawdown, equity)
+    curve = np.asarray(equity)
+    peak = np.maximum.accumulate(curve)
+    assert dd == pytest.approx(((peak - curve) / peak).max())
+
+
+def test_expectancy_10k_trades(benchmark, rng):
+    r_values = rng.normal(0.2, 1.5, 10_000).tolist()
+    assert benchmark(advanced_metrics.expectancy, r_values) == pytest.approx(np.mean(r_values))
+
+
+# -------------------------
+# portfolio.exits (paso de exits con OPEN_TRADES operaciones)
+# -------------------------
+def test_exits_por_ciclo(benchmark, open_trades):
+    def evaluate():
+        actions = []
+        for side, entry, atr, px in open_trades:
+            levels = exits.compute_atr_levels(
+                side=side, entry_price=entry, atr=atr, atr_multiple_stop=2.0
+            )
+            trailing = exits.update_trailing_stop(
+                side=side,
+                entry_price=entry,
+                current_price=px,
+                risk_per_unit=abs(entry - levels.stop),
+                existing_trailing_stop=None,
+            )
+            decision = exits.evaluate_exit_decision(
+                side=side,
+                levels=exits.ExitLevels(levels.stop, levels.tp1, levels.tp2, trailing),
+                current_price=px,
+                tp1_already_taken=False,
+            )
+            actions.append(decision.action)
+        return actions
+
+    actions = benchmark(evaluate)
+    assert len(actions) == OPEN_TRADES
+    assert set(actions) <= {"NONE", "STOP", "TP1_PARTIAL", "TP2_FULL", "TRAIL_STOP"}
+
+
+# -------------------------
+# RiskEngine
+# -------------------------
+def test_evaluate_gates_con_sectores(benchmark):
+    engine = RiskEngine(_limits("ATR"))
+    exposure = {sector: 0.05 * (i % 7) for i, sector in enumerate(SECTORS)}
+
+    result = benchmark(
+        lambda: engine.evaluate_gates(
+            equity=95_000.0,
+            peak_equity=100_000.0,
+            daily_pnl=-500.0,
+            weekly_pnl=-1_500.0,
+            sector_exposure_pct=exposure,
+        )
+    )
+    assert result.mode == "DEGRADED"  # 0.30 > sector_cap 0.25
+    assert sum(r.startswith("SECTOR_CAP_SUPERADO") for r in result.reasons) == 1
+
+
+@pytest.mark.parametrize("sizing_mode", ["ATR", "FIXED_FRACTIONAL"])
+def test_compute_position_size_por_ciclo(benchmark, open_trades, sizing_mode):
+    engine = RiskEngine(_limits(sizing_mode))
+
+    def size_all():
+        return [
+            engine.compute_position_size(symbol="SYN", price=entry, equity=1_000_000.0, atr=atr)
+            for _, entry, atr, _ in open_trades
+        ]
+
+    sizes = benchmark(size_all)
+    assert len(sizes) == OPEN_TRADES and all(s >= 0 for s in sizes)
+
+
+def test_compute_position_sizes_vectorizado(benchmark, rng):
+    """Screening de 5000 candidatos en una llamada (paso de entries)."""
+    engine = RiskEngine(_limits("ATR"))
+    n = 5_000
+    symbols = [f"S{i:04d}" for i in range(n)]
+    prices = rng.uniform(10.0, 500.0, n)
+    atrs = prices * rng.uniform(0.005, 0.03, n)
+    vols = rng.uniform(0.1, 0.8, n)
+
+    sizes = benchmark(engine.compute_position_sizes, symbols, prices, atrs, vols, 1_000_000.0)
+    assert sizes.shape == (n,) and (sizes > 0).all()
+
+
+# -------------------------
+# portfolio.correlation (una barra nueva para 500 símbolos en cartera)
+# -------------------------
+def test_correlacion_incremental_por_barra(benchmark, rng):
+    rolling = RollingCovariance(500, window=120)
+    rolling.push_many(rng.normal(0.0, 0.001, (120, 500)))
+    bars = rng.normal(0.0, 0.001, (64, 500))
+    step = iter(range(10**9))
+
+    def push_bar():
+        rolling.push(bars[next(step) % len(bars)])
+
+    benchmark(push_bar)
+    assert rolling.count == 120
+
+
+# -------------------------
+# desk_grade.logging_config (una línea por símbolo, como el paso de entries)
+# -------------------------
+def test_logging_en_cola_por_ciclo(benchmark, open_trades):
+    stream = io.StringIO()
+    handler, listener = build_queue_logging(stream, JsonFormatter(), rate_per_s=0.0)
+    logger = logging.getLogger("micro.logging")
+    logger.handlers = [handler]
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+
+    def log_cycle():
+        with log_context(cycle_id="micro", strategy_id="baseline"):
+            for i, (side, entry, _, _) in enumerate(open_trades):
+                with log_context(symbol=f"S{i:04d}"):
+                    logger.info("Nueva entrada %s qty=%.4f price=%.4f", side, 1.0, entry)
+
+    listener.start()
+    try:
+        benchmark(log_cycle)
+    finally:
+        listener.stop()
+    lines = stream.getvalue().splitlines()
+    assert lines and len(lines) % OPEN_TRADES == 0
+    assert '"symbol": "S0000"' in lines[0]
@@ -0,0 +1,83 @@
+"""
+Fixture benchmark mínima para cuando pytest-benchmark no está instalado.
+
+Imita la parte de la API que usan los micro-benchmarks (benchmark(fn, *args) y
+benchmark.pedantic) y deja los resultados en el formato de benchmarks.harness,
+de modo que se guardan en benchmarks/results/ y se comparan con una línea base
+igual que los del ciclo completo.
+"""
+
+from __future__ import annotations
+
+import statistics
+import time
+from typing import Callable, Dict, List
+
+# Una ronda debe durar al menos esto para que el reloj no domine la medida
+MIN_ROUND_S = 0.001
+MAX_TIME_S = 0.5
+MIN_ROUNDS = 5
+MAX_ROUNDS = 1000
+
+
+class BenchmarkTimer:
+    """Mide fn en rondas de N iteraciones calibradas y guarda las estadísticas en store[name]."""
+
+    def __init__(
+        self,
+        name: str,
+        store: Dict[str, dict],
+        max_time: float = MAX_TIME_S,
+        min_rounds: int = MIN_ROUNDS,
+    ) -> None:
+        self.name = name
+        self.store = store
+        self.max_time = max_time
+        self.min_rounds = min_rounds
+
+    def _round(self, fn: Callable, args: tuple, kwargs: dict, iterations: int) -> float:
+        t0 = time.perf_counter()
+        for _ in range(iterations):
+            fn(*args, **kwargs)
+        return time.perf_counter() - t0
+
+    def _record(self, times: List[float], iterations: int) -> None:
+        self.store[self.name] = {
+            "median_s": statistics.median(times),
+            "min_s": min(times),
+            "max_s": max(times),
+            "times_s": times,
+            "rounds": len(times),
+            "iterations": iterations,
+            "queries": 0,
+        }
+
+    def __call__(self, fn: Callable, *args, **kwargs):
+        result = fn(*args, **kwargs)  # calentamiento
+
+        iterations = 1
+        elapsed = self._round(fn, args, kwargs, iterations)
+        while elapsed < MIN_ROUND_S:
+            iterations *= 10
+            elapsed = self._round(fn, args, kwargs, iterations)
+
+        rounds = min(MAX_ROUNDS, max(self.min_rounds, int(self.max_time / elapsed)))
+        times = [self._round(fn, args, kwargs, iterations) / iterations for _ in range(rounds)]
+        self._record(times, iterations)
+        return result
+
+    def pedantic(
+        self,
+        fn: Callable,
+        args: tuple = (),
+        kwargs: dict | None = None,
+        rounds: int = 1,
+        iterations: int = 1,
+        warmup_rounds: int = 0,
+    ):
+        kwargs = kwargs or {}
+        for _ in range(warmup_rounds):
+            fn(*args, **kwargs)
+        times = [self._round(fn, args, kwargs, iterations) / iterations for _ in range(rounds)]
+        self._record(times, iterations)
+        return fn(*args, **kwargs)
@@ -0,0 +1,280 @@
+"""
+Benchmarks del ciclo de riesgo a escala contra bases de datos desechables.
+
+Para cada escenario (universo de símbolos y operaciones abiertas) se siembra una
+base plantilla y cada repetición de cada caso corre sobre una copia nueva. Se
+mide el tiempo y el número de consultas de run_cycle(), de cada paso y de los
+métodos de los motores que tocan la base de datos; el informe se guarda en JSON
+y se compara con la línea base. Sale con código 1 si hay regresiones.
+
+Ejemplos de uso:
+    # Postgres de docker-compose (docker compose up -d db)
+    python -m benchmarks.run_benchmarks
+
+    # Clúster temporal (initdb/pg_ctl en el PATH o en PG_BIN)
+    python -m benchmarks.run_benchmarks --temp-cluster --scenarios 10x5,100x50
+
+    # Fijar la línea base tras un cambio de rendimiento aceptado
+    python -m benchmarks.run_benchmarks --save-baseline
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import sys
+import time
+import uuid
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import pandas as pd
+from dotenv import load_dotenv
+
+from .database import BenchServer, temp_cluster
+from .harness import (
+    DEFAULT_BASELINE,
+    DEFAULT_MIN_DELTA_S,
+    DEFAULT_RESULTS_DIR,
+    DEFAULT_THRESHOLD_PCT,
+    build_report,
+    compare,
+    format_table,
+    load_results,
+    measure,
+    missed_targets,
+    save_report,
+)
+from .scenarios import (
+    BENCH_STRATEGY_ID,
+    DEFAULT_SCENARIOS,
+    EQUITY,
+    Scenario,
+    parse_scenarios,
+    seed_scenario,
+)
+
+load_dotenv()
+
+logger = logging.getLogger("benchmarks")
+
+
+def _cases() -> Dict[str, Callable[[Scenario], Callable[[], object]]]:
+    """
+    Casos medidos: nombre -> prepare(scenario) que devuelve la función a medir.
+
+    El import es diferido: run_risk_cycle configura logging al importarse.
+    """
+    from portfolio.exit_engine import ExitEngine
+    from portfolio.exposure import fetch_sector_exposure, snapshot_exposure
+    from portfolio.kill_switch import KillSwitch
+    from portfolio.lifecycle_engine import LifecycleEngine
+    from portfolio.risk_layer import RiskEngine
+    from scripts import run_risk_cycle as cycle
+
+    def exit_engine_trades(scenario: Scenario):
+        trades = cycle._fetch_open_trades()
+        prices = {t["symbol"]: cycle._fetch_latest_price(t["symbol"]) for t in trades}
+        engine = ExitEngine()
+
+        def run():
+            for t in trades:
+                engine.process_trade_exit(
+                    symbol=t["symbol"],
+                    strategy_id=t["strategy_id"],
+                    current_price=prices[t["symbol"]],
+                )
+
+        return run
+
+    def lifecycle_cooldown(scenario: Scenario):
+        lifecycle = LifecycleEngine()
+        symbols = scenario.symbol_names
+        return lambda: [lifecycle.is_in_cooldown(s, BENCH_STRATEGY_ID) for s in symbols]
+
+    def lifecycle_register_entry(scenario: Scenario):
+        lifecycle = LifecycleEngine()
+        free = scenario.symbol_names[scenario.open_trades + scenario.exited_trades :]
+
+        def run():
+            for s in free:
+                lifecycle.register_entry(
+                    symbol=s,
+                    strategy_id=BENCH_STRATEGY_ID,
+                    qty=1.0,
+                    entry_price=100.0,
+                    stop_price=98.0,
+                    tp1_price=102.0,
+                    tp2_price=104.0,
+                )
+
+        return run
+
+    def fresh_state(prepare):
+        # Cada repetición corre sobre una base nueva: sin estado en memoria de la anterior
+        def wrapped(scenario: Scenario):
+            cycle.reset_correlation_engine()
+            return prepare(scenario)
+
+        return wrapped
+
+    cases = {
+        "run_cycle": lambda s: cycle.run_cycle,
+        "step_exits": lambda s: lambda: cycle._exits_step(ExitEngine()),
+        "step_journal": lambda s: LifecycleEngine().process_exited_trades,
+        "step_risk": lambda s: lambda: cycle._risk_gates_step(RiskEngine()),
+        "step_entries": lambda s: lambda: cycle._entries_step(RiskEngine()),
+        "exit_engine.process_trade_exit": exit_engine_trades,
+        "lifecycle.is_in_cooldown": lifecycle_cooldown,
+        "lifecycle.register_entry": lifecycle_register_entry,
+        # Lo que corre en el paso de risk gates: lectura por sector y snapshot histórico
+        "exposure.fetch_sector_exposure": lambda s: fetch_sector_exposure,
+        "exposure.snapshot_exposure": lambda s: lambda: snapshot_exposure(EQUITY),
+        # Aplana todas las posiciones abiertas (500 en 1000x500x100) en modo PAPER
+        "kill_switch.trigger": lambda s: lambda: KillSwitch(paper_trading=True).trigger("BENCH"),
+    }
+    return {name: fresh_state(prepare) for name, prepare in cases.items()}
+
+
+def _latency_targets() -> Dict[str, float]:
+    """Objetivos absolutos de latencia (segundos) por caso, comprobados en cada ejecución."""
+    from portfolio.kill_switch import LATENCY_TARGET_MS
+
+    return {"kill_switch.trigger": LATENCY_TARGET_MS / 1000.0}
+
+
+def run_scenario(
+    server: BenchServer,
+    scenario: Scenario,
+    cases: Dict[str, Callable],
+    *,
+    repeats: int,
+    timescale: bool,
+    run_id: str,
+) -> Dict[str, dict]:
+    template = f"desk_bench_{run_id}_{scenario.name}"
+    server.create_database(template)
+    try:
+        server.load_schema(template, timescale=timescale)
+        with server.use(template):
+            totals = seed_scenario(scenario, pd.Timestamp.now(tz="UTC").floor("min"))
+        logger.info("Escenario %s sembrado: %s", scenario.name, totals)
+
+        results = {}
+        for name, prepare in cases.items():
+            results[f"{scenario.name}/{name}"] = measure(
+                lambda: prepare(scenario),
+                lambda: server.fresh_copy(template, f"{template}_run"),
+                repeats,
+            )
+            logger.info(
+                "%s/%s: %.1f ms, %d consultas",
+                scenario.name,
+                name,
+                results[f"{scenario.name}/{name}"]["median_s"] * 1000,
+                results[f"{scenario.name}/{name}"]["queries"],
+            )
+        return results
+    finally:
+        server.drop_database(template)
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks del ciclo de riesgo")
+    parser.add_argument(
+        "--scenarios",
+        default=os.getenv("BENCH_SCENARIOS"),
+        help="SIMBOLOSxABIERTAS[xCERRADAS] separados por comas (por defecto, la matriz estándar)",
+    )
+    parser.add_argument("--cases", help="Casos a medir separados por comas (por defecto, todos)")
+    parser.add_argument("--repeats", type=int, default=int(os.getenv("BENCH_REPEATS", "3")))
+    parser.add_argument(
+        "--temp-cluster", action="store_true", help="Usar un clúster initdb temporal"
+    )
+    parser.add_argument("--timescale", action="store_true", help="Crear ohlcv como hypertable")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument(
+        "--save-baseline", action="store_true", help="Guardar el resultado como línea base"
+    )
+    parser.add_argument("--output-dir", type=Path, default=DEFAULT_RESULTS_DIR)
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=float(os.getenv("BENCH_REGRESSION_PCT", str(DEFAULT_THRESHOLD_PCT))),
+        help="Regresión máxima tolerada en el tiempo mediano (%%)",
+    )
+    parser.add_argument(
+        "--min-delta-ms",
+        type=float,
+        default=DEFAULT_MIN_DELTA_S * 1000,
+        help="Diferencia absoluta por debajo de la cual no se considera regresión",
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s - %(message)s"
+    )
+    scenarios = parse_scenarios(args.scenarios) if args.scenarios else list(DEFAULT_SCENARIOS)
+    cases = _cases()
+    # Los motores registran cada operación; a esta escala el log distorsiona la medida
+    logging.getLogger().setLevel(logging.WARNING)
+    logger.setLevel(logging.INFO)
+    if args.cases:
+        wanted = [c.strip() for c in args.cases.split(",") if c.strip()]
+        unknown = sorted(set(wanted) - set(cases))
+        if unknown:
+            parser.error(f"casos desconocidos: {', '.join(unknown)}")
+        cases = {name: cases[name] for name in wanted}
+
+    run_id = uuid.uuid4().hex[:8]
+    server_ctx = temp_cluster() if args.temp_cluster else nullcontext(BenchServer.from_env())
+    results: Dict[str, dict] = {}
+    with server_ctx as server:
+        version = server.server_version()
+        for scenario in scenarios:
+            results.update(
+                run_scenario(
+                    server,
+                    scenario,
+                    cases,
+                    repeats=args.repeats,
+                    timescale=args.timescale,
+                    run_id=run_id,
+                )
+            )
+
+    report = build_report(
+        results,
+        postgres=version,
+        timescale=args.timescale,
+        repeats=args.repeats,
+        scenarios=[s.name for s in scenarios],
+    )
+    path = save_report(report, args.output_dir / f"{time.strftime('%Y%m%dT%H%M%S')}_{run_id}.json")
+    logger.info("Resultados en %s", path)
+
+    baseline = load_results(args.baseline)
+    print(format_table(results, baseline))
+
+    missed = missed_targets(results, _latency_targets())
+    for target in missed:
+        logger.error("Objetivo de latencia incumplido: %s", target)
+
+    if args.save_baseline:
+        save_report(report, args.baseline)
+        logger.info("Línea base actualizada en %s", args.baseline)
+        return 1 if missed else 0
+    if baseline is None:
+        logger.warning("Sin línea base en %s; usa --save-baseline para fijarla", args.baseline)
+        return 1 if missed else 0
+
+    regressions = compare(results, baseline, args.threshold, args.min_delta_ms / 1000)
+    for regression in regressions:
+        logger.error("Regresión: %s", regression)
+    return 1 if regressions or missed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
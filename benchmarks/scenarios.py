@@ -0,0 +1,178 @@
+"""
+Universos parametrizados para los benchmarks del ciclo de riesgo.
+
+Cada escenario siembra (con data_pipeline.synthetic) barras 1m, ATR y señales
+para N símbolos SYNnnnn, y además:
+
+- open_trades operaciones ENTERED (con su posición) en los primeros símbolos,
+  con niveles amplios para que el paso de exits recorra la ruta completa
+  (carga, trailing, UPDATE) sin cerrar operaciones: así el número de consultas
+  es estable entre ejecuciones.
+- exited_trades operaciones EXITED pendientes de journal en los siguientes
+  símbolos (niveles intactos, como tras una salida manual).
+- Un histórico diario de cash_balances (equity, PnL diario y semanal).
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import List, Sequence
+
+import pandas as pd
+
+from data_pipeline.synthetic import SyntheticMarket, seed_synthetic
+from desk_grade import api
+from portfolio.exposure import upsert_exposure, upsert_symbol_sectors
+
+BENCH_STRATEGY_ID = "baseline"
+EQUITY = 1_000_000.0
+TRADE_QTY = 10.0
+# Sectores asignados en rueda a los símbolos (agregación de fetch_sector_exposure)
+BENCH_SECTORS = ("InformationTechnology", "Financials", "Energy", "HealthCare", "Industrials")
+
+
+@dataclass(frozen=True)
+class Scenario:
+    symbols: int
+    open_trades: int
+    exited_trades: int = 0
+    history_days: float = 2.0
+    signals_per_day: float = 4.0
+    seed: int = 42
+
+    def __post_init__(self) -> None:
+        if self.open_trades + self.exited_trades > self.symbols:
+            raise ValueError(
+                f"{self.open_trades}+{self.exited_trades} operaciones no caben en "
+                f"{self.symbols} símbolos"
+            )
+
+    @property
+    def name(self) -> str:
+        return f"u{self.symbols}_t{self.open_trades}"
+
+    @property
+    def symbol_names(self) -> List[str]:
+        return [f"SYN{i:04d}" for i in range(self.symbols)]
+
+
+DEFAULT_SCENARIOS = (
+    Scenario(10, 5, 2),
+    Scenario(100, 20, 10),
+    Scenario(100, 80, 10),
+    Scenario(1000, 100, 50),
+    Scenario(1000, 500, 100),
+)
+
+
+def parse_scenarios(spec: str) -> List[Scenario]:
+    """
+    Lista "SIMBOLOSxABIERTAS[xCERRADAS]" separada por comas, p. ej. "10x5,1000x500x100".
+
+    Sin CERRADAS se usa una quinta parte de las abiertas.
+    """
+    scenarios = []
+    for item in spec.split(","):
+        item = item.strip().lower()
+        if not item:
+            continue
+        parts = item.split("x")
+        if len(parts) not in (2, 3) or not all(p.isdigit() for p in parts):
+            raise ValueError(f"Escenario inválido: {item!r} (formato 100x20 o 100x20x5)")
+        symbols, open_trades = int(parts[0]), int(parts[1])
+        exited = int(parts[2]) if len(parts) == 3 else open_trades // 5
+        scenarios.append(Scenario(symbols, open_trades, exited))
+    return scenarios
+
+
+def _latest_closes(symbols: Sequence[str]) -> dict:
+    rows = api.fetch_all(
+        """
+        SELECT DISTINCT ON (symbol) symbol, close
+        FROM ohlcv
+        WHERE symbol = ANY(%s)
+        ORDER BY symbol, ts DESC
+        """,
+        (list(symbols),),
+    )
+    return {r["symbol"]: float(r["close"]) for r in rows}
+
+
+def seed_scenario(scenario: Scenario, end: pd.Timestamp) -> dict:
+    """Siembra el escenario en la base activa (ver BenchServer.use). Devuelve filas por tabla."""
+    symbols = scenario.symbol_names
+    start = end - pd.Timedelta(days=scenario.history_days)
+    market = SyntheticMarket(symbols, timeframe="1m", seed=scenario.seed)
+    totals = seed_synthetic(
+        market,
+        start,
+        end,
+        signals_per_day=scenario.signals_per_day,
+        strategy_id=BENCH_STRATEGY_ID,
+    )
+
+    open_symbols = symbols[: scenario.open_trades]
+    exited_symbols = symbols[
+        scenario.open_trades : scenario.open_trades + scenario.exited_trades
+    ]
+    closes = _latest_closes(open_symbols + exited_symbols)
+    entry_ts = end.to_pydatetime() - timedelta(days=1)
+
+    trades = []
+    positions = []
+    for i, symbol in enumerate(open_symbols):
+        price = closes[symbol]
+        if i % 2 == 0:
+            qty, stop, tp1, tp2 = TRADE_QTY, price * 0.5, price * 1.5, price * 2.0
+        else:
+            qty, stop, tp1, tp2 = -TRADE_QTY, price * 1.5, price * 0.6, price * 0.4
+        trades.append((symbol, "ENTERED", entry_ts, price, qty, stop, tp1, tp2))
+        positions.append((symbol, qty, price))
+    for symbol in exited_symbols:
+        price = closes[symbol]
+        trades.append(
+            (symbol, "EXITED", entry_ts, price, 0.0, price * 0.98, price * 1.02, price * 1.04)
+        )
+
+    with api.transaction():
+        api.execute_many(
+            """
+            INSERT INTO trade_state (
+                symbol, strategy_id, state, entry_ts, entry_price, qty,
+                stop_price, tp1_price, tp2_price
+            )
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+            """,
+            [(t[0], BENCH_STRATEGY_ID, *t[1:]) for t in trades],
+        )
+        api.execute_many(
+            """
+            INSERT INTO positions (symbol, qty, avg_price, strategy_id)
+            VALUES (%s, %s, %s, %s)
+            """,
+            [(*p, BENCH_STRATEGY_ID) for p in positions],
+        )
+        upsert_exposure([(BENCH_STRATEGY_ID, *p) for p in positions])
+        upsert_symbol_sectors(
+            {s: BENCH_SECTORS[i % len(BENCH_SECTORS)] for i, s in enumerate(symbols)}
+        )
+        api.execute("DELETE FROM cash_balances")
+        api.execute_many(
+            """
+            INSERT INTO cash_balances (ts, currency, balance, available)
+            VALUES (%s, 'USD', %s, %s)
+            """,
+            [
+                (end.to_pydatetime() - timedelta(days=day), EQUITY - day * 100.0, EQUITY)
+                for day in range(10, -1, -1)
+            ],
+        )
+
+    totals.update(
+        trade_state=len(trades),
+        positions=len(positions),
+        cash_balances=11,
+        symbol_sectors=len(symbols),
+    )
+    return totals
@@ -0,0 +1,320 @@
+"""
+Caché local de barras normalizadas en Parquet.
+
+Estructura en disco (particiones hive):
+
+    {root}/symbol=AAPL/timeframe=1m/month=2024-01/part-<key>-<bloque>.parquet
+    {root}/_manifest/<key>.json
+
+Cada descarga de un provider para (provider, symbol, timeframe, rango) tiene
+una clave estable; el manifest registra las claves ya cacheadas. Una ingesta
+repetida con la misma clave se sirve desde Parquet (columnar, con pushdown de
+symbol/ts) en lugar de volver a parsear CSV o a pedir al provider. Varias
+descargas del mismo símbolo (otro provider, otro fichero, otro rango) comparten
+partición; al servir una clave sólo se leen sus ficheros part-<key>*.
+
+Sólo se cachean rangos cerrados (end_ts en el pasado): sin end_ts, o con un
+fin que aún no ha llegado, el provider puede devolver barras nuevas en cada
+llamada. En providers que leen ficheros (csv, tradingview) la clave incluye
+el mtime y el tamaño del origen, y nunca se registran descargas vacías ni
+símbolos con error (last_errors del provider).
+"""
+
+from __future__ import annotations
+
+import glob
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional
+
+import pandas as pd
+
+from .providers.base import Provider
+from .providers.parquet_provider import OHLCV_COLUMNS, PYARROW_AVAILABLE, read_parquet_bars
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_DIR = "_manifest"
+
+
+def cache_key(
+    provider: str,
+    symbol: str,
+    timeframe: str,
+    start_ts: Optional[str],
+    end_ts: Optional[str],
+) -> str:
+    """Clave estable (sha1 corto) de una descarga de un símbolo."""
+    raw = "|".join([provider, symbol.upper(), timeframe, start_ts or "", end_ts or ""])
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def is_closed_range(end_ts: Optional[str], now: Optional[pd.Timestamp] = None) -> bool:
+    """
+    True si el rango ya no puede recibir barras nuevas y se puede cachear.
+
+    Un día de margen: un fin sólo-fecha ("2024-12-31") puede incluir el día completo.
+    """
+    if not end_ts:
+        return False
+    end = pd.Timestamp(end_ts)
+    end = end.tz_localize("UTC") if end.tzinfo is None else end.tz_convert("UTC")
+    now = now if now is not None else pd.Timestamp.now(tz="UTC")
+    return end <= now - pd.Timedelta(days=1)
+
+
+def path_fingerprint(path: str) -> str:
+    """Número de ficheros, mtime máximo y tamaño total de un fichero o carpeta."""
+    if os.path.isdir(path):
+        files = [os.path.join(d, name) for d, _, names in os.walk(path) for name in names]
+    else:
+        files = [path]
+    stats = [os.stat(f) for f in files if os.path.exists(f)]
+    mtime = max((st.st_mtime_ns for st in stats), default=0)
+    size = sum(st.st_size for st in stats)
+    return f"{len(stats)}:{mtime}:{size}"
+
+
+class BarCache:
+    """Caché de barras en Parquet particionado por symbol/timeframe/month."""
+
+    def __init__(self, root: str):
+        if not PYARROW_AVAILABLE:
+            raise ImportError("pyarrow no está instalado. Instala con: pip install pyarrow")
+        self.root = root
+        os.makedirs(os.path.join(root, MANIFEST_DIR), exist_ok=True)
+
+    def _manifest_path(self, key: str) -> str:
+        return os.path.join(self.root, MANIFEST_DIR, f"{key}.json")
+
+    def has(self, key: str) -> bool:
+        return os.path.exists(self._manifest_path(key))
+
+    def part_files(self, key: str, symbol: str, timeframe: str) -> List[str]:
+        """Ficheros Parquet escritos por la descarga key (uno por mes y bloque)."""
+        pattern = os.path.join(
+            glob.escape(self.root),
+            f"symbol={glob.escape(symbol.upper())}",
+            f"timeframe={glob.escape(timeframe)}",
+            "month=*",
+            f"part-{key}*.parquet",
+        )
+        return sorted(glob.glob(pattern))
+
+    def discard(self, key: str, symbol: str, timeframe: str) -> None:
+        """Borra los ficheros de una descarga (restos de una escritura interrumpida)."""
+        for path in self.part_files(key, symbol, timeframe):
+            os.remove(path)
+
+    def write_part(
+        self, key: str, symbol: str, timeframe: str, df: pd.DataFrame, seq: int = 0
+    ) -> int:
+        """Escribe un bloque de barras de la descarga key; devuelve las filas escritas."""
+        if df.empty:
+            return 0
+        bars = df[OHLCV_COLUMNS].drop(columns=["symbol"]).copy()
+        bars["ts"] = pd.to_datetime(bars["ts"], utc=True)
+        months = bars["ts"].dt.strftime("%Y-%m")
+        for month, part in bars.groupby(months, sort=True):
+            part_dir = os.path.join(
+                self.root, f"symbol={symbol.upper()}", f"timeframe={timeframe}", f"month={month}"
+            )
+            os.makedirs(part_dir, exist_ok=True)
+            part.sort_values("ts").to_parquet(
+                os.path.join(part_dir, f"part-{key}-{seq:05d}.parquet"), index=False
+            )
+        return len(bars)
+
+    def register(
+        self,
+        key: str,
+        provider: str,
+        symbol: str,
+        timeframe: str,
+        start_ts: Optional[str],
+        end_ts: Optional[str],
+        rows: int,
+    ) -> None:
+        """Registra en el manifest una descarga ya escrita completa."""
+        manifest = {
+            "provider": provider,
+            "symbol": symbol.upper(),
+            "timeframe": timeframe,
+            "start_ts": start_ts,
+            "end_ts": end_ts,
+            "rows": int(rows),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        }
+        with open(self._manifest_path(key), "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+
+    def write(
+        self,
+        provider: str,
+        symbol: str,
+        timeframe: str,
+        start_ts: Optional[str],
+        end_ts: Optional[str],
+        df: pd.DataFrame,
+    ) -> Optional[str]:
+        """
+        Guarda las barras de un símbolo (una descarga) y registra su clave.
+
+        Una descarga vacía no se registra (devuelve None): puede ser un fallo
+        transitorio del provider y debe volver a pedirse.
+        """
+        if df.empty:
+            return None
+        key = cache_key(provider, symbol, timeframe, start_ts, end_ts)
+        self.discard(key, symbol, timeframe)
+        rows = self.write_part(key, symbol, timeframe, df)
+        self.register(key, provider, symbol, timeframe, start_ts, end_ts, rows)
+        return key
+
+    def read(
+        self,
+        symbols: List[str],
+        timeframe: str,
+        start_ts: Optional[str],
+        end_ts: Optional[str],
+        keys: Optional[List[str]] = None,
+    ) -> pd.DataFrame:
+        """
+        Lee barras de la caché con poda de particiones y filtro de ts.
+
+        Con keys (una por símbolo, en el mismo orden) sólo se leen los ficheros
+        de esas descargas; sin keys, todas las descargas de los símbolos (si se
+        solapan, gana la última leída).
+        """
+        if not any(name.startswith("symbol=") for name in os.listdir(self.root)):
+            return pd.DataFrame(columns=OHLCV_COLUMNS)
+        files = None
+        if keys is not None:
+            files = [
+                path
+                for symbol, key in zip(symbols, keys)
+                for path in self.part_files(key, symbol, timeframe)
+            ]
+        return read_parquet_bars(self.root, symbols, timeframe, start_ts, end_ts, files=files)
+
+
+class CachedProvider(Provider):
+    """
+    Envuelve un provider y cachea sus resultados en un BarCache.
+
+    Por cada símbolo se mira la clave (provider, symbol, timeframe, rango): los
+    cacheados se leen de Parquet y el resto se piden al provider en una sola
+    llamada y se guardan. Con source_path (providers que leen ficheros) la
+    clave incluye path_fingerprint(source_path). Los rangos abiertos pasan
+    directamente al provider.
+    """
+
+    def __init__(
+        self,
+        provider: Provider,
+        cache: BarCache,
+        name: str,
+        source_path: Optional[str] = None,
+    ):
+        self.provider = provider
+        self.cache = cache
+        self.name = name
+        self.source_path = source_path
+
+    def __enter__(self):
+        if hasattr(self.provider, "__enter__"):
+            self.provider.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if hasattr(self.provider, "__exit__"):
+            self.provider.__exit__(exc_type, exc_val, exc_tb)
+
+    @property
+    def last_errors(self) -> Dict[str, str]:
+        """Errores por símbolo de la última descarga del provider envuelto."""
+        return getattr(self.provider, "last_errors", {})
+
+    def _key_name(self) -> str:
+        if self.source_path is None:
+            return self.name
+        return f"{self.name}@{path_fingerprint(self.source_path)}"
+
+    def iter_ohlcv(
+        self,
+        symbols: list[str],
+        timeframe: str,
+        start_ts: Optional[str],
+        end_ts: Optional[str],
+        asset: str,
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Bloques de barras: primero los símbolos cacheados y después los bloques
+        del provider según llegan (iter_ohlcv), escritos en la caché a la vez.
+
+        Las claves de los símbolos descargados se registran al agotar el
+        provider, así una lectura interrumpida no deja descargas a medias.
+        """
+        if not is_closed_range(end_ts):
+            logger.info("Caché %s: rango abierto (end=%s), sin caché", self.name, end_ts)
+            yield from self.provider.iter_ohlcv(symbols, timeframe, start_ts, end_ts, asset)
+            return
+
+        name = self._key_name()
+        keys = {s.upper(): cache_key(name, s, timeframe, start_ts, end_ts) for s in symbols}
+        cached = [s for s in symbols if self.cache.has(keys[s.upper()])]
+        missing = [s for s in symbols if not self.cache.has(keys[s.upper()])]
+
+        if cached:
+            logger.info("Caché %s: %d símbolos desde Parquet", self.name, len(cached))
+            df = self.cache.read(
+                cached, timeframe, start_ts, end_ts, keys=[keys[s.upper()] for s in cached]
+            )
+            if not df.empty:
+                yield df
+        if not missing:
+            return
+
+        rows: Dict[str, int] = {}
+        chunks = self.provider.iter_ohlcv(missing, timeframe, start_ts, end_ts, asset)
+        for seq, chunk in enumerate(chunks):
+            if not chunk.empty:
+                chunk_symbols = chunk["symbol"].astype(str).str.upper()
+                for symbol, part in chunk.groupby(chunk_symbols, sort=False):
+                    key = keys.get(symbol)
+                    if key is None:
+                        continue
+                    if symbol not in rows:
+                        self.cache.discard(key, symbol, timeframe)
+                        rows[symbol] = 0
+                    rows[symbol] += self.cache.write_part(key, symbol, timeframe, part, seq)
+            yield chunk
+
+        failed = {s.upper() for s in self.last_errors}
+        for symbol, count in rows.items():
+            if count and symbol not in failed:
+                self.cache.register(
+                    keys[symbol], name, symbol, timeframe, start_ts, end_ts, count
+                )
+
+    def fetch_ohlcv(
+        self,
+        symbols: list[str],
+        timeframe: str,
+        start_ts: Optional[str],
+        end_ts: Optional[str],
+        asset: str,
+    ) -> pd.DataFrame:
+        frames = [
+            f
+            for f in self.iter_ohlcv(symbols, timeframe, start_ts, end_ts, asset)
+            if not f.empty
+        ]
+        if not frames:
+            return pd.DataFrame(columns=OHLCV_COLUMNS)
+        df = pd.concat(frames, ignore_index=True)
+        df["ts"] = pd.to_datetime(df["ts"], utc=True)
+        return df.sort_values(["symbol", "ts"]).reset_index(drop=True)
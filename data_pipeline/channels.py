@@ -0,0 +1,9 @@
+"""
+Canales NOTIFY de Postgres del pipeline de datos.
+
+Módulo sin dependencias para que los procesos que sólo escuchan (scheduler)
+no importen pandas ni el resto de data_pipeline.streaming.
+"""
+
+# Canal NOTIFY con cada lote de barras nuevas en ohlcv (lo escucha el scheduler)
+OHLCV_CHANNEL = "ohlcv_bars"
@@ -5,6 +5,9 @@ Ejemplos de uso:
     # Desde CSV
     python -m data_pipeline.cli.ingest_ohlcv --provider csv --path data.csv --timeframe 1d --asset USA_STOCK
 
+    # Desde un CSV de varios GB, leyendo y cargando por bloques de 500k filas
+    python -m data_pipeline.cli.ingest_ohlcv --provider csv --path dump.csv --timeframe 1m --asset USA_STOCK --symbols AAPL --chunksize 500000
+
     # Desde QuantConnect (Lean local)
     python -m data_pipeline.cli.ingest_ohlcv --provider quantconnect --timeframe 1d --asset USA_STOCK --symbols AAPL,TSLA
 
@@ -13,6 +16,18 @@ Ejemplos de uso:
 
     # Desde TradingView (CSV export)
     python -m data_pipeline.cli.ingest_ohlcv --provider tradingview --timeframe 1d --asset USA_STOCK --symbols AAPL
+
+    # Desde Parquet (archivo o dataset particionado)
+    python -m data_pipeline.cli.ingest_ohlcv --provider parquet --path bars/ --timeframe 1m --asset USA_STOCK --symbols AAPL
+
+    # Con caché local Parquet: la segunda ingesta del mismo rango cerrado no re-parsea los CSV
+    python -m data_pipeline.cli.ingest_ohlcv --provider tradingview --timeframe 1d --asset USA_STOCK --symbols AAPL --start 2024-01-01 --end 2024-12-31 --cache-dir .bar_cache
+
+    # Refresco incremental: sólo barras posteriores al último ts cargado por símbolo
+    python -m data_pipeline.cli.ingest_ohlcv --provider ibkr --timeframe 1h --asset FOREX --symbols EURUSD --incremental
+
+    # Cargar también las barras inválidas (quedan registradas en ohlcv_rejects)
+    python -m data_pipeline.cli.ingest_ohlcv --provider csv --path data.csv --timeframe 1d --asset USA_STOCK --symbols AAPL --validate flag
 """
 
 from __future__ import annotations
@@ -25,17 +40,36 @@ from dotenv import load_dotenv
 # Añadir raíz del proyecto al path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
-from data_pipeline.providers import (
-    CsvProvider,
-    QuantConnectProvider,
-    IBKRProvider,
-    TradingViewProvider,
+# Sólo el registro: cada provider (ib_insync, requests, pyarrow) se importa al elegirlo
+from data_pipeline.providers import PROVIDER_REGISTRY, get_provider_class
+from data_pipeline.loader import (
+    DEFAULT_OVERLAP_BARS,
+    LoadResult,
+    fetch_watermarks,
+    load_frames,
+    plan_incremental,
 )
-from desk_grade import api
 
 load_dotenv()
 
 
+def _load(provider, plan, args, source, validator=None) -> LoadResult:
+    """Pide cada grupo del plan al provider y carga los bloques según llegan."""
+    result = LoadResult()
+    for start_ts, group in plan.items():
+        frames = provider.iter_ohlcv(
+            symbols=group,
+            timeframe=args.timeframe,
+            start_ts=start_ts,
+            end_ts=args.end,
+            asset=args.asset,
+        )
+        load_frames(frames, args.timeframe, source, result, validator=validator)
+        if result.rows:
+            print(f"  Cargados {result.rows} registros...")
+    return result
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Ingiere datos OHLCV desde diferentes providers"
@@ -43,12 +77,12 @@ def main():
     parser.add_argument(
         "--provider",
         required=True,
-        choices=["csv", "quantconnect", "ibkr", "tradingview"],
+        choices=list(PROVIDER_REGISTRY),
         help="Provider de datos",
     )
     parser.add_argument(
         "--path",
-        help="Ruta al archivo/carpeta (requerido para csv/tradingview)",
+        help="Ruta al archivo/carpeta (requerido para csv/tradingview/parquet)",
     )
     parser.add_argument(
         "--symbols",
@@ -78,22 +112,52 @@ def main():
         "--end",
         help="Fecha de fin (ISO format, ej: 2024-12-31)",
     )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Pedir sólo barras posteriores al MAX(ts) ya cargado por símbolo",
+    )
+    parser.add_argument(
+        "--overlap-bars",
+        type=int,
+        default=DEFAULT_OVERLAP_BARS,
+        help=f"Barras de solape antes del watermark en modo incremental (default: {DEFAULT_OVERLAP_BARS})",
+    )
+    parser.add_argument(
+        "--chunksize",
+        type=int,
+        default=None,
+        help="Filas por bloque al leer CSV en streaming (provider csv)",
+    )
+    parser.add_argument(
+        "--validate",
+        choices=["quarantine", "flag", "off"],
+        default=os.getenv("OHLCV_VALIDATION", "quarantine"),
+        help="Validación de barras: quarantine (no cargar las inválidas), flag (cargarlas) u off "
+        "(default: OHLCV_VALIDATION o quarantine). Las inválidas se guardan en ohlcv_rejects",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=os.getenv("BAR_CACHE_DIR"),
+        help="Caché local Parquet de barras (default: BAR_CACHE_DIR; vacío = sin caché)",
+    )
 
     args = parser.parse_args()
 
     # Parsear símbolos
     symbols = [s.strip().upper() for s in args.symbols.split(",") if s.strip()]
 
-    # Crear provider
+    # Crear provider (importa sólo el módulo del provider elegido)
+    provider_class = get_provider_class(args.provider)
     if args.provider == "csv":
         if not args.path:
             print("ERROR: --path es requerido para provider csv")
             sys.exit(1)
-        provider = CsvProvider(args.path)
+        provider = provider_class(args.path, chunksize=args.chunksize)
     elif args.provider == "quantconnect":
-        provider = QuantConnectProvider()
+        provider = provider_class()
     elif args.provider == "ibkr":
-        provider = IBKRProvider(
+        provider = provider_class(
             host=os.getenv("IBKR_HOST", "127.0.0.1"),
             port=int(os.getenv("IBKR_PORT", "7497")),
             client_id=int(os.getenv("IBKR_CLIENT_ID", "1")),
@@ -104,11 +168,27 @@ def main():
         if not args.path:
             print("ERROR: --path o TRADINGVIEW_EXPORT_PATH es requerido")
             sys.exit(1)
-        provider = TradingViewProvider(export_path=args.path)
+        provider = provider_class(export_path=args.path)
+    elif args.provider == "parquet":
+        if not args.path:
+            print("ERROR: --path es requerido para provider parquet")
+            sys.exit(1)
+        provider = provider_class(args.path)
     else:
         print(f"ERROR: Provider desconocido: {args.provider}")
         sys.exit(1)
 
+    # Caché Parquet (no tiene sentido sobre un provider que ya lee Parquet)
+    if args.cache_dir and args.provider != "parquet":
+        from data_pipeline.cache import BarCache, CachedProvider
+
+        # Con --path la clave incluye mtime/tamaño del origen (re-exportar invalida)
+        name = f"{args.provider}:{args.path}" if args.path else args.provider
+        provider = CachedProvider(
+            provider, BarCache(args.cache_dir), name=name, source_path=args.path
+        )
+        print(f"  Caché: {args.cache_dir}" + ("" if args.end else " (sin --end: no se usa)"))
+
     # Obtener datos
     print(f"[INGEST] Obteniendo datos desde {args.provider}...")
     print(f"  Símbolos: {', '.join(symbols)}")
@@ -116,65 +196,53 @@ def main():
     print(f"  Asset: {args.asset}")
 
     try:
+        # Rangos a pedir: uno común, o uno por grupo de símbolos según su watermark
+        if args.incremental:
+            watermarks = fetch_watermarks(symbols, args.timeframe)
+            plan = plan_incremental(
+                symbols,
+                args.timeframe,
+                watermarks,
+                default_start=args.start,
+                overlap_bars=args.overlap_bars,
+            )
+            for start_ts, group in plan.items():
+                print(f"  Incremental desde {start_ts or 'inicio'}: {', '.join(group)}")
+        else:
+            plan = {args.start: symbols}
+
+        source = args.source or args.provider
+        print(f"[INGEST] Insertando en base de datos (source={source})...")
+
+        validator = None
+        if args.validate != "off":
+            from data_pipeline.validation import OhlcvValidator
+
+            validator = OhlcvValidator(args.timeframe, mode=args.validate)
+
         # IBKR requiere contexto de conexión
         if args.provider == "ibkr":
             with provider:
-                df = provider.fetch_ohlcv(
-                    symbols=symbols,
-                    timeframe=args.timeframe,
-                    start_ts=args.start,
-                    end_ts=args.end,
-                    asset=args.asset,
-                )
+                result = _load(provider, plan, args, source, validator)
         else:
-            df = provider.fetch_ohlcv(
-                symbols=symbols,
-                timeframe=args.timeframe,
-                start_ts=args.start,
-                end_ts=args.end,
-                asset=args.asset,
+            result = _load(provider, plan, args, source, validator)
+
+        if validator is not None:
+            print(
+                f"[INGEST] Validación ({args.validate}): {validator.rows_rejected} de "
+                f"{validator.rows_seen} filas rechazadas → ohlcv_rejects"
             )
+            report = validator.gap_report()
+            if not report.empty:
+                print("[INGEST] Huecos por símbolo:")
+                print(report.to_string(index=False))
 
-        if df.empty:
+        if not result.rows:
             print("[INGEST] No se obtuvieron datos")
-            sys.exit(1)
-
-        print(f"[INGEST] Obtenidos {len(df)} registros")
-
-        # Insertar en base de datos
-        source = args.source or args.provider
-        print(f"[INGEST] Insertando en base de datos (source={source})...")
-
-        count = 0
-        for _, row in df.iterrows():
-            api.execute(
-                """
-                INSERT INTO ohlcv (symbol, ts, open, high, low, close, volume, timeframe)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                ON CONFLICT (symbol, ts, timeframe) DO UPDATE SET
-                    open = EXCLUDED.open,
-                    high = EXCLUDED.high,
-                    low = EXCLUDED.low,
-                    close = EXCLUDED.close,
-                    volume = EXCLUDED.volume
-                """,
-                (
-                    row["symbol"],
-                    row["ts"].to_pydatetime(),
-                    float(row["open"]),
-                    float(row["high"]),
-                    float(row["low"]),
-                    float(row["close"]),
-                    float(row["volume"]),
-                    args.timeframe,
-                ),
-            )
-            count += 1
-            if count % 1000 == 0:
-                print(f"  Insertados {count}/{len(df)} registros...")
+            sys.exit(0 if args.incremental else 1)
 
-        print(f"[INGEST] Completado: {count} registros insertados")
-        print(f"[INGEST] Rango: {df['ts'].min()} a {df['ts'].max()}")
+        print(f"[INGEST] Completado: {result.rows} registros insertados")
+        print(f"[INGEST] Rango: {result.first_ts} a {result.last_ts}")
 
     except Exception as e:
         print(f"[INGEST] ERROR: {e}")
@@ -0,0 +1,78 @@
+"""
+Script CLI para derivar timeframes superiores desde las barras de ohlcv.
+
+Sólo se recalculan los intervalos cuyas barras origen se escribieron desde la
+ejecución anterior (watermark en resample_state).
+
+Ejemplos de uso:
+    # 5m, 15m, 1h y 1d desde 1m (incremental)
+    python -m data_pipeline.cli.resample_ohlcv --timeframes 5m,15m,1h,1d
+
+    # Reconstruir 1h completo de unos símbolos
+    python -m data_pipeline.cli.resample_ohlcv --timeframes 1h --symbols AAPL,MSFT --full
+"""
+
+from __future__ import annotations
+import argparse
+import os
+import sys
+from dotenv import load_dotenv
+
+# Añadir raíz del proyecto al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from data_pipeline.resample import resample_timeframe
+
+load_dotenv()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Deriva barras de timeframes superiores desde ohlcv"
+    )
+    parser.add_argument(
+        "--timeframes",
+        default=os.getenv("RESAMPLE_TIMEFRAMES", "5m,15m,1h,1d"),
+        help="Timeframes destino separados por comas (default: RESAMPLE_TIMEFRAMES o 5m,15m,1h,1d)",
+    )
+    parser.add_argument(
+        "--source-timeframe",
+        default="1m",
+        help="Timeframe origen (default: 1m)",
+    )
+    parser.add_argument(
+        "--symbols",
+        help="Limitar a estos símbolos (separados por comas); no avanza el watermark",
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Ignorar el watermark y recalcular todo el histórico",
+    )
+    args = parser.parse_args()
+
+    timeframes = [t.strip() for t in args.timeframes.split(",") if t.strip()]
+    symbols = (
+        [s.strip().upper() for s in args.symbols.split(",") if s.strip()]
+        if args.symbols
+        else None
+    )
+
+    try:
+        for timeframe in timeframes:
+            rows = resample_timeframe(
+                timeframe,
+                source_timeframe=args.source_timeframe,
+                symbols=symbols,
+                full=args.full,
+            )
+            print(f"[RESAMPLE] {args.source_timeframe} → {timeframe}: {rows} barras escritas")
+    except Exception as e:
+        print(f"[RESAMPLE] ERROR: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
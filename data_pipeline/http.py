@@ -0,0 +1,43 @@
+"""
+Sesión HTTP compartida para providers con API REST.
+
+Una sola requests.Session con keep-alive y pool de conexiones, y reintentos
+con backoff exponencial en 429/5xx que respetan la cabecera Retry-After.
+"""
+
+from __future__ import annotations
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+def build_session(
+    retries: int = 5,
+    backoff_factor: float = 0.5,
+    pool_size: int = 10,
+) -> requests.Session:
+    """
+    Crea una Session con reintentos para GET.
+
+    Args:
+        retries: Reintentos máximos por petición (conexión, lectura y estado)
+        backoff_factor: Espera base entre reintentos (0.5s, 1s, 2s, ...)
+        pool_size: Conexiones keep-alive por host (>= hilos que comparten la sesión)
+    """
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=frozenset({"GET"}),
+        respect_retry_after_header=True,
+        # Tras agotar reintentos se devuelve la última respuesta (raise_for_status decide)
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(max_retries=retry, pool_connections=pool_size, pool_maxsize=pool_size)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
@@ -0,0 +1,154 @@
+"""
+Carga de OHLCV normalizado en la tabla ohlcv.
+
+- fetch_watermarks: último ts cargado por símbolo para un timeframe (una consulta)
+- plan_incremental: desde dónde pedir cada símbolo al provider (watermark - solape)
+- upsert_ohlcv: inserta/actualiza un DataFrame normalizado en lote (cuenta las filas
+  en desk_grade_ingest_rows_total)
+- load_frames: consume un generador de DataFrames (Provider.iter_ohlcv) bloque a bloque,
+  opcionalmente validando cada bloque (data_pipeline.validation)
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from desk_grade import api, metrics
+
+from .timeframes import timeframe_to_timedelta
+
+if TYPE_CHECKING:
+    from .validation import OhlcvValidator
+
+# Barras que se vuelven a pedir antes del watermark para recoger correcciones tardías
+DEFAULT_OVERLAP_BARS = 3
+
+UPSERT_OHLCV_SQL = """
+    INSERT INTO ohlcv (symbol, ts, open, high, low, close, volume, timeframe, source)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+    ON CONFLICT (symbol, ts, timeframe) DO UPDATE SET
+        open = EXCLUDED.open,
+        high = EXCLUDED.high,
+        low = EXCLUDED.low,
+        close = EXCLUDED.close,
+        volume = EXCLUDED.volume,
+        source = EXCLUDED.source,
+        ingested_at = now()
+"""
+
+
+def fetch_watermarks(symbols: List[str], timeframe: str) -> Dict[str, pd.Timestamp]:
+    """Devuelve {symbol: MAX(ts)} de ohlcv; los símbolos sin datos no aparecen."""
+    rows = api.fetch_all(
+        """
+        SELECT symbol, MAX(ts) AS max_ts
+        FROM ohlcv
+        WHERE timeframe = %s
+          AND symbol = ANY(%s)
+        GROUP BY symbol
+        """,
+        (timeframe, list(symbols)),
+    )
+    return {r["symbol"]: pd.Timestamp(r["max_ts"]) for r in rows if r["max_ts"] is not None}
+
+
+def plan_incremental(
+    symbols: List[str],
+    timeframe: str,
+    watermarks: Dict[str, pd.Timestamp],
+    default_start: Optional[str] = None,
+    overlap_bars: int = DEFAULT_OVERLAP_BARS,
+) -> Dict[Optional[str], List[str]]:
+    """
+    Agrupa los símbolos por el start_ts con el que hay que pedirlos.
+
+    Con watermark: watermark - overlap_bars barras (nunca antes de default_start).
+    Sin watermark: default_start (None = lo que decida el provider).
+    Devuelve {start_ts ISO o None: [symbols]} para pedir cada grupo de una vez.
+    """
+    overlap = timeframe_to_timedelta(timeframe) * overlap_bars
+    floor = pd.to_datetime(default_start, utc=True) if default_start else None
+
+    groups: Dict[Optional[str], List[str]] = {}
+    for symbol in symbols:
+        watermark = watermarks.get(symbol)
+        if watermark is None:
+            start = default_start
+        else:
+            start_ts = watermark.tz_convert("UTC") - overlap
+            if floor is not None:
+                start_ts = max(start_ts, floor)
+            start = start_ts.isoformat()
+        groups.setdefault(start, []).append(symbol)
+    return groups
+
+
+def upsert_ohlcv(df: pd.DataFrame, timeframe: str, source: str) -> int:
+    """Inserta/actualiza las filas normalizadas de df en ohlcv. Devuelve el nº de filas."""
+    if df.empty:
+        return 0
+    ts = pd.to_datetime(df["ts"], utc=True)
+    rows = list(
+        zip(
+            df["symbol"].astype(str),
+            [t.to_pydatetime() for t in ts],
+            df["open"].astype(float),
+            df["high"].astype(float),
+            df["low"].astype(float),
+            df["close"].astype(float),
+            df["volume"].astype(float),
+            [timeframe] * len(df),
+            [source] * len(df),
+        )
+    )
+    api.execute_many(UPSERT_OHLCV_SQL, rows)
+    metrics.INGEST_ROWS.labels(source, timeframe).inc(len(rows))
+    return len(rows)
+
+
+@dataclass
+class LoadResult:
+    """Resumen de una carga: filas escritas, rechazadas y rango de ts visto."""
+
+    rows: int = 0
+    rejected: int = 0
+    first_ts: Optional[pd.Timestamp] = None
+    last_ts: Optional[pd.Timestamp] = None
+
+    def add(self, df: pd.DataFrame, rows: int) -> None:
+        self.rows += rows
+        lo, hi = df["ts"].min(), df["ts"].max()
+        self.first_ts = lo if self.first_ts is None else min(self.first_ts, lo)
+        self.last_ts = hi if self.last_ts is None else max(self.last_ts, hi)
+
+
+def load_frames(
+    frames: Iterable[pd.DataFrame],
+    timeframe: str,
+    source: str,
+    result: Optional[LoadResult] = None,
+    validator: Optional["OhlcvValidator"] = None,
+) -> LoadResult:
+    """
+    Carga cada DataFrame del iterable según llega, sin acumularlos en memoria.
+
+    Acepta un LoadResult previo para acumular varias llamadas (p. ej. grupos
+    de símbolos en modo incremental). Con validator, cada bloque se valida
+    antes de cargarse y las filas rechazadas se guardan en ohlcv_rejects.
+    """
+    result = result or LoadResult()
+    for df in frames:
+        if df.empty:
+            continue
+        if validator is not None:
+            from .validation import insert_rejects
+
+            df, rejects = validator.validate(df)
+            result.rejected += insert_rejects(rejects, timeframe, source)
+            if df.empty:
+                continue
+        result.add(df, upsert_ohlcv(df, timeframe, source))
+    return result
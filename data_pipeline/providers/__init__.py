@@ -1,10 +1,56 @@
-"""Providers de datos de mercado."""
+"""
+Providers de datos de mercado.
+
+Los providers se importan bajo demanda: importar este paquete no carga
+ib_insync, requests ni pyarrow. get_provider_class("ibkr") (o acceder a
+data_pipeline.providers.IBKRProvider) importa sólo el módulo de ese provider.
+"""
+
+from __future__ import annotations
+
+from importlib import import_module
+from typing import TYPE_CHECKING, Dict, Tuple, Type
 
 from .base import Provider
-from .csv_provider import CsvProvider
-from .quantconnect_provider import QuantConnectProvider
-from .ibkr_provider import IBKRProvider
-from .tradingview_provider import TradingViewProvider
+
+if TYPE_CHECKING:
+    from .csv_provider import CsvProvider
+    from .ibkr_provider import IBKRProvider
+    from .parquet_provider import ParquetProvider
+    from .quantconnect_provider import QuantConnectProvider
+    from .tradingview_provider import TradingViewProvider
+
+# nombre en CLI → (módulo, clase)
+PROVIDER_REGISTRY: Dict[str, Tuple[str, str]] = {
+    "csv": (".csv_provider", "CsvProvider"),
+    "quantconnect": (".quantconnect_provider", "QuantConnectProvider"),
+    "ibkr": (".ibkr_provider", "IBKRProvider"),
+    "tradingview": (".tradingview_provider", "TradingViewProvider"),
+    "parquet": (".parquet_provider", "ParquetProvider"),
+}
+
+_CLASS_MODULES = {cls: module for module, cls in PROVIDER_REGISTRY.values()}
+
+
+def get_provider_class(name: str) -> Type[Provider]:
+    """Importa y devuelve la clase del provider registrado con ese nombre."""
+    try:
+        module, cls = PROVIDER_REGISTRY[name]
+    except KeyError:
+        raise ValueError(
+            f"Provider desconocido: {name} (válidos: {', '.join(PROVIDER_REGISTRY)})"
+        ) from None
+    return getattr(import_module(module, __name__), cls)
+
+
+def __getattr__(attr: str):
+    module = _CLASS_MODULES.get(attr)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {attr!r}")
+    value = getattr(import_module(module, __name__), attr)
+    globals()[attr] = value
+    return value
+
 
 __all__ = [
     "Provider",
@@ -12,4 +58,7 @@ __all__ = [
     "QuantConnectProvider",
     "IBKRProvider",
     "TradingViewProvider",
+    "ParquetProvider",
+    "PROVIDER_REGISTRY",
+    "get_provider_class",
 ]
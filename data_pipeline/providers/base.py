@@ -4,7 +4,7 @@ Interfaz base para providers de datos OHLCV.
 
 from __future__ import annotations
 from abc import ABC, abstractmethod
-from typing import Optional
+from typing import Iterator, Optional
 import pandas as pd
 
 
@@ -34,3 +34,22 @@ class Provider(ABC):
             DataFrame con columnas normalizadas: ts, symbol, open, high, low, close, volume
         """
         raise NotImplementedError
+
+    def iter_ohlcv(
+        self,
+        symbols: list[str],
+        timeframe: str,
+        start_ts: Optional[str],
+        end_ts: Optional[str],
+        asset: str,
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Igual que fetch_ohlcv pero como generador de DataFrames normalizados.
+
+        Por defecto produce un único DataFrame; los providers que pueden leer
+        por bloques (p. ej. CsvProvider con chunksize) lo sobrescriben para
+        mantener acotada la memoria.
+        """
+        df = self.fetch_ohlcv(symbols, timeframe, start_ts, end_ts, asset)
+        if not df.empty:
+            yield df
@@ -4,9 +4,21 @@ Provider para leer datos OHLCV desde archivos CSV.
 
 from __future__ import annotations
 import pandas as pd
-from typing import Optional
+from typing import Iterator, Optional
 from .base import Provider
 
+OHLCV_COLUMNS = ["ts", "symbol", "open", "high", "low", "close", "volume"]
+
+# Tipos explícitos para no dejar que pandas infiera (y duplique memoria) por bloque
+CSV_DTYPES = {
+    "symbol": "category",
+    "open": "float64",
+    "high": "float64",
+    "low": "float64",
+    "close": "float64",
+    "volume": "float64",
+}
+
 
 class CsvProvider(Provider):
     """
@@ -17,14 +29,72 @@ class CsvProvider(Provider):
     - symbol
     - open, high, low, close
     - volume (opcional)
+
+    Con chunksize, iter_ohlcv lee el archivo por bloques de chunksize filas y
+    aplica los filtros de símbolo/fecha en cada bloque, de modo que la memoria
+    máxima depende del tamaño del bloque y no del archivo.
     """
 
-    def __init__(self, path: str):
+    def __init__(self, path: str, chunksize: Optional[int] = None):
         """
         Args:
             path: Ruta al archivo CSV
+            chunksize: Filas por bloque en lectura streaming (None = todo de una vez)
         """
         self.path = path
+        self.chunksize = chunksize
+
+    def _columns(self) -> list[str]:
+        header = pd.read_csv(self.path, nrows=0).columns
+        if "ts" not in header:
+            raise ValueError("CSV debe incluir columna 'ts'")
+        for c in ["open", "high", "low", "close"]:
+            if c not in header:
+                raise ValueError(f"CSV falta columna requerida: {c}")
+        return [c for c in OHLCV_COLUMNS if c in header]
+
+    @staticmethod
+    def _normalize(
+        df: pd.DataFrame,
+        symbols: list[str],
+        start: Optional[pd.Timestamp],
+        end: Optional[pd.Timestamp],
+    ) -> pd.DataFrame:
+        if symbols:
+            df = df[df["symbol"].isin(symbols)]
+        df = df.assign(ts=pd.to_datetime(df["ts"], utc=True))
+        if start is not None:
+            df = df[df["ts"] >= start]
+        if end is not None:
+            df = df[df["ts"] <= end]
+        if "volume" not in df.columns:
+            df = df.assign(volume=0.0)
+        # Normalizar orden y tipos
+        return df[OHLCV_COLUMNS]
+
+    def iter_ohlcv(
+        self,
+        symbols: list[str],
+        timeframe: str,
+        start_ts: Optional[str],
+        end_ts: Optional[str],
+        asset: str,
+    ) -> Iterator[pd.DataFrame]:
+        columns = self._columns()
+        start = pd.to_datetime(start_ts, utc=True) if start_ts else None
+        end = pd.to_datetime(end_ts, utc=True) if end_ts else None
+
+        reader = pd.read_csv(
+            self.path,
+            usecols=columns,
+            dtype={c: t for c, t in CSV_DTYPES.items() if c in columns},
+            chunksize=self.chunksize,
+        )
+        chunks = reader if self.chunksize else [reader]
+        for chunk in chunks:
+            df = self._normalize(chunk, symbols, start, end)
+            if not df.empty:
+                yield df
 
     def fetch_ohlcv(
         self,
@@ -34,21 +104,9 @@ class CsvProvider(Provider):
         end_ts: Optional[str],
         asset: str,
     ) -> pd.DataFrame:
-        df = pd.read_csv(self.path)
-        if "ts" not in df.columns:
-            raise ValueError("CSV debe incluir columna 'ts'")
-        df["ts"] = pd.to_datetime(df["ts"], utc=True)
-        if symbols:
-            df = df[df["symbol"].isin(symbols)]
-        if start_ts:
-            df = df[df["ts"] >= pd.to_datetime(start_ts, utc=True)]
-        if end_ts:
-            df = df[df["ts"] <= pd.to_datetime(end_ts, utc=True)]
-        for c in ["open", "high", "low", "close"]:
-            if c not in df.columns:
-                raise ValueError(f"CSV falta columna requerida: {c}")
-        if "volume" not in df.columns:
-            df["volume"] = 0
-        # Normalizar orden y tipos
-        df = df[["ts", "symbol", "open", "high", "low", "close", "volume"]].copy()
+        frames = list(self.iter_ohlcv(symbols, timeframe, start_ts, end_ts, asset))
+        if not frames:
+            return pd.DataFrame(columns=OHLCV_COLUMNS)
+        df = pd.concat(frames, ignore_index=True)
+        df["symbol"] = df["symbol"].astype(str)
         return df
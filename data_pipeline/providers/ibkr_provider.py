@@ -1,21 +1,149 @@
 """
 Provider para obtener datos OHLCV desde Interactive Brokers (IBKR).
 
-Usa ib_insync para conectarse a TWS/IB Gateway.
+Usa ib_insync para conectarse a TWS/IB Gateway. Los rangos largos se parten en
+trozos dentro de los límites de IB por petición y se descargan de forma
+concurrente (API async de ib_insync) respetando las reglas de pacing.
 """
 
 from __future__ import annotations
+import asyncio
+import logging
+import math
+import os
+import time
+from collections import defaultdict, deque
 import pandas as pd
-from typing import Optional
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
 from datetime import datetime, timedelta, timezone
 from .base import Provider
 
 try:
-    from ib_insync import IB, Stock, Forex, Future, Crypto, util
+    from ib_insync import IB, Stock, Forex, Future, Crypto
     IB_AVAILABLE = True
 except ImportError:
     IB_AVAILABLE = False
 
+logger = logging.getLogger(__name__)
+
+OHLCV_COLUMNS = ["ts", "symbol", "open", "high", "low", "close", "volume"]
+
+# Timeframe → barSizeSetting de IBKR
+BAR_SIZE_MAP = {
+    "1m": "1 min",
+    "5m": "5 mins",
+    "15m": "15 mins",
+    "30m": "30 mins",
+    "1h": "1 hour",
+    "1d": "1 day",
+}
+
+# Duración máxima por petición para cada barSize (tabla de combinaciones
+# válidas duración/barSize de IB: 1 D para 1 min, 1 W hasta 3 mins+, 1 M hasta
+# 30 mins+, 1 Y para barras diarias). 1 M se toma como 28 días para no pasarse.
+MAX_CHUNK_DURATION = {
+    "1 min": timedelta(days=1),
+    "5 mins": timedelta(days=7),
+    "15 mins": timedelta(days=7),
+    "30 mins": timedelta(days=28),
+    "1 hour": timedelta(days=28),
+    "1 day": timedelta(days=365),
+}
+
+# Límites por defecto de concurrencia y pacing de datos históricos de IB:
+# como mucho 60 peticiones cada 10 minutos y menos de 6 peticiones del mismo
+# contrato en 2 segundos. Configurables con IBKR_MAX_IN_FLIGHT,
+# IBKR_PACING_MAX_REQUESTS e IBKR_PACING_WINDOW_S.
+DEFAULT_MAX_IN_FLIGHT = 8
+DEFAULT_PACING_MAX_REQUESTS = 60
+DEFAULT_PACING_WINDOW_S = 600.0
+DEFAULT_CONTRACT_BURST = 5
+DEFAULT_CONTRACT_BURST_WINDOW_S = 2.0
+
+
+def split_range(
+    start_dt: datetime,
+    end_dt: datetime,
+    max_chunk: timedelta,
+) -> List[Tuple[datetime, datetime]]:
+    """
+    Parte [start_dt, end_dt] en trozos de como mucho max_chunk, del más
+    reciente al más antiguo (IB pide por endDateTime + duración hacia atrás).
+    """
+    chunks: List[Tuple[datetime, datetime]] = []
+    chunk_end = end_dt
+    while chunk_end > start_dt:
+        chunk_start = max(start_dt, chunk_end - max_chunk)
+        chunks.append((chunk_start, chunk_end))
+        chunk_end = chunk_start
+    return chunks
+
+
+def duration_str(span: timedelta) -> str:
+    """durationStr de IB que cubre span (segundos si es < 1 día, si no días)."""
+    seconds = max(1, math.ceil(span.total_seconds()))
+    if seconds < 86400:
+        return f"{seconds} S"
+    return f"{math.ceil(seconds / 86400)} D"
+
+
+class HistoricalPacer:
+    """
+    Limitador de peticiones históricas para asyncio.
+
+    Aplica una ventana deslizante global (max_requests cada window_s) y un
+    límite de ráfaga por contrato (burst peticiones cada burst_window_s).
+    acquire() espera lo necesario antes de dejar pasar la petición.
+    """
+
+    def __init__(
+        self,
+        max_requests: int = DEFAULT_PACING_MAX_REQUESTS,
+        window_s: float = DEFAULT_PACING_WINDOW_S,
+        burst: int = DEFAULT_CONTRACT_BURST,
+        burst_window_s: float = DEFAULT_CONTRACT_BURST_WINDOW_S,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_requests = max_requests
+        self.window_s = window_s
+        self.burst = burst
+        self.burst_window_s = burst_window_s
+        self._clock = clock
+        self._sent: Deque[float] = deque()
+        self._sent_by_key: Dict[str, Deque[float]] = defaultdict(deque)
+
+    def _wait_time(self, key: str, now: float) -> float:
+        while self._sent and now - self._sent[0] >= self.window_s:
+            self._sent.popleft()
+        per_key = self._sent_by_key[key]
+        while per_key and now - per_key[0] >= self.burst_window_s:
+            per_key.popleft()
+
+        wait = 0.0
+        if len(self._sent) >= self.max_requests:
+            wait = self._sent[0] + self.window_s - now
+        if len(per_key) >= self.burst:
+            wait = max(wait, per_key[0] + self.burst_window_s - now)
+        return wait
+
+    async def acquire(self, key: str) -> None:
+        while True:
+            now = self._clock()
+            wait = self._wait_time(key, now)
+            if wait <= 0:
+                # Sin await entre la comprobación y el registro: atómico en el loop
+                self._sent.append(now)
+                self._sent_by_key[key].append(now)
+                return
+            await asyncio.sleep(wait)
+
+    @classmethod
+    def from_env(cls) -> "HistoricalPacer":
+        return cls(
+            max_requests=int(os.getenv("IBKR_PACING_MAX_REQUESTS", DEFAULT_PACING_MAX_REQUESTS)),
+            window_s=float(os.getenv("IBKR_PACING_WINDOW_S", DEFAULT_PACING_WINDOW_S)),
+        )
+
 
 class IBKRProvider(Provider):
     """
@@ -32,14 +160,21 @@ class IBKRProvider(Provider):
         host: str = "127.0.0.1",
         port: int = 7497,
         client_id: int = 1,
+        max_in_flight: Optional[int] = None,
+        pacer: Optional[HistoricalPacer] = None,
+        ib: Optional[Any] = None,
     ):
         """
         Args:
             host: Host de TWS/IB Gateway (default: 127.0.0.1)
             port: Puerto (7497 para paper, 4001 para live)
             client_id: ID de cliente único
+            max_in_flight: Máximo de peticiones históricas simultáneas
+                (default: IBKR_MAX_IN_FLIGHT o 8)
+            pacer: Limitador de pacing (default: HistoricalPacer.from_env())
+            ib: Cliente IB ya construido (tests); por defecto ib_insync.IB()
         """
-        if not IB_AVAILABLE:
+        if ib is None and not IB_AVAILABLE:
             raise ImportError(
                 "ib_insync no está instalado. Instala con: pip install ib_insync"
             )
@@ -47,8 +182,14 @@ class IBKRProvider(Provider):
         self.host = host
         self.port = port
         self.client_id = client_id
-        self.ib = IB()
+        if max_in_flight is None:
+            max_in_flight = int(os.getenv("IBKR_MAX_IN_FLIGHT", DEFAULT_MAX_IN_FLIGHT))
+        self.max_in_flight = max(1, max_in_flight)
+        self.pacer = pacer or HistoricalPacer.from_env()
+        self.ib = ib if ib is not None else IB()
         self._connected = False
+        # Errores de la última descarga por símbolo (el símbolo se omite entero)
+        self.last_errors: Dict[str, str] = {}
 
     def connect(self) -> None:
         """Conecta a TWS/IB Gateway."""
@@ -69,6 +210,87 @@ class IBKRProvider(Provider):
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.disconnect()
 
+    @staticmethod
+    def _build_contract(symbol: str, asset: str):
+        """Crea el contrato IBKR para el símbolo; None si el símbolo no es válido."""
+        if asset == "FOREX":
+            # FOREX: formato "EURUSD" -> "EUR", "USD"
+            if len(symbol) != 6:
+                return None
+            return Forex(symbol[:3], symbol[3:])
+        if asset == "FUTURES":
+            # Para futuros, el símbolo debe incluir mes/año
+            # Ejemplo: "ES", "NQ", etc. (requiere lógica adicional)
+            return Future(symbol, "CME")
+        if asset == "CRYPTO":
+            # IBKR crypto: formato "BTCUSD"
+            return Crypto(symbol, "PAXOS", "USD")
+        return Stock(symbol, "SMART", "USD")
+
+    async def _fetch_chunk(
+        self,
+        semaphore: asyncio.Semaphore,
+        symbol: str,
+        contract,
+        chunk: Tuple[datetime, datetime],
+        bar_size: str,
+    ) -> List:
+        chunk_start, chunk_end = chunk
+        async with semaphore:
+            await self.pacer.acquire(symbol)
+            return await self.ib.reqHistoricalDataAsync(
+                contract,
+                endDateTime=chunk_end,
+                durationStr=duration_str(chunk_end - chunk_start),
+                barSizeSetting=bar_size,
+                whatToShow="TRADES",
+                useRTH=True,
+                formatDate=2,  # timestamps en UTC
+            )
+
+    async def _fetch_symbol(
+        self,
+        semaphore: asyncio.Semaphore,
+        symbol: str,
+        contract,
+        chunks: List[Tuple[datetime, datetime]],
+        bar_size: str,
+    ) -> Optional[pd.DataFrame]:
+        try:
+            results = await asyncio.gather(
+                *[self._fetch_chunk(semaphore, symbol, contract, c, bar_size) for c in chunks]
+            )
+        except Exception as e:
+            # Un trozo fallido dejaría un hueco: se descarta el símbolo completo
+            logger.error("Error obteniendo datos de IBKR para %s: %s", symbol, e)
+            self.last_errors[symbol] = str(e)
+            return None
+
+        rows = [
+            (bar.date, bar.open, bar.high, bar.low, bar.close, bar.volume)
+            for bars in results
+            for bar in (bars or [])
+        ]
+        if not rows:
+            return None
+        df_symbol = pd.DataFrame(rows, columns=["date", "open", "high", "low", "close", "volume"])
+        df_symbol["symbol"] = symbol.upper()
+        df_symbol["ts"] = pd.to_datetime(df_symbol["date"], utc=True)
+        return df_symbol[OHLCV_COLUMNS]
+
+    async def _fetch_all(
+        self,
+        requests: List[Tuple[str, Any, List[Tuple[datetime, datetime]]]],
+        bar_size: str,
+    ) -> List[Optional[pd.DataFrame]]:
+        semaphore = asyncio.Semaphore(self.max_in_flight)
+        return await asyncio.gather(
+            *[
+                self._fetch_symbol(semaphore, symbol, contract, chunks, bar_size)
+                for symbol, contract, chunks in requests
+            ]
+        )
+
     def fetch_ohlcv(
         self,
         symbols: list[str],
@@ -79,6 +301,11 @@ class IBKRProvider(Provider):
     ) -> pd.DataFrame:
         """
         Obtiene datos OHLCV desde IBKR.
+
+        Cada símbolo se parte en trozos de la duración máxima permitida para el
+        barSize y todos los trozos se piden en paralelo (hasta max_in_flight en
+        vuelo, sujetos al pacer). Los resultados se unen y se deduplican por
+        (symbol, ts). Los símbolos con error quedan en self.last_errors.
         
         Args:
             symbols: Lista de símbolos
@@ -89,94 +316,43 @@ class IBKRProvider(Provider):
         """
         if not self._connected:
             self.connect()
-        
-        # Mapear timeframe a barSize de IBKR
-        bar_size_map = {
-            "1m": "1 min",
-            "5m": "5 mins",
-            "15m": "15 mins",
-            "30m": "30 mins",
-            "1h": "1 hour",
-            "1d": "1 day",
-        }
-        bar_size = bar_size_map.get(timeframe, "1 day")
-        
-        # Mapear asset a tipo de contrato IBKR
-        asset_type_map = {
-            "USA_STOCK": Stock,
-            "FOREX": Forex,
-            "FUTURES": Future,
-            "CRYPTO": Crypto,
-        }
-        contract_class = asset_type_map.get(asset, Stock)
-        
-        all_data = []
-        
+
+        self.last_errors = {}
+        bar_size = BAR_SIZE_MAP.get(timeframe, "1 day")
+
+        if end_ts:
+            end_dt = pd.to_datetime(end_ts, utc=True).to_pydatetime()
+        else:
+            end_dt = datetime.now(timezone.utc)
+        if start_ts:
+            start_dt = pd.to_datetime(start_ts, utc=True).to_pydatetime()
+        else:
+            start_dt = end_dt - timedelta(days=30)
+        chunks = split_range(start_dt, end_dt, MAX_CHUNK_DURATION[bar_size])
+
+        requests = []
         for symbol in symbols:
-            try:
-                # Crear contrato IBKR
-                if asset == "FOREX":
-                    # FOREX: formato "EURUSD" -> "EUR", "USD"
-                    if len(symbol) == 6:
-                        base = symbol[:3]
-                        quote = symbol[3:]
-                        contract = Forex(base, quote)
-                    else:
-                        print(f"Símbolo FOREX inválido: {symbol}")
-                        continue
-                elif asset == "USA_STOCK":
-                    contract = Stock(symbol, "SMART", "USD")
-                elif asset == "FUTURES":
-                    # Para futuros, el símbolo debe incluir mes/año
-                    # Ejemplo: "ES", "NQ", etc. (requiere lógica adicional)
-                    contract = Future(symbol, "CME")
-                elif asset == "CRYPTO":
-                    # IBKR crypto: formato "BTCUSD"
-                    contract = Crypto(symbol, "PAXOS", "USD")
-                else:
-                    contract = Stock(symbol, "SMART", "USD")
-                
-                # Convertir timestamps
-                if start_ts:
-                    start_dt = pd.to_datetime(start_ts, utc=True).replace(tzinfo=None)
-                else:
-                    start_dt = datetime.now() - timedelta(days=30)
-                
-                if end_ts:
-                    end_dt = pd.to_datetime(end_ts, utc=True).replace(tzinfo=None)
-                else:
-                    end_dt = datetime.now()
-                
-                # Solicitar datos históricos
-                bars = self.ib.reqHistoricalData(
-                    contract,
-                    endDateTime=end_dt,
-                    durationStr=f"{(end_dt - start_dt).days} D",
-                    barSizeSetting=bar_size,
-                    whatToShow="TRADES",
-                    useRTH=True,
-                )
-                
-                if bars:
-                    # Convertir a DataFrame
-                    df_symbol = util.df(bars)
-                    df_symbol["symbol"] = symbol.upper()
-                    df_symbol["ts"] = pd.to_datetime(df_symbol["date"], utc=True)
-                    df_symbol = df_symbol.rename(columns={
-                        "open": "open",
-                        "high": "high",
-                        "low": "low",
-                        "close": "close",
-                        "volume": "volume",
-                    })
-                    all_data.append(df_symbol[["ts", "symbol", "open", "high", "low", "close", "volume"]])
-            except Exception as e:
-                print(f"Error obteniendo datos de IBKR para {symbol}: {e}")
+            contract = self._build_contract(symbol, asset)
+            if contract is None:
+                logger.warning("Símbolo %s inválido: %s", asset, symbol)
+                self.last_errors[symbol] = "símbolo inválido"
                 continue
-        
+            requests.append((symbol, contract, chunks))
+
+        logger.info(
+            "IBKR: %d símbolos x %d trozos (%s, max_in_flight=%d)",
+            len(requests),
+            len(chunks),
+            bar_size,
+            self.max_in_flight,
+        )
+        all_data = [df for df in self.ib.run(self._fetch_all(requests, bar_size)) if df is not None]
+
         if not all_data:
-            return pd.DataFrame(columns=["ts", "symbol", "open", "high", "low", "close", "volume"])
+            return pd.DataFrame(columns=OHLCV_COLUMNS)
         
         df = pd.concat(all_data, ignore_index=True)
-        df = df.sort_values(["symbol", "ts"])
+        # Los trozos contiguos pueden solaparse en la barra frontera
+        df = df.drop_duplicates(subset=["symbol", "ts"], keep="last")
+        df = df.sort_values(["symbol", "ts"]).reset_index(drop=True)
         return df
@@ -0,0 +1,240 @@
+"""
+Lectura en paralelo de la Lean Data Library local.
+
+Soporta dos estructuras:
+
+1. Nativa de Lean (zip):
+   - minuto: {data_path}/{asset}/minute/{symbol}/YYYYMMDD_trade.zip (o _quote.zip)
+     filas: ms desde medianoche, open, high, low, close, volume
+   - hora/día: {data_path}/{asset}/{hour|daily}/{symbol}.zip
+     filas: "YYYYMMDD HH:MM", open, high, low, close, volume
+   Los precios de equity vienen multiplicados por 10000 (deci-céntimos).
+   Los ficheros de quote (forex) se convierten al precio medio bid/ask.
+
+2. CSV exportado: {data_path}/{asset}/{symbol}/{timeframe}/YYYYMMDD.csv con
+   cabecera time,open,high,low,close,volume.
+
+Los ficheros diarios se podan por la fecha YYYYMMDD del nombre antes de
+abrirlos y los supervivientes se leen con un pool de procesos. Un fichero
+corrupto o ilegible no aborta la lectura: se devuelve vacío con su error.
+"""
+
+from __future__ import annotations
+
+import glob
+import logging
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from typing import List, NamedTuple, Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+OHLCV_COLUMNS = ["ts", "symbol", "open", "high", "low", "close", "volume"]
+
+# Carpeta de la estructura CSV exportada (sin mercado)
+ASSET_DIRS = {
+    "USA_STOCK": "equity/usa",
+    "FOREX": "forex",
+    "FUTURES": "future",
+    "CRYPTO": "crypto",
+}
+
+# Carpeta de la estructura nativa de Lean (incluye mercado por defecto)
+NATIVE_ASSET_DIRS = {
+    "USA_STOCK": "equity/usa",
+    "FOREX": "forex/oanda",
+    "FUTURES": "future/cme",
+    "CRYPTO": "crypto/coinbase",
+}
+
+# Zona horaria de los datos de Lean por clase de activo
+DATA_TIMEZONES = {
+    "USA_STOCK": "America/New_York",
+}
+
+# Factor de escala de precios en los zip nativos
+PRICE_SCALES = {
+    "USA_STOCK": 10000.0,
+}
+
+NATIVE_RESOLUTIONS = {
+    "1m": "minute",
+    "1h": "hour",
+    "1d": "daily",
+}
+
+# Por debajo de este número de ficheros no compensa arrancar procesos
+MIN_FILES_FOR_POOL = 8
+
+_DATE_PREFIX = re.compile(r"^(\d{8})")
+
+
+class LeanFile(NamedTuple):
+    """Un fichero a leer y cómo interpretarlo (picklable para el pool)."""
+
+    path: str
+    symbol: str
+    layout: str  # "minute_zip", "bars_zip" o "csv"
+    day: Optional[str]  # YYYYMMDD del nombre (minute_zip / csv)
+    scale: float
+    tz: str
+
+
+class LeanRead(NamedTuple):
+    """Resultado de leer un fichero: barras (vacías si falla) y error, o None."""
+
+    task: LeanFile
+    frame: pd.DataFrame
+    error: Optional[str]
+
+
+def file_day(path: str) -> Optional[date]:
+    """Fecha YYYYMMDD al principio del nombre del fichero, o None."""
+    match = _DATE_PREFIX.match(os.path.basename(path))
+    if not match:
+        return None
+    try:
+        return pd.to_datetime(match.group(1), format="%Y%m%d").date()
+    except ValueError:
+        return None
+
+
+def prune_by_day(
+    paths: List[str],
+    start: Optional[pd.Timestamp],
+    end: Optional[pd.Timestamp],
+) -> List[str]:
+    """
+    Descarta, sin abrirlos, los ficheros cuyo día queda fuera de [start, end].
+
+    Se compara por día completo (la zona horaria del fichero puede desplazar
+    algunas horas respecto a UTC, el filtro exacto se hace tras leer).
+    Los ficheros sin fecha en el nombre se conservan.
+    """
+    lo = (start - pd.Timedelta(days=1)).date() if start is not None else None
+    hi = (end + pd.Timedelta(days=1)).date() if end is not None else None
+    kept = []
+    for path in paths:
+        day = file_day(path)
+        if day is not None and ((lo and day < lo) or (hi and day > hi)):
+            continue
+        kept.append(path)
+    return kept
+
+
+def _scale_prices(df: pd.DataFrame, scale: float) -> pd.DataFrame:
+    if scale != 1.0:
+        for c in ["open", "high", "low", "close"]:
+            df[c] = df[c] / scale
+    return df
+
+
+def _native_bars(raw: pd.DataFrame) -> pd.DataFrame:
+    """Columnas OHLCV de un zip nativo: trade (6 columnas) o quote (11, mid bid/ask)."""
+    if raw.shape[1] >= 11:
+        bars = pd.DataFrame({"time": raw[0]})
+        for i, c in enumerate(["open", "high", "low", "close"]):
+            bars[c] = (raw[1 + i] + raw[6 + i]) / 2.0
+        bars["volume"] = 0.0
+        return bars
+    bars = raw.iloc[:, :6].copy()
+    bars.columns = ["time", "open", "high", "low", "close", "volume"]
+    return bars
+
+
+def read_lean_file(task: LeanFile) -> pd.DataFrame:
+    """Lee un fichero Lean y devuelve barras normalizadas (ts en UTC)."""
+    if task.layout == "csv":
+        df = pd.read_csv(task.path)
+        time_col = "time" if "time" in df.columns else "Time" if "Time" in df.columns else None
+        if time_col is None:
+            return pd.DataFrame(columns=OHLCV_COLUMNS)
+        df["ts"] = pd.to_datetime(df[time_col], utc=True)
+    else:
+        df = _native_bars(pd.read_csv(task.path, header=None, compression="zip"))
+        if task.layout == "minute_zip":
+            midnight = pd.Timestamp(pd.to_datetime(task.day, format="%Y%m%d"))
+            local = midnight + pd.to_timedelta(df["time"], unit="ms")
+        else:
+            local = pd.to_datetime(df["time"].astype(str), format="%Y%m%d %H:%M")
+        df["ts"] = local.dt.tz_localize(task.tz).dt.tz_convert("UTC")
+        df = _scale_prices(df, task.scale)
+
+    df["symbol"] = task.symbol.upper()
+    if "volume" not in df.columns:
+        df["volume"] = 0.0
+    return df[OHLCV_COLUMNS]
+
+
+def try_read_lean_file(task: LeanFile) -> LeanRead:
+    """read_lean_file sin lanzar: un fichero ilegible devuelve barras vacías y su error."""
+    try:
+        return LeanRead(task, read_lean_file(task), None)
+    except Exception as e:
+        return LeanRead(task, pd.DataFrame(columns=OHLCV_COLUMNS), f"{type(e).__name__}: {e}")
+
+
+def read_lean_files(tasks: List[LeanFile], max_workers: Optional[int] = None) -> List[LeanRead]:
+    """
+    Lee los ficheros en un pool de procesos (en serie si son pocos o max_workers=1).
+
+    Los errores se capturan por fichero dentro de cada worker y se registran
+    aquí, en el proceso principal, con un warning.
+    """
+    if len(tasks) < MIN_FILES_FOR_POOL or max_workers == 1:
+        results = [try_read_lean_file(t) for t in tasks]
+    else:
+        workers = max_workers or os.cpu_count() or 1
+        chunksize = max(1, len(tasks) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(try_read_lean_file, tasks, chunksize=chunksize))
+    for result in results:
+        if result.error is not None:
+            logger.warning("Error leyendo %s: %s", result.task.path, result.error)
+    return results
+
+
+def discover_files(
+    data_path: str,
+    symbol: str,
+    timeframe: str,
+    asset: str,
+    start: Optional[pd.Timestamp],
+    end: Optional[pd.Timestamp],
+) -> List[LeanFile]:
+    """
+    Localiza los ficheros de un símbolo (nativos o CSV exportado), ya podados por día.
+    """
+    tz = DATA_TIMEZONES.get(asset, "UTC")
+    scale = PRICE_SCALES.get(asset, 1.0)
+    resolution = NATIVE_RESOLUTIONS.get(timeframe)
+    native_dir = os.path.join(data_path, NATIVE_ASSET_DIRS.get(asset, asset.lower()))
+
+    if resolution == "minute":
+        symbol_dir = os.path.join(native_dir, "minute", symbol.lower())
+        paths = sorted(glob.glob(os.path.join(symbol_dir, "*_trade.zip")))
+        if not paths:
+            paths = sorted(glob.glob(os.path.join(symbol_dir, "*_quote.zip")))
+        if paths:
+            return [
+                LeanFile(p, symbol, "minute_zip", os.path.basename(p)[:8], scale, tz)
+                for p in prune_by_day(paths, start, end)
+            ]
+    elif resolution in ("hour", "daily"):
+        path = os.path.join(native_dir, resolution, f"{symbol.lower()}.zip")
+        if os.path.exists(path):
+            return [LeanFile(path, symbol, "bars_zip", None, scale, tz)]
+
+    pattern = os.path.join(
+        data_path,
+        ASSET_DIRS.get(asset, asset.lower()),
+        symbol.lower(),
+        timeframe.lower(),
+        "*.csv",
+    )
+    paths = prune_by_day(sorted(glob.glob(pattern)), start, end)
+    return [LeanFile(p, symbol, "csv", os.path.basename(p)[:8], 1.0, "UTC") for p in paths]
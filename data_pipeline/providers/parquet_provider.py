@@ -0,0 +1,112 @@
+"""
+Provider para leer datos OHLCV desde archivos Parquet (Arrow).
+
+Lee un archivo o un directorio (dataset) con las columnas normalizadas. Los
+filtros de símbolo, timeframe y rango de ts se empujan al lector de Arrow:
+se descartan particiones (symbol=/timeframe=/month=) y row groups completos
+sin llegar a leerlos.
+"""
+
+from __future__ import annotations
+import pandas as pd
+from typing import Optional
+from .base import Provider
+
+try:
+    import pyarrow.dataset as ds
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+OHLCV_COLUMNS = ["ts", "symbol", "open", "high", "low", "close", "volume"]
+
+
+def read_parquet_bars(
+    path: str,
+    symbols: list[str],
+    timeframe: Optional[str],
+    start_ts: Optional[str],
+    end_ts: Optional[str],
+    files: Optional[list[str]] = None,
+) -> pd.DataFrame:
+    """
+    Lee barras normalizadas de un archivo/directorio Parquet con predicate pushdown.
+
+    Si el dataset tiene particiones hive (symbol=/timeframe=/month=) se usan
+    para podar directorios; el filtro de ts usa las estadísticas de row group.
+    Con files sólo se leen esos ficheros (rutas bajo path, que sigue siendo la
+    base de las particiones).
+    """
+    if files is None:
+        dataset = ds.dataset(path, format="parquet", partitioning="hive")
+    elif files:
+        dataset = ds.dataset(
+            files, format="parquet", partitioning="hive", partition_base_dir=path
+        )
+    else:
+        return pd.DataFrame(columns=OHLCV_COLUMNS)
+    names = set(dataset.schema.names)
+
+    start = pd.to_datetime(start_ts, utc=True) if start_ts else None
+    end = pd.to_datetime(end_ts, utc=True) if end_ts else None
+
+    conditions = []
+    if symbols:
+        conditions.append(ds.field("symbol").isin([s.upper() for s in symbols]))
+    if timeframe and "timeframe" in names:
+        conditions.append(ds.field("timeframe") == timeframe)
+    if "month" in names:
+        # Poda de particiones mensuales (YYYY-MM compara bien como texto)
+        if start is not None:
+            conditions.append(ds.field("month") >= start.strftime("%Y-%m"))
+        if end is not None:
+            conditions.append(ds.field("month") <= end.strftime("%Y-%m"))
+    if start is not None:
+        conditions.append(ds.field("ts") >= start.to_pydatetime())
+    if end is not None:
+        conditions.append(ds.field("ts") <= end.to_pydatetime())
+
+    predicate = None
+    for condition in conditions:
+        predicate = condition if predicate is None else predicate & condition
+
+    columns = [c for c in OHLCV_COLUMNS if c in names]
+    df = dataset.to_table(columns=columns, filter=predicate).to_pandas()
+
+    if df.empty:
+        return pd.DataFrame(columns=OHLCV_COLUMNS)
+    df["ts"] = pd.to_datetime(df["ts"], utc=True)
+    df["symbol"] = df["symbol"].astype(str)
+    if "volume" not in df.columns:
+        df["volume"] = 0.0
+    df = df[OHLCV_COLUMNS].drop_duplicates(subset=["symbol", "ts"], keep="last")
+    return df.sort_values(["symbol", "ts"]).reset_index(drop=True)
+
+
+class ParquetProvider(Provider):
+    """
+    Lee OHLCV desde Parquet.
+
+    Acepta un archivo suelto con columnas ts, symbol, open, high, low, close,
+    volume, o un directorio con particiones hive como el que genera BarCache
+    (data_pipeline.cache). Requiere pyarrow: pip install pyarrow
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Archivo .parquet o directorio de un dataset Parquet
+        """
+        if not PYARROW_AVAILABLE:
+            raise ImportError("pyarrow no está instalado. Instala con: pip install pyarrow")
+        self.path = path
+
+    def fetch_ohlcv(
+        self,
+        symbols: list[str],
+        timeframe: str,
+        start_ts: Optional[str],
+        end_ts: Optional[str],
+        asset: str,
+    ) -> pd.DataFrame:
+        return read_parquet_bars(self.path, symbols, timeframe, start_ts, end_ts)
@@ -8,12 +8,21 @@ Soporta:
 """
 
 from __future__ import annotations
+import logging
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import pandas as pd
-from typing import Optional
+from typing import Dict, Optional
 import requests
 from datetime import datetime, timezone
+from ..http import build_session
 from .base import Provider
+from .lean_reader import discover_files, read_lean_files
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_API_URL = "https://www.quantconnect.com/api/v2"
+DEFAULT_API_WORKERS = 4
 
 
 class QuantConnectProvider(Provider):
@@ -31,16 +40,34 @@ class QuantConnectProvider(Provider):
         user_id: Optional[str] = None,
         api_key: Optional[str] = None,
         data_path: Optional[str] = None,
+        lean_workers: Optional[int] = None,
+        api_url: Optional[str] = None,
+        api_workers: Optional[int] = None,
+        session: Optional[requests.Session] = None,
     ):
         """
         Args:
             user_id: QuantConnect User ID (para API)
             api_key: QuantConnect API Key (para API)
             data_path: Ruta a carpeta de datos Lean (alternativa a API)
+            lean_workers: Procesos para leer ficheros Lean (default: QC_LEAN_WORKERS o nº de CPUs)
+            api_url: URL base de la API (default: QC_API_URL o la API v2 pública)
+            api_workers: Hilos para pedir símbolos a la API (default: QC_API_WORKERS o 4)
+            session: Sesión HTTP a reutilizar (default: build_session con reintentos)
         """
         self.user_id = user_id or os.getenv("QC_USER_ID")
         self.api_key = api_key or os.getenv("QC_API_KEY")
         self.data_path = data_path or os.getenv("QC_DATA_PATH")
+        if lean_workers is None and os.getenv("QC_LEAN_WORKERS"):
+            lean_workers = int(os.getenv("QC_LEAN_WORKERS"))
+        self.lean_workers = lean_workers
+        self.api_url = (api_url or os.getenv("QC_API_URL") or DEFAULT_API_URL).rstrip("/")
+        if api_workers is None:
+            api_workers = int(os.getenv("QC_API_WORKERS", DEFAULT_API_WORKERS))
+        self.api_workers = max(1, api_workers)
+        self._session = session
+        # Errores de la última descarga por símbolo
+        self.last_errors: Dict[str, str] = {}
         
         if not self.user_id and not self.data_path:
             raise ValueError(
@@ -62,6 +89,7 @@ class QuantConnectProvider(Provider):
         Nota: La API de QuantConnect tiene limitaciones. Para producción,
         considera exportar datos desde QC Cloud o usar Lean Data Library local.
         """
+        self.last_errors = {}
         if self.data_path:
             return self._fetch_from_lean(symbols, timeframe, start_ts, end_ts, asset)
         else:
@@ -78,69 +106,116 @@ class QuantConnectProvider(Provider):
         """
         Lee datos desde Lean Data Library local.
         
-        Estructura esperada:
-        {data_path}/{asset}/{symbol}/{timeframe}/YYYYMMDD.csv
+        Estructuras soportadas (ver data_pipeline.providers.lean_reader):
+        - nativa de Lean: {data_path}/{asset}/minute/{symbol}/YYYYMMDD_trade.zip
+          y {data_path}/{asset}/{hour|daily}/{symbol}.zip
+        - CSV exportado: {data_path}/{asset}/{symbol}/{timeframe}/YYYYMMDD.csv
+
+        Los ficheros diarios fuera del rango se descartan por nombre antes de
+        abrirlos; el resto se lee en un pool de procesos (lean_workers). Los
+        ficheros ilegibles se omiten y quedan en self.last_errors por símbolo.
         """
-        import glob
-        
-        all_data = []
-        
+        start = pd.to_datetime(start_ts, utc=True) if start_ts else None
+        end = pd.to_datetime(end_ts, utc=True) if end_ts else None
+
+        tasks = []
         for symbol in symbols:
-            # Mapear asset a estructura de carpetas Lean
-            asset_map = {
-                "USA_STOCK": "equity/usa",
-                "FOREX": "forex",
-                "FUTURES": "future",
-                "CRYPTO": "crypto",
-            }
-            lean_asset = asset_map.get(asset, asset.lower())
-            
-            # Construir patrón de búsqueda
-            pattern = os.path.join(
-                self.data_path,
-                lean_asset,
-                symbol.lower(),
-                timeframe.lower(),
-                "*.csv",
-            )
-            
-            files = glob.glob(pattern)
-            if not files:
-                continue
-            
-            for file_path in sorted(files):
-                try:
-                    df_file = pd.read_csv(file_path)
-                    # Lean usa formato: time,open,high,low,close,volume
-                    if "time" in df_file.columns:
-                        df_file["ts"] = pd.to_datetime(df_file["time"], utc=True)
-                    elif "Time" in df_file.columns:
-                        df_file["ts"] = pd.to_datetime(df_file["Time"], utc=True)
-                    else:
-                        continue
-                    
-                    df_file["symbol"] = symbol.upper()
-                    all_data.append(df_file)
-                except Exception as e:
-                    print(f"Error leyendo {file_path}: {e}")
-                    continue
-        
+            tasks.extend(discover_files(self.data_path, symbol, timeframe, asset, start, end))
+        if not tasks:
+            return pd.DataFrame(columns=["ts", "symbol", "open", "high", "low", "close", "volume"])
+
+        all_data = []
+        for result in read_lean_files(tasks, self.lean_workers):
+            if result.error is not None:
+                symbol = result.task.symbol
+                message = f"{os.path.basename(result.task.path)}: {result.error}"
+                previous = self.last_errors.get(symbol)
+                self.last_errors[symbol] = f"{previous}; {message}" if previous else message
+            elif not result.frame.empty:
+                all_data.append(result.frame)
         if not all_data:
             return pd.DataFrame(columns=["ts", "symbol", "open", "high", "low", "close", "volume"])
         
         df = pd.concat(all_data, ignore_index=True)
         
         # Filtrar por fechas
-        if start_ts:
-            df = df[df["ts"] >= pd.to_datetime(start_ts, utc=True)]
-        if end_ts:
-            df = df[df["ts"] <= pd.to_datetime(end_ts, utc=True)]
+        if start is not None:
+            df = df[df["ts"] >= start]
+        if end is not None:
+            df = df[df["ts"] <= end]
         
         # Normalizar columnas
         df = df[["ts", "symbol", "open", "high", "low", "close", "volume"]].copy()
         df = df.sort_values(["symbol", "ts"])
         return df
 
+    def _get_session(self) -> requests.Session:
+        if self._session is None:
+            self._session = build_session(pool_size=self.api_workers)
+        return self._session
+
+    def _fetch_symbol_from_api(
+        self,
+        symbol: str,
+        timeframe: str,
+        start_ts: Optional[str],
+        end_ts: Optional[str],
+        asset: str,
+    ) -> pd.DataFrame:
+        """Pide un símbolo a la API; lanza excepción si la respuesta final no es 2xx."""
+        # Mapear timeframe a resolución de QC
+        resolution_map = {
+            "1m": "Minute",
+            "5m": "Minute",
+            "15m": "Minute",
+            "1h": "Hour",
+            "1d": "Daily",
+        }
+        resolution = resolution_map.get(timeframe, "Daily")
+        
+        # Mapear asset a tipo de QC
+        asset_type_map = {
+            "USA_STOCK": "Equity",
+            "FOREX": "Forex",
+            "FUTURES": "Future",
+            "CRYPTO": "Crypto",
+        }
+        qc_asset_type = asset_type_map.get(asset, "Equity")
+        
+        # Construir request
+        # Nota: Esto es un ejemplo. La API real de QC puede requerir autenticación diferente
+        # y endpoints específicos. Consulta la documentación oficial.
+        params = {
+            "symbol": symbol,
+            "resolution": resolution,
+            "type": qc_asset_type,
+        }
+        
+        if start_ts:
+            params["start"] = start_ts
+        if end_ts:
+            params["end"] = end_ts
+        
+        # Ejemplo de llamada (ajustar según documentación real de QC API)
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+        }
+        response = self._get_session().get(
+            f"{self.api_url}/data/read",
+            params=params,
+            headers=headers,
+            timeout=30,
+        )
+        response.raise_for_status()
+
+        data = response.json()
+        # Procesar respuesta según formato de QC API
+        # (ajustar según documentación real)
+        df_symbol = pd.DataFrame(data.get("bars", []))
+        if not df_symbol.empty:
+            df_symbol["symbol"] = symbol.upper()
+        return df_symbol
+
     def _fetch_from_api(
         self,
         symbols: list[str],
@@ -151,72 +226,33 @@ class QuantConnectProvider(Provider):
     ) -> pd.DataFrame:
         """
         Obtiene datos desde QuantConnect Cloud API.
+
+        Los símbolos se piden en paralelo (api_workers hilos) sobre una sesión
+        compartida con keep-alive y reintentos en 429/5xx (respetando
+        Retry-After). Los símbolos que fallan se registran en self.last_errors.
         
         Nota: La API pública de QC es limitada. Para datos históricos completos,
         usa exportaciones CSV o Lean Data Library.
         """
-        # QuantConnect API v2 endpoints
-        base_url = "https://www.quantconnect.com/api/v2"
-        
         all_data = []
-        
-        for symbol in symbols:
-            # Mapear timeframe a resolución de QC
-            resolution_map = {
-                "1m": "Minute",
-                "5m": "Minute",
-                "15m": "Minute",
-                "1h": "Hour",
-                "1d": "Daily",
-            }
-            resolution = resolution_map.get(timeframe, "Daily")
-            
-            # Mapear asset a tipo de QC
-            asset_type_map = {
-                "USA_STOCK": "Equity",
-                "FOREX": "Forex",
-                "FUTURES": "Future",
-                "CRYPTO": "Crypto",
-            }
-            qc_asset_type = asset_type_map.get(asset, "Equity")
-            
-            # Construir request
-            # Nota: Esto es un ejemplo. La API real de QC puede requerir autenticación diferente
-            # y endpoints específicos. Consulta la documentación oficial.
-            params = {
-                "symbol": symbol,
-                "resolution": resolution,
-                "type": qc_asset_type,
+
+        with ThreadPoolExecutor(max_workers=self.api_workers) as pool:
+            futures = {
+                pool.submit(
+                    self._fetch_symbol_from_api, symbol, timeframe, start_ts, end_ts, asset
+                ): symbol
+                for symbol in symbols
             }
-            
-            if start_ts:
-                params["start"] = start_ts
-            if end_ts:
-                params["end"] = end_ts
-            
-            try:
-                # Ejemplo de llamada (ajustar según documentación real de QC API)
-                headers = {
-                    "Authorization": f"Bearer {self.api_key}",
-                }
-                response = requests.get(
-                    f"{base_url}/data/read",
-                    params=params,
-                    headers=headers,
-                    timeout=30,
-                )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    # Procesar respuesta según formato de QC API
-                    # (ajustar según documentación real)
-                    df_symbol = pd.DataFrame(data.get("bars", []))
-                    if not df_symbol.empty:
-                        df_symbol["symbol"] = symbol.upper()
-                        all_data.append(df_symbol)
-            except Exception as e:
-                print(f"Error obteniendo datos de QC API para {symbol}: {e}")
-                continue
+            for future in as_completed(futures):
+                symbol = futures[future]
+                try:
+                    df_symbol = future.result()
+                except Exception as e:
+                    logger.error("Error obteniendo datos de QC API para %s: %s", symbol, e)
+                    self.last_errors[symbol] = str(e)
+                    continue
+                if not df_symbol.empty:
+                    all_data.append(df_symbol)
         
         if not all_data:
             return pd.DataFrame(columns=["ts", "symbol", "open", "high", "low", "close", "volume"])
@@ -0,0 +1,215 @@
+"""
+Resample incremental de barras OHLCV a timeframes superiores (1m → 5m/15m/1h/1d).
+
+Cada barra de ohlcv guarda en ingested_at el momento de su última escritura.
+resample_state recuerda, por (timeframe origen, timeframe destino), el
+ingested_at más reciente ya procesado. En cada ejecución:
+
+1. Se buscan (una consulta) las barras origen escritas desde el watermark y el
+   rango de ts tocado por símbolo.
+2. Se leen (una consulta por lote de símbolos) las barras origen de los
+   intervalos destino completos que cubren ese rango.
+3. Se agregan de forma vectorizada (first/max/min/last/sum por symbol y bucket)
+   y se escriben con upsert en ohlcv con el timeframe destino.
+
+Sólo se recalculan los intervalos tocados; el intervalo en curso se escribe
+parcial y se completa en la siguiente ejecución. Los buckets se alinean a la
+época Unix en UTC (1d = día UTC).
+"""
+
+from __future__ import annotations
+
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from desk_grade import api
+
+from .loader import upsert_ohlcv
+from .timeframes import timeframe_to_timedelta
+
+logger = logging.getLogger(__name__)
+
+OHLCV_COLUMNS = ["ts", "symbol", "open", "high", "low", "close", "volume"]
+
+# Margen hacia atrás sobre el watermark: una transacción que empezó antes de la
+# ejecución anterior (ingested_at = now() de su inicio) pudo confirmar después.
+DEFAULT_LOOKBACK = timedelta(minutes=5)
+
+# Símbolos por consulta de barras origen (acota la memoria en la primera pasada)
+DEFAULT_SYMBOLS_PER_BATCH = 50
+
+
+def resample_bars(df: pd.DataFrame, timeframe: str) -> pd.DataFrame:
+    """Agrega barras normalizadas al timeframe (ts = inicio del intervalo, UTC)."""
+    if df.empty:
+        return pd.DataFrame(columns=OHLCV_COLUMNS)
+    period = pd.Timedelta(timeframe_to_timedelta(timeframe)).value
+    ts = pd.to_datetime(df["ts"], utc=True)
+    ns = ts.dt.tz_localize(None).to_numpy("datetime64[ns]").view("i8")
+
+    frame = pd.DataFrame(
+        {
+            "symbol": df["symbol"].to_numpy(),
+            "bucket": ns - ns % period,
+            "ns": ns,
+            "open": df["open"].to_numpy(dtype=np.float64),
+            "high": df["high"].to_numpy(dtype=np.float64),
+            "low": df["low"].to_numpy(dtype=np.float64),
+            "close": df["close"].to_numpy(dtype=np.float64),
+            "volume": df["volume"].to_numpy(dtype=np.float64),
+        }
+    ).sort_values(["symbol", "ns"], kind="stable")
+
+    bars = frame.groupby(["symbol", "bucket"], sort=False).agg(
+        open=("open", "first"),
+        high=("high", "max"),
+        low=("low", "min"),
+        close=("close", "last"),
+        volume=("volume", "sum"),
+    )
+    bars = bars.reset_index()
+    bars["ts"] = pd.to_datetime(bars["bucket"], unit="ns", utc=True)
+    return bars[OHLCV_COLUMNS]
+
+
+def get_watermark(source_timeframe: str, timeframe: str) -> Optional[datetime]:
+    row = api.fetch_one(
+        "SELECT watermark FROM resample_state WHERE source_timeframe = %s AND timeframe = %s",
+        (source_timeframe, timeframe),
+    )
+    return row["watermark"] if row else None
+
+
+def set_watermark(source_timeframe: str, timeframe: str, watermark: datetime) -> None:
+    api.execute(
+        """
+        INSERT INTO resample_state (source_timeframe, timeframe, watermark)
+        VALUES (%s, %s, %s)
+        ON CONFLICT (source_timeframe, timeframe) DO UPDATE SET
+            watermark = GREATEST(resample_state.watermark, EXCLUDED.watermark),
+            updated_at = now()
+        """,
+        (source_timeframe, timeframe, watermark),
+    )
+
+
+def fetch_touched_ranges(
+    source_timeframe: str,
+    since: Optional[datetime],
+    symbols: Optional[List[str]] = None,
+) -> Tuple[Dict[str, Tuple[pd.Timestamp, pd.Timestamp]], Optional[datetime]]:
+    """
+    Rango de ts escrito desde since por símbolo y el ingested_at máximo visto.
+
+    Devuelve ({symbol: (min_ts, max_ts)}, max_ingested_at).
+    """
+    rows = api.fetch_all(
+        """
+        SELECT symbol, MIN(ts) AS min_ts, MAX(ts) AS max_ts, MAX(ingested_at) AS max_ingested
+        FROM ohlcv
+        WHERE timeframe = %s
+          AND (%s::timestamptz IS NULL OR ingested_at > %s::timestamptz)
+          AND (%s::text[] IS NULL OR symbol = ANY(%s::text[]))
+        GROUP BY symbol
+        """,
+        (source_timeframe, since, since, symbols, symbols),
+    )
+    ranges = {r["symbol"]: (pd.Timestamp(r["min_ts"]), pd.Timestamp(r["max_ts"])) for r in rows}
+    max_ingested = max((r["max_ingested"] for r in rows), default=None)
+    return ranges, max_ingested
+
+
+def bucket_ranges(
+    ranges: Dict[str, Tuple[pd.Timestamp, pd.Timestamp]],
+    timeframe: str,
+) -> Dict[str, Tuple[pd.Timestamp, pd.Timestamp]]:
+    """Amplía cada rango a intervalos destino completos: [floor(min), floor(max) + periodo)."""
+    period = pd.Timedelta(timeframe_to_timedelta(timeframe))
+    out = {}
+    for symbol, (lo, hi) in ranges.items():
+        lo, hi = pd.Timestamp(lo).tz_convert("UTC"), pd.Timestamp(hi).tz_convert("UTC")
+        out[symbol] = (lo.floor(period), hi.floor(period) + period)
+    return out
+
+
+def fetch_source_bars(
+    ranges: Dict[str, Tuple[pd.Timestamp, pd.Timestamp]],
+    source_timeframe: str,
+) -> pd.DataFrame:
+    """Barras origen de varios símbolos, cada uno en su rango [lo, hi), en una consulta."""
+    if not ranges:
+        return pd.DataFrame(columns=OHLCV_COLUMNS)
+    symbols = list(ranges)
+    rows = api.fetch_all(
+        """
+        SELECT o.ts, o.symbol, o.open, o.high, o.low, o.close, o.volume
+        FROM ohlcv o
+        JOIN unnest(%s::text[], %s::timestamptz[], %s::timestamptz[]) AS r(symbol, lo, hi)
+          ON o.symbol = r.symbol AND o.ts >= r.lo AND o.ts < r.hi
+        WHERE o.timeframe = %s
+        ORDER BY o.symbol, o.ts
+        """,
+        (
+            symbols,
+            [ranges[s][0].to_pydatetime() for s in symbols],
+            [ranges[s][1].to_pydatetime() for s in symbols],
+            source_timeframe,
+        ),
+    )
+    if not rows:
+        return pd.DataFrame(columns=OHLCV_COLUMNS)
+    return pd.DataFrame(rows, columns=OHLCV_COLUMNS)
+
+
+def resample_timeframe(
+    timeframe: str,
+    source_timeframe: str = "1m",
+    symbols: Optional[List[str]] = None,
+    full: bool = False,
+    lookback: timedelta = DEFAULT_LOOKBACK,
+    symbols_per_batch: int = DEFAULT_SYMBOLS_PER_BATCH,
+) -> int:
+    """
+    Recalcula los intervalos de timeframe tocados desde la última ejecución.
+
+    full=True ignora el watermark y reconstruye todo el histórico. Con symbols
+    se procesan sólo esos símbolos y el watermark no se mueve (avanzarlo
+    saltaría las barras nuevas del resto). Devuelve el número de barras escritas.
+    """
+    target = timeframe_to_timedelta(timeframe)
+    source = timeframe_to_timedelta(source_timeframe)
+    if target <= source or target % source:
+        raise ValueError(
+            f"{timeframe} no es un múltiplo superior de {source_timeframe}"
+        )
+
+    watermark = None if full else get_watermark(source_timeframe, timeframe)
+    since = watermark - lookback if watermark is not None else None
+    touched, max_ingested = fetch_touched_ranges(source_timeframe, since, symbols)
+    if not touched:
+        logger.info("Resample %s→%s: sin barras nuevas", source_timeframe, timeframe)
+        return 0
+
+    ranges = bucket_ranges(touched, timeframe)
+    names = sorted(ranges)
+    written = 0
+    for i in range(0, len(names), symbols_per_batch):
+        batch = {s: ranges[s] for s in names[i : i + symbols_per_batch]}
+        bars = resample_bars(fetch_source_bars(batch, source_timeframe), timeframe)
+        written += upsert_ohlcv(bars, timeframe, f"resample:{source_timeframe}")
+
+    # El watermark sólo avanza cuando todos los lotes se escribieron
+    if symbols is None:
+        set_watermark(source_timeframe, timeframe, max_ingested)
+    logger.info(
+        "Resample %s→%s: %d barras de %d símbolos",
+        source_timeframe,
+        timeframe,
+        written,
+        len(names),
+    )
+    return written
@@ -0,0 +1,279 @@
+"""
+Streaming de barras en tiempo real desde IBKR hacia ohlcv.
+
+- BarAggregator: agrega barras de 5 segundos (reqRealTimeBars) al timeframe
+  configurado y emite cada barra cuando su intervalo se completa.
+- OhlcvBatchWriter: acumula barras completadas y las escribe en lote en ohlcv
+  (upsert multi-fila), opcionalmente con NOTIFY para despertar al ciclo de riesgo.
+- IBKRBarStreamer: suscribe los símbolos en IB y conecta ambos.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import time
+from dataclasses import dataclass, replace
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from desk_grade import api
+
+from .channels import OHLCV_CHANNEL  # noqa: F401 (re-export)
+from .loader import upsert_ohlcv
+from .timeframes import timeframe_to_timedelta
+
+logger = logging.getLogger(__name__)
+
+REALTIME_BAR_SECONDS = 5
+
+
+@dataclass(frozen=True)
+class Bar:
+    """Barra OHLCV de un símbolo; ts es el inicio del intervalo (UTC)."""
+
+    symbol: str
+    ts: pd.Timestamp
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float
+
+    def merge(self, other: "Bar") -> "Bar":
+        """Combina con una barra posterior del mismo intervalo."""
+        return replace(
+            self,
+            high=max(self.high, other.high),
+            low=min(self.low, other.low),
+            close=other.close,
+            volume=self.volume + other.volume,
+        )
+
+
+class BarAggregator:
+    """
+    Agrega barras pequeñas (5s) en barras del timeframe.
+
+    Una barra se emite cuando llega una barra de un intervalo posterior o
+    cuando close_until() ve que su intervalo terminó (símbolos sin actividad).
+    La última barra emitida de cada símbolo se conserva: si llega tarde una
+    barra de 5s de ese intervalo se fusiona y la barra se vuelve a emitir
+    (el upsert en ohlcv la sobrescribe).
+    """
+
+    def __init__(self, timeframe: str):
+        self.timeframe = timeframe
+        self.period = pd.Timedelta(timeframe_to_timedelta(timeframe))
+        self._open: Dict[str, Bar] = {}
+        self._closed: Dict[str, Bar] = {}
+
+    def _bucket(self, ts: pd.Timestamp) -> pd.Timestamp:
+        ts = pd.Timestamp(ts)
+        ts = ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+        return ts.floor(self.period)
+
+    def add(self, bar: Bar) -> List[Bar]:
+        """Añade una barra pequeña; devuelve las barras del timeframe completadas."""
+        bucket = self._bucket(bar.ts)
+        piece = replace(bar, ts=bucket)
+
+        closed = self._closed.get(bar.symbol)
+        if closed is not None and bucket <= closed.ts:
+            if bucket < closed.ts:
+                logger.warning("Barra descartada por llegar tarde: %s %s", bar.symbol, bar.ts)
+                return []
+            merged = closed.merge(piece)
+            self._closed[bar.symbol] = merged
+            return [merged]
+
+        current = self._open.get(bar.symbol)
+        if current is None:
+            self._open[bar.symbol] = piece
+            return []
+        if bucket == current.ts:
+            self._open[bar.symbol] = current.merge(piece)
+            return []
+        if bucket < current.ts:
+            logger.warning("Barra fuera de orden descartada: %s %s", bar.symbol, bar.ts)
+            return []
+
+        # Empieza un intervalo nuevo: el actual está completo
+        self._open[bar.symbol] = piece
+        self._closed[bar.symbol] = current
+        return [current]
+
+    def close_until(self, now: pd.Timestamp) -> List[Bar]:
+        """Emite las barras abiertas cuyo intervalo terminó antes de now."""
+        completed = []
+        for symbol, current in list(self._open.items()):
+            if current.ts + self.period <= now:
+                del self._open[symbol]
+                self._closed[symbol] = current
+                completed.append(current)
+        return completed
+
+
+class OhlcvBatchWriter:
+    """
+    Buffer de barras completadas con escritura en lote en ohlcv.
+
+    flush() escribe todo el buffer en una transacción (upsert multi-fila) y,
+    si notify_channel está definido, envía un NOTIFY que se entrega al hacer
+    commit. maybe_flush() lo hace al llegar a batch_size barras o cuando pasan
+    flush_interval_s segundos desde el último flush.
+    """
+
+    def __init__(
+        self,
+        timeframe: str,
+        source: str = "ibkr_stream",
+        batch_size: int = 500,
+        flush_interval_s: float = 5.0,
+        notify_channel: Optional[str] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.timeframe = timeframe
+        self.source = source
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        self.notify_channel = notify_channel
+        self._clock = clock
+        self._buffer: Dict[Tuple[str, pd.Timestamp], Bar] = {}
+        self._last_flush = clock()
+        self.rows_written = 0
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    def add(self, bars: List[Bar]) -> None:
+        for bar in bars:
+            # Una barra re-emitida sustituye a la anterior del mismo intervalo
+            self._buffer[(bar.symbol, bar.ts)] = bar
+
+    def maybe_flush(self) -> int:
+        due = self._clock() - self._last_flush >= self.flush_interval_s
+        if len(self._buffer) >= self.batch_size or (due and self._buffer):
+            return self.flush()
+        return 0
+
+    def flush(self) -> int:
+        self._last_flush = self._clock()
+        if not self._buffer:
+            return 0
+        bars = list(self._buffer.values())
+        df = pd.DataFrame([bar.__dict__ for bar in bars])
+
+        with api.transaction():
+            rows = upsert_ohlcv(df, self.timeframe, self.source)
+            if self.notify_channel:
+                api.notify(
+                    self.notify_channel,
+                    json.dumps(
+                        {
+                            "timeframe": self.timeframe,
+                            "symbols": sorted(df["symbol"].unique().tolist()),
+                            "last_ts": df["ts"].max().isoformat(),
+                        }
+                    ),
+                )
+        # Sólo se vacía el buffer si la escritura confirmó
+        self._buffer.clear()
+        self.rows_written += rows
+        logger.info("Flush de %d barras %s en ohlcv", rows, self.timeframe)
+        return rows
+
+
+class IBKRBarStreamer:
+    """
+    Suscribe barras de 5s (reqRealTimeBars) de una lista de símbolos y las
+    lleva a ohlcv agregadas al timeframe del writer.
+
+    provider debe ser un IBKRProvider (se usan su cliente ib y sus contratos).
+    """
+
+    def __init__(
+        self,
+        provider,
+        symbols: List[str],
+        asset: str,
+        writer: OhlcvBatchWriter,
+        what_to_show: str = "TRADES",
+        use_rth: bool = False,
+    ):
+        self.provider = provider
+        self.ib = provider.ib
+        self.symbols = [s.upper() for s in symbols]
+        self.asset = asset
+        self.writer = writer
+        self.aggregator = BarAggregator(writer.timeframe)
+        self.what_to_show = what_to_show
+        self.use_rth = use_rth
+        # Margen para que llegue la última barra de 5s antes de cerrar un intervalo
+        self.close_grace = pd.Timedelta(seconds=2 * REALTIME_BAR_SECONDS)
+        self._subscriptions = []
+
+    def _on_bar(self, symbol: str, rt_bar) -> None:
+        bar = Bar(
+            symbol=symbol,
+            ts=pd.Timestamp(rt_bar.time),
+            open=float(rt_bar.open_),
+            high=float(rt_bar.high),
+            low=float(rt_bar.low),
+            close=float(rt_bar.close),
+            volume=float(rt_bar.volume),
+        )
+        self.writer.add(self.aggregator.add(bar))
+
+    def subscribe(self) -> None:
+        for symbol in self.symbols:
+            contract = self.provider._build_contract(symbol, self.asset)
+            if contract is None:
+                logger.warning("Símbolo %s inválido: %s", self.asset, symbol)
+                continue
+            bars = self.ib.reqRealTimeBars(
+                contract, REALTIME_BAR_SECONDS, self.what_to_show, self.use_rth
+            )
+
+            def handler(bar_list, has_new_bar, symbol=symbol):
+                if has_new_bar and bar_list:
+                    self._on_bar(symbol, bar_list[-1])
+
+            bars.updateEvent += handler
+            self._subscriptions.append(bars)
+        logger.info(
+            "Streaming %s de %d símbolos (barras %ss → %s)",
+            self.what_to_show,
+            len(self._subscriptions),
+            REALTIME_BAR_SECONDS,
+            self.writer.timeframe,
+        )
+
+    def tick(self, now: Optional[pd.Timestamp] = None) -> int:
+        """Cierra intervalos vencidos y hace flush si toca. Devuelve filas escritas."""
+        now = now if now is not None else pd.Timestamp.now(tz="UTC")
+        self.writer.add(self.aggregator.close_until(now - self.close_grace))
+        return self.writer.maybe_flush()
+
+    def stop(self) -> None:
+        for bars in self._subscriptions:
+            self.ib.cancelRealTimeBars(bars)
+        self._subscriptions = []
+        self.writer.flush()
+
+    def run(self, poll_s: float = 1.0) -> None:
+        """Bucle bloqueante: procesa eventos de IB y hace flush periódico."""
+        self.subscribe()
+        try:
+            while True:
+                self.ib.sleep(poll_s)
+                try:
+                    self.tick()
+                except Exception as exc:
+                    # El buffer se conserva y se reintenta en el siguiente tick
+                    logger.error("Error escribiendo barras: %s", exc, exc_info=True)
+        except KeyboardInterrupt:
+            logger.info("Streaming detenido por el usuario")
+        finally:
+            self.stop()
@@ -0,0 +1,324 @@
+"""
+Generador vectorizado de datos de mercado sintéticos para pruebas de carga.
+
+- SyntheticMarket: GBM por símbolo (volatilidad propia) con rendimientos
+  correlacionados mediante un modelo de factores, OHLC coherente
+  (low <= open, close <= high) y volumen ligado al tamaño del movimiento.
+- AtrTracker: ATR de Wilder de todos los símbolos a la vez, con estado entre bloques.
+- generate_signals: señales de momentum aleatorias para signals_live.
+- seed_synthetic: escribe todo bloque a bloque en ohlcv / atr_cache /
+  signals_live con COPY (una transacción por bloque).
+
+Las barras son continuas (24/7, sin calendario de mercado). Todo se calcula
+sobre matrices (barras × símbolos) de NumPy; no hay bucles por barra.
+"""
+
+from __future__ import annotations
+
+import itertools
+import logging
+from datetime import timedelta
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from desk_grade import api
+
+from .timeframes import timeframe_to_timedelta
+
+logger = logging.getLogger(__name__)
+
+OHLCV_COLUMNS = ["ts", "symbol", "open", "high", "low", "close", "volume"]
+
+YEAR = timedelta(days=365)
+
+
+class SyntheticMarket:
+    """
+    Universo de símbolos con precios GBM correlacionados por factores.
+
+    El shock de cada símbolo es z_i = B_i·f + sqrt(1 - |B_i|²)·e_i, con f
+    (n_factors) y e_i normales independientes: varianza unitaria y
+    correlación B·Bᵀ fuera de la diagonal. factor_share acota la fracción de
+    varianza explicada por los factores (|B_i|²).
+    """
+
+    def __init__(
+        self,
+        symbols: Sequence[str],
+        timeframe: str = "1m",
+        seed: Optional[int] = None,
+        n_factors: int = 3,
+        annual_vol: Tuple[float, float] = (0.15, 0.60),
+        factor_share: Tuple[float, float] = (0.2, 0.7),
+        drift: float = 0.05,
+        start_prices: Optional[Sequence[float]] = None,
+        price_range: Tuple[float, float] = (10.0, 500.0),
+        volume_range: Tuple[float, float] = (1e3, 1e5),
+    ):
+        self.symbols = [s.upper() for s in symbols]
+        self.timeframe = timeframe
+        self.period = timeframe_to_timedelta(timeframe)
+        self.dt = self.period / YEAR
+        self.drift = drift
+        self.rng = np.random.default_rng(seed)
+
+        n = len(self.symbols)
+        self.vol = self.rng.uniform(*annual_vol, n)
+        share = self.rng.uniform(*factor_share, n)
+        raw = self.rng.standard_normal((n, n_factors))
+        raw /= np.linalg.norm(raw, axis=1, keepdims=True)
+        self.loadings = raw * np.sqrt(share)[:, None]
+        self.idio = np.sqrt(1.0 - share)
+        self.base_volume = np.exp(self.rng.uniform(*np.log(volume_range), n))
+        if start_prices is not None:
+            self.last_close = np.asarray(start_prices, dtype=np.float64).copy()
+        else:
+            self.last_close = np.exp(self.rng.uniform(*np.log(price_range), n))
+
+    def correlation(self) -> np.ndarray:
+        """Correlación teórica de los rendimientos (n × n)."""
+        corr = self.loadings @ self.loadings.T
+        np.fill_diagonal(corr, 1.0)
+        return corr
+
+    def generate(self, n_bars: int) -> Dict[str, np.ndarray]:
+        """
+        Genera las siguientes n_bars barras de todos los símbolos.
+
+        Devuelve matrices (n_bars × n_símbolos) open/high/low/close/volume y
+        el shock z; el siguiente bloque continúa desde el último close.
+        """
+        n = len(self.symbols)
+        factors = self.rng.standard_normal((n_bars, self.loadings.shape[1]))
+        z = factors @ self.loadings.T + self.rng.standard_normal((n_bars, n)) * self.idio
+        step = self.vol * np.sqrt(self.dt)
+        log_ret = (self.drift - 0.5 * self.vol**2) * self.dt + step * z
+
+        close = self.last_close * np.exp(np.cumsum(log_ret, axis=0))
+        open_ = np.vstack([self.last_close, close[:-1]])
+        # Mechas: excursión semi-normal fuera del cuerpo de la vela
+        wicks = np.abs(self.rng.standard_normal((2, n_bars, n))) * (0.5 * step)
+        high = np.maximum(open_, close) * np.exp(wicks[0])
+        low = np.minimum(open_, close) * np.exp(-wicks[1])
+        volume = np.round(
+            self.base_volume
+            * np.exp(0.5 * self.rng.standard_normal((n_bars, n)))
+            * (1.0 + 2.0 * np.abs(z))
+        )
+
+        self.last_close = close[-1].copy()
+        return {"open": open_, "high": high, "low": low, "close": close, "volume": volume, "z": z}
+
+    def iter_bars(
+        self,
+        start: pd.Timestamp,
+        end: pd.Timestamp,
+        chunk_bars: Optional[int] = None,
+    ) -> Iterator[Tuple[pd.DatetimeIndex, Dict[str, np.ndarray]]]:
+        """
+        Recorre [start, end) en bloques de chunk_bars barras (por defecto un día).
+
+        Cada bloque es (índice de ts, matrices de generate()).
+        """
+        period = pd.Timedelta(self.period)
+        start = pd.Timestamp(start).tz_convert("UTC").ceil(period)
+        end = pd.Timestamp(end).tz_convert("UTC")
+        chunk_bars = chunk_bars or max(1, int(pd.Timedelta(days=1) / period))
+        total = max(0, int(np.ceil((end - start) / period)))
+        for offset in range(0, total, chunk_bars):
+            n_bars = min(chunk_bars, total - offset)
+            ts = pd.date_range(start + offset * period, periods=n_bars, freq=period)
+            yield ts, self.generate(n_bars)
+
+    def to_frame(self, ts: pd.DatetimeIndex, bars: Dict[str, np.ndarray]) -> pd.DataFrame:
+        """Matrices de un bloque a formato largo (ts, symbol, ohlcv), ordenado por ts."""
+        n = len(self.symbols)
+        return pd.DataFrame(
+            {
+                "ts": ts.repeat(n),
+                "symbol": np.tile(np.asarray(self.symbols, dtype=object), len(ts)),
+                **{c: bars[c].ravel() for c in ["open", "high", "low", "close", "volume"]},
+            }
+        )
+
+
+class AtrTracker:
+    """ATR de Wilder (media exponencial de alpha 1/period del true range) con estado."""
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.atr: Optional[np.ndarray] = None
+        self.prev_close: Optional[np.ndarray] = None
+
+    def update(self, bars: Dict[str, np.ndarray]) -> np.ndarray:
+        """ATR tras cada barra del bloque (n_bars × n_símbolos)."""
+        high, low, close = bars["high"], bars["low"], bars["close"]
+        first = bars["open"][:1] if self.prev_close is None else self.prev_close
+        prev_close = np.vstack([first, close[:-1]])
+        tr = np.maximum(high - low, np.maximum(np.abs(high - prev_close), np.abs(low - prev_close)))
+        # ewm(adjust=False) parte del primer valor: se antepone el ATR anterior
+        seed = tr[:1] if self.atr is None else self.atr[None, :]
+        smoothed = pd.DataFrame(np.vstack([seed, tr])).ewm(alpha=1.0 / self.period, adjust=False).mean()
+        atr = smoothed.to_numpy()[1:]
+        self.atr = atr[-1].copy()
+        self.prev_close = close[-1:].copy()
+        return atr
+
+
+def generate_signals(
+    market: SyntheticMarket,
+    ts: pd.DatetimeIndex,
+    bars: Dict[str, np.ndarray],
+    signals_per_day: float = 2.0,
+    lookback: int = 20,
+    strategy_id: str = "synthetic",
+) -> pd.DataFrame:
+    """
+    Señales aleatorias (Bernoulli por barra) con lado según el momentum de lookback barras.
+
+    strength = |momentum| en desviaciones típicas esperadas, acotado a [0, 1] (÷3).
+    """
+    columns = ["ts", "symbol", "side", "strength", "strategy_id"]
+    bars_per_day = pd.Timedelta(days=1) / pd.Timedelta(market.period)
+    p = min(1.0, signals_per_day / bars_per_day)
+    fire = market.rng.random(bars["close"].shape) < p
+    if not fire.any():
+        return pd.DataFrame(columns=columns)
+
+    log_close = np.log(bars["close"])
+    ref = np.vstack([np.repeat(log_close[:1], lookback, axis=0), log_close])[:-lookback]
+    momentum = log_close - ref
+    scale = market.vol * np.sqrt(market.dt * lookback)
+
+    rows, cols = np.nonzero(fire)
+    mom = momentum[rows, cols]
+    return pd.DataFrame(
+        {
+            "ts": ts[rows],
+            "symbol": np.asarray(market.symbols, dtype=object)[cols],
+            "side": np.where(mom >= 0, "BUY", "SELL"),
+            "strength": np.clip(np.abs(mom) / scale[cols] / 3.0, 0.0, 1.0).round(4),
+            "strategy_id": strategy_id,
+        }
+    )
+
+
+OHLCV_COPY_TYPES = [
+    "timestamptz", "text", "float8", "float8", "float8", "float8", "float8", "text", "text",
+]
+
+
+def _repeat_each(values: Sequence, times: int) -> List:
+    """[a, a, b, b, ...]: cada valor repetido times veces (ts de un bloque por símbolo)."""
+    return [v for v in values for _ in range(times)]
+
+
+def copy_ohlcv(
+    market: SyntheticMarket,
+    ts: pd.DatetimeIndex,
+    bars: Dict[str, np.ndarray],
+    source: str,
+) -> int:
+    """Carga un bloque de barras con COPY binario (las filas no deben existir ya en ohlcv)."""
+    n = len(market.symbols)
+    rows = zip(
+        _repeat_each(ts.to_pydatetime(), n),
+        market.symbols * len(ts),
+        *(bars[c].ravel().tolist() for c in ["open", "high", "low", "close", "volume"]),
+        itertools.repeat(market.timeframe),
+        itertools.repeat(source),
+    )
+    api.copy_rows("ohlcv", OHLCV_COLUMNS + ["timeframe", "source"], rows, types=OHLCV_COPY_TYPES)
+    return n * len(ts)
+
+
+def copy_atr(symbols: Sequence[str], ts: pd.DatetimeIndex, atr: np.ndarray, timeframe: str) -> int:
+    """Carga filas de atr_cache (ATR de todos los símbolos en los ts dados)."""
+    if not len(ts):
+        return 0
+    rows = zip(
+        list(symbols) * len(ts),
+        itertools.repeat(timeframe),
+        _repeat_each(ts.to_pydatetime(), len(symbols)),
+        atr.ravel().tolist(),
+    )
+    api.copy_rows(
+        "atr_cache",
+        ["symbol", "timeframe", "ts", "atr"],
+        rows,
+        types=["text", "text", "timestamptz", "float8"],
+    )
+    return len(ts) * len(symbols)
+
+
+def copy_signals(df: pd.DataFrame) -> int:
+    if df.empty:
+        return 0
+    rows = zip(
+        df["symbol"],
+        pd.DatetimeIndex(df["ts"]).to_pydatetime(),
+        df["side"],
+        df["strength"].tolist(),
+        df["strategy_id"],
+        itertools.repeat({"source": "synthetic"}),
+    )
+    api.copy_rows(
+        "signals_live",
+        ["symbol", "ts", "side", "strength", "strategy_id", "meta"],
+        rows,
+        types=["text", "timestamptz", "text", "float8", "text", "jsonb"],
+    )
+    return len(df)
+
+
+def delete_range(symbols: List[str], timeframe: str, start: pd.Timestamp, end: pd.Timestamp) -> None:
+    """Borra lo generado antes en el rango (para volver a sembrar sin conflictos)."""
+    params = (symbols, start.to_pydatetime(), end.to_pydatetime())
+    api.execute(
+        "DELETE FROM ohlcv WHERE symbol = ANY(%s) AND ts >= %s AND ts < %s AND timeframe = %s",
+        params + (timeframe,),
+    )
+    api.execute(
+        "DELETE FROM atr_cache WHERE symbol = ANY(%s) AND ts >= %s AND ts < %s AND timeframe = %s",
+        params + (timeframe,),
+    )
+    api.execute(
+        "DELETE FROM signals_live WHERE symbol = ANY(%s) AND ts >= %s AND ts < %s",
+        params,
+    )
+
+
+def seed_synthetic(
+    market: SyntheticMarket,
+    start: pd.Timestamp,
+    end: pd.Timestamp,
+    source: str = "synthetic",
+    atr_period: int = 14,
+    atr_every: int = 60,
+    signals_per_day: float = 2.0,
+    strategy_id: str = "synthetic",
+    chunk_bars: Optional[int] = None,
+) -> Dict[str, int]:
+    """
+    Genera y carga [start, end) bloque a bloque (una transacción por bloque).
+
+    atr_cache recibe el ATR cada atr_every barras (y en la última de cada bloque).
+    Devuelve el número de filas escritas por tabla.
+    """
+    atr_tracker = AtrTracker(atr_period)
+    totals = {"ohlcv": 0, "atr_cache": 0, "signals_live": 0}
+    for ts, bars in market.iter_bars(start, end, chunk_bars):
+        atr = atr_tracker.update(bars)
+        pick = np.flatnonzero((np.arange(len(ts)) + 1) % atr_every == 0)
+        if not len(pick) or pick[-1] != len(ts) - 1:
+            pick = np.r_[pick, len(ts) - 1]
+        signals = generate_signals(market, ts, bars, signals_per_day, strategy_id=strategy_id)
+
+        with api.transaction():
+            totals["ohlcv"] += copy_ohlcv(market, ts, bars, source)
+            totals["atr_cache"] += copy_atr(market.symbols, ts[pick], atr[pick], market.timeframe)
+            totals["signals_live"] += copy_signals(signals)
+        logger.debug("Bloque sintético hasta %s: %s", ts[-1], totals)
+    return totals
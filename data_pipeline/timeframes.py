@@ -0,0 +1,27 @@
+"""
+Utilidades de timeframes (1m, 5m, 15m, 30m, 1h, 4h, 1d).
+"""
+
+from __future__ import annotations
+
+from datetime import timedelta
+
+TIMEFRAME_DELTAS = {
+    "1m": timedelta(minutes=1),
+    "5m": timedelta(minutes=5),
+    "15m": timedelta(minutes=15),
+    "30m": timedelta(minutes=30),
+    "1h": timedelta(hours=1),
+    "4h": timedelta(hours=4),
+    "1d": timedelta(days=1),
+}
+
+
+def timeframe_to_timedelta(timeframe: str) -> timedelta:
+    """Duración de una barra del timeframe; ValueError si no se reconoce."""
+    try:
+        return TIMEFRAME_DELTAS[timeframe]
+    except KeyError:
+        raise ValueError(
+            f"Timeframe desconocido: {timeframe} (válidos: {', '.join(TIMEFRAME_DELTAS)})"
+        ) from None
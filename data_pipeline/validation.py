@@ -0,0 +1,261 @@
+"""
+Validación vectorizada de calidad de barras OHLCV antes de cargarlas.
+
+Cada fila recibe una máscara de bits con los motivos de rechazo (todo en
+arrays NumPy, sin bucles por fila):
+
+    invalid_ts          ts nulo / no parseable
+    non_finite          algún precio o volumen NaN/inf
+    non_positive_price  open/high/low/close <= 0
+    high_below_low      high < low
+    open_out_of_range   open fuera de [low, high]
+    close_out_of_range  close fuera de [low, high]
+    negative_volume     volume < 0
+    duplicate_ts        (symbol, ts) repetido; se conserva la última aparición
+
+Los huecos (saltos mayores que el timeframe entre barras consecutivas de un
+símbolo) no se rechazan: se acumulan en un informe por símbolo. No se tiene en
+cuenta el calendario de mercado, así que noches y fines de semana cuentan
+como huecos en timeframes intradía.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from desk_grade import api
+
+from .timeframes import timeframe_to_timedelta
+
+# Modos: quarantine descarta las filas malas, flag las carga igualmente (salvo
+# las que no se pueden guardar, ver UNSTORABLE_REASONS) y off no valida. En
+# quarantine y flag las filas malas van a ohlcv_rejects.
+VALIDATION_MODES = ("quarantine", "flag", "off")
+
+REASONS: List[str] = [
+    "invalid_ts",
+    "non_finite",
+    "non_positive_price",
+    "high_below_low",
+    "open_out_of_range",
+    "close_out_of_range",
+    "negative_volume",
+    "duplicate_ts",
+]
+REASON_BITS: Dict[str, int] = {reason: 1 << i for i, reason in enumerate(REASONS)}
+
+# Filas que ni en modo flag se cargan en ohlcv: sin ts no hay clave y un precio
+# NaN/inf no es una barra utilizable (sólo quedan en ohlcv_rejects)
+UNSTORABLE_REASONS = ("invalid_ts", "non_finite")
+_UNSTORABLE = REASON_BITS["invalid_ts"] | REASON_BITS["non_finite"]
+
+INSERT_REJECTS_SQL = """
+    INSERT INTO ohlcv_rejects (symbol, ts, open, high, low, close, volume, timeframe, source, reason)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+_NAT = np.iinfo(np.int64).min
+
+
+def _reason_text(mask: int) -> str:
+    return ",".join(reason for reason, bit in REASON_BITS.items() if mask & bit)
+
+
+class _Arrays(NamedTuple):
+    """Columnas de un bloque como arrays, calculadas una sola vez."""
+
+    ts: np.ndarray  # int64 ns UTC (NaT = mínimo int64)
+    codes: np.ndarray  # código de símbolo
+    symbols: np.ndarray  # símbolo de cada código
+    order: np.ndarray  # orden estable por (symbol, ts)
+
+
+def _ts_ns(ts: pd.Series) -> np.ndarray:
+    """ts como int64 ns UTC; si ya es datetime no se vuelve a parsear."""
+    if isinstance(ts.dtype, pd.DatetimeTZDtype):
+        ts = ts.dt.tz_convert("UTC").dt.tz_localize(None)
+    elif not pd.api.types.is_datetime64_dtype(ts.dtype):
+        ts = pd.to_datetime(ts, utc=True, errors="coerce").dt.tz_localize(None)
+    return ts.to_numpy("datetime64[ns]").view("i8")
+
+
+def _arrays(df: pd.DataFrame) -> _Arrays:
+    ts = _ts_ns(df["ts"])
+    codes, symbols = pd.factorize(df["symbol"].astype(str), sort=False)
+    return _Arrays(ts, codes, np.asarray(symbols), _sort_order(codes, ts))
+
+
+def reject_mask(df: pd.DataFrame, arrays: Optional[_Arrays] = None) -> np.ndarray:
+    """Máscara de bits (uint16) con los motivos de rechazo de cada fila."""
+    n = len(df)
+    mask = np.zeros(n, dtype=np.uint16)
+    if n == 0:
+        return mask
+    arrays = arrays or _arrays(df)
+
+    o, h, l, c, v = (
+        pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=np.float64)
+        for col in ("open", "high", "low", "close", "volume")
+    )
+
+    with np.errstate(invalid="ignore"):
+        mask[arrays.ts == _NAT] |= REASON_BITS["invalid_ts"]
+        finite = np.isfinite(o) & np.isfinite(h) & np.isfinite(l) & np.isfinite(c) & np.isfinite(v)
+        mask[~finite] |= REASON_BITS["non_finite"]
+        mask[(o <= 0) | (h <= 0) | (l <= 0) | (c <= 0)] |= REASON_BITS["non_positive_price"]
+        mask[h < l] |= REASON_BITS["high_below_low"]
+        mask[(o < l) | (o > h)] |= REASON_BITS["open_out_of_range"]
+        mask[(c < l) | (c > h)] |= REASON_BITS["close_out_of_range"]
+        mask[v < 0] |= REASON_BITS["negative_volume"]
+
+    order = arrays.order
+    sc, st = arrays.codes[order], arrays.ts[order]
+    same = (sc[1:] == sc[:-1]) & (st[1:] == st[:-1]) & (st[1:] != _NAT)
+    # En cada grupo repetido se marca todo menos la última aparición
+    mask[order[:-1][same]] |= REASON_BITS["duplicate_ts"]
+    return mask
+
+
+def _sort_order(codes: np.ndarray, ts: np.ndarray) -> np.ndarray:
+    """Orden estable por (symbol, ts); evita ordenar si ya viene ordenado."""
+    if len(codes) < 2:
+        return np.arange(len(codes))
+    dc = np.diff(codes)
+    if np.all((dc > 0) | ((dc == 0) & (ts[1:] >= ts[:-1]))):
+        return np.arange(len(codes))
+    return np.lexsort((ts, codes))
+
+
+@dataclass
+class GapStats:
+    """Huecos acumulados de un símbolo."""
+
+    bars: int = 0
+    gaps: int = 0
+    missing_bars: int = 0
+    max_gap: pd.Timedelta = field(default_factory=lambda: pd.Timedelta(0))
+    first_ts: pd.Timestamp = None
+    last_ts: pd.Timestamp = None
+
+
+class OhlcvValidator:
+    """
+    Valida bloques de barras de un timeframe y acumula el informe de huecos.
+
+    Se puede llamar bloque a bloque (Provider.iter_ohlcv): el último ts de cada
+    símbolo se recuerda para detectar huecos entre bloques. Los duplicados sólo
+    se detectan dentro de un bloque (entre bloques los resuelve el upsert).
+    """
+
+    def __init__(self, timeframe: str, mode: str = "quarantine"):
+        if mode not in VALIDATION_MODES:
+            raise ValueError(f"Modo de validación desconocido: {mode} (válidos: {VALIDATION_MODES})")
+        self.timeframe = timeframe
+        self.mode = mode
+        self.period_ns = int(pd.Timedelta(timeframe_to_timedelta(timeframe)).value)
+        self.gap_stats: Dict[str, GapStats] = {}
+        self.rows_seen = 0
+        self.rows_rejected = 0
+
+    def validate(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Devuelve (filas a cargar, filas rechazadas con columna reason).
+
+        En modo flag las filas rechazadas también se cargan, salvo las de
+        UNSTORABLE_REASONS (ts inválido o valores no finitos).
+        """
+        if self.mode == "off" or df.empty:
+            return df, df.iloc[0:0].assign(reason=pd.Series(dtype=str))
+
+        arrays = _arrays(df)
+        mask = reject_mask(df, arrays)
+        bad = mask != 0
+        self.rows_seen += len(df)
+        self.rows_rejected += int(bad.sum())
+        self._update_gaps(arrays, mask)
+
+        rejects = df[bad]
+        if len(rejects):
+            # Pocas combinaciones distintas: el texto se calcula una vez por máscara
+            masks = mask[bad]
+            unique, inverse = np.unique(masks, return_inverse=True)
+            texts = np.array([_reason_text(int(m)) for m in unique], dtype=object)
+            rejects = rejects.assign(reason=texts[inverse])
+        else:
+            rejects = rejects.assign(reason=pd.Series(dtype=str))
+
+        if not len(rejects):
+            clean = df
+        elif self.mode == "flag":
+            unstorable = (mask & _UNSTORABLE) != 0
+            clean = df[~unstorable] if unstorable.any() else df
+        else:
+            clean = df[~bad]
+        return clean, rejects
+
+    def _update_gaps(self, arrays: _Arrays, mask: np.ndarray) -> None:
+        """Acumula huecos sobre las filas con ts válido y no duplicado."""
+        keep = (mask & (REASON_BITS["invalid_ts"] | REASON_BITS["duplicate_ts"])) == 0
+        # Filtrar el orden ya calculado mantiene el orden (symbol, ts)
+        order = arrays.order[keep[arrays.order]]
+        if not len(order):
+            return
+        codes, ts = arrays.codes[order], arrays.ts[order]
+        uniques = arrays.symbols
+
+        # Límites de cada símbolo en el array ordenado
+        starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+        ends = np.r_[starts[1:], len(codes)]
+        diffs = np.diff(ts)
+        same = codes[1:] == codes[:-1]
+
+        for code, lo, hi in zip(codes[starts], starts, ends):
+            symbol = uniques[code]
+            stats = self.gap_stats.setdefault(symbol, GapStats())
+            steps = diffs[lo : hi - 1][same[lo : hi - 1]]
+            if stats.last_ts is not None:
+                steps = np.r_[ts[lo] - stats.last_ts.value, steps]
+            gaps = steps[steps > self.period_ns]
+            stats.bars += int(hi - lo)
+            if len(gaps):
+                stats.gaps += len(gaps)
+                stats.missing_bars += int((gaps // self.period_ns - 1).sum())
+                stats.max_gap = max(stats.max_gap, pd.Timedelta(int(gaps.max())))
+            first, last = pd.Timestamp(ts[lo], tz="UTC"), pd.Timestamp(ts[hi - 1], tz="UTC")
+            stats.first_ts = first if stats.first_ts is None else min(stats.first_ts, first)
+            stats.last_ts = last if stats.last_ts is None else max(stats.last_ts, last)
+
+    def gap_report(self) -> pd.DataFrame:
+        """Informe de huecos por símbolo."""
+        columns = ["symbol", "bars", "gaps", "missing_bars", "max_gap", "first_ts", "last_ts"]
+        rows = [
+            (symbol, s.bars, s.gaps, s.missing_bars, s.max_gap, s.first_ts, s.last_ts)
+            for symbol, s in sorted(self.gap_stats.items())
+        ]
+        return pd.DataFrame(rows, columns=columns)
+
+
+def insert_rejects(rejects: pd.DataFrame, timeframe: str, source: str) -> int:
+    """Guarda las filas rechazadas en ohlcv_rejects. Devuelve el nº de filas."""
+    if rejects.empty:
+        return 0
+    ts = pd.to_datetime(rejects["ts"], utc=True, errors="coerce")
+    rows = list(
+        zip(
+            rejects["symbol"].astype(str),
+            [None if pd.isna(t) else t.to_pydatetime() for t in ts],
+            *(
+                pd.to_numeric(rejects[col], errors="coerce").astype(float)
+                for col in ("open", "high", "low", "close", "volume")
+            ),
+            [timeframe] * len(rejects),
+            [source] * len(rejects),
+            rejects["reason"],
+        )
+    )
+    api.execute_many(INSERT_REJECTS_SQL, rows)
+    return len(rows)
@@ -0,0 +1,356 @@
+"""
+Receptor HTTP (asyncio) de alertas de TradingView hacia signals_live.
+
+Las alertas se validan y se encolan en memoria; un SignalBatcher las inserta
+en lote (cada flush_interval_ms o al llegar a max_rows filas) con un único
+commit por lote, de modo que las ráfagas al cierre de barra no generan un
+commit por petición. La respuesta es 202 en cuanto la señal queda encolada.
+
+Endpoints:
+    POST /webhook   alerta de TradingView (JSON)
+    GET  /stats     contadores de throughput y latencia (JSON)
+    GET  /health    200 OK
+
+Formato de alerta (mensaje de la alerta en TradingView):
+    {"symbol": "{{ticker}}", "side": "buy", "time": "{{timenow}}",
+     "strength": 1.0, "strategy_id": "baseline", "passphrase": "..."}
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hmac
+import json
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SIDE_ALIASES = {
+    "BUY": "BUY",
+    "LONG": "BUY",
+    "SELL": "SELL",
+    "SHORT": "SELL",
+}
+
+# Campos que no se copian a meta
+_KNOWN_FIELDS = {"symbol", "ticker", "side", "action", "time", "timenow", "ts", "strength",
+                 "strategy_id", "strategy", "passphrase"}
+
+MAX_BODY_BYTES = 64 * 1024
+
+INSERT_SIGNALS_SQL = """
+    INSERT INTO signals_live (symbol, ts, side, strength, strategy_id, meta)
+    VALUES (%s, %s, %s, %s, %s, %s)
+"""
+
+
+class AlertError(ValueError):
+    """Alerta con formato inválido (se responde 400)."""
+
+
+@dataclass(frozen=True)
+class Signal:
+    """Señal validada lista para signals_live."""
+
+    symbol: str
+    ts: datetime
+    side: str
+    strength: Optional[float]
+    strategy_id: str
+    meta: Dict = field(default_factory=dict)
+
+    def as_row(self) -> Tuple:
+        return (self.symbol, self.ts, self.side, self.strength, self.strategy_id, self.meta)
+
+
+def parse_alert(
+    payload: Dict,
+    default_strategy: str = "tradingview",
+    secret: Optional[str] = None,
+) -> Signal:
+    """Valida una alerta de TradingView y la convierte en Signal (AlertError si no vale)."""
+    if not isinstance(payload, dict):
+        raise AlertError("el cuerpo debe ser un objeto JSON")
+    # Comparación en tiempo constante (en bytes: compare_digest no admite str no ASCII)
+    passphrase = str(payload.get("passphrase", "")).encode("utf-8")
+    if secret and not hmac.compare_digest(passphrase, secret.encode("utf-8")):
+        raise AlertError("passphrase incorrecta")
+
+    symbol = str(payload.get("symbol") or payload.get("ticker") or "").strip().upper()
+    if not symbol:
+        raise AlertError("falta symbol")
+    # "NASDAQ:AAPL" → "AAPL"
+    symbol = symbol.split(":")[-1]
+
+    side = SIDE_ALIASES.get(str(payload.get("side") or payload.get("action") or "").upper())
+    if side is None:
+        raise AlertError("side debe ser buy/sell/long/short")
+
+    raw_ts = payload.get("time") or payload.get("timenow") or payload.get("ts")
+    if raw_ts:
+        try:
+            ts = datetime.fromisoformat(str(raw_ts).replace("Z", "+00:00"))
+        except ValueError:
+            raise AlertError(f"time inválido: {raw_ts}") from None
+        ts = ts.replace(tzinfo=timezone.utc) if ts.tzinfo is None else ts
+    else:
+        ts = datetime.now(timezone.utc)
+
+    strength = payload.get("strength")
+    if strength is not None:
+        try:
+            strength = float(strength)
+        except (TypeError, ValueError):
+            raise AlertError(f"strength inválido: {strength}") from None
+
+    strategy_id = str(payload.get("strategy_id") or payload.get("strategy") or default_strategy)
+    meta = {k: v for k, v in payload.items() if k not in _KNOWN_FIELDS}
+    meta["source"] = "tradingview_webhook"
+    return Signal(symbol, ts, side, strength, strategy_id, meta)
+
+
+def insert_signals(rows: List[Tuple]) -> None:
+    """Inserta un lote en signals_live con un único commit."""
+    from desk_grade import api
+
+    with api.transaction():
+        api.execute_many(INSERT_SIGNALS_SQL, rows)
+
+
+class WebhookStats:
+    """Contadores del receptor (throughput y latencia encolado → commit)."""
+
+    def __init__(self, window: int = 1000):
+        self.started = time.monotonic()
+        self.received = 0
+        self.accepted = 0
+        self.rejected = 0
+        self.inserted = 0
+        self.batches = 0
+        self.flush_errors = 0
+        self._latencies_ms: Deque[float] = deque(maxlen=window)
+
+    def record_flush(self, enqueued_at: List[float], now: float) -> None:
+        self.batches += 1
+        self.inserted += len(enqueued_at)
+        self._latencies_ms.extend((now - t) * 1000.0 for t in enqueued_at)
+
+    def snapshot(self, pending: int = 0) -> Dict:
+        uptime = time.monotonic() - self.started
+        latencies = sorted(self._latencies_ms)
+
+        def pct(q: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(q * len(latencies)))], 3)
+
+        return {
+            "uptime_s": round(uptime, 3),
+            "received": self.received,
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "inserted": self.inserted,
+            "pending": pending,
+            "batches": self.batches,
+            "flush_errors": self.flush_errors,
+            "inserted_per_s": round(self.inserted / uptime, 3) if uptime > 0 else 0.0,
+            "avg_batch_rows": round(self.inserted / self.batches, 3) if self.batches else 0.0,
+            "latency_ms_p50": pct(0.50),
+            "latency_ms_p95": pct(0.95),
+            "latency_ms_max": round(latencies[-1], 3) if latencies else None,
+        }
+
+
+class SignalBatcher:
+    """
+    Buffer de señales con flush en lote por tiempo o por tamaño.
+
+    La inserción (bloqueante, psycopg) se ejecuta en un hilo del executor para
+    no parar el event loop. Si falla, las filas vuelven al buffer y se
+    reintentan en el siguiente flush; con más de max_pending filas pendientes
+    add() rechaza nuevas señales (el servidor responde 503).
+    """
+
+    def __init__(
+        self,
+        insert_fn: Callable[[List[Tuple]], None] = insert_signals,
+        flush_interval_ms: int = 200,
+        max_rows: int = 500,
+        max_pending: int = 50000,
+        stats: Optional[WebhookStats] = None,
+    ):
+        self.insert_fn = insert_fn
+        self.flush_interval_s = flush_interval_ms / 1000.0
+        self.max_rows = max_rows
+        self.max_pending = max_pending
+        self.stats = stats or WebhookStats()
+        self._buffer: List[Tuple[Signal, float]] = []
+        self._full = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    def add(self, signal: Signal) -> bool:
+        if len(self._buffer) >= self.max_pending:
+            return False
+        self._buffer.append((signal, time.monotonic()))
+        if len(self._buffer) >= self.max_rows:
+            self._full.set()
+        return True
+
+    async def flush(self) -> int:
+        async with self._lock:
+            if not self._buffer:
+                return 0
+            batch = self._buffer[: self.max_rows]
+            del self._buffer[: len(batch)]
+            rows = [signal.as_row() for signal, _ in batch]
+            loop = asyncio.get_running_loop()
+            try:
+                await loop.run_in_executor(None, self.insert_fn, rows)
+            except Exception as exc:
+                self.stats.flush_errors += 1
+                self._buffer[:0] = batch
+                logger.error("Error insertando %d señales: %s", len(rows), exc, exc_info=True)
+                return 0
+            self.stats.record_flush([t for _, t in batch], time.monotonic())
+            return len(rows)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._full.wait(), timeout=self.flush_interval_s)
+            except asyncio.TimeoutError:
+                pass
+            self._full.clear()
+            await self.flush()
+            while len(self._buffer) >= self.max_rows:
+                if not await self.flush():
+                    break
+
+    def start(self) -> None:
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        while self._buffer:
+            if not await self.flush():
+                break
+
+
+class WebhookServer:
+    """Servidor HTTP/1.1 mínimo sobre asyncio.start_server."""
+
+    def __init__(
+        self,
+        batcher: SignalBatcher,
+        host: str = "127.0.0.1",
+        port: int = 8088,
+        secret: Optional[str] = None,
+        default_strategy: str = "tradingview",
+    ):
+        self.batcher = batcher
+        self.stats = batcher.stats
+        self.host = host
+        self.port = port
+        self.secret = secret
+        self.default_strategy = default_strategy
+        self._server: Optional[asyncio.base_events.Server] = None
+
+    async def start(self) -> None:
+        self.batcher.start()
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info("Webhook TradingView escuchando en http://%s:%d/webhook", self.host, self.port)
+
+    async def stop(self) -> None:
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+        await self.batcher.stop()
+
+    async def serve_forever(self) -> None:
+        await self.start()
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.stop()
+
+    def _accept(self, body: bytes) -> Tuple[int, Dict]:
+        self.stats.received += 1
+        try:
+            signal = parse_alert(json.loads(body or b"null"), self.default_strategy, self.secret)
+        except (AlertError, json.JSONDecodeError, UnicodeDecodeError) as exc:
+            self.stats.rejected += 1
+            return 400, {"error": str(exc)}
+        if not self.batcher.add(signal):
+            self.stats.rejected += 1
+            return 503, {"error": "buffer lleno"}
+        self.stats.accepted += 1
+        return 202, {"status": "queued"}
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length") or 0)
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, 413, {"error": "cuerpo demasiado grande"}, False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                path = path.split("?", 1)[0]
+                if method == "POST" and path in ("/webhook", "/"):
+                    status, response = self._accept(body)
+                elif method == "GET" and path == "/stats":
+                    status, response = 200, self.stats.snapshot(pending=len(self.batcher))
+                elif method == "GET" and path == "/health":
+                    status, response = 200, {"status": "ok"}
+                else:
+                    status, response = 404, {"error": "not found"}
+
+                keep_alive = headers.get("connection", "").lower() != "close"
+                await self._respond(writer, status, response, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _respond(writer, status: int, body: Dict, keep_alive: bool) -> None:
+        reasons = {200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found",
+                   413: "Payload Too Large", 503: "Service Unavailable"}
+        payload = json.dumps(body).encode("utf-8")
+        head = (
+            f"HTTP/1.1 {status} {reasons.get(status, '')}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(payload)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + payload)
+        await writer.drain()
@@ -1,21 +1,212 @@
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+
 import psycopg
+from psycopg import sql
 from psycopg.rows import dict_row
+from psycopg.types.json import JsonbDumper
 from .db import db_session
 
-def execute(query, params=None):
+# Los dict (columnas meta/payload JSONB) se envían como jsonb
+psycopg.adapters.register_dumper(dict, JsonbDumper)
+
+# Conexión de la transacción en curso (ver transaction()); None fuera de ella.
+_current_conn = ContextVar("desk_grade_transaction_conn", default=None)
+
+# Sentencias enviadas por este módulo desde el arranque (todos los hilos); ver query_count().
+_query_lock = threading.Lock()
+_query_total = 0
+
+
+def _count_query():
+    global _query_total
+    with _query_lock:
+        _query_total += 1
+
+
+class QueryCount:
+    """Sentencias enviadas entre la creación del contador y stop() (o ahora)."""
+
+    def __init__(self):
+        self._start = _query_total
+        self._end = None
+
+    def stop(self):
+        self._end = _query_total
+
+    @property
+    def value(self):
+        end = self._end if self._end is not None else _query_total
+        return end - self._start
+
+
+@contextmanager
+def query_count():
+    """
+    Cuenta las sentencias enviadas por execute/execute_many/copy_rows/fetch_*
+    dentro del bloque, incluidas las de otros hilos (modo threads del ciclo).
+
+    Una llamada a execute_many o copy_rows cuenta como una sentencia.
+    """
+    counter = QueryCount()
+    try:
+        yield counter
+    finally:
+        counter.stop()
+
+
+@contextmanager
+def _connection():
+    conn = _current_conn.get()
+    if conn is not None:
+        yield conn
+        return
     with db_session() as conn:
+        yield conn
+
+def execute(query, params=None):
+    _count_query()
+    with _connection() as conn:
         with conn.cursor() as cur:
             cur.execute(query, params or ())
-            conn.commit()
+            if _current_conn.get() is None:
+                conn.commit()
+
+def execute_many(query, params_seq):
+    """Ejecuta la misma sentencia para cada tupla de parámetros (pipeline de psycopg)."""
+    _count_query()
+    with _connection() as conn:
+        with conn.cursor() as cur:
+            cur.executemany(query, params_seq)
+            if _current_conn.get() is None:
+                conn.commit()
+
+def copy_rows(table, columns, rows, types=None):
+    """
+    Carga tuplas con COPY FROM STDIN (mucho más rápido que INSERT por fila).
+
+    Con types (nombres de tipo de Postgres, uno por columna) se usa el formato
+    binario, que evita formatear cada valor como texto.
+    """
+    _count_query()
+    statement = sql.SQL("COPY {} ({}) FROM STDIN{}").format(
+        sql.Identifier(table),
+        sql.SQL(", ").join(sql.Identifier(c) for c in columns),
+        sql.SQL(" (FORMAT BINARY)" if types else ""),
+    )
+    with _connection() as conn:
+        with conn.cursor() as cur:
+            with cur.copy(statement) as copy:
+                if types:
+                    copy.set_types(types)
+                for row in rows:
+                    copy.write_row(row)
+            if _current_conn.get() is None:
+                conn.commit()
 
 def fetch_all(query, params=None):
-    with db_session() as conn:
+    _count_query()
+    with _connection() as conn:
         with conn.cursor(row_factory=dict_row) as cur:
             cur.execute(query, params or ())
             return cur.fetchall()
 
 def fetch_one(query, params=None):
-    with db_session() as conn:
+    _count_query()
+    with _connection() as conn:
         with conn.cursor(row_factory=dict_row) as cur:
             cur.execute(query, params or ())
             return cur.fetchone()
+
+@contextmanager
+def transaction():
+    """
+    Agrupa las llamadas a execute/fetch_* del bloque en una única transacción.
+
+    Dentro del bloque todas las funciones de este módulo usan la misma conexión
+    y no hacen commit; el commit se hace al salir (rollback si hay excepción).
+    Los bloques anidados se convierten en savepoints. El contexto es por hilo.
+    """
+    conn = _current_conn.get()
+    if conn is not None:
+        with conn.transaction():
+            yield
+        return
+
+    with db_session() as conn:
+        token = _current_conn.set(conn)
+        try:
+            with conn.transaction():
+                yield
+        finally:
+            _current_conn.reset(token)
+
+def notify(channel, payload=""):
+    """Envía un NOTIFY de Postgres (se entrega al hacer commit)."""
+    execute("SELECT pg_notify(%s, %s)", (channel, payload))
+
+def listen(channel, timeout=None):
+    """
+    Escucha un canal de Postgres (LISTEN) y devuelve los payloads recibidos.
+
+    Generador bloqueante sobre una conexión dedicada en autocommit. Con timeout
+    (segundos) termina si no llega ninguna notificación en ese intervalo.
+    """
+    with db_session() as conn:
+        conn.autocommit = True
+        conn.execute(sql.SQL("LISTEN {}").format(sql.Identifier(channel)))
+        for notification in conn.notifies(timeout=timeout):
+            yield notification.payload
+
+class Subscription:
+    """LISTEN abierto sobre una conexión dedicada (ver subscribe())."""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def wait(self, timeout=None):
+        """
+        Devuelve los payloads pendientes desde la última llamada, incluidos los
+        que llegaron mientras no se esperaba. Si no hay ninguno bloquea hasta
+        el primero o hasta timeout (lista vacía).
+        """
+        payloads = [n.payload for n in self._conn.notifies(timeout=timeout, stop_after=1)]
+        if payloads:
+            payloads.extend(n.payload for n in self._conn.notifies(timeout=0))
+        return payloads
+
+
+@contextmanager
+def subscribe(channel):
+    """
+    Mantiene un LISTEN abierto durante el contexto y devuelve una Subscription.
+
+    A diferencia de listen(), la conexión no se cierra entre esperas: las
+    notificaciones enviadas mientras el proceso hace otra cosa (un ciclo)
+    quedan en cola y las entrega la siguiente Subscription.wait().
+    """
+    with db_session() as conn:
+        conn.autocommit = True
+        conn.execute(sql.SQL("LISTEN {}").format(sql.Identifier(channel)))
+        yield Subscription(conn)
+
+
+@contextmanager
+def advisory_lock(key1, key2):
+    """
+    Intenta tomar un advisory lock de sesión (pg_try_advisory_lock) y lo
+    mantiene mientras dure el contexto. Devuelve True si se obtuvo.
+
+    El lock vive en una conexión dedicada; se libera al salir (o al cerrarse
+    la conexión si el proceso muere).
+    """
+    with db_session() as conn:
+        conn.autocommit = True
+        row = conn.execute("SELECT pg_try_advisory_lock(%s, %s)", (key1, key2)).fetchone()
+        acquired = bool(row[0])
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                conn.execute("SELECT pg_advisory_unlock(%s, %s)", (key1, key2))
@@ -0,0 +1,224 @@
+"""
+Checkpoints de ciclo: cycle_id + marcadores de paso completado.
+
+Un ciclo que se interrumpe (caída del proceso entre pasos) queda en estado
+RUNNING; el siguiente arranque lo reanuda en el primer paso incompleto en lugar
+de repetir los ya hechos. Las escrituras con efectos (orders, fills, journal)
+usan claves idempotentes derivadas del cycle_id, de modo que repetir un paso a
+medias no duplica nada.
+
+El proceso que ejecuta un ciclo mantiene un advisory lock de sesión sobre su
+cycle_id mientras dura: un ciclo RUNNING cuyo lock está tomado sigue vivo en
+otro proceso (scheduler + ejecución manual, varias réplicas) y no se reanuda.
+Si el proceso muere, la conexión se cierra y el lock queda libre.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import zlib
+from contextlib import ExitStack
+from typing import Optional, Set, Tuple
+
+from . import api
+
+logger = logging.getLogger(__name__)
+
+# Ciclos RUNNING más antiguos que esto no se reanudan (se marcan ABANDONED)
+RESUME_MAX_AGE_MINUTES = int(os.getenv("CYCLE_RESUME_MAX_AGE_MINUTES", "60"))
+
+# Namespace (int32) para los advisory locks de ciclo: pg_try_advisory_lock(ns, crc32(cycle_id))
+CYCLE_LOCK_NAMESPACE = zlib.crc32(b"desk_grade.cycle_run") & 0x7FFFFFFF
+
+
+def cycle_lock_key(cycle_id: str) -> Tuple[int, int]:
+    """Clave (int32, int32) del advisory lock de un ciclo."""
+    return CYCLE_LOCK_NAMESPACE, zlib.crc32(str(cycle_id).encode("utf-8")) & 0x7FFFFFFF
+
+
+def _try_lock(cycle_id: str) -> Optional[ExitStack]:
+    """Toma el lock del ciclo; devuelve el ExitStack que lo libera, o None si está ocupado."""
+    stack = ExitStack()
+    try:
+        acquired = stack.enter_context(api.advisory_lock(*cycle_lock_key(cycle_id)))
+    except BaseException:
+        stack.close()
+        raise
+    if not acquired:
+        stack.close()
+        return None
+    return stack
+
+
+def idempotency_key(cycle_id: str, step: str, *parts: str) -> str:
+    """Clave estable para una escritura de un paso concreto de un ciclo."""
+    return ":".join([str(cycle_id), step, *[str(p) for p in parts]])
+
+
+class CycleCheckpoint:
+    """
+    Estado persistido de un ciclo (tablas cycle_runs / cycle_steps).
+
+    El de start_or_resume lleva el advisory lock del ciclo: usarlo como context
+    manager (o llamar a release()) para soltarlo al terminar.
+    """
+
+    def __init__(
+        self,
+        cycle_id: str,
+        kind: str,
+        completed: Set[str],
+        resumed: bool,
+        lock: Optional[ExitStack] = None,
+    ) -> None:
+        self.cycle_id = cycle_id
+        self.kind = kind
+        self.completed = completed
+        self.resumed = resumed
+        self._lock = lock
+
+    def __enter__(self) -> "CycleCheckpoint":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.release()
+
+    def release(self) -> None:
+        """Suelta el advisory lock del ciclo (idempotente)."""
+        if self._lock is not None:
+            self._lock.close()
+            self._lock = None
+
+    @classmethod
+    def start_or_resume(
+        cls,
+        cycle_id: Optional[str] = None,
+        kind: str = "risk_cycle",
+    ) -> "CycleCheckpoint":
+        """
+        Reanuda el ciclo indicado (o el último RUNNING reciente del mismo tipo
+        que no esté en curso en otro proceso) o crea uno nuevo si no hay nada
+        pendiente. El checkpoint devuelto tiene tomado el lock del ciclo.
+
+        Con cycle_id explícito, si otro proceso lo está ejecutando se lanza
+        RuntimeError.
+        """
+        lock: Optional[ExitStack] = None
+        try:
+            with api.transaction():
+                if cycle_id is None:
+                    cycle_id, lock = cls._resume_candidate(kind)
+                    if cycle_id is None:
+                        row = api.fetch_one(
+                            """
+                            INSERT INTO cycle_runs (kind)
+                            VALUES (%s)
+                            RETURNING cycle_id
+                            """,
+                            (kind,),
+                        )
+                        # El lock se toma antes del commit: ningún otro proceso
+                        # llega a ver el ciclo RUNNING sin lock
+                        lock = _try_lock(str(row["cycle_id"]))
+                        return cls(str(row["cycle_id"]), kind, set(), resumed=False, lock=lock)
+                else:
+                    lock = _try_lock(cycle_id)
+                    if lock is None:
+                        raise RuntimeError(f"Ciclo {cycle_id} en curso en otro proceso")
+                    api.execute(
+                        """
+                        INSERT INTO cycle_runs (cycle_id, kind)
+                        VALUES (%s, %s)
+                        ON CONFLICT (cycle_id) DO NOTHING
+                        """,
+                        (cycle_id, kind),
+                    )
+
+                steps = api.fetch_all(
+                    """
+                    SELECT step
+                    FROM cycle_steps
+                    WHERE cycle_id = %s
+                    """,
+                    (cycle_id,),
+                )
+        except BaseException:
+            if lock is not None:
+                lock.close()
+            raise
+
+        completed = {r["step"] for r in steps}
+        return cls(str(cycle_id), kind, completed, resumed=bool(completed), lock=lock)
+
+    @staticmethod
+    def _resume_candidate(kind: str) -> Tuple[Optional[str], Optional[ExitStack]]:
+        """
+        Ciclo RUNNING reciente más nuevo cuyo lock está libre (el proceso que lo
+        ejecutaba murió), con el lock ya tomado; (None, None) si no hay.
+        """
+        api.execute(
+            """
+            UPDATE cycle_runs
+            SET status = 'ABANDONED',
+                finished_at = NOW()
+            WHERE kind = %s
+              AND status = 'RUNNING'
+              AND started_at < NOW() - make_interval(mins => %s)
+            """,
+            (kind, RESUME_MAX_AGE_MINUTES),
+        )
+        rows = api.fetch_all(
+            """
+            SELECT cycle_id
+            FROM cycle_runs
+            WHERE kind = %s
+              AND status = 'RUNNING'
+            ORDER BY started_at DESC
+            """,
+            (kind,),
+        )
+        for row in rows:
+            candidate = str(row["cycle_id"])
+            lock = _try_lock(candidate)
+            if lock is None:
+                logger.info("Ciclo %s en curso en otro proceso, no se reanuda", candidate)
+                continue
+            # Pudo terminar entre la consulta y el lock
+            status = api.fetch_one(
+                "SELECT status FROM cycle_runs WHERE cycle_id = %s",
+                (candidate,),
+            )
+            if status and status["status"] == "RUNNING":
+                return candidate, lock
+            lock.close()
+        return None, None
+
+    def is_done(self, step: str) -> bool:
+        return step in self.completed
+
+    def mark_done(self, step: str) -> None:
+        api.execute(
+            """
+            INSERT INTO cycle_steps (cycle_id, step)
+            VALUES (%s, %s)
+            ON CONFLICT (cycle_id, step) DO NOTHING
+            """,
+            (self.cycle_id, step),
+        )
+        self.completed.add(step)
+
+    def finish(self) -> None:
+        api.execute(
+            """
+            UPDATE cycle_runs
+            SET status = 'COMPLETED',
+                finished_at = NOW()
+            WHERE cycle_id = %s
+            """,
+            (self.cycle_id,),
+        )
+
+    def key(self, step: str, *parts: str) -> str:
+        """Atajo de idempotency_key para este ciclo."""
+        return idempotency_key(self.cycle_id, step, *parts)
@@ -33,6 +33,11 @@ def get_config() -> dict:
             "paper_trading": os.getenv("PAPER_TRADING", "true").lower() == "true",
             "strategy_id": os.getenv("STRATEGY_ID", "baseline"),
         },
+        "cycle": {
+            "shards": int(os.getenv("CYCLE_SHARDS", str(os.cpu_count() or 1))),
+            "execution_mode": os.getenv("CYCLE_EXECUTION_MODE", "sequential").lower(),
+            "max_workers": int(os.getenv("CYCLE_MAX_WORKERS", "8")),
+        },
         "logging": {
             "level": os.getenv("LOG_LEVEL", "INFO").upper(),
         },
@@ -0,0 +1,112 @@
+"""
+Ejecución de trabajo por clave (p. ej. por símbolo) en serie o en un pool de hilos.
+
+Garantías:
+- Los elementos con la misma clave se ejecutan en serie y en el orden recibido.
+- Claves distintas pueden ejecutarse en paralelo (modo "threads").
+- Un error en una clave no aborta las demás: se recoge y se devuelve.
+
+En modo "threads" la ocupación del pool se publica en desk_grade.metrics
+(hilos, hilos ocupados, segundos ocupados y utilización de la última ejecución).
+"""
+
+from __future__ import annotations
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Hashable, Iterable, List, TypeVar
+
+from desk_grade import metrics
+
+T = TypeVar("T")
+K = TypeVar("K", bound=Hashable)
+
+MODE_SEQUENTIAL = "sequential"
+MODE_THREADS = "threads"
+EXECUTION_MODES = (MODE_SEQUENTIAL, MODE_THREADS)
+
+
+def group_by_key(items: Iterable[T], key: Callable[[T], K]) -> Dict[K, List[T]]:
+    """Agrupa elementos por clave conservando el orden de aparición."""
+    groups: Dict[K, List[T]] = {}
+    for item in items:
+        groups.setdefault(key(item), []).append(item)
+    return groups
+
+
+def _run_group(items: List[T], fn: Callable[[T], None]) -> None:
+    for item in items:
+        fn(item)
+
+
+def _run_group_tracked(items: List[T], fn: Callable[[T], None]) -> float:
+    """_run_group contando el hilo como ocupado; devuelve los segundos ocupados."""
+    metrics.POOL_BUSY.inc()
+    start = time.perf_counter()
+    try:
+        _run_group(items, fn)
+    finally:
+        busy = time.perf_counter() - start
+        metrics.POOL_BUSY.dec()
+        metrics.POOL_BUSY_SECONDS.inc(busy)
+    return busy
+
+
+def run_per_key(
+    items: Iterable[T],
+    key: Callable[[T], K],
+    fn: Callable[[T], None],
+    *,
+    mode: str = MODE_SEQUENTIAL,
+    max_workers: int = 8,
+) -> Dict[K, Exception]:
+    """
+    Aplica fn a cada elemento, agrupando por clave.
+
+    Si un elemento falla, se omiten los restantes de su misma clave (para no
+    romper el orden) y el error queda registrado para esa clave.
+
+    Args:
+        items: Elementos a procesar.
+        key: Función que devuelve la clave de orden (p. ej. el símbolo).
+        fn: Trabajo a ejecutar por elemento.
+        mode: "sequential" o "threads".
+        max_workers: Tamaño máximo del pool en modo "threads".
+
+    Returns:
+        Diccionario clave → excepción para las claves que fallaron.
+    """
+    if mode not in EXECUTION_MODES:
+        raise ValueError(f"Modo de ejecución inválido: {mode}")
+
+    groups = group_by_key(items, key)
+    errors: Dict[K, Exception] = {}
+
+    if mode == MODE_SEQUENTIAL or max_workers <= 1 or len(groups) <= 1:
+        for k, group in groups.items():
+            try:
+                _run_group(group, fn)
+            except Exception as exc:
+                errors[k] = exc
+        return errors
+
+    workers = min(max_workers, len(groups))
+    metrics.POOL_WORKERS.inc(workers)
+    start = time.perf_counter()
+    busy = 0.0
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                k: pool.submit(_run_group_tracked, group, fn) for k, group in groups.items()
+            }
+            for k, future in futures.items():
+                try:
+                    busy += future.result()
+                except Exception as exc:
+                    errors[k] = exc
+    finally:
+        metrics.POOL_WORKERS.dec(workers)
+    elapsed = time.perf_counter() - start
+    if elapsed > 0:
+        metrics.POOL_UTILIZATION.set(busy / (workers * elapsed))
+    return errors
@@ -1,35 +1,299 @@
-"""Configuración de logging centralizada."""
+"""
+Configuración de logging centralizada.
 
+Por defecto los registros pasan por una cola (QueueHandler) y un hilo aparte
+(QueueListener) hace el formateo y la escritura, de modo que el hilo del ciclo
+sólo resuelve el mensaje y encola. Además:
+
+- LOG_FORMAT=json emite una línea JSON por registro, con los campos de
+  contexto (cycle_id, symbol, strategy_id; ver log_context) y los extra.
+- Los mensajes por debajo de WARNING se limitan por plantilla con un token
+  bucket (LOG_RATE_LIMIT_PER_S / LOG_RATE_LIMIT_BURST); el siguiente mensaje
+  que pasa lleva suppressed=N con los descartados.
+"""
+
+import atexit
+import copy
+import json
 import logging
+import multiprocessing.util
 import os
+import queue
 import sys
-from typing import Optional
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Callable, Dict, Iterator, Optional, TextIO, Tuple
 
 from dotenv import load_dotenv
 
 load_dotenv()
 
+DEFAULT_FORMAT = "%(asctime)s [%(levelname)8s] %(name)s - %(message)s"
+DEFAULT_DATEFMT = "%Y-%m-%d %H:%M:%S"
+LOG_FORMATS = ("text", "json")
+
+# Campos de contexto que se añaden a cada registro (en este orden en modo texto)
+CONTEXT_FIELDS = ("cycle_id", "strategy_id", "symbol")
+
+_log_context: ContextVar[Dict[str, object]] = ContextVar("desk_grade_log_context", default={})
+
+# Atributos propios de LogRecord: lo demás son extra del usuario
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {
+    "message",
+    "asctime",
+    "taskName",
+}
+
+_listener: Optional[QueueListener] = None
+
+
+# -------------------------
+# Contexto
+# -------------------------
+@contextmanager
+def log_context(**fields) -> Iterator[None]:
+    """Añade fields (p. ej. cycle_id, symbol) a todos los registros del bloque."""
+    token = _log_context.set({**_log_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _log_context.reset(token)
+
+
+def current_log_context() -> Dict[str, object]:
+    """Contexto actual, para propagarlo a hilos de un pool (no heredan ContextVar)."""
+    return dict(_log_context.get())
+
+
+class ContextFilter(logging.Filter):
+    """Copia el contexto de log_context al registro (en el hilo que emite)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        for key, value in _log_context.get().items():
+            if not hasattr(record, key):
+                setattr(record, key, value)
+        return True
+
+
+# -------------------------
+# Rate limiting
+# -------------------------
+class RateLimitFilter(logging.Filter):
+    """
+    Token bucket por (logger, plantilla del mensaje) para niveles < WARNING.
+
+    Avisos y errores pasan siempre. rate_per_s <= 0 desactiva el límite.
+    """
+
+    def __init__(
+        self,
+        rate_per_s: float,
+        burst: Optional[int] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        super().__init__()
+        self.rate = rate_per_s
+        self.burst = float(burst if burst is not None else max(1, int(rate_per_s)))
+        self._clock = clock
+        self._lock = threading.Lock()
+        # clave -> (tokens, último instante, descartados desde el último que pasó)
+        self._buckets: Dict[Tuple[str, object], Tuple[float, float, int]] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.rate <= 0 or record.levelno >= logging.WARNING:
+            return True
+        key = (record.name, record.msg)
+        now = self._clock()
+        with self._lock:
+            tokens, last, suppressed = self._buckets.get(key, (self.burst, now, 0))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            if tokens < 1.0:
+                self._buckets[key] = (tokens, now, suppressed + 1)
+                return False
+            self._buckets[key] = (tokens - 1.0, now, 0)
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+# -------------------------
+# Formatters
+# -------------------------
+def _extra_fields(record: logging.LogRecord) -> Dict[str, object]:
+    return {k: v for k, v in vars(record).items() if k not in _RECORD_ATTRS}
+
+
+class TextFormatter(logging.Formatter):
+    """Formato de texto clásico con el contexto y los extra al final: [cycle_id=… symbol=…]."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        fields = _extra_fields(record)
+        if not fields:
+            return text
+        ordered = [k for k in CONTEXT_FIELDS if k in fields]
+        ordered += sorted(k for k in fields if k not in CONTEXT_FIELDS)
+        suffix = " ".join(f"{k}={fields[k]}" for k in ordered)
+        head, sep, tail = text.partition("\n")
+        return f"{head} [{suffix}]{sep}{tail}"
+
+
+class JsonFormatter(logging.Formatter):
+    """Una línea JSON por registro: ts, level, logger, message, contexto y extra."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "thread": record.threadName,
+        }
+        payload.update(_extra_fields(record))
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            payload["exc"] = record.exc_text
+        if record.stack_info:
+            payload["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+# -------------------------
+# Cola
+# -------------------------
+class DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler que sólo resuelve el mensaje en el hilo que emite.
+
+    El QueueHandler estándar aplica el formatter antes de encolar; aquí el
+    formateo (fecha, JSON) lo hace el hilo del listener. La traza de una
+    excepción sí se serializa aquí: el traceback no puede cruzar de hilo.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def build_formatter(log_format: str = "text", format_string: Optional[str] = None):
+    if log_format not in LOG_FORMATS:
+        raise ValueError(f"LOG_FORMAT inválido: {log_format} (text o json)")
+    if log_format == "json":
+        return JsonFormatter()
+    return TextFormatter(format_string or DEFAULT_FORMAT, datefmt=DEFAULT_DATEFMT)
+
+
+def build_queue_logging(
+    stream: TextIO,
+    formatter: logging.Formatter,
+    rate_per_s: float = 0.0,
+    burst: Optional[int] = None,
+) -> Tuple[QueueHandler, QueueListener]:
+    """
+    Handler para el logger (encola) y listener (formatea y escribe en stream).
+
+    El listener no está arrancado; quien lo crea llama a start() y stop().
+    """
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    output = logging.StreamHandler(stream)
+    output.setFormatter(formatter)
+
+    handler = DeferredQueueHandler(log_queue)
+    handler.addFilter(RateLimitFilter(rate_per_s, burst))
+    handler.addFilter(ContextFilter())
+    listener = QueueListener(log_queue, output, respect_handler_level=True)
+    return handler, listener
+
+
+def _stop_listener() -> None:
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def _restart_listener_in_child() -> None:
+    """
+    Tras un fork el hilo del listener no existe en el hijo: se arranca otro.
+
+    Se descartan los registros que el padre tenía en cola (ya los escribe él).
+    Los procesos de multiprocessing salen con os._exit, sin atexit: la cola se
+    vacía con un finalizador de multiprocessing.
+    """
+    global _listener
+    if _listener is None:
+        return
+    log_queue = _listener.queue
+    while True:
+        try:
+            log_queue.get_nowait()
+        except queue.Empty:
+            break
+    _listener = QueueListener(log_queue, *_listener.handlers, respect_handler_level=True)
+    _listener.start()
+    multiprocessing.util.Finalize(None, _stop_listener, exitpriority=0)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_listener_in_child)
+
 
 def setup_logging(
     level: Optional[str] = None,
     format_string: Optional[str] = None,
+    log_format: Optional[str] = None,
+    use_queue: Optional[bool] = None,
 ) -> None:
     """
-    Configura el logging del sistema.
+    Configura el logging del sistema (no hace nada si el root ya tiene handlers).
 
     Args:
         level: Nivel de logging (DEBUG, INFO, WARNING, ERROR). Si es None, se lee de LOG_LEVEL.
-        format_string: Formato personalizado. Si es None, usa un formato por defecto.
+        format_string: Formato personalizado (modo texto). Si es None, usa un formato por defecto.
+        log_format: "text" o "json". Si es None, se lee de LOG_FORMAT.
+        use_queue: Escribir desde un hilo aparte. Si es None, se lee de LOG_QUEUE.
     """
+    global _listener
+
+    root = logging.getLogger()
+    if root.handlers:
+        return
+
     if level is None:
         level = os.getenv("LOG_LEVEL", "INFO").upper()
+    if log_format is None:
+        log_format = os.getenv("LOG_FORMAT", "text").lower()
+    if use_queue is None:
+        use_queue = os.getenv("LOG_QUEUE", "true").lower() == "true"
+    rate_per_s = float(os.getenv("LOG_RATE_LIMIT_PER_S", "20"))
+    burst = int(os.getenv("LOG_RATE_LIMIT_BURST", "100"))
+
+    formatter = build_formatter(log_format, format_string)
+    root.setLevel(getattr(logging, level, logging.INFO))
 
-    if format_string is None:
-        format_string = "%(asctime)s [%(levelname)8s] %(name)s - %(message)s"
+    if not use_queue:
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(formatter)
+        handler.addFilter(RateLimitFilter(rate_per_s, burst))
+        handler.addFilter(ContextFilter())
+        root.addHandler(handler)
+        return
 
-    logging.basicConfig(
-        level=getattr(logging, level, logging.INFO),
-        format=format_string,
-        stream=sys.stdout,
-        datefmt="%Y-%m-%d %H:%M:%S",
-    )
+    handler, _listener = build_queue_logging(sys.stdout, formatter, rate_per_s, burst)
+    root.addHandler(handler)
+    _listener.start()
+    # Vaciar la cola al salir: los últimos mensajes no se pierden
+    atexit.register(_stop_listener)
@@ -0,0 +1,365 @@
+"""
+Métricas del proceso en formato de exposición de Prometheus (texto 0.0.4).
+
+Contadores, gauges e histogramas con etiquetas, en memoria y sin dependencias
+externas. start_metrics_server() sirve GET /metrics desde un hilo daemon; el
+scheduler lo arranca en METRICS_PORT y Prometheus lo recoge (ver
+infra/prometheus.yml y el dashboard grafana/dashboards/cycle_performance.json).
+
+Las métricas del sistema están definidas al final del módulo: el ciclo de
+riesgo, el executor y el loader de ohlcv las actualizan siempre; sólo se
+exponen si el proceso arranca el servidor.
+"""
+
+from __future__ import annotations
+
+import bisect
+import logging
+import math
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_METRICS_PORT = int(os.getenv("METRICS_PORT", "9108"))
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    """
+    Base: nombre, ayuda, nombres de etiqueta y series por valores de etiqueta.
+
+    Con etiquetas se opera sobre metric.labels("valor", ...); sin etiquetas,
+    sobre la propia métrica.
+    """
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def labels(self, *values: object) -> "_Series":
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} espera etiquetas {self.labelnames}, recibió {values}")
+        return _Series(self, tuple(str(v) for v in values))
+
+    def _unlabelled(self) -> "_Series":
+        if self.labelnames:
+            raise ValueError(f"{self.name} tiene etiquetas {self.labelnames}: usar labels()")
+        return _Series(self, ())
+
+    def _samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        with self._lock:
+            samples = list(self._samples())
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+            *samples,
+        ]
+
+
+class _Series:
+    """Una serie (métrica + valores de etiqueta); delega en la métrica."""
+
+    __slots__ = ("_metric", "_key")
+
+    def __init__(self, metric: _Metric, key: LabelValues) -> None:
+        self._metric = metric
+        self._key = key
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._metric._inc(self._key, amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._metric._inc(self._key, -amount)
+
+    def set(self, value: float) -> None:
+        self._metric._set(self._key, value)
+
+    def observe(self, value: float) -> None:
+        self._metric._observe(self._key, value)
+
+    def value(self) -> float:
+        return self._metric._value(self._key)
+
+
+class _ScalarMetric(_Metric):
+    """Contadores y gauges: un float por serie."""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def _inc(self, key: LabelValues, amount: float) -> None:
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def _value(self, key: LabelValues) -> float:
+        with self._lock:
+            return self._values.get(key, 0.0)
+
+    def value(self) -> float:
+        return self._unlabelled().value()
+
+    def _samples(self) -> Iterable[str]:
+        for key, value in sorted(self._values.items()):
+            yield f"{self.name}{_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Counter(_ScalarMetric):
+    kind = "counter"
+
+    def _inc(self, key: LabelValues, amount: float) -> None:
+        if amount < 0:
+            raise ValueError("Un contador no puede decrecer")
+        super()._inc(key, amount)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._unlabelled().inc(amount)
+
+    def total(self) -> float:
+        """Suma de todas las series (p. ej. fills de cualquier lado)."""
+        with self._lock:
+            return sum(self._values.values())
+
+
+class Gauge(_ScalarMetric):
+    kind = "gauge"
+
+    def _set(self, key: LabelValues, value: float) -> None:
+        with self._lock:
+            self._values[key] = float(value)
+
+    def set(self, value: float) -> None:
+        self._unlabelled().set(value)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._unlabelled().inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._unlabelled().dec(amount)
+
+
+class Histogram(_Metric):
+    """Histograma acumulado con buckets fijos (le=…, +Inf), _sum y _count."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = (0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0),
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(float(b) for b in buckets))
+        # clave -> (cuentas por bucket sin acumular, +Inf al final; suma)
+        self._series: Dict[LabelValues, Tuple[List[int], float]] = {}
+
+    def _observe(self, key: LabelValues, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._series.get(key, ([0] * (len(self.buckets) + 1), 0.0))
+            counts[index] += 1
+            self._series[key] = (counts, total + value)
+
+    def _value(self, key: LabelValues) -> float:
+        """Número de observaciones de la serie."""
+        with self._lock:
+            series = self._series.get(key)
+        return float(sum(series[0])) if series else 0.0
+
+    def observe(self, value: float) -> None:
+        self._unlabelled().observe(value)
+
+    def count(self) -> float:
+        return self._unlabelled().value()
+
+    def _samples(self) -> Iterable[str]:
+        for key, (counts, total) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, n in zip(self.buckets + (math.inf,), counts):
+                cumulative += n
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, key)} {_format_value(total)}"
+            yield f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}"
+
+
+class Registry:
+    """Conjunto de métricas que se exponen juntas."""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Métrica duplicada: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def _handler_for(registry: Registry):
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:  # noqa: N802 (API de http.server)
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args) -> None:
+            # Un scrape cada 15s no debe llenar el log del proceso
+            logger.debug("metrics %s", format % args)
+
+    return MetricsHandler
+
+
+def start_metrics_server(
+    port: int = DEFAULT_METRICS_PORT,
+    host: str = "0.0.0.0",
+    registry: Optional[Registry] = None,
+) -> ThreadingHTTPServer:
+    """
+    Sirve GET /metrics en un hilo daemon y devuelve el servidor.
+
+    port=0 elige un puerto libre (server.server_address[1]); para pararlo,
+    server.shutdown().
+    """
+    server = ThreadingHTTPServer((host, port), _handler_for(registry or REGISTRY))
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True)
+    thread.start()
+    logger.info("Métricas en http://%s:%d/metrics", host, server.server_address[1])
+    return server
+
+
+def _register(metric):
+    return REGISTRY.register(metric)
+
+
+# -------------------------
+# Métricas del sistema
+# -------------------------
+CYCLE_DURATION = _register(
+    Histogram(
+        "desk_grade_cycle_duration_seconds",
+        "Duración del ciclo de riesgo completo",
+        ["status"],
+        buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300),
+    )
+)
+STEP_DURATION = _register(
+    Histogram(
+        "desk_grade_cycle_step_duration_seconds",
+        "Duración de cada paso del ciclo (exits, journal, risk, entries)",
+        ["step"],
+        buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120),
+    )
+)
+CYCLE_QUERIES = _register(
+    Histogram(
+        "desk_grade_cycle_queries",
+        "Sentencias SQL por ciclo (desk_grade.api.query_count)",
+        buckets=(10, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 25000),
+    )
+)
+STEP_QUERIES = _register(
+    Gauge(
+        "desk_grade_cycle_step_queries",
+        "Sentencias SQL del paso en el último ciclo",
+        ["step"],
+    )
+)
+CYCLES_TOTAL = _register(
+    Counter("desk_grade_cycles_total", "Ciclos de riesgo ejecutados", ["status"])
+)
+LAST_SUCCESS = _register(
+    Gauge(
+        "desk_grade_cycle_last_success_timestamp_seconds",
+        "Instante Unix del último ciclo completado sin error",
+    )
+)
+OPEN_TRADES = _register(
+    Gauge("desk_grade_open_trades", "Operaciones abiertas al evaluar exits en el último ciclo")
+)
+FILLS_TOTAL = _register(Counter("desk_grade_fills_total", "Fills PAPER escritos", ["side"]))
+CYCLE_FILLS = _register(
+    Histogram(
+        "desk_grade_cycle_fills",
+        "Fills PAPER escritos por ciclo",
+        buckets=(0, 1, 5, 10, 25, 50, 100, 250, 500, 1000),
+    )
+)
+POOL_WORKERS = _register(
+    Gauge("desk_grade_pool_workers", "Hilos del pool de run_per_key en curso (0 si no hay)")
+)
+POOL_BUSY = _register(
+    Gauge("desk_grade_pool_busy_workers", "Hilos del pool ejecutando trabajo ahora mismo")
+)
+POOL_BUSY_SECONDS = _register(
+    Counter(
+        "desk_grade_pool_busy_seconds_total",
+        "Segundos-hilo ocupados en el pool (utilización = rate / workers)",
+    )
+)
+POOL_UTILIZATION = _register(
+    Gauge(
+        "desk_grade_pool_utilization_ratio",
+        "Ocupación media del pool en la última ejecución (tiempo ocupado / hilos × duración)",
+    )
+)
+INGEST_ROWS = _register(
+    Counter(
+        "desk_grade_ingest_rows_total",
+        "Filas de ohlcv escritas (rows/s = rate)",
+        ["source", "timeframe"],
+    )
+)
@@ -0,0 +1,228 @@
+"""
+Captura de perfiles de un ciclo (cProfile + muestreo de pilas).
+
+profile_cycle() ejecuta una función (normalmente run_cycle) y deja en un
+directorio dos ficheros con la fecha y el cycle_id en el nombre:
+
+- <ts>_<cycle_id>.pstats: cProfile del hilo del ciclo y de los hilos que se
+  creen durante el ciclo (pool de CYCLE_EXECUTION_MODE=threads), fusionados.
+  Desde Python 3.12 cProfile usa sys.monitoring y sólo admite un profiler
+  activo por proceso: no se crean perfiles por hilo y el trabajo de los hilos
+  del pool queda sólo en el .collapsed.
+- <ts>_<cycle_id>.collapsed: pilas muestreadas cada PROFILE_SAMPLE_MS en formato
+  "frame;frame;frame N", la entrada de flamegraph.pl, speedscope o inferno.
+
+Sin dependencias externas; scripts.profile_view muestra las funciones con más
+tiempo acumulado.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+DEFAULT_PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+DEFAULT_SAMPLE_INTERVAL_S = float(os.getenv("PROFILE_SAMPLE_MS", "5")) / 1000.0
+
+# Un cProfile por hilo sólo es posible antes de sys.monitoring (3.12)
+PER_THREAD_PROFILES = sys.version_info < (3, 12)
+
+
+@dataclass(frozen=True)
+class ProfileArtifacts:
+    pstats_path: Path
+    collapsed_path: Path
+    elapsed_s: float
+    samples: int
+
+
+@dataclass(frozen=True)
+class ProfileSchedule:
+    """
+    Qué ciclos perfilar en un proceso de larga duración (scheduler).
+
+    every=0 desactiva; once=True perfila sólo el primer ciclo; si no, cada
+    every-ésimo ciclo (1 = todos).
+    """
+
+    every: int = 0
+    once: bool = False
+
+    @classmethod
+    def parse(cls, value: Optional[str]) -> "ProfileSchedule":
+        """'' / off → nada, 'once' → primer ciclo, N → cada N ciclos."""
+        value = (value or "").strip().lower()
+        if value in ("", "off", "false", "0"):
+            return cls()
+        if value == "once":
+            return cls(every=1, once=True)
+        if not value.isdigit():
+            raise ValueError(f"Valor de perfilado inválido: {value!r} (off, once o N)")
+        return cls(every=int(value))
+
+    def due(self, cycle_number: int) -> bool:
+        """cycle_number empieza en 1."""
+        if self.every <= 0:
+            return False
+        if self.once:
+            return cycle_number == 1
+        return cycle_number % self.every == 0
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", "?")
+    # ';' separa frames en el formato collapsed
+    return f"{module}:{code.co_qualname}".replace(";", ",")
+
+
+class StackSampler:
+    """
+    Muestrea las pilas de todos los hilos (salvo el propio) cada interval segundos.
+
+    Cada muestra se acumula como pila raíz→hoja precedida del nombre del hilo.
+    """
+
+    def __init__(self, interval: float = DEFAULT_SAMPLE_INTERVAL_S) -> None:
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _sample(self) -> None:
+        own = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            labels.append(names.get(ident, f"thread-{ident}").replace(";", ","))
+            self.stacks[";".join(reversed(labels))] += 1
+        self.samples += 1
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def write_collapsed(self, path: Path) -> None:
+        with open(path, "w", encoding="utf-8") as fh:
+            for stack, count in self.stacks.most_common():
+                fh.write(f"{stack} {count}\n")
+
+
+class _ThreadProfiles:
+    """Un cProfile por cada hilo nuevo creado mientras está instalado."""
+
+    def __init__(self) -> None:
+        self.profiles: List[cProfile.Profile] = []
+        self._lock = threading.Lock()
+
+    def hook(self, frame, event, arg):
+        # Primer evento del hilo: el profiler C sustituye a este hook
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Ya hay otro profiler activo: el hilo sigue sin perfil propio (y sin
+            # este hook, que si no se volvería a llamar en cada evento)
+            sys.setprofile(None)
+            return
+        with self._lock:
+            self.profiles.append(profile)
+
+    def install(self) -> None:
+        if PER_THREAD_PROFILES:
+            threading.setprofile(self.hook)
+
+    def uninstall(self) -> None:
+        threading.setprofile(None)
+
+
+def _artifact_stem(label: str, started: datetime) -> str:
+    safe = "".join(c if c.isalnum() or c in "-_" else "_" for c in label)
+    return f"{started.strftime('%Y%m%dT%H%M%SZ')}_{safe}"
+
+
+def profile_cycle(
+    fn: Callable[[], T],
+    output_dir: Optional[os.PathLike] = None,
+    label: Optional[Callable[[T], str]] = None,
+    sample_interval: float = DEFAULT_SAMPLE_INTERVAL_S,
+) -> Tuple[T, ProfileArtifacts]:
+    """
+    Ejecuta fn bajo cProfile y el muestreador y escribe .pstats y .collapsed.
+
+    label(resultado) da la etiqueta del fichero (por defecto str(resultado),
+    p. ej. el cycle_id que devuelve run_cycle). Si fn falla, los ficheros se
+    escriben igualmente con la etiqueta "failed" y la excepción se propaga.
+    """
+    out = Path(output_dir or DEFAULT_PROFILE_DIR)
+    out.mkdir(parents=True, exist_ok=True)
+    started = datetime.now(timezone.utc)
+
+    threads = _ThreadProfiles()
+    sampler = StackSampler(sample_interval)
+    profile = cProfile.Profile()
+
+    result = None
+    name = "failed"
+    sampler.start()  # antes de install(): el muestreador no se perfila
+    threads.install()
+    t0 = time.perf_counter()
+    profile.enable()
+    try:
+        result = fn()
+        name = label(result) if label else str(result)
+    finally:
+        profile.disable()
+        elapsed = time.perf_counter() - t0
+        sampler.stop()
+        threads.uninstall()
+
+        stem = _artifact_stem(name, started)
+        stats = pstats.Stats(profile)
+        for thread_profile in threads.profiles:
+            stats.add(thread_profile)
+        artifacts = ProfileArtifacts(
+            pstats_path=out / f"{stem}.pstats",
+            collapsed_path=out / f"{stem}.collapsed",
+            elapsed_s=elapsed,
+            samples=sampler.samples,
+        )
+        stats.dump_stats(artifacts.pstats_path)
+        sampler.write_collapsed(artifacts.collapsed_path)
+        logger.info(
+            "Perfil de %s (%.2fs, %d muestras): %s",
+            name,
+            elapsed,
+            sampler.samples,
+            artifacts.pstats_path,
+        )
+    return result, artifacts
@@ -0,0 +1,53 @@
+"""
+Particionado por hash de (strategy_id, symbol) para ejecutar el ciclo de riesgo
+en varios procesos.
+
+Cada shard se identifica por (index, count). Una operación pertenece a un único
+shard, calculado con un hash estable (CRC32), de modo que todos los procesos
+coinciden en el reparto sin coordinarse. Todos los workers deben usar el mismo
+número de shards.
+"""
+
+from __future__ import annotations
+
+import zlib
+from dataclasses import dataclass
+
+# Namespace (int32) para los advisory locks de shards: pg_try_advisory_lock(ns, index)
+SHARD_LOCK_NAMESPACE = zlib.crc32(b"desk_grade.cycle_shard") & 0x7FFFFFFF
+
+
+def shard_of(strategy_id: str, symbol: str, shard_count: int) -> int:
+    """
+    Devuelve el índice de shard [0, shard_count) para (strategy_id, symbol).
+
+    Usa CRC32 en lugar de hash() porque este último está aleatorizado por proceso.
+    """
+    if shard_count <= 0:
+        raise ValueError(f"shard_count debe ser positivo: {shard_count}")
+    key = f"{strategy_id}:{symbol.upper()}".encode("utf-8")
+    return zlib.crc32(key) % shard_count
+
+
+@dataclass(frozen=True)
+class ShardSpec:
+    """Partición de trabajo asignada a un worker."""
+
+    index: int
+    count: int
+
+    def __post_init__(self) -> None:
+        if self.count <= 0 or not 0 <= self.index < self.count:
+            raise ValueError(f"Shard inválido: index={self.index} count={self.count}")
+
+    @property
+    def lock_key(self) -> tuple[int, int]:
+        """Clave (namespace, index) del advisory lock de Postgres del shard."""
+        return SHARD_LOCK_NAMESPACE, self.index
+
+    def owns(self, strategy_id: str, symbol: str) -> bool:
+        """True si (strategy_id, symbol) pertenece a este shard."""
+        return shard_of(strategy_id, symbol, self.count) == self.index
+
+    def __str__(self) -> str:
+        return f"{self.index}/{self.count}"
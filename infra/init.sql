@@ -38,6 +38,23 @@ SELECT create_hypertable('ohlcv', 'ts', if_not_exists => TRUE);
 CREATE UNIQUE INDEX IF NOT EXISTS idx_ohlcv_unique ON ohlcv(symbol, ts, timeframe);
 CREATE INDEX IF NOT EXISTS idx_ohlcv_symbol_ts ON ohlcv(symbol, ts DESC);
 
+-- Barras en cuarentena (rechazadas por data_pipeline.validation)
+CREATE TABLE IF NOT EXISTS ohlcv_rejects (
+    id           UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    symbol       TEXT        NOT NULL,
+    ts           TIMESTAMPTZ,
+    open         DOUBLE PRECISION,
+    high         DOUBLE PRECISION,
+    low          DOUBLE PRECISION,
+    close        DOUBLE PRECISION,
+    volume       DOUBLE PRECISION,
+    timeframe    TEXT        NOT NULL,
+    source       TEXT,
+    reason       TEXT        NOT NULL, -- motivos separados por comas
+    rejected_at  TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+CREATE INDEX IF NOT EXISTS idx_ohlcv_rejects_symbol_ts ON ohlcv_rejects(symbol, ts DESC);
+
 -- Live signals
 CREATE TABLE IF NOT EXISTS signals_live (
     id           UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
@@ -63,6 +80,8 @@ CREATE TABLE IF NOT EXISTS orders (
     strategy_id     TEXT        NOT NULL,
     paper_trade     BOOLEAN     NOT NULL DEFAULT TRUE,
     parent_order_id UUID,
+    cycle_id        UUID,
+    idempotency_key TEXT,
     meta            JSONB       DEFAULT '{}'::jsonb
 );
 CREATE INDEX IF NOT EXISTS idx_orders_symbol_ts ON orders(symbol, ts DESC);
@@ -78,6 +97,7 @@ CREATE TABLE IF NOT EXISTS fills (
     qty         DOUBLE PRECISION NOT NULL,
     price       DOUBLE PRECISION NOT NULL,
     fee         DOUBLE PRECISION DEFAULT 0,
+    cycle_id    UUID,
     meta        JSONB       DEFAULT '{}'::jsonb
 );
 CREATE INDEX IF NOT EXISTS idx_fills_symbol_ts ON fills(symbol, ts DESC);
@@ -157,6 +177,26 @@ CREATE TABLE IF NOT EXISTS exposure_snapshots (
 );
 CREATE INDEX IF NOT EXISTS idx_exposure_symbol_ts ON exposure_snapshots(symbol, ts DESC);
 
+-- Exposición vigente por (estrategia, símbolo): se reescribe con cada cambio de positions
+-- y es la que leen los gates; exposure_snapshots queda sólo como histórico
+CREATE TABLE IF NOT EXISTS exposure_current (
+    strategy_id     TEXT        NOT NULL,
+    symbol          TEXT        NOT NULL,
+    qty             DOUBLE PRECISION NOT NULL,
+    price           DOUBLE PRECISION NOT NULL, -- precio del último cambio de la posición
+    net_exposure    DOUBLE PRECISION NOT NULL,
+    gross_exposure  DOUBLE PRECISION NOT NULL,
+    updated_at      TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (strategy_id, symbol)
+);
+
+-- Mapa símbolo → sector para los sector caps
+CREATE TABLE IF NOT EXISTS symbol_sectors (
+    symbol      TEXT        PRIMARY KEY,
+    sector      TEXT        NOT NULL,
+    updated_at  TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
 -- Correlation state
 CREATE TABLE IF NOT EXISTS correlation_state (
     id              UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
@@ -178,6 +218,24 @@ CREATE TABLE IF NOT EXISTS atr_cache (
 );
 CREATE UNIQUE INDEX IF NOT EXISTS idx_atr_cache_symbol_tf_ts ON atr_cache(symbol, timeframe, ts);
 
+-- Vol realizada (portfolio/volatility.py): estado EWMA vigente por símbolo y timeframe.
+-- *_var son varianzas por barra (se actualizan con cada barra nueva); *_vol, anualizadas.
+CREATE TABLE IF NOT EXISTS vol_cache (
+    symbol            TEXT        NOT NULL,
+    timeframe         TEXT        NOT NULL,
+    ts                TIMESTAMPTZ NOT NULL, -- última barra incorporada
+    close             DOUBLE PRECISION NOT NULL,
+    ewma_var          DOUBLE PRECISION NOT NULL,
+    parkinson_var     DOUBLE PRECISION NOT NULL,
+    garman_klass_var  DOUBLE PRECISION NOT NULL,
+    ewma_vol          DOUBLE PRECISION NOT NULL,
+    parkinson_vol     DOUBLE PRECISION NOT NULL,
+    garman_klass_vol  DOUBLE PRECISION NOT NULL,
+    n_bars            INTEGER     NOT NULL,
+    updated_at        TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (symbol, timeframe)
+);
+
 -- Trade state
 CREATE TABLE IF NOT EXISTS trade_state (
     id              UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
@@ -221,6 +279,7 @@ CREATE TABLE IF NOT EXISTS trade_journal (
     pnl_r           DOUBLE PRECISION NOT NULL,
     mae             DOUBLE PRECISION,
     mfe             DOUBLE PRECISION,
+    cycle_id        UUID,
     meta            JSONB       DEFAULT '{}'::jsonb
 );
 CREATE INDEX IF NOT EXISTS idx_trade_journal_symbol_ts ON trade_journal(symbol, exit_ts DESC);
@@ -249,6 +308,24 @@ CREATE TABLE IF NOT EXISTS job_queue (
 );
 CREATE INDEX IF NOT EXISTS idx_job_queue_status_scheduled ON job_queue(status, scheduled_for);
 
+-- Cycle checkpoints (reanudación de ciclos interrumpidos)
+CREATE TABLE IF NOT EXISTS cycle_runs (
+    cycle_id        UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    kind            TEXT        NOT NULL DEFAULT 'risk_cycle',
+    started_at      TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    finished_at     TIMESTAMPTZ,
+    status          TEXT        NOT NULL DEFAULT 'RUNNING', -- RUNNING/COMPLETED/ABANDONED
+    meta            JSONB       DEFAULT '{}'::jsonb
+);
+CREATE INDEX IF NOT EXISTS idx_cycle_runs_kind_status ON cycle_runs(kind, status, started_at DESC);
+
+CREATE TABLE IF NOT EXISTS cycle_steps (
+    cycle_id        UUID        NOT NULL REFERENCES cycle_runs(cycle_id),
+    step            TEXT        NOT NULL,
+    completed_at    TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (cycle_id, step)
+);
+
 -- Alerts
 CREATE TABLE IF NOT EXISTS alerts (
     id              UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
@@ -277,3 +354,48 @@ INSERT INTO cash_balances (currency, balance, available)
 SELECT 'USD', 10000, 10000
 WHERE NOT EXISTS (SELECT 1 FROM cash_balances);
 
+-- Migraciones incrementales para bases de datos ya inicializadas
+ALTER TABLE orders ADD COLUMN IF NOT EXISTS cycle_id UUID;
+ALTER TABLE orders ADD COLUMN IF NOT EXISTS idempotency_key TEXT;
+ALTER TABLE fills ADD COLUMN IF NOT EXISTS cycle_id UUID;
+ALTER TABLE trade_journal ADD COLUMN IF NOT EXISTS cycle_id UUID;
+-- Momento de la última escritura de cada barra (resample incremental)
+ALTER TABLE ohlcv ADD COLUMN IF NOT EXISTS ingested_at TIMESTAMPTZ NOT NULL DEFAULT now();
+CREATE INDEX IF NOT EXISTS idx_ohlcv_timeframe_ingested ON ohlcv(timeframe, ingested_at);
+
+-- Watermark del resample por (timeframe origen, timeframe destino)
+CREATE TABLE IF NOT EXISTS resample_state (
+    source_timeframe TEXT        NOT NULL,
+    timeframe        TEXT        NOT NULL,
+    watermark        TIMESTAMPTZ NOT NULL,
+    updated_at       TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (source_timeframe, timeframe)
+);
+
+-- Escrituras idempotentes por ciclo
+CREATE UNIQUE INDEX IF NOT EXISTS idx_orders_idempotency_key ON orders(idempotency_key);
+-- El journal anterior (sin ON CONFLICT) puede tener la misma operación repetida:
+-- se conserva la primera fila física (menor ctid) por clave antes de crear el
+-- índice único. Sólo mientras el índice no existe.
+DELETE FROM trade_journal t
+USING trade_journal d
+WHERE to_regclass('idx_trade_journal_trade') IS NULL
+  AND t.symbol = d.symbol
+  AND t.strategy_id = d.strategy_id
+  AND t.entry_ts = d.entry_ts
+  AND t.exit_ts = d.exit_ts
+  AND t.ctid > d.ctid;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_trade_journal_trade
+    ON trade_journal(symbol, strategy_id, entry_ts, exit_ts);
+
+-- exposure_current y symbol_sectors en bases de datos ya inicializadas
+INSERT INTO exposure_current (strategy_id, symbol, qty, price, net_exposure, gross_exposure)
+SELECT strategy_id, symbol, qty, avg_price, qty * avg_price, abs(qty * avg_price)
+FROM positions
+ON CONFLICT (strategy_id, symbol) DO NOTHING;
+INSERT INTO symbol_sectors (symbol, sector)
+SELECT DISTINCT ON (symbol) symbol, sector
+FROM exposure_snapshots
+WHERE sector IS NOT NULL
+ORDER BY symbol, ts DESC
+ON CONFLICT (symbol) DO NOTHING;
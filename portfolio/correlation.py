@@ -0,0 +1,279 @@
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+
+from data_pipeline.timeframes import timeframe_to_timedelta
+from desk_grade.api import copy_rows, fetch_all
+
+
+load_dotenv()
+
+# Últimas `limit` barras de cada símbolo posteriores a `since` (una consulta,
+# un index scan por símbolo sobre idx_ohlcv_symbol_ts)
+BARS_SINCE_SQL = """
+    SELECT s.symbol, b.ts, b.close
+    FROM unnest(%s::text[]) AS s(symbol)
+    CROSS JOIN LATERAL (
+        SELECT ts, close
+        FROM ohlcv
+        WHERE ohlcv.symbol = s.symbol
+          AND ohlcv.timeframe = %s
+          AND ohlcv.ts > %s
+        ORDER BY ts DESC
+        LIMIT %s
+    ) AS b
+"""
+
+CORRELATION_COLUMNS = ["ts", "symbol_pair", "window_minutes", "correlation"]
+CORRELATION_COPY_TYPES = ["timestamptz", "text", "int4", "float8"]
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+@dataclass(frozen=True)
+class CorrelationConfig:
+    """Parámetros del motor de correlación cargados desde variables de entorno."""
+
+    timeframe: str
+    window_bars: int
+    min_bars: int
+    threshold: float  # |ρ| (con signo de la posición) a partir del cual dos posiciones se agrupan
+    max_cluster_pct: float  # % máximo de exposición bruta en un grupo correlacionado
+
+    @classmethod
+    def from_env(cls) -> "CorrelationConfig":
+        window = int(os.getenv("RISK_CORRELATION_WINDOW_BARS", "120"))
+        return cls(
+            timeframe=os.getenv("RISK_CORRELATION_TIMEFRAME", "1m"),
+            window_bars=window,
+            min_bars=int(os.getenv("RISK_CORRELATION_MIN_BARS", str(max(2, window // 2)))),
+            threshold=float(os.getenv("RISK_CORRELATION_THRESHOLD", "0.8")),
+            max_cluster_pct=float(os.getenv("RISK_CORRELATION_MAX_CLUSTER_PCT", "0.5")),
+        )
+
+    @property
+    def window_minutes(self) -> int:
+        return int(timeframe_to_timedelta(self.timeframe).total_seconds() // 60) * self.window_bars
+
+
+class RollingCovariance:
+    """
+    Sumas de una ventana deslizante de W vectores de rendimientos (N símbolos).
+
+    Mantiene Σx (N) y Σxxᵀ (N×N): cada push suma la fila nueva y resta la que
+    sale de la ventana, O(N²) en lugar de O(N²·W). Cada W pushes las sumas se
+    recalculan desde el buffer para que el error de redondeo no se acumule
+    (O(N²·W) cada W pushes: sigue siendo O(N²) amortizado).
+    """
+
+    def __init__(self, n: int, window: int) -> None:
+        if window < 2:
+            raise ValueError("La ventana de correlación necesita al menos 2 barras")
+        self.window = window
+        self.buffer = np.zeros((window, n))
+        self.sums = np.zeros(n)
+        self.cross = np.zeros((n, n))
+        self.count = 0
+        self._pos = 0
+        self._since_rebuild = 0
+
+    def push(self, x: np.ndarray) -> None:
+        if self.count == self.window:
+            old = self.buffer[self._pos]
+            self.sums -= old
+            self.cross -= np.outer(old, old)
+        else:
+            self.count += 1
+        self.buffer[self._pos] = x
+        self.sums += x
+        self.cross += np.outer(x, x)
+        self._pos = (self._pos + 1) % self.window
+
+        self._since_rebuild += 1
+        if self._since_rebuild >= self.window:
+            self._rebuild()
+
+    def push_many(self, rows: np.ndarray) -> None:
+        for x in rows:
+            self.push(x)
+
+    def _rebuild(self) -> None:
+        filled = self.buffer[: self.count]
+        self.sums = filled.sum(axis=0)
+        self.cross = filled.T @ filled
+        self._since_rebuild = 0
+
+    def correlation(self) -> np.ndarray:
+        """Matriz de correlación de Pearson; NaN en filas/columnas sin varianza."""
+        n = self.count
+        if n < 2:
+            return np.full(self.cross.shape, np.nan)
+        mean = self.sums / n
+        cov = self.cross / n - np.outer(mean, mean)
+        std = np.sqrt(np.clip(np.diag(cov), 0.0, None))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = cov / np.outer(std, std)
+        corr[~np.isfinite(corr)] = np.nan
+        np.clip(corr, -1.0, 1.0, out=corr)
+        live = np.flatnonzero(std > 0)
+        corr[live, live] = 1.0
+        return corr
+
+
+def correlated_concentration(
+    corr: np.ndarray,
+    net_exposure: Sequence[float],
+    threshold: float,
+) -> Tuple[float, List[int]]:
+    """
+    Mayor grupo de posiciones correlacionadas y su % de la exposición bruta.
+
+    Dos posiciones i, j se enlazan si ρᵢⱼ·signo(i)·signo(j) ≥ threshold: dos
+    largos con ρ alta suman riesgo, un largo y un corto con ρ alta se cubren.
+    Los grupos son las componentes conexas de ese grafo; un grupo de una sola
+    posición no cuenta como concentración.
+    """
+    exposure = np.asarray(net_exposure, dtype=float)
+    gross = np.abs(exposure)
+    total = gross.sum()
+    if total <= 0 or len(exposure) < 2:
+        return 0.0, []
+
+    sign = np.sign(exposure)
+    linked = np.nan_to_num(corr * np.outer(sign, sign), nan=-np.inf) >= threshold
+    np.fill_diagonal(linked, False)
+
+    best: List[int] = []
+    best_share = 0.0
+    seen = np.zeros(len(exposure), dtype=bool)
+    for start in range(len(exposure)):
+        if seen[start] or gross[start] == 0:
+            continue
+        component = []
+        stack = [start]
+        seen[start] = True
+        while stack:
+            i = stack.pop()
+            component.append(i)
+            for j in np.flatnonzero(linked[i] & ~seen):
+                seen[j] = True
+                stack.append(int(j))
+        share = float(gross[component].sum() / total)
+        if len(component) > 1 and share > best_share:
+            best, best_share = sorted(component), share
+    return best_share, best
+
+
+class CorrelationEngine:
+    """
+    Correlaciones móviles de rendimientos logarítmicos de los símbolos en cartera.
+
+    refresh() lee de ohlcv sólo las barras nuevas desde la última llamada y las
+    añade a la ventana; si cambia el conjunto de símbolos (o el hueco supera la
+    ventana) se reconstruye con las últimas W+1 barras. En el scheduler la
+    instancia vive entre ciclos, así que el coste por ciclo es O(N²) por barra
+    nueva. Los huecos de un símbolo se rellenan con el último cierre
+    (rendimiento 0) y las barras que llegan tarde a un ts ya procesado no se
+    vuelven a leer.
+    """
+
+    def __init__(self, config: Optional[CorrelationConfig] = None) -> None:
+        self.config = config or CorrelationConfig.from_env()
+        self.symbols: List[str] = []
+        self.last_close = np.empty(0)
+        self.last_ts: datetime = _EPOCH
+        self.rolling = RollingCovariance(0, self.config.window_bars)
+
+    @property
+    def ready(self) -> bool:
+        return len(self.symbols) >= 2 and self.rolling.count >= self.config.min_bars
+
+    def _reset(self, symbols: List[str]) -> None:
+        self.symbols = symbols
+        self.last_close = np.full(len(symbols), np.nan)
+        self.last_ts = _EPOCH
+        self.rolling = RollingCovariance(len(symbols), self.config.window_bars)
+
+    def refresh(self, symbols: Sequence[str]) -> int:
+        """Incorpora las barras nuevas de symbols; devuelve las filas añadidas."""
+        wanted = sorted(set(symbols))
+        if wanted != self.symbols:
+            self._reset(wanted)
+        if len(self.symbols) < 2:
+            return 0
+
+        limit = self.config.window_bars + 1
+        rows = fetch_all(BARS_SINCE_SQL, (self.symbols, self.config.timeframe, self.last_ts, limit))
+        if not rows:
+            return 0
+        bars = pd.DataFrame(rows)
+        if self.last_ts != _EPOCH and bars["symbol"].value_counts().max() >= limit:
+            # Hueco mayor que la ventana: las barras intermedias no se leyeron
+            self._reset(self.symbols)
+            return self.refresh(self.symbols)
+        closes = (
+            bars.pivot(index="ts", columns="symbol", values="close")
+            .reindex(columns=self.symbols)
+            .sort_index()
+        )
+        return self._append(closes)
+
+    def _append(self, closes: pd.DataFrame) -> int:
+        prices = np.vstack([self.last_close, closes.to_numpy(dtype=float)])
+        prices = pd.DataFrame(prices).ffill().to_numpy()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            returns = np.diff(np.log(prices), axis=0)
+        if np.isnan(self.last_close).all():
+            returns = returns[1:]  # primera carga: la primera barra sólo da el precio base
+        returns[~np.isfinite(returns)] = 0.0
+
+        self.rolling.push_many(returns)
+        self.last_close = prices[-1]
+        self.last_ts = closes.index[-1].to_pydatetime()
+        return len(returns)
+
+    def correlation(self) -> np.ndarray:
+        return self.rolling.correlation()
+
+    def correlation_flag(self, net_exposure: Dict[str, float]) -> Tuple[bool, float, List[str]]:
+        """
+        (flag, % de exposición bruta del mayor grupo correlacionado, símbolos del grupo).
+
+        Sin datos suficientes (min_bars) el flag no se activa.
+        """
+        if not self.ready:
+            return False, 0.0, []
+        exposure = [net_exposure.get(s, 0.0) for s in self.symbols]
+        share, members = correlated_concentration(
+            self.correlation(), exposure, self.config.threshold
+        )
+        cluster = [self.symbols[i] for i in members]
+        return share > self.config.max_cluster_pct, share, cluster
+
+    def persist(self, ts: Optional[datetime] = None) -> int:
+        """
+        Escribe en correlation_state los pares de símbolos (i < j) con correlación
+        definida, todos con el mismo ts, mediante COPY. Devuelve las filas escritas.
+        """
+        if not self.ready:
+            return 0
+        ts = ts or datetime.now(timezone.utc)
+        corr = self.correlation()
+        upper_i, upper_j = np.triu_indices(len(self.symbols), k=1)
+        values = corr[upper_i, upper_j]
+        keep = np.isfinite(values)
+        window_minutes = self.config.window_minutes
+        rows = [
+            (ts, f"{self.symbols[i]}|{self.symbols[j]}", window_minutes, float(v))
+            for i, j, v in zip(upper_i[keep], upper_j[keep], values[keep])
+        ]
+        if rows:
+            copy_rows("correlation_state", CORRELATION_COLUMNS, rows, types=CORRELATION_COPY_TYPES)
+        return len(rows)
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+from typing import Dict, Mapping, Sequence, Tuple
+
+from desk_grade.api import execute, fetch_all
+
+
+# exposure_current: una fila por (estrategia, símbolo) con la posición vigente,
+# reescrita en la misma transacción que cada cambio de positions
+UPSERT_EXPOSURE_SQL = """
+    INSERT INTO exposure_current (
+        strategy_id, symbol, qty, price, net_exposure, gross_exposure, updated_at
+    )
+    SELECT strategy_id, symbol, qty, price, qty * price, abs(qty * price), NOW()
+    FROM unnest(%s::text[], %s::text[], %s::float8[], %s::float8[])
+         AS t(strategy_id, symbol, qty, price)
+    ON CONFLICT (strategy_id, symbol) DO UPDATE SET
+        qty = EXCLUDED.qty,
+        price = EXCLUDED.price,
+        net_exposure = EXCLUDED.net_exposure,
+        gross_exposure = EXCLUDED.gross_exposure,
+        updated_at = EXCLUDED.updated_at
+"""
+
+# Exposición neta por sector de las posiciones abiertas, valorada al último
+# cierre de ohlcv (o al precio del último cambio de la posición si no hay barras)
+SECTOR_EXPOSURE_SQL = """
+    SELECT COALESCE(m.sector, 'UNKNOWN') AS sector,
+           SUM(e.qty * COALESCE(px.close, e.price)) AS net_exp
+    FROM exposure_current e
+    LEFT JOIN symbol_sectors m ON m.symbol = e.symbol
+    LEFT JOIN LATERAL (
+        SELECT close
+        FROM ohlcv
+        WHERE ohlcv.symbol = e.symbol
+        ORDER BY ts DESC
+        LIMIT 1
+    ) px ON TRUE
+    WHERE e.qty <> 0
+    GROUP BY 1
+"""
+
+# Histórico: copia las posiciones abiertas de exposure_current en exposure_snapshots
+SNAPSHOT_EXPOSURE_SQL = """
+    INSERT INTO exposure_snapshots (
+        symbol, sector, gross_exposure, net_exposure, leverage, strategy_id
+    )
+    SELECT e.symbol, m.sector, e.gross_exposure, e.net_exposure,
+           e.gross_exposure / NULLIF(%s::float8, 0), e.strategy_id
+    FROM exposure_current e
+    LEFT JOIN symbol_sectors m ON m.symbol = e.symbol
+    WHERE e.qty <> 0
+"""
+
+UPSERT_SECTORS_SQL = """
+    INSERT INTO symbol_sectors (symbol, sector, updated_at)
+    SELECT symbol, sector, NOW()
+    FROM unnest(%s::text[], %s::text[]) AS t(symbol, sector)
+    ON CONFLICT (symbol) DO UPDATE SET
+        sector = EXCLUDED.sector,
+        updated_at = EXCLUDED.updated_at
+"""
+
+
+def upsert_exposure(positions: Sequence[Tuple[str, str, float, float]]) -> None:
+    """
+    Actualiza exposure_current con filas (strategy_id, symbol, qty, price).
+
+    Una sola sentencia para cualquier número de posiciones; llamar dentro de la
+    transacción que modifica positions para que ambas tablas no diverjan.
+    """
+    if not positions:
+        return
+    strategies, symbols, qtys, prices = (list(col) for col in zip(*positions))
+    execute(UPSERT_EXPOSURE_SQL, (strategies, symbols, qtys, prices))
+
+
+def fetch_sector_exposure() -> Dict[str, float]:
+    """Exposición neta (en divisa) por sector de las posiciones abiertas."""
+    rows = fetch_all(SECTOR_EXPOSURE_SQL)
+    return {r["sector"]: float(r["net_exp"] or 0.0) for r in rows}
+
+
+def snapshot_exposure(equity: float) -> None:
+    """Añade a exposure_snapshots la exposición vigente (serie histórica, no se lee en gates)."""
+    execute(SNAPSHOT_EXPOSURE_SQL, (equity,))
+
+
+def upsert_symbol_sectors(sectors: Mapping[str, str]) -> None:
+    """Carga o actualiza el mapa símbolo → sector."""
+    if not sectors:
+        return
+    symbols = list(sectors)
+    execute(UPSERT_SECTORS_SQL, (symbols, [sectors[s] for s in symbols]))
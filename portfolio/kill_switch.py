@@ -0,0 +1,268 @@
+from __future__ import annotations
+
+import logging
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List
+
+from desk_grade.api import execute, fetch_all, fetch_one, transaction
+
+from .order_builder import OrderIntent, build_order_intent
+
+logger = logging.getLogger(__name__)
+
+KILL_SWITCH_CHANNEL = "kill_switch"
+KILL_SWITCH_EVENT = "KILL_SWITCH"
+KILL_SWITCH_RESET_EVENT = "KILL_SWITCH_RESET"
+LATENCY_TARGET_MS = 100.0
+
+
+@dataclass
+class KillSwitchResult:
+    """Resultado de una activación del kill switch."""
+
+    reason: str
+    intents: List[OrderIntent]
+    trades_exited: int
+    latency_ms: float
+
+
+def build_flatten_intents(
+    rows: Iterable[Dict],
+    reason: str = KILL_SWITCH_EVENT,
+) -> List[OrderIntent]:
+    """
+    Construye las OrderIntent que llevan a cero cada posición.
+
+    Cada fila debe tener symbol, strategy_id, qty y price. Sin efectos secundarios.
+    """
+    intents: List[OrderIntent] = []
+    for row in rows:
+        intent = build_order_intent(
+            symbol=row["symbol"],
+            target_qty=0.0,
+            current_qty=float(row["qty"]),
+            price=float(row["price"]),
+            strategy_id=row["strategy_id"],
+            reason=reason,
+        )
+        if intent:
+            intents.append(intent)
+    return intents
+
+
+def is_kill_switch_active() -> bool:
+    """True si el último evento de kill switch es una activación sin reset posterior."""
+    row = fetch_one(
+        """
+        SELECT event_type
+        FROM risk_events
+        WHERE event_type IN (%s, %s)
+        ORDER BY ts DESC
+        LIMIT 1
+        """,
+        (KILL_SWITCH_EVENT, KILL_SWITCH_RESET_EVENT),
+    )
+    return bool(row) and row["event_type"] == KILL_SWITCH_EVENT
+
+
+class KillSwitch:
+    """
+    Camino rápido para aplanar la cartera sin ejecutar un ciclo completo.
+
+    En una sola transacción:
+      - risk_state → HALT (y evento KILL_SWITCH, que mantiene el HALT en
+        ciclos posteriores hasta un reset)
+      - OrderIntent de cierre para todas las posiciones con qty != 0
+        (una única consulta set-based con el último precio de ohlcv)
+      - en modo PAPER: orders + fills + positions a cero, y trade_state
+        ENTERED/MANAGED → EXITED (el journal lo genera el siguiente ciclo)
+
+    El número de sentencias es constante, independiente del número de posiciones.
+    """
+
+    def __init__(self, paper_trading: bool = True, actor: str = "kill_switch") -> None:
+        self.paper_trading = paper_trading
+        self.actor = actor
+
+    # -------------------------
+    # Helpers DB
+    # -------------------------
+    def _lock_open_positions(self) -> List[Dict]:
+        return fetch_all(
+            """
+            SELECT p.symbol, p.strategy_id, p.qty,
+                   COALESCE(px.close, p.avg_price) AS price
+            FROM positions p
+            LEFT JOIN LATERAL (
+                SELECT o.close
+                FROM ohlcv o
+                WHERE o.symbol = p.symbol
+                ORDER BY o.ts DESC
+                LIMIT 1
+            ) px ON TRUE
+            WHERE p.qty <> 0
+            FOR UPDATE OF p
+            """
+        )
+
+    def _apply_paper_fills(self, intents: List[OrderIntent], reason: str) -> None:
+        symbols = [i.symbol for i in intents]
+        strategies = [i.strategy_id for i in intents]
+        sides = [i.side for i in intents]
+        qtys = [i.qty for i in intents]
+        prices = [i.price for i in intents]
+
+        execute(
+            """
+            WITH intents AS (
+                SELECT *
+                FROM unnest(%s::text[], %s::text[], %s::text[], %s::float8[], %s::float8[])
+                     AS t(symbol, strategy_id, side, qty, price)
+            ), new_orders AS (
+                INSERT INTO orders (
+                    symbol, side, qty, price, order_type, status, strategy_id, paper_trade, meta
+                )
+                SELECT symbol, side, qty, price, 'MARKET', 'FILLED', strategy_id, TRUE,
+                       jsonb_build_object('reason', %s::text)
+                FROM intents
+                RETURNING id, symbol, side, qty, price
+            )
+            INSERT INTO fills (order_id, symbol, side, qty, price)
+            SELECT id, symbol, side, qty, price
+            FROM new_orders
+            """,
+            (symbols, strategies, sides, qtys, prices, reason),
+        )
+
+        # PnL realizado al cerrar: (precio - avg) * qty vale para long y short.
+        # exposure_current se pone a cero en la misma sentencia.
+        execute(
+            """
+            WITH closed AS (
+                UPDATE positions p
+                SET realized_pnl = p.realized_pnl + (t.price - p.avg_price) * p.qty,
+                    qty = 0,
+                    avg_price = 0,
+                    last_updated = NOW()
+                FROM unnest(%s::text[], %s::text[], %s::float8[])
+                     AS t(symbol, strategy_id, price)
+                WHERE p.symbol = t.symbol
+                  AND p.strategy_id = t.strategy_id
+                RETURNING p.strategy_id, p.symbol, t.price
+            )
+            INSERT INTO exposure_current (
+                strategy_id, symbol, qty, price, net_exposure, gross_exposure, updated_at
+            )
+            SELECT strategy_id, symbol, 0, price, 0, 0, NOW()
+            FROM closed
+            ON CONFLICT (strategy_id, symbol) DO UPDATE SET
+                qty = 0,
+                price = EXCLUDED.price,
+                net_exposure = 0,
+                gross_exposure = 0,
+                updated_at = EXCLUDED.updated_at
+            """,
+            (symbols, strategies, prices),
+        )
+
+    def _exit_open_trades(self, reason: str) -> int:
+        row = fetch_one(
+            """
+            WITH exited AS (
+                UPDATE trade_state
+                SET state = 'EXITED',
+                    qty = 0,
+                    trailing_price = NULL,
+                    last_updated = NOW()
+                WHERE state IN ('ENTERED', 'MANAGED')
+                RETURNING symbol, strategy_id
+            ), events AS (
+                INSERT INTO trade_events (symbol, strategy_id, event_type, description)
+                SELECT symbol, strategy_id, %s, %s
+                FROM exited
+                RETURNING 1
+            )
+            SELECT COUNT(*) AS n FROM events
+            """,
+            (KILL_SWITCH_EVENT, reason),
+        )
+        return int(row["n"]) if row else 0
+
+    # -------------------------
+    # API pública
+    # -------------------------
+    def trigger(self, reason: str = "MANUAL") -> KillSwitchResult:
+        """Activa el kill switch y devuelve las intenciones generadas y la latencia."""
+        start = time.perf_counter()
+        description = f"{KILL_SWITCH_EVENT} reason={reason}"
+
+        with transaction():
+            execute(
+                """
+                INSERT INTO risk_state (mode, reason)
+                VALUES ('HALT', %s)
+                """,
+                (description,),
+            )
+            intents = build_flatten_intents(self._lock_open_positions(), reason=KILL_SWITCH_EVENT)
+
+            trades_exited = 0
+            if self.paper_trading:
+                if intents:
+                    self._apply_paper_fills(intents, reason)
+                trades_exited = self._exit_open_trades(reason)
+
+            execute(
+                """
+                INSERT INTO risk_events (event_type, severity, description, meta)
+                VALUES (
+                    %s, 'ERROR', %s,
+                    jsonb_build_object('positions', %s::int, 'paper', %s::bool)
+                )
+                """,
+                (KILL_SWITCH_EVENT, description, len(intents), self.paper_trading),
+            )
+            execute(
+                """
+                INSERT INTO audit_log (actor, action, entity_type, details)
+                VALUES (%s, %s, 'risk_state', jsonb_build_object('reason', %s::text))
+                """,
+                (self.actor, KILL_SWITCH_EVENT, reason),
+            )
+
+        latency_ms = (time.perf_counter() - start) * 1000.0
+        log = logger.warning if latency_ms > LATENCY_TARGET_MS else logger.info
+        log(
+            "Kill switch activado: posiciones=%d trades_exited=%d latencia=%.1fms "
+            "(objetivo %.0fms)",
+            len(intents),
+            trades_exited,
+            latency_ms,
+            LATENCY_TARGET_MS,
+        )
+        return KillSwitchResult(
+            reason=reason,
+            intents=intents,
+            trades_exited=trades_exited,
+            latency_ms=latency_ms,
+        )
+
+    def reset(self, reason: str = "MANUAL") -> None:
+        """Desactiva el HALT latcheado; el siguiente ciclo vuelve a evaluar gates."""
+        with transaction():
+            execute(
+                """
+                INSERT INTO risk_events (event_type, severity, description)
+                VALUES (%s, 'WARN', %s)
+                """,
+                (KILL_SWITCH_RESET_EVENT, f"{KILL_SWITCH_RESET_EVENT} reason={reason}"),
+            )
+            execute(
+                """
+                INSERT INTO audit_log (actor, action, entity_type, details)
+                VALUES (%s, %s, 'risk_state', jsonb_build_object('reason', %s::text))
+                """,
+                (self.actor, KILL_SWITCH_RESET_EVENT, reason),
+            )
+        logger.info("Kill switch reseteado: %s", reason)
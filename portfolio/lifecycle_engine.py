@@ -2,9 +2,9 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
-from typing import Iterable, List, Optional, Tuple
+from typing import Callable, Iterable, List, Optional, Tuple
 
-from desk_grade.api import execute, fetch_all, fetch_one
+from desk_grade.api import execute, fetch_all, fetch_one, transaction
 
 from . import metrics
 
@@ -232,10 +232,23 @@ class LifecycleEngine:
         mae_r, mfe_r = metrics.mae_mfe_r(side, entry_price, stop_price, price_path)
         return r, pnl_r, mae_r, mfe_r
 
-    def process_exited_trades(self) -> None:
+    def process_exited_trades(
+        self,
+        trade_filter: Optional[Callable[[str, str], bool]] = None,
+        cycle_id: Optional[str] = None,
+    ) -> None:
         """
         Recorre todas las operaciones con estado EXITED y genera entradas
         en trade_journal (si aún no existen) y eventos de lifecycle/cooldown.
+
+        Journal, cooldown y paso a FLAT de cada operación se escriben en una
+        misma transacción; el journal es idempotente por
+        (symbol, strategy_id, entry_ts, exit_ts).
+
+        Args:
+            trade_filter: Predicado opcional (strategy_id, symbol) -> bool para
+                procesar sólo un subconjunto (por ejemplo, un shard).
+            cycle_id: Ciclo que genera el journal (trazabilidad).
         """
         exited_trades = fetch_all(
             """
@@ -249,6 +262,8 @@ class LifecycleEngine:
         for row in exited_trades:
             symbol = row["symbol"]
             strategy_id = row["strategy_id"]
+            if trade_filter is not None and not trade_filter(strategy_id, symbol):
+                continue
             entry_ts = row["entry_ts"]
             exit_ts = row["last_updated"]
             entry_price = float(row["entry_price"])
@@ -295,46 +310,49 @@ class LifecycleEngine:
                 price_path=price_path,
             )
 
-            execute(
-                """
-                INSERT INTO trade_journal (
-                    symbol, strategy_id, entry_ts, exit_ts,
-                    entry_price, exit_price, qty, r, pnl_r, mae, mfe
+            with transaction():
+                execute(
+                    """
+                    INSERT INTO trade_journal (
+                        symbol, strategy_id, entry_ts, exit_ts,
+                        entry_price, exit_price, qty, r, pnl_r, mae, mfe, cycle_id
+                    )
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                    ON CONFLICT (symbol, strategy_id, entry_ts, exit_ts) DO NOTHING
+                    """,
+                    (
+                        symbol,
+                        strategy_id,
+                        entry_ts,
+                        exit_ts,
+                        entry_price,
+                        exit_price,
+                        abs(qty),
+                        r,
+                        pnl_r,
+                        mae_r,
+                        mfe_r,
+                        cycle_id,
+                    ),
                 )
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                """,
-                (
-                    symbol,
-                    strategy_id,
-                    entry_ts,
-                    exit_ts,
-                    entry_price,
-                    exit_price,
-                    abs(qty),
-                    r,
-                    pnl_r,
-                    mae_r,
-                    mfe_r,
-                ),
-            )
 
-            # Registra lifecycle EXITED + cooldown
-            self.apply_cooldown(symbol=symbol, strategy_id=strategy_id, exit_ts=exit_ts)
+                # Registra lifecycle EXITED + cooldown
+                self.apply_cooldown(symbol=symbol, strategy_id=strategy_id, exit_ts=exit_ts)
 
-            # Dejamos la operación en estado FLAT para futuras entradas
-            execute(
-                """
-                UPDATE trade_state
-                SET state = 'FLAT',
-                    entry_ts = NULL,
-                    entry_price = NULL,
-                    stop_price = NULL,
-                    tp1_price = NULL,
-                    tp2_price = NULL,
-                    trailing_price = NULL,
-                    last_updated = NOW()
-                WHERE symbol = %s
-                  AND strategy_id = %s
-                """,
-                (symbol, strategy_id),
-            )
+                # Dejamos la operación en estado FLAT para futuras entradas
+                execute(
+                    """
+                    UPDATE trade_state
+                    SET state = 'FLAT',
+                        entry_ts = NULL,
+                        entry_price = NULL,
+                        stop_price = NULL,
+                        tp1_price = NULL,
+                        tp2_price = NULL,
+                        trailing_price = NULL,
+                        last_updated = NOW()
+                    WHERE symbol = %s
+                      AND strategy_id = %s
+                    """,
+                    (symbol, strategy_id),
+                )
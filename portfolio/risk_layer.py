@@ -3,8 +3,9 @@ from __future__ import annotations
 import math
 import os
 from dataclasses import dataclass
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Sequence
 
+import numpy as np
 from dotenv import load_dotenv
 
 from desk_grade.api import execute
@@ -13,6 +14,16 @@ from desk_grade.api import execute
 load_dotenv()
 
 
+def _as_float_array(values: Optional[Sequence[Optional[float]]], n: int) -> np.ndarray:
+    """Array float64 de longitud n; None pasa a NaN."""
+    if values is None:
+        return np.full(n, np.nan)
+    array = np.array(values, dtype=float)
+    if array.shape != (n,):
+        raise ValueError(f"Se esperaban {n} valores, recibidos {array.shape}")
+    return array
+
+
 @dataclass(frozen=True)
 class RiskLimits:
     """Límites de riesgo estáticos cargados desde variables de entorno."""
@@ -72,7 +83,8 @@ class ExposureSnapshot:
 class RiskEngine:
     """
     Capa de riesgo determinista:
-    - Gates de riesgo (DD, pérdidas diaria/semanal, reconciliación, correlación, sector caps)
+    - Gates de riesgo (DD, pérdidas diaria/semanal, kill switch, reconciliación,
+      correlación, sector caps)
     - Position sizing (fixed fractional / ATR-based)
     - Vol targeting
     - Construcción y persistencia de exposure_snapshots
@@ -96,6 +108,7 @@ class RiskEngine:
         sector_exposure_pct: Optional[Dict[str, float]] = None,
         correlation_flag: bool = False,
         reconciliation_flag: bool = False,
+        kill_switch_flag: bool = False,
     ) -> RiskGateResult:
         """
         Evalúa todos los gates de riesgo y devuelve el modo de operación:
@@ -133,6 +146,11 @@ class RiskEngine:
                 f"WEEKLY_LOSS_LIMIT_SUPERADO pnl={weekly_pnl:.2f} limite={weekly_loss_limit_value:.2f}"
             )
 
+        # Kill switch activo → HALT hasta que se resetee manualmente
+        if kill_switch_flag:
+            mode = "HALT"
+            reasons.append("KILL_SWITCH_ACTIVO")
+
         # Reconciliación → HALT
         if reconciliation_flag:
             mode = "HALT"
@@ -240,6 +258,52 @@ class RiskEngine:
         scaled = base_size * (self.limits.vol_target / asset_annual_vol)
         return max(0.0, math.floor(scaled))
 
+    # -------------------------
+    # SIZING EN LOTE
+    # -------------------------
+    def compute_position_sizes(
+        self,
+        symbols: Sequence[str],
+        prices: Sequence[Optional[float]],
+        atrs: Optional[Sequence[Optional[float]]],
+        vols: Optional[Sequence[Optional[float]]],
+        equity: float,
+    ) -> np.ndarray:
+        """
+        compute_position_size + apply_vol_targeting para todos los candidatos a la vez.
+
+        prices, atrs y vols van alineados con symbols; None (o NaN) si no se
+        conocen. Hace las mismas operaciones en el mismo orden que la ruta
+        escalar, así que cada tamaño es idéntico bit a bit al de
+        apply_vol_targeting(compute_position_size(...)). Los valores no finitos
+        dan tamaño 0.
+        """
+        n = len(symbols)
+        price = _as_float_array(prices, n)
+        atr = _as_float_array(atrs, n)
+        vol = _as_float_array(vols, n)
+        sizes = np.zeros(n)
+        if equity <= 0:
+            return sizes
+
+        risk_dollars = equity * self.limits.fixed_fractional
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            if self.limits.sizing_mode.upper() == "ATR":
+                per_unit_risk = atr * self.limits.atr_multiplier
+                raw = risk_dollars / per_unit_risk
+                ok = (price > 0) & (atr > 0) & (per_unit_risk > 0)
+            else:
+                raw = risk_dollars / price
+                ok = price > 0
+            ok &= np.isfinite(raw)
+            sizes[ok] = np.maximum(0.0, np.floor(raw[ok]))
+
+            if self.limits.vol_target:
+                scaled = sizes * (self.limits.vol_target / vol)
+                ok = (sizes > 0) & (vol > 0) & np.isfinite(scaled)
+                sizes[ok] = np.maximum(0.0, np.floor(scaled[ok]))
+        return sizes
+
     # -------------------------
     # EXPOSURE SNAPSHOTS
     # -------------------------
@@ -0,0 +1,343 @@
+from __future__ import annotations
+
+import math
+import os
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from dotenv import load_dotenv
+
+from data_pipeline.timeframes import timeframe_to_timedelta
+from desk_grade.api import execute_many, fetch_all
+
+
+load_dotenv()
+
+ESTIMATORS = ("ewma", "parkinson", "garman_klass")
+
+# Por defecto, sesión regular de renta variable USA: 252 días de 6.5 horas.
+# FOREX (24h, ~260 días) o cripto / datos sintéticos (24h, 365 días) se
+# configuran con RISK_VOL_SESSION_HOURS y RISK_VOL_TRADING_DAYS.
+TRADING_DAYS_PER_YEAR = 252
+SESSION_HOURS = 6.5
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_LN2 = math.log(2.0)
+
+VOL_STATE_SQL = """
+    SELECT symbol, ts, close, ewma_var, parkinson_var, garman_klass_var, n_bars
+    FROM vol_cache
+    WHERE timeframe = %s
+      AND symbol = ANY(%s)
+"""
+
+# Barras de cada símbolo posteriores a su último ts en vol_cache (una consulta)
+NEW_BARS_SQL = """
+    SELECT s.symbol, b.ts, b.open, b.high, b.low, b.close
+    FROM unnest(%s::text[], %s::timestamptz[]) AS s(symbol, since)
+    CROSS JOIN LATERAL (
+        SELECT ts, open, high, low, close
+        FROM ohlcv
+        WHERE ohlcv.symbol = s.symbol
+          AND ohlcv.timeframe = %s
+          AND ohlcv.ts > s.since
+        ORDER BY ts DESC
+        LIMIT %s
+    ) AS b
+"""
+
+UPSERT_VOL_SQL = """
+    INSERT INTO vol_cache (
+        symbol, timeframe, ts, close, ewma_var, parkinson_var, garman_klass_var,
+        ewma_vol, parkinson_vol, garman_klass_vol, n_bars, updated_at
+    )
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW())
+    ON CONFLICT (symbol, timeframe) DO UPDATE SET
+        ts = EXCLUDED.ts,
+        close = EXCLUDED.close,
+        ewma_var = EXCLUDED.ewma_var,
+        parkinson_var = EXCLUDED.parkinson_var,
+        garman_klass_var = EXCLUDED.garman_klass_var,
+        ewma_vol = EXCLUDED.ewma_vol,
+        parkinson_vol = EXCLUDED.parkinson_vol,
+        garman_klass_vol = EXCLUDED.garman_klass_vol,
+        n_bars = EXCLUDED.n_bars,
+        updated_at = EXCLUDED.updated_at
+"""
+
+
+def bars_per_year(
+    timeframe: str,
+    session_hours: float = SESSION_HOURS,
+    trading_days: float = TRADING_DAYS_PER_YEAR,
+) -> float:
+    """
+    Barras por año para anualizar: trading_days sesiones de session_hours en
+    intradía, trading_days barras en diario.
+    """
+    delta = timeframe_to_timedelta(timeframe)
+    if delta >= timedelta(days=1):
+        return trading_days * timedelta(days=1) / delta
+    session = timedelta(hours=min(session_hours, 24.0))
+    return trading_days * max(session, delta) / delta
+
+
+@dataclass(frozen=True)
+class VolConfig:
+    """Parámetros de la vol realizada cargados desde variables de entorno."""
+
+    timeframe: str
+    halflife_bars: float
+    estimator: str  # "ewma", "parkinson" o "garman_klass"
+    warmup_bars: int  # barras leídas al inicializar un símbolo
+    min_bars: int  # barras mínimas antes de usar la estimación
+    session_hours: float = SESSION_HOURS  # horas de mercado por día (24 en FOREX / cripto)
+    trading_days: float = TRADING_DAYS_PER_YEAR  # sesiones por año (365 en cripto)
+
+    @classmethod
+    def from_env(cls) -> "VolConfig":
+        halflife = float(os.getenv("RISK_VOL_HALFLIFE_BARS", "390"))
+        estimator = os.getenv("RISK_VOL_ESTIMATOR", "ewma").lower()
+        if estimator not in ESTIMATORS:
+            raise ValueError(
+                f"RISK_VOL_ESTIMATOR inválido: {estimator} (válidos: {', '.join(ESTIMATORS)})"
+            )
+        return cls(
+            timeframe=os.getenv("RISK_VOL_TIMEFRAME", "1m"),
+            halflife_bars=halflife,
+            estimator=estimator,
+            warmup_bars=int(os.getenv("RISK_VOL_WARMUP_BARS", str(int(4 * halflife)))),
+            min_bars=int(os.getenv("RISK_VOL_MIN_BARS", str(int(halflife)))),
+            session_hours=float(os.getenv("RISK_VOL_SESSION_HOURS", str(SESSION_HOURS))),
+            trading_days=float(
+                os.getenv("RISK_VOL_TRADING_DAYS", str(TRADING_DAYS_PER_YEAR))
+            ),
+        )
+
+    @property
+    def periods_per_year(self) -> float:
+        return bars_per_year(self.timeframe, self.session_hours, self.trading_days)
+
+    @property
+    def decay(self) -> float:
+        """λ de la EWMA: el peso de una barra se reduce a la mitad cada halflife_bars."""
+        return 0.5 ** (1.0 / self.halflife_bars)
+
+
+# -------------------------
+# Estimadores por barra (varianza de una barra, media cero)
+# -------------------------
+def squared_log_returns(close: np.ndarray, prev_close: float) -> np.ndarray:
+    """ln(Cₜ/Cₜ₋₁)², con prev_close como cierre anterior a la primera barra."""
+    closes = np.concatenate([[prev_close], close])
+    return np.diff(np.log(closes)) ** 2
+
+
+def parkinson_terms(high: np.ndarray, low: np.ndarray) -> np.ndarray:
+    """Parkinson (1980): ln(H/L)² / (4·ln2)."""
+    return np.log(high / low) ** 2 / (4.0 * _LN2)
+
+
+def garman_klass_terms(
+    open_: np.ndarray, high: np.ndarray, low: np.ndarray, close: np.ndarray
+) -> np.ndarray:
+    """Garman-Klass (1980): ½·ln(H/L)² − (2·ln2 − 1)·ln(C/O)²."""
+    return 0.5 * np.log(high / low) ** 2 - (2.0 * _LN2 - 1.0) * np.log(close / open_) ** 2
+
+
+def ewma_variance(terms: np.ndarray, decay: float, prev_var: Optional[float]) -> float:
+    """
+    varₜ = λ·varₜ₋₁ + (1−λ)·termₜ aplicado a todas las barras de una vez.
+
+    Forma cerrada: λᵏ·var₀ + (1−λ)·Σ λᵏ⁻¹⁻ⁱ·termᵢ. Sin estado previo, var₀ es
+    la media de terms (siembra con la muestra de warm-up).
+    """
+    k = len(terms)
+    if k == 0:
+        return float(prev_var or 0.0)
+    seed = float(np.mean(terms)) if prev_var is None else prev_var
+    weights = (1.0 - decay) * decay ** np.arange(k - 1, -1, -1, dtype=float)
+    return float(decay**k * seed + weights @ terms)
+
+
+@dataclass(frozen=True)
+class VolState:
+    """Estado de vol_cache de un símbolo (varianzas por barra)."""
+
+    symbol: str
+    ts: datetime
+    close: float
+    ewma_var: float
+    parkinson_var: float
+    garman_klass_var: float
+    n_bars: int
+
+    def annual_vol(self, estimator: str, periods_per_year: float) -> float:
+        variance = {
+            "ewma": self.ewma_var,
+            "parkinson": self.parkinson_var,
+            "garman_klass": self.garman_klass_var,
+        }[estimator]
+        return math.sqrt(max(variance, 0.0) * periods_per_year)
+
+
+def advance_state(
+    symbol: str,
+    prev: Optional[VolState],
+    ts: Sequence[datetime],
+    open_: np.ndarray,
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    decay: float,
+) -> Optional[VolState]:
+    """
+    Incorpora barras nuevas (ordenadas por ts) al estado de un símbolo.
+
+    Sin estado previo la primera barra sólo aporta el cierre base. Devuelve
+    None si no hay rendimientos que incorporar.
+    """
+    if prev is None:
+        if len(close) < 2:
+            return None
+        base = close[0]
+        ts, open_, high, low, close = ts[1:], open_[1:], high[1:], low[1:], close[1:]
+    else:
+        if len(close) == 0:
+            return prev
+        base = prev.close
+
+    return VolState(
+        symbol=symbol,
+        ts=ts[-1],
+        close=float(close[-1]),
+        ewma_var=ewma_variance(
+            squared_log_returns(close, base), decay, prev.ewma_var if prev else None
+        ),
+        parkinson_var=ewma_variance(
+            parkinson_terms(high, low), decay, prev.parkinson_var if prev else None
+        ),
+        garman_klass_var=ewma_variance(
+            garman_klass_terms(open_, high, low, close),
+            decay,
+            prev.garman_klass_var if prev else None,
+        ),
+        n_bars=(prev.n_bars if prev else 0) + len(close),
+    )
+
+
+# -------------------------
+# vol_cache
+# -------------------------
+def _load_states(symbols: List[str], timeframe: str) -> Dict[str, VolState]:
+    rows = fetch_all(VOL_STATE_SQL, (timeframe, symbols))
+    return {
+        r["symbol"]: VolState(
+            symbol=r["symbol"],
+            ts=r["ts"],
+            close=float(r["close"]),
+            ewma_var=float(r["ewma_var"]),
+            parkinson_var=float(r["parkinson_var"]),
+            garman_klass_var=float(r["garman_klass_var"]),
+            n_bars=int(r["n_bars"]),
+        )
+        for r in rows
+    }
+
+
+def refresh_vol_cache(
+    symbols: Sequence[str], config: Optional[VolConfig] = None
+) -> Dict[str, VolState]:
+    """
+    Actualiza vol_cache con las barras de ohlcv posteriores al último ts de cada símbolo.
+
+    Dos lecturas (estado y barras nuevas de todos los símbolos) y un upsert en
+    lote. Un símbolo sin estado, o cuyo hueco llena el límite de warm-up, se
+    reinicializa con las últimas warmup_bars barras. Devuelve el estado vigente
+    de cada símbolo con datos.
+    """
+    config = config or VolConfig.from_env()
+    wanted = sorted(set(symbols))
+    if not wanted:
+        return {}
+    states = _load_states(wanted, config.timeframe)
+    since = [states[s].ts if s in states else _EPOCH for s in wanted]
+    rows = fetch_all(NEW_BARS_SQL, (wanted, since, config.timeframe, config.warmup_bars))
+
+    bars: Dict[str, List[Dict]] = {}
+    for r in rows:
+        bars.setdefault(r["symbol"], []).append(r)
+
+    periods = config.periods_per_year
+    updates = []
+    for symbol, symbol_bars in bars.items():
+        symbol_bars.sort(key=lambda r: r["ts"])
+        prev = states.get(symbol)
+        if prev is not None and len(symbol_bars) >= config.warmup_bars:
+            prev = None  # barras intermedias no leídas: se reinicializa
+        ohlc = np.array(
+            [(r["open"], r["high"], r["low"], r["close"]) for r in symbol_bars], dtype=float
+        )
+        state = advance_state(
+            symbol,
+            prev,
+            [r["ts"] for r in symbol_bars],
+            ohlc[:, 0],
+            ohlc[:, 1],
+            ohlc[:, 2],
+            ohlc[:, 3],
+            config.decay,
+        )
+        if state is None or state is prev:
+            continue
+        states[symbol] = state
+        updates.append(
+            (
+                symbol,
+                config.timeframe,
+                state.ts,
+                state.close,
+                state.ewma_var,
+                state.parkinson_var,
+                state.garman_klass_var,
+                state.annual_vol("ewma", periods),
+                state.annual_vol("parkinson", periods),
+                state.annual_vol("garman_klass", periods),
+                state.n_bars,
+            )
+        )
+    if updates:
+        execute_many(UPSERT_VOL_SQL, updates)
+    return states
+
+
+def fetch_annual_vols(
+    symbols: Sequence[str],
+    config: Optional[VolConfig] = None,
+    *,
+    refresh: bool = False,
+) -> Dict[str, float]:
+    """
+    Vol anualizada de todos los símbolos en una llamada.
+
+    Sin refresh es una única consulta a vol_cache; con refresh antes se
+    incorporan las barras nuevas (refresh_vol_cache) y se usa su resultado.
+    Usa el estimador configurado y omite los símbolos sin estado o con menos
+    de min_bars barras incorporadas.
+    """
+    config = config or VolConfig.from_env()
+    wanted = sorted(set(symbols))
+    if not wanted:
+        return {}
+    if refresh:
+        states = refresh_vol_cache(wanted, config)
+    else:
+        states = _load_states(wanted, config.timeframe)
+    periods = config.periods_per_year
+    return {
+        symbol: state.annual_vol(config.estimator, periods)
+        for symbol, state in states.items()
+        if state.n_bars >= config.min_bars
+    }
@@ -81,6 +81,9 @@ def main():
                 asset=args.asset,
             )
 
+        for symbol, error in provider.last_errors.items():
+            print(f"[IBKR] {symbol}: omitido ({error})")
+
         if df.empty:
             print("[IBKR] No se obtuvieron datos")
             sys.exit(1)
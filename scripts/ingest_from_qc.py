@@ -85,6 +85,9 @@ def main():
             asset=args.asset,
         )
 
+        for symbol, error in provider.last_errors.items():
+            print(f"[QC] {symbol}: omitido ({error})")
+
         if df.empty:
             print("[QC] No se obtuvieron datos")
             sys.exit(1)
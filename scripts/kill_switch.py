@@ -0,0 +1,167 @@
+"""
+Kill switch: aplana todas las posiciones y deja el sistema en HALT.
+
+No ejecuta un ciclo completo: en una sola transacción marca risk_state HALT,
+genera las órdenes de cierre de todas las posiciones abiertas, las aplica como
+fills PAPER y marca trade_state como EXITED.
+
+Ejemplos de uso:
+    # Activar ahora
+    python -m scripts.kill_switch --reason "manual"
+
+    # Encolar un job KILL_SWITCH y avisar al listener (NOTIFY)
+    python -m scripts.kill_switch --notify --reason "desde ops"
+
+    # Proceso residente que escucha NOTIFY kill_switch y jobs KILL_SWITCH
+    python -m scripts.kill_switch --listen
+
+    # Quitar el HALT latcheado
+    python -m scripts.kill_switch --reset --reason "revisado"
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+from typing import List
+
+from dotenv import load_dotenv
+
+from desk_grade import api
+from desk_grade.logging_config import setup_logging
+from portfolio.kill_switch import KILL_SWITCH_CHANNEL, KILL_SWITCH_EVENT, KillSwitch
+
+load_dotenv()
+setup_logging()
+
+logger = logging.getLogger("kill_switch")
+
+PAPER_TRADING = os.getenv("PAPER_TRADING", "true").lower() == "true"
+
+
+def enqueue_kill_switch(reason: str) -> None:
+    """Inserta un job KILL_SWITCH pendiente y notifica al listener en la misma transacción."""
+    with api.transaction():
+        api.execute(
+            """
+            INSERT INTO job_queue (job_type, payload)
+            VALUES (%s, jsonb_build_object('reason', %s::text))
+            """,
+            (KILL_SWITCH_EVENT, reason),
+        )
+        api.notify(KILL_SWITCH_CHANNEL, reason)
+    logger.info("Job KILL_SWITCH encolado y notificado: %s", reason)
+
+
+def _claim_pending_jobs() -> List[dict]:
+    with api.transaction():
+        return api.fetch_all(
+            """
+            UPDATE job_queue
+            SET status = 'RUNNING',
+                attempts = attempts + 1,
+                last_update = NOW()
+            WHERE id IN (
+                SELECT id
+                FROM job_queue
+                WHERE job_type = %s
+                  AND status = 'PENDING'
+                  AND scheduled_for <= NOW()
+                ORDER BY scheduled_for
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING id, payload
+            """,
+            (KILL_SWITCH_EVENT,),
+        )
+
+
+def _has_pending_jobs() -> bool:
+    row = api.fetch_one(
+        """
+        SELECT 1 AS pending
+        FROM job_queue
+        WHERE job_type = %s
+          AND status = 'PENDING'
+        LIMIT 1
+        """,
+        (KILL_SWITCH_EVENT,),
+    )
+    return bool(row)
+
+
+def _finish_jobs(job_ids: List, status: str) -> None:
+    api.execute(
+        """
+        UPDATE job_queue
+        SET status = %s,
+            last_update = NOW()
+        WHERE id = ANY(%s)
+        """,
+        (status, job_ids),
+    )
+
+
+def handle_notification(kill_switch: KillSwitch, payload: str) -> None:
+    """
+    Atiende un NOTIFY: procesa los jobs KILL_SWITCH pendientes o, si no hay
+    ninguno (NOTIFY enviado directamente), activa con el payload como motivo.
+    """
+    jobs = _claim_pending_jobs()
+    reasons = [(job["payload"] or {}).get("reason", "JOB") for job in jobs]
+    reason = ",".join(reasons) if reasons else (payload or "NOTIFY")
+
+    job_ids = [job["id"] for job in jobs]
+    try:
+        kill_switch.trigger(reason=reason)
+    except Exception:
+        if job_ids:
+            _finish_jobs(job_ids, "FAILED")
+        raise
+    if job_ids:
+        _finish_jobs(job_ids, "SUCCESS")
+
+
+def listen_forever(kill_switch: KillSwitch) -> None:
+    """Escucha el canal kill_switch; al arrancar atiende los jobs pendientes."""
+    logger.info("Escuchando NOTIFY %s (paper=%s)", KILL_SWITCH_CHANNEL, kill_switch.paper_trading)
+    if _has_pending_jobs():
+        handle_notification(kill_switch, "")
+    try:
+        for payload in api.listen(KILL_SWITCH_CHANNEL):
+            try:
+                handle_notification(kill_switch, payload)
+            except Exception as exc:
+                logger.error("Error ejecutando kill switch: %s", exc, exc_info=True)
+    except KeyboardInterrupt:
+        logger.info("Listener de kill switch detenido por el usuario")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Kill switch: aplanar posiciones y HALT")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--listen", action="store_true", help="Escuchar NOTIFY y jobs KILL_SWITCH")
+    mode.add_argument("--notify", action="store_true", help="Encolar job y notificar al listener")
+    mode.add_argument("--reset", action="store_true", help="Quitar el HALT del kill switch")
+    parser.add_argument("--reason", default="MANUAL", help="Motivo (se registra en risk_events)")
+    args = parser.parse_args()
+
+    kill_switch = KillSwitch(paper_trading=PAPER_TRADING)
+
+    if args.listen:
+        listen_forever(kill_switch)
+    elif args.notify:
+        enqueue_kill_switch(args.reason)
+    elif args.reset:
+        kill_switch.reset(reason=args.reason)
+    else:
+        result = kill_switch.trigger(reason=args.reason)
+        print(
+            f"[KILL_SWITCH] posiciones={len(result.intents)} "
+            f"trades_exited={result.trades_exited} latencia={result.latency_ms:.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Muestra las funciones con más tiempo de un perfil de ciclo (desk_grade.profiling).
+
+Acepta un fichero .pstats o un directorio (se usa el .pstats más reciente). Con
+--stacks lista además las pilas más muestreadas del .collapsed asociado.
+
+Ejemplos de uso:
+    python -m scripts.profile_view profiles/
+    python -m scripts.profile_view profiles/20250101T120000Z_<cycle_id>.pstats --top 40
+    python -m scripts.profile_view profiles/ --sort tottime --filter portfolio --stacks 10
+
+Para un flamegraph: flamegraph.pl <fichero>.collapsed > ciclo.svg (o abrir el
+.collapsed en https://www.speedscope.app).
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import pstats
+from pathlib import Path
+from typing import List, Optional
+
+SORT_KEYS = ("cumulative", "tottime", "ncalls")
+
+
+def resolve_profile(path: Path) -> Path:
+    """El propio fichero, o el .pstats más reciente del directorio."""
+    if path.is_dir():
+        candidates = sorted(path.glob("*.pstats"))
+        if not candidates:
+            raise FileNotFoundError(f"No hay ficheros .pstats en {path}")
+        return candidates[-1]
+    return path
+
+
+def format_top(
+    path: Path, top: int = 25, sort: str = "cumulative", pattern: Optional[str] = None
+) -> str:
+    """Tabla de pstats con las top funciones por sort (opcionalmente filtradas por regex)."""
+    out = io.StringIO()
+    stats = pstats.Stats(str(path), stream=out)
+    stats.strip_dirs().sort_stats(sort)
+    restrictions = [pattern, top] if pattern else [top]
+    stats.print_stats(*restrictions)
+    return out.getvalue()
+
+
+def top_stacks(path: Path, top: int = 10) -> List[str]:
+    """Pilas más muestreadas de un .collapsed, como '<muestras> <%> hoja  ←  padre ← ...'."""
+    rows = []
+    total = 0
+    for line in path.read_text(encoding="utf-8").splitlines():
+        stack, _, count = line.rpartition(" ")
+        rows.append((int(count), stack.split(";")))
+        total += int(count)
+    rows.sort(key=lambda r: r[0], reverse=True)
+    return [
+        f"{count:6d} {count / total:6.1%}  " + "  ←  ".join(reversed(frames[-4:]))
+        for count, frames in rows[:top]
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Top de funciones de un perfil de ciclo")
+    parser.add_argument("path", type=Path, help="Fichero .pstats o directorio de perfiles")
+    parser.add_argument("--top", type=int, default=25, help="Funciones a mostrar")
+    parser.add_argument("--sort", choices=SORT_KEYS, default="cumulative")
+    parser.add_argument("--filter", help="Regex sobre fichero:línea(función)")
+    parser.add_argument(
+        "--stacks", type=int, default=0, help="Mostrar también las N pilas más muestreadas"
+    )
+    args = parser.parse_args()
+
+    profile = resolve_profile(args.path)
+    print(f"Perfil: {profile}")
+    print(format_top(profile, args.top, args.sort, args.filter))
+
+    if args.stacks:
+        collapsed = profile.with_suffix(".collapsed")
+        if not collapsed.exists():
+            print(f"No existe {collapsed}")
+            return
+        print(f"Pilas más muestreadas ({collapsed.name}):")
+        for line in top_stacks(collapsed, args.stacks):
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
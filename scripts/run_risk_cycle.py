@@ -1,30 +1,42 @@
 from __future__ import annotations
 
+import argparse
 import logging
+import math
 import os
+import time
 from datetime import datetime, timedelta, timezone
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 
 from dotenv import load_dotenv
 
-from desk_grade import api
+from desk_grade import api, metrics
+from desk_grade.checkpoint import CycleCheckpoint, idempotency_key
+from desk_grade.executor import run_per_key
+from desk_grade.logging_config import current_log_context, log_context, setup_logging
+from desk_grade.profiling import DEFAULT_PROFILE_DIR, profile_cycle
+from desk_grade.sharding import ShardSpec
+from portfolio.correlation import CorrelationEngine
 from portfolio.exit_engine import ExitEngine
+from portfolio.exposure import fetch_sector_exposure, snapshot_exposure, upsert_exposure
+from portfolio.kill_switch import is_kill_switch_active
 from portfolio.lifecycle_engine import LifecycleEngine
 from portfolio.order_builder import OrderIntent, build_order_intent
 from portfolio.risk_layer import ExposureSnapshot, RiskEngine
+from portfolio.volatility import fetch_annual_vols
 
 
 load_dotenv()
 
-logging.basicConfig(
-    level=getattr(logging, os.getenv("LOG_LEVEL", "INFO").upper()),
-    format="%(asctime)s [%(levelname)s] %(name)s - %(message)s",
-)
+setup_logging()
 logger = logging.getLogger("run_risk_cycle")
 
 
 PAPER_TRADING = os.getenv("PAPER_TRADING", "true").lower() == "true"
 STRATEGY_ID = os.getenv("STRATEGY_ID", "baseline")
+# "sequential" o "threads": los pasos exits/entries procesan símbolos en paralelo
+EXECUTION_MODE = os.getenv("CYCLE_EXECUTION_MODE", "sequential").lower()
+MAX_WORKERS = int(os.getenv("CYCLE_MAX_WORKERS", "8"))
 
 
 def _now() -> datetime:
@@ -70,6 +82,44 @@ def _fetch_atr(symbol: str) -> Optional[float]:
     return float(row["atr"]) if row else None
 
 
+def _fetch_latest_prices(symbols: List[str]) -> Dict[str, float]:
+    """Último cierre de cada símbolo en una consulta (un index scan por símbolo)."""
+    rows = api.fetch_all(
+        """
+        SELECT s.symbol, b.close
+        FROM unnest(%s::text[]) AS s(symbol)
+        CROSS JOIN LATERAL (
+            SELECT close
+            FROM ohlcv
+            WHERE ohlcv.symbol = s.symbol
+            ORDER BY ts DESC
+            LIMIT 1
+        ) AS b
+        """,
+        (symbols,),
+    )
+    return {r["symbol"]: float(r["close"]) for r in rows}
+
+
+def _fetch_atrs(symbols: List[str]) -> Dict[str, float]:
+    """Último ATR de atr_cache de cada símbolo en una consulta."""
+    rows = api.fetch_all(
+        """
+        SELECT s.symbol, a.atr
+        FROM unnest(%s::text[]) AS s(symbol)
+        CROSS JOIN LATERAL (
+            SELECT atr
+            FROM atr_cache
+            WHERE atr_cache.symbol = s.symbol
+            ORDER BY ts DESC
+            LIMIT 1
+        ) AS a
+        """,
+        (symbols,),
+    )
+    return {r["symbol"]: float(r["atr"]) for r in rows}
+
+
 def _compute_equity_and_pnl() -> Tuple[float, float, float]:
     """
     Calcula equity actual y PnL diario/semanal aproximados en modo PAPER.
@@ -122,39 +172,79 @@ def _compute_equity_and_pnl() -> Tuple[float, float, float]:
     return equity, daily_pnl, weekly_pnl
 
 
-def _fetch_sector_exposure_pct() -> Dict[str, float]:
+def _fetch_sector_exposure_pct(equity: float) -> Dict[str, float]:
     """
-    Agrega exposure_snapshots recientes por sector para aproximar exposición sectorial.
+    Exposición neta por sector de las posiciones vigentes (exposure_current),
+    como fracción del equity.
     """
+    if equity <= 0:
+        return {}
+    return {sector: net / equity for sector, net in fetch_sector_exposure().items()}
+
+
+# Vive entre ciclos en el scheduler: cada ciclo sólo añade las barras nuevas
+_correlation_engine: Optional[CorrelationEngine] = None
+
+
+def reset_correlation_engine() -> None:
+    """
+    Descarta el motor de correlación en memoria: el siguiente ciclo lo
+    reconstruye desde ohlcv. Necesario si cambia la base de datos entre ciclos
+    del mismo proceso (benchmarks sobre copias frescas, tests).
+    """
+    global _correlation_engine
+    _correlation_engine = None
+
+
+def _correlation_flag_step() -> bool:
+    """
+    Actualiza las correlaciones de los símbolos con posición abierta, las
+    persiste en correlation_state si entraron barras nuevas y devuelve el flag
+    de concentración.
+    """
+    global _correlation_engine
+    if _correlation_engine is None:
+        _correlation_engine = CorrelationEngine()
+    engine = _correlation_engine
+
     rows = api.fetch_all(
         """
-        SELECT sector, SUM(net_exposure) AS net_exp
-        FROM exposure_snapshots
-        WHERE ts >= NOW() - INTERVAL '1 day'
-        GROUP BY sector
+        SELECT symbol, SUM(qty) AS qty
+        FROM positions
+        GROUP BY symbol
+        HAVING SUM(qty) <> 0
         """
     )
-    # Normalizamos por equity actual para obtener porcentaje aproximado
-    equity, _, _ = _compute_equity_and_pnl()
-    if equity <= 0:
-        return {}
-
-    result: Dict[str, float] = {}
+    added = engine.refresh([r["symbol"] for r in rows])
+    last_close = dict(zip(engine.symbols, engine.last_close.tolist()))
+    net_exposure = {}
     for r in rows:
-        sector = r["sector"] or "UNKNOWN"
-        pct = float(r["net_exp"] or 0.0) / equity
-        result[sector] = pct
-    return result
+        price = last_close.get(r["symbol"], math.nan)
+        net_exposure[r["symbol"]] = float(r["qty"]) * (0.0 if math.isnan(price) else price)
+    flag, share, cluster = engine.correlation_flag(net_exposure)
+    if added:
+        # Sin barras nuevas las correlaciones no cambian: no se repiten los N(N-1)/2 pares
+        engine.persist()
+    if flag:
+        logger.warning(
+            "Concentración correlacionada %.1f%% > %.1f%% en %s",
+            share * 100,
+            engine.config.max_cluster_pct * 100,
+            ",".join(cluster),
+        )
+    return flag
 
 
 def _risk_gates_step(risk_engine: RiskEngine) -> str:
     """Evalúa gates de riesgo y persiste risk_state / risk_events."""
     equity, daily_pnl, weekly_pnl = _compute_equity_and_pnl()
-    # Aproximaciones simples de flags
-    correlation_flag = False
+    correlation_flag = _correlation_flag_step()
+    # Aproximación simple: sin reconciliación con el broker en modo PAPER
     reconciliation_flag = False
+    kill_switch_flag = is_kill_switch_active()
 
-    sector_exposure_pct = _fetch_sector_exposure_pct()
+    sector_exposure_pct = _fetch_sector_exposure_pct(equity)
+    snapshot_exposure(equity)
 
     # Peak equity aproximado como máximo histórico en cash_balances
     peak_row = api.fetch_one(
@@ -173,6 +263,7 @@ def _risk_gates_step(risk_engine: RiskEngine) -> str:
         sector_exposure_pct=sector_exposure_pct,
         correlation_flag=correlation_flag,
         reconciliation_flag=reconciliation_flag,
+        kill_switch_flag=kill_switch_flag,
     )
 
     api.execute(
@@ -243,19 +334,44 @@ def _fetch_current_position(symbol: str) -> float:
     return float(row["qty"]) if row else 0.0
 
 
-def _persist_paper_fill(intent: OrderIntent) -> None:
+def _persist_paper_fill(
+    intent: OrderIntent,
+    *,
+    cycle_id: Optional[str] = None,
+    idempotency_key: Optional[str] = None,
+) -> Optional[bool]:
     """
     En modo PAPER, consideramos que las órdenes se ejecutan instantáneamente
     al precio de mercado y actualizamos orders, fills y positions.
+
+    Todo se escribe en una única transacción. Con idempotency_key, si la orden
+    ya existe (paso reanudado tras una caída) no se vuelve a aplicar.
+    Devuelve True si el fill se aplicó, False si la orden ya estaba aplicada y
+    None fuera de modo PAPER (no se escribe nada).
     """
     if not PAPER_TRADING:
-        return
+        return None
 
-    # Insert order
-    api.execute(
+    with api.transaction():
+        return _apply_paper_fill(intent, cycle_id=cycle_id, idempotency_key=idempotency_key)
+
+
+def _apply_paper_fill(
+    intent: OrderIntent,
+    *,
+    cycle_id: Optional[str],
+    idempotency_key: Optional[str],
+) -> bool:
+    # Insert order (idempotente por idempotency_key)
+    order = api.fetch_one(
         """
-        INSERT INTO orders (symbol, side, qty, price, order_type, status, strategy_id, paper_trade)
-        VALUES (%s, %s, %s, %s, 'MARKET', 'FILLED', %s, TRUE)
+        INSERT INTO orders (
+            symbol, side, qty, price, order_type, status, strategy_id, paper_trade,
+            cycle_id, idempotency_key
+        )
+        VALUES (%s, %s, %s, %s, 'MARKET', 'FILLED', %s, TRUE, %s, %s)
+        ON CONFLICT (idempotency_key) DO NOTHING
+        RETURNING id
         """,
         (
             intent.symbol,
@@ -263,8 +379,21 @@ def _persist_paper_fill(intent: OrderIntent) -> None:
             intent.qty,
             intent.price,
             intent.strategy_id,
+            cycle_id,
+            idempotency_key,
         ),
     )
+    if not order:
+        logger.info("Orden %s ya aplicada, se omite", idempotency_key)
+        return False
+
+    api.execute(
+        """
+        INSERT INTO fills (order_id, symbol, side, qty, price, cycle_id)
+        VALUES (%s, %s, %s, %s, %s, %s)
+        """,
+        (order["id"], intent.symbol, intent.side, intent.qty, intent.price, cycle_id),
+    )
 
     # Update or insert position
     current_row = api.fetch_one(
@@ -338,85 +467,126 @@ def _persist_paper_fill(intent: OrderIntent) -> None:
             ),
         )
 
+    upsert_exposure([(intent.strategy_id, intent.symbol, new_qty, intent.price)])
+    return True
+
+
+def _process_open_trade(exit_engine: ExitEngine, trade: Dict) -> None:
+    """Obtiene precio/ATR de una operación abierta y evalúa su salida."""
+    symbol = trade["symbol"]
+    price = _fetch_latest_price(symbol)
+    if price is None:
+        return
+    atr = _fetch_atr(symbol)
+    exit_engine.process_trade_exit(
+        symbol=symbol,
+        strategy_id=trade["strategy_id"],
+        current_price=price,
+        atr=atr,
+    )
+
 
-def _entries_step(risk_engine: RiskEngine) -> None:
+def _log_symbol_errors(step: str, errors: Dict[str, Exception]) -> None:
+    for symbol, exc in errors.items():
+        logger.error("Error en %s para %s: %s", step, symbol, exc, exc_info=exc)
+
+
+def _per_symbol_logged(fn: Callable[[Dict], None]) -> Callable[[Dict], None]:
     """
-    Genera entradas en modo PAPER, respetando gates de riesgo
-    y cooldown de lifecycle.
+    Ejecuta fn(item) con symbol y strategy_id del item en el contexto de log.
+
+    El contexto del ciclo (cycle_id) se captura aquí: los hilos del pool no
+    heredan los ContextVar del hilo que llama.
     """
-    lifecycle = LifecycleEngine()
+    parent = current_log_context()
 
-    risk_mode_row = api.fetch_one(
-        """
-        SELECT mode
-        FROM risk_state
-        ORDER BY ts DESC
-        LIMIT 1
-        """
-    )
-    risk_mode = risk_mode_row["mode"] if risk_mode_row else "NORMAL"
+    def run(item: Dict) -> None:
+        strategy_id = item.get("strategy_id", STRATEGY_ID)
+        with log_context(**parent, symbol=item["symbol"], strategy_id=strategy_id):
+            fn(item)
 
-    if risk_mode != "NORMAL":
-        logger.info("Risk mode %s: sólo reducción, sin nuevas entradas", risk_mode)
-        return
+    return run
 
-    equity, _, _ = _compute_equity_and_pnl()
-    if equity <= 0:
-        logger.warning("Equity no disponible, se omiten nuevas entradas")
-        return
 
-    signals = _fetch_latest_signals()
+def _exits_step(
+    exit_engine: ExitEngine, shard: Optional[ShardSpec] = None
+) -> Dict[str, Exception]:
+    """
+    Evalúa salidas de las operaciones abiertas (opcionalmente sólo las de un shard).
 
-    for sig in signals:
-        symbol = sig["symbol"]
-        side = sig["side"].upper()
+    Devuelve los errores por símbolo; un símbolo que falla no aborta el resto.
+    """
+    open_trades = [
+        t
+        for t in _fetch_open_trades()
+        if shard is None or shard.owns(t["strategy_id"], t["symbol"])
+    ]
+    if shard is None:
+        metrics.OPEN_TRADES.set(len(open_trades))
+    errors = run_per_key(
+        open_trades,
+        key=lambda t: t["symbol"],
+        fn=_per_symbol_logged(lambda t: _process_open_trade(exit_engine, t)),
+        mode=EXECUTION_MODE,
+        max_workers=MAX_WORKERS,
+    )
+    _log_symbol_errors("exits", errors)
+    return errors
+
+
+def _process_entry_signal(
+    lifecycle: LifecycleEngine,
+    sig: Dict,
+    price: float,
+    atr: Optional[float],
+    final_size: float,
+    cycle_id: Optional[str] = None,
+) -> None:
+    """
+    Ejecuta (PAPER) la entrada de una señal ya dimensionada en _entries_step.
 
-        if lifecycle.is_in_cooldown(symbol, STRATEGY_ID):
-            logger.info("Symbol %s en cooldown, se salta entrada", symbol)
-            continue
+    El fill y el registro en trade_state van en la misma transacción y la orden
+    se identifica por (cycle_id, estrategia, símbolo): reanudar el paso no
+    duplica entradas ya aplicadas.
+    """
+    symbol = sig["symbol"]
+    side = sig["side"].upper()
 
-        price = _fetch_latest_price(symbol)
-        if price is None or price <= 0:
-            continue
+    if lifecycle.is_in_cooldown(symbol, STRATEGY_ID):
+        logger.info("Symbol %s en cooldown, se salta entrada", symbol)
+        return
 
-        atr = _fetch_atr(symbol)
-        base_size = risk_engine.compute_position_size(
-            symbol=symbol,
-            price=price,
-            equity=equity,
-            atr=atr,
-        )
-        # Para simplicidad, ignoramos vol específica del activo (no tenemos aquí)
-        final_size = risk_engine.apply_vol_targeting(
-            base_size=base_size,
-            asset_annual_vol=None,
-        )
-        if final_size <= 0:
-            continue
+    target_qty = final_size if side == "BUY" else -final_size
+    current_qty = _fetch_current_position(symbol)
 
-        target_qty = final_size if side == "BUY" else -final_size
-        current_qty = _fetch_current_position(symbol)
+    intent = build_order_intent(
+        symbol=symbol,
+        target_qty=target_qty,
+        current_qty=current_qty,
+        price=price,
+        strategy_id=STRATEGY_ID,
+        reason="RISK_CYCLE_ENTRY",
+    )
+    if not intent:
+        return
 
-        intent = build_order_intent(
-            symbol=symbol,
-            target_qty=target_qty,
-            current_qty=current_qty,
-            price=price,
-            strategy_id=STRATEGY_ID,
-            reason="RISK_CYCLE_ENTRY",
-        )
-        if not intent:
-            continue
+    logger.info(
+        "Nueva entrada %s %s qty=%.4f price=%.4f",
+        intent.side,
+        intent.symbol,
+        intent.qty,
+        intent.price,
+        extra={"side": intent.side, "qty": intent.qty, "price": intent.price},
+    )
 
-        logger.info(
-            "Nueva entrada %s %s qty=%.4f price=%.4f",
-            intent.side,
-            intent.symbol,
-            intent.qty,
-            intent.price,
-        )
+    key = None
+    if cycle_id:
+        key = idempotency_key(cycle_id, "entries", intent.strategy_id, intent.symbol)
 
-        _persist_paper_fill(intent)
+    with api.transaction():
+        applied = _persist_paper_fill(intent, cycle_id=cycle_id, idempotency_key=key)
+        if applied is False:
+            return  # ya aplicada en una ejecución anterior del paso
 
         # Registrar entrada en trade_state/lifecycle
         atr_for_levels = atr or (price * 0.01)
@@ -437,9 +607,96 @@ def _entries_step(risk_engine: RiskEngine) -> None:
             tp1_price=levels.tp1,
             tp2_price=levels.tp2,
         )
+    if applied:
+        metrics.FILLS_TOTAL.labels(intent.side).inc()
+
+
+def _entries_step(
+    risk_engine: RiskEngine,
+    *,
+    risk_mode: Optional[str] = None,
+    equity: Optional[float] = None,
+    shard: Optional[ShardSpec] = None,
+    cycle_id: Optional[str] = None,
+) -> Dict[str, Exception]:
+    """
+    Genera entradas en modo PAPER, respetando gates de riesgo
+    y cooldown de lifecycle.
+
+    risk_mode y equity pueden venir ya calculados (por ejemplo, desde el
+    coordinador de shards); si no, se leen de la base de datos.
+
+    Devuelve los errores por símbolo; un símbolo que falla no aborta el resto.
+    """
+    lifecycle = LifecycleEngine()
+
+    if risk_mode is None:
+        risk_mode_row = api.fetch_one(
+            """
+            SELECT mode
+            FROM risk_state
+            ORDER BY ts DESC
+            LIMIT 1
+            """
+        )
+        risk_mode = risk_mode_row["mode"] if risk_mode_row else "NORMAL"
+
+    if risk_mode != "NORMAL":
+        logger.info("Risk mode %s: sólo reducción, sin nuevas entradas", risk_mode)
+        return {}
+
+    if equity is None:
+        equity, _, _ = _compute_equity_and_pnl()
+    if equity <= 0:
+        logger.warning("Equity no disponible, se omiten nuevas entradas")
+        return {}
+
+    signals = [
+        sig
+        for sig in _fetch_latest_signals()
+        if shard is None or shard.owns(STRATEGY_ID, sig["symbol"])
+    ]
+    if not signals:
+        return {}
+
+    # Precio, ATR y vol realizada de todos los candidatos en una consulta cada uno
+    # y sizing vectorizado; sólo las señales con tamaño > 0 pasan a ejecutarse.
+    symbols = [sig["symbol"] for sig in signals]
+    prices = _fetch_latest_prices(symbols)
+    atrs = _fetch_atrs(symbols)
+    vols: Dict[str, float] = {}
+    if risk_engine.limits.vol_target:
+        vols = fetch_annual_vols(symbols, refresh=True)
+    sizes = risk_engine.compute_position_sizes(
+        symbols,
+        [prices.get(s) for s in symbols],
+        [atrs.get(s) for s in symbols],
+        [vols.get(s) for s in symbols],
+        equity,
+    )
+    sized = {s: float(size) for s, size in zip(symbols, sizes) if size > 0}
+
+    errors = run_per_key(
+        [sig for sig in signals if sig["symbol"] in sized],
+        key=lambda sig: sig["symbol"],
+        fn=_per_symbol_logged(
+            lambda sig: _process_entry_signal(
+                lifecycle,
+                sig,
+                prices[sig["symbol"]],
+                atrs.get(sig["symbol"]),
+                sized[sig["symbol"]],
+                cycle_id,
+            )
+        ),
+        mode=EXECUTION_MODE,
+        max_workers=MAX_WORKERS,
+    )
+    _log_symbol_errors("entries", errors)
+    return errors
 
 
-def run_cycle() -> None:
+def run_cycle(cycle_id: Optional[str] = None) -> str:
     """
     Ejecuta un ciclo completo intradía en modo PAPER con el siguiente orden:
       1) Exits
@@ -447,41 +704,106 @@ def run_cycle() -> None:
       3) Risk
       4) Entries
       5) Persistencia (implícita vía DB)
+
+    Cada paso completado queda marcado en cycle_steps. Si el proceso muere a
+    mitad de ciclo, la siguiente ejecución reanuda el mismo cycle_id en el
+    primer paso incompleto. Devuelve el cycle_id.
+
+    La duración, las sentencias SQL y los fills del ciclo y de cada paso se
+    publican en desk_grade.metrics (GET /metrics del scheduler).
     """
-    logger.info("=== RISK CYCLE START ===")
+    start = time.perf_counter()
+    fills_before = metrics.FILLS_TOTAL.total()
+    status = "error"
+    with api.query_count() as queries:
+        try:
+            with CycleCheckpoint.start_or_resume(cycle_id) as checkpoint, log_context(
+                cycle_id=checkpoint.cycle_id
+            ):
+                cycle_id = _run_cycle_steps(checkpoint)
+            status = "ok"
+        finally:
+            _record_cycle_metrics(
+                status,
+                time.perf_counter() - start,
+                queries.value,
+                metrics.FILLS_TOTAL.total() - fills_before,
+            )
+    return cycle_id
+
+
+def _record_cycle_metrics(status: str, duration_s: float, queries: int, fills: float) -> None:
+    metrics.CYCLES_TOTAL.labels(status).inc()
+    metrics.CYCLE_DURATION.labels(status).observe(duration_s)
+    metrics.CYCLE_QUERIES.observe(queries)
+    metrics.CYCLE_FILLS.observe(fills)
+    if status == "ok":
+        metrics.LAST_SUCCESS.set(time.time())
+
+
+def _run_cycle_steps(checkpoint: CycleCheckpoint) -> str:
+    cycle_id = checkpoint.cycle_id
+    if checkpoint.resumed:
+        logger.warning(
+            "=== RISK CYCLE RESUME %s (pasos completados: %s) ===",
+            cycle_id,
+            ",".join(sorted(checkpoint.completed)),
+        )
+    else:
+        logger.info("=== RISK CYCLE START %s ===", cycle_id)
 
     risk_engine = RiskEngine()
     exit_engine = ExitEngine()
     lifecycle = LifecycleEngine()
 
-    # 1) Exits
-    open_trades = _fetch_open_trades()
-    for t in open_trades:
-        symbol = t["symbol"]
-        strategy_id = t["strategy_id"]
-        price = _fetch_latest_price(symbol)
-        if price is None:
+    steps = [
+        # 1) Exits (errores recogidos por símbolo, no abortan el ciclo)
+        ("exits", lambda: _exits_step(exit_engine)),
+        # 2) Journal (MAE/MFE, R, pnl_r y lifecycle EXITED + cooldown)
+        ("journal", lambda: lifecycle.process_exited_trades(cycle_id=cycle_id)),
+        # 3) Risk gates y risk_state / risk_events
+        ("risk", lambda: _risk_gates_step(risk_engine)),
+        # 4) Entries (BUY/SELL) en modo PAPER
+        ("entries", lambda: _entries_step(risk_engine, cycle_id=cycle_id)),
+    ]
+    for step, run_step in steps:
+        if checkpoint.is_done(step):
+            logger.info("Paso %s ya completado en ciclo %s, se omite", step, cycle_id)
             continue
-        atr = _fetch_atr(symbol)
-        exit_engine.process_trade_exit(
-            symbol=symbol,
-            strategy_id=strategy_id,
-            current_price=price,
-            atr=atr,
-        )
-
-    # 2) Journal (MAE/MFE, R, pnl_r y lifecycle EXITED + cooldown)
-    lifecycle.process_exited_trades()
-
-    # 3) Risk gates y risk_state / risk_events
-    _risk_gates_step(risk_engine)
-
-    # 4) Entries (BUY/SELL) en modo PAPER
-    _entries_step(risk_engine)
+        step_start = time.perf_counter()
+        with api.query_count() as step_queries:
+            run_step()
+        metrics.STEP_DURATION.labels(step).observe(time.perf_counter() - step_start)
+        metrics.STEP_QUERIES.labels(step).set(step_queries.value)
+        checkpoint.mark_done(step)
 
     # 5) Persistencia: todas las operaciones se realizan contra DB en cada paso
-    logger.info("=== RISK CYCLE END ===")
+    checkpoint.finish()
+    logger.info("=== RISK CYCLE END %s ===", cycle_id)
+    return cycle_id
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Ciclo de riesgo intradía (PAPER)")
+    parser.add_argument("--cycle-id", help="Reanudar un ciclo concreto")
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Perfilar el ciclo (.pstats y .collapsed en --profile-dir)",
+    )
+    parser.add_argument("--profile-dir", default=DEFAULT_PROFILE_DIR)
+    args = parser.parse_args()
+
+    if not args.profile:
+        run_cycle(args.cycle_id)
+        return
+    _, artifacts = profile_cycle(lambda: run_cycle(args.cycle_id), args.profile_dir)
+    logger.info(
+        "Perfil escrito en %s (ver: python -m scripts.profile_view %s)",
+        artifacts.pstats_path,
+        artifacts.pstats_path,
+    )
 
 
 if __name__ == "__main__":
-    run_cycle()
+    main()
@@ -0,0 +1,222 @@
+"""
+Ejecución del ciclo de riesgo repartida en K procesos (shards).
+
+Cada worker procesa sólo las operaciones/señales cuyo (strategy_id, symbol)
+cae en su partición hash y mantiene un advisory lock de Postgres por shard,
+de modo que dos workers nunca procesan la misma operación.
+
+Los gates de riesgo a nivel de cuenta (equity, drawdown, PnL, sectores) se
+calculan una sola vez en el coordinador y se pasan a los shards:
+
+  1) Exits + Journal   → en paralelo por shard
+  2) Risk gates        → coordinador (una vez)
+  3) Entries           → en paralelo por shard, con el modo/equity del paso 2
+
+Ejemplo de uso:
+    python -m scripts.run_sharded_cycle --shards 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from desk_grade import api
+from desk_grade.checkpoint import CycleCheckpoint
+from desk_grade.logging_config import log_context
+from desk_grade.sharding import ShardSpec
+from portfolio.exit_engine import ExitEngine
+from portfolio.lifecycle_engine import LifecycleEngine
+from portfolio.risk_layer import RiskEngine
+from scripts.run_risk_cycle import (
+    _compute_equity_and_pnl,
+    _entries_step,
+    _exits_step,
+    _risk_gates_step,
+)
+
+logger = logging.getLogger("run_sharded_cycle")
+
+PHASE_EXITS = "exits"
+PHASE_ENTRIES = "entries"
+CHECKPOINT_KIND = "sharded_cycle"
+
+
+def _shard_step(phase: str, shard: ShardSpec) -> str:
+    return f"{phase}:{shard}"
+
+
+@dataclass
+class ShardReport:
+    """Resultado de ejecutar una fase del ciclo en un shard."""
+
+    shard: str
+    phase: str
+    acquired: bool
+    duration_s: float
+    error: Optional[str] = None
+    symbol_errors: Dict[str, str] = field(default_factory=dict)
+
+
+def run_shard_phase(
+    shard: ShardSpec,
+    phase: str,
+    risk_mode: Optional[str] = None,
+    equity: Optional[float] = None,
+    cycle_id: Optional[str] = None,
+) -> ShardReport:
+    """
+    Ejecuta una fase del ciclo para un shard, bajo su advisory lock.
+
+    Si otro proceso ya tiene el lock del shard, no se procesa nada y se
+    devuelve acquired=False. Con cycle_id, al terminar se marca el paso
+    "<fase>:<shard>" como completado para poder reanudar el ciclo.
+    """
+    start = time.perf_counter()
+    with (
+        log_context(cycle_id=cycle_id, shard=str(shard)),
+        api.advisory_lock(*shard.lock_key) as acquired,
+    ):
+        if not acquired:
+            logger.warning("Shard %s ocupado por otro worker, se omite fase %s", shard, phase)
+            return ShardReport(str(shard), phase, False, time.perf_counter() - start)
+
+        try:
+            if phase == PHASE_EXITS:
+                errors = _exits_step(ExitEngine(), shard=shard)
+                LifecycleEngine().process_exited_trades(trade_filter=shard.owns, cycle_id=cycle_id)
+            elif phase == PHASE_ENTRIES:
+                errors = _entries_step(
+                    RiskEngine(),
+                    risk_mode=risk_mode,
+                    equity=equity,
+                    shard=shard,
+                    cycle_id=cycle_id,
+                )
+            else:
+                raise ValueError(f"Fase desconocida: {phase}")
+            if cycle_id:
+                CycleCheckpoint(cycle_id, CHECKPOINT_KIND, set(), resumed=False).mark_done(
+                    _shard_step(phase, shard)
+                )
+        except Exception as exc:
+            logger.error("Error en shard %s fase %s: %s", shard, phase, exc, exc_info=True)
+            return ShardReport(
+                str(shard), phase, True, time.perf_counter() - start, error=str(exc)
+            )
+
+    return ShardReport(
+        str(shard),
+        phase,
+        True,
+        time.perf_counter() - start,
+        symbol_errors={symbol: str(exc) for symbol, exc in errors.items()},
+    )
+
+
+def _run_phase(
+    pool: ProcessPoolExecutor,
+    checkpoint: CycleCheckpoint,
+    shard_count: int,
+    phase: str,
+    risk_mode: Optional[str] = None,
+    equity: Optional[float] = None,
+) -> List[ShardReport]:
+    shards = [ShardSpec(i, shard_count) for i in range(shard_count)]
+    pending = [s for s in shards if not checkpoint.is_done(_shard_step(phase, s))]
+    if len(pending) < len(shards):
+        logger.info(
+            "Fase %s: %d shards ya completados en ciclo %s",
+            phase,
+            len(shards) - len(pending),
+            checkpoint.cycle_id,
+        )
+    futures = [
+        pool.submit(
+            run_shard_phase, shard, phase, risk_mode, equity, checkpoint.cycle_id
+        )
+        for shard in pending
+    ]
+    reports = [f.result() for f in futures]
+    for r in reports:
+        logger.info(
+            "Shard %s fase=%s lock=%s duración=%.3fs símbolos_con_error=%d%s",
+            r.shard,
+            r.phase,
+            r.acquired,
+            r.duration_s,
+            len(r.symbol_errors),
+            f" error={r.error}" if r.error else "",
+        )
+    return reports
+
+
+def run_sharded_cycle(shard_count: int, max_workers: Optional[int] = None) -> List[ShardReport]:
+    """
+    Ejecuta un ciclo completo repartido en shard_count shards usando un pool
+    de procesos de tamaño max_workers (por defecto, uno por shard).
+
+    Un ciclo interrumpido se reanuda: sólo se ejecutan las fases/shards que
+    no quedaron marcados como completados. El coordinador mantiene el lock del
+    ciclo mientras dura, así que otro coordinador no lo reanuda en paralelo.
+    """
+    with CycleCheckpoint.start_or_resume(kind=CHECKPOINT_KIND) as checkpoint:
+        logger.info(
+            "=== SHARDED RISK CYCLE %s %s (shards=%d) ===",
+            "RESUME" if checkpoint.resumed else "START",
+            checkpoint.cycle_id,
+            shard_count,
+        )
+        start = time.perf_counter()
+
+        with ProcessPoolExecutor(max_workers=max_workers or shard_count) as pool:
+            # 1) Exits + Journal por shard
+            reports = _run_phase(pool, checkpoint, shard_count, PHASE_EXITS)
+
+            # 2) Risk gates a nivel de cuenta, una única vez
+            risk_mode: Optional[str] = None  # si ya estaba hecho, los shards lo leen de risk_state
+            if not checkpoint.is_done("risk"):
+                risk_mode = _risk_gates_step(RiskEngine())
+                checkpoint.mark_done("risk")
+            equity, _, _ = _compute_equity_and_pnl()
+
+            # 3) Entries por shard con el resultado compartido
+            reports += _run_phase(pool, checkpoint, shard_count, PHASE_ENTRIES, risk_mode, equity)
+
+        failed = [r for r in reports if r.error or not r.acquired]
+        if not failed:
+            checkpoint.finish()
+        logger.info(
+            "=== SHARDED RISK CYCLE END %s (%.3fs, %d shards con error/ocupados) ===",
+            checkpoint.cycle_id,
+            time.perf_counter() - start,
+            len(failed),
+        )
+    return reports
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Ciclo de riesgo repartido en shards")
+    parser.add_argument(
+        "--shards",
+        type=int,
+        default=int(os.getenv("CYCLE_SHARDS", str(os.cpu_count() or 1))),
+        help="Número de shards (debe ser igual en todos los workers)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Procesos del pool (default: uno por shard)",
+    )
+    args = parser.parse_args()
+    run_sharded_cycle(args.shards, args.workers)
+
+
+if __name__ == "__main__":
+    main()
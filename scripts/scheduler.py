@@ -3,6 +3,18 @@ Scheduler básico para ejecutar ciclos de riesgo periódicamente.
 
 Este scheduler es simple y está diseñado para ser reemplazado por Colibrí
 en producción. Ejecuta el ciclo de riesgo cada N minutos.
+
+Con SCHEDULER_WAKE_ON_BARS=true, además de esperar el intervalo escucha el
+canal NOTIFY ohlcv_bars (scripts.stream_from_ibkr --notify) y adelanta el
+siguiente ciclo en cuanto llegan barras nuevas. El LISTEN se abre antes del
+primer ciclo y sigue abierto entre ciclos: las barras notificadas mientras
+corre un ciclo adelantan el siguiente en lugar de perderse.
+
+SCHEDULER_PROFILE=once perfila el primer ciclo y SCHEDULER_PROFILE=N cada
+N-ésimo ciclo (desk_grade.profiling, ficheros en PROFILE_DIR).
+
+Mientras corre, sirve las métricas del proceso en http://<host>:METRICS_PORT/metrics
+(formato Prometheus; METRICS_PORT=0 lo desactiva).
 """
 
 from __future__ import annotations
@@ -10,11 +22,17 @@ from __future__ import annotations
 import logging
 import os
 import time
+from contextlib import nullcontext
 from datetime import datetime, timezone
+from typing import Optional
 
 from dotenv import load_dotenv
 
+from data_pipeline.channels import OHLCV_CHANNEL
+from desk_grade import api
 from desk_grade.logging_config import setup_logging
+from desk_grade.metrics import DEFAULT_METRICS_PORT, start_metrics_server
+from desk_grade.profiling import DEFAULT_PROFILE_DIR, ProfileSchedule, profile_cycle
 
 load_dotenv()
 setup_logging()
@@ -22,19 +40,47 @@ setup_logging()
 logger = logging.getLogger("scheduler")
 
 
-def run_risk_cycle() -> None:
-    """Importa y ejecuta el ciclo de riesgo."""
+def run_risk_cycle(profile: bool = False) -> None:
+    """Importa y ejecuta el ciclo de riesgo (perfilado si profile)."""
     from scripts.run_risk_cycle import run_cycle
 
-    run_cycle()
+    if profile:
+        profile_cycle(run_cycle, DEFAULT_PROFILE_DIR)
+    else:
+        run_cycle()
 
 
-def scheduler_loop(interval_minutes: int = 5) -> None:
+def wait_for_next_cycle(
+    interval_seconds: int, bars: Optional[api.Subscription] = None
+) -> None:
+    """
+    Espera el intervalo; con una suscripción a ohlcv_bars vuelve antes si hay
+    barras notificadas, incluidas las que llegaron durante el ciclo anterior.
+    """
+    if bars is None:
+        time.sleep(interval_seconds)
+        return
+    payloads = bars.wait(timeout=interval_seconds)
+    if payloads:
+        logger.info(
+            "Barras nuevas notificadas (%d lotes, último %s): se adelanta el ciclo",
+            len(payloads),
+            payloads[-1],
+        )
+
+
+def scheduler_loop(
+    interval_minutes: int = 5,
+    wake_on_bars: bool = False,
+    profile_schedule: ProfileSchedule = ProfileSchedule(),
+) -> None:
     """
     Ejecuta el ciclo de riesgo cada N minutos de forma continua.
 
     Args:
         interval_minutes: Intervalo en minutos entre ejecuciones
+        wake_on_bars: Adelantar el ciclo al recibir NOTIFY ohlcv_bars
+        profile_schedule: Ciclos a perfilar (SCHEDULER_PROFILE)
     """
     interval_seconds = interval_minutes * 60
     logger.info(
@@ -45,19 +91,23 @@ def scheduler_loop(interval_minutes: int = 5) -> None:
     cycle_count = 0
 
     try:
-        while True:
-            cycle_count += 1
-            logger.info("=== CICLO #%d INICIADO ===", cycle_count)
-
-            try:
-                run_risk_cycle()
-                logger.info("=== CICLO #%d COMPLETADO ===", cycle_count)
-            except Exception as exc:
-                logger.error("Error en ciclo #%d: %s", cycle_count, exc, exc_info=True)
-
-            # Esperar hasta el siguiente ciclo
-            logger.info("Esperando %d segundos hasta el siguiente ciclo...", interval_seconds)
-            time.sleep(interval_seconds)
+        # Una sola conexión LISTEN para todo el bucle (abierta antes del primer ciclo)
+        with api.subscribe(OHLCV_CHANNEL) if wake_on_bars else nullcontext() as bars:
+            while True:
+                cycle_count += 1
+                logger.info("=== CICLO #%d INICIADO ===", cycle_count)
+
+                try:
+                    run_risk_cycle(profile=profile_schedule.due(cycle_count))
+                    logger.info("=== CICLO #%d COMPLETADO ===", cycle_count)
+                except Exception as exc:
+                    logger.error("Error en ciclo #%d: %s", cycle_count, exc, exc_info=True)
+
+                # Esperar hasta el siguiente ciclo
+                logger.info(
+                    "Esperando %d segundos hasta el siguiente ciclo...", interval_seconds
+                )
+                wait_for_next_cycle(interval_seconds, bars)
 
     except KeyboardInterrupt:
         logger.info("Scheduler detenido por el usuario")
@@ -69,7 +119,15 @@ def scheduler_loop(interval_minutes: int = 5) -> None:
 def main() -> None:
     """Función principal del scheduler."""
     interval = int(os.getenv("SCHEDULER_INTERVAL_MINUTES", "5"))
-    scheduler_loop(interval_minutes=interval)
+    wake_on_bars = os.getenv("SCHEDULER_WAKE_ON_BARS", "false").lower() == "true"
+    profile_schedule = ProfileSchedule.parse(os.getenv("SCHEDULER_PROFILE"))
+    if DEFAULT_METRICS_PORT:
+        start_metrics_server(DEFAULT_METRICS_PORT)
+    scheduler_loop(
+        interval_minutes=interval,
+        wake_on_bars=wake_on_bars,
+        profile_schedule=profile_schedule,
+    )
 
 
 if __name__ == "__main__":
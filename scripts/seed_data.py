@@ -8,10 +8,12 @@ from __future__ import annotations
 
 import logging
 import os
-from datetime import datetime, timedelta, timezone
 
+import pandas as pd
 from dotenv import load_dotenv
 
+from data_pipeline.loader import upsert_ohlcv
+from data_pipeline.synthetic import SyntheticMarket
 from desk_grade import api
 from desk_grade.logging_config import setup_logging
 
@@ -25,6 +27,9 @@ def seed_ohlcv(symbol: str, days: int = 30, timeframe: str = "1m") -> None:
     """
     Genera datos OHLCV sintéticos para un símbolo.
 
+    Las barras se generan vectorizadas (data_pipeline.synthetic) y se cargan
+    con un único upsert en lote.
+
     Args:
         symbol: Símbolo del activo (ej: "EURUSD", "AAPL")
         days: Número de días de datos históricos a generar
@@ -32,51 +37,18 @@ def seed_ohlcv(symbol: str, days: int = 30, timeframe: str = "1m") -> None:
     """
     logger.info("Generando OHLCV para %s (%d días, %s)", symbol, days, timeframe)
 
-    now = datetime.now(timezone.utc)
-    start_ts = now - timedelta(days=days)
+    end = pd.Timestamp.now(tz="UTC")
+    start = end - pd.Timedelta(days=days)
 
     # Precio base sintético
     base_price = 100.0 if "USD" not in symbol else 1.0
+    market = SyntheticMarket(
+        [symbol], timeframe=timeframe, start_prices=[base_price], n_factors=1
+    )
 
-    current_ts = start_ts
-    current_price = base_price
     count = 0
-
-    while current_ts < now:
-        # Movimiento aleatorio simple (random walk)
-        import random
-
-        change_pct = random.uniform(-0.001, 0.001)  # ±0.1% por minuto
-        current_price *= 1 + change_pct
-
-        high = current_price * 1.0005
-        low = current_price * 0.9995
-        open_price = current_price * 0.9998
-        close_price = current_price
-
-        api.execute(
-            """
-            INSERT INTO ohlcv (symbol, ts, open, high, low, close, volume, timeframe)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-            ON CONFLICT DO NOTHING
-            """,
-            (
-                symbol,
-                current_ts,
-                open_price,
-                high,
-                low,
-                close_price,
-                random.uniform(1000, 10000),
-                timeframe,
-            ),
-        )
-
-        current_ts += timedelta(minutes=1)
-        count += 1
-
-        if count % 1000 == 0:
-            logger.debug("Insertadas %d velas hasta %s", count, current_ts)
+    for ts, bars in market.iter_bars(start, end):
+        count += upsert_ohlcv(market.to_frame(ts, bars), timeframe, "seed")
 
     logger.info("OHLCV generado: %d velas para %s", count, symbol)
 
@@ -0,0 +1,91 @@
+"""
+Streaming de barras en tiempo real desde IBKR hacia la tabla ohlcv.
+
+Suscribe barras de 5 segundos (reqRealTimeBars), las agrega al timeframe
+indicado y escribe las barras completadas en lote. Con --notify envía un
+NOTIFY ohlcv_bars por lote para que el scheduler adelante el ciclo de riesgo.
+Con --metrics-port sirve /metrics (desk_grade_ingest_rows_total, filas/s con rate()).
+
+Requisitos:
+1. TWS o IB Gateway corriendo (suscripción de datos de mercado en tiempo real)
+2. IBKR_HOST / IBKR_PORT / IBKR_CLIENT_ID en .env
+
+Ejemplo de uso:
+    python -m scripts.stream_from_ibkr --symbols AAPL,MSFT --asset USA_STOCK --timeframe 1m --notify
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+
+from dotenv import load_dotenv
+
+from data_pipeline.providers import get_provider_class
+from data_pipeline.channels import OHLCV_CHANNEL
+from data_pipeline.streaming import IBKRBarStreamer, OhlcvBatchWriter
+from desk_grade.logging_config import setup_logging
+from desk_grade.metrics import start_metrics_server
+
+load_dotenv()
+setup_logging()
+
+logger = logging.getLogger("stream_from_ibkr")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Streaming de barras IBKR hacia ohlcv")
+    parser.add_argument("--symbols", required=True, help="Símbolos separados por comas")
+    parser.add_argument("--asset", default="USA_STOCK", help="USA_STOCK, FOREX, FUTURES, CRYPTO")
+    parser.add_argument("--timeframe", default="1m", help="Timeframe de las barras agregadas")
+    parser.add_argument(
+        "--what-to-show",
+        default="TRADES",
+        help="TRADES, MIDPOINT, BID o ASK (FOREX suele requerir MIDPOINT)",
+    )
+    parser.add_argument("--batch-size", type=int, default=500, help="Barras por lote")
+    parser.add_argument(
+        "--flush-interval",
+        type=float,
+        default=5.0,
+        help="Segundos máximos entre escrituras",
+    )
+    parser.add_argument(
+        "--notify",
+        action="store_true",
+        help=f"Enviar NOTIFY {OHLCV_CHANNEL} tras cada lote",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=int(os.getenv("STREAM_METRICS_PORT", "0")),
+        help="Puerto para GET /metrics (0 = desactivado)",
+    )
+    args = parser.parse_args()
+
+    if args.metrics_port:
+        start_metrics_server(args.metrics_port)
+    symbols = [s.strip().upper() for s in args.symbols.split(",") if s.strip()]
+    provider = get_provider_class("ibkr")(
+        host=os.getenv("IBKR_HOST", "127.0.0.1"),
+        port=int(os.getenv("IBKR_PORT", "7497")),
+        # client_id distinto del de la ingesta histórica para poder convivir
+        client_id=int(os.getenv("IBKR_STREAM_CLIENT_ID", "2")),
+    )
+    writer = OhlcvBatchWriter(
+        timeframe=args.timeframe,
+        batch_size=args.batch_size,
+        flush_interval_s=args.flush_interval,
+        notify_channel=OHLCV_CHANNEL if args.notify else None,
+    )
+
+    with provider:
+        IBKRBarStreamer(
+            provider, symbols, args.asset, writer, what_to_show=args.what_to_show
+        ).run()
+    logger.info("Barras escritas: %d", writer.rows_written)
+
+
+if __name__ == "__main__":
+    main()
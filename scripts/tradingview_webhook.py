@@ -0,0 +1,74 @@
+"""
+Receptor de alertas (webhook) de TradingView hacia signals_live.
+
+Las alertas se validan y se insertan en lote (un commit cada TV_WEBHOOK_FLUSH_MS
+milisegundos o TV_WEBHOOK_BATCH_ROWS filas), así que las ráfagas al cierre de
+barra no hacen un commit por petición. GET /stats devuelve contadores de
+throughput y latencia.
+
+Configuración (.env):
+    TV_WEBHOOK_HOST, TV_WEBHOOK_PORT, TV_WEBHOOK_SECRET,
+    TV_WEBHOOK_FLUSH_MS, TV_WEBHOOK_BATCH_ROWS
+
+Ejemplo de uso:
+    python -m scripts.tradingview_webhook --port 8088
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import os
+
+from dotenv import load_dotenv
+
+from data_pipeline.webhook_server import SignalBatcher, WebhookServer
+from desk_grade.logging_config import setup_logging
+
+load_dotenv()
+setup_logging()
+
+logger = logging.getLogger("tradingview_webhook")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Webhook de alertas TradingView → signals_live")
+    parser.add_argument("--host", default=os.getenv("TV_WEBHOOK_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("TV_WEBHOOK_PORT", "8088")))
+    parser.add_argument(
+        "--flush-ms",
+        type=int,
+        default=int(os.getenv("TV_WEBHOOK_FLUSH_MS", "200")),
+        help="Milisegundos máximos entre inserciones",
+    )
+    parser.add_argument(
+        "--batch-rows",
+        type=int,
+        default=int(os.getenv("TV_WEBHOOK_BATCH_ROWS", "500")),
+        help="Filas por lote",
+    )
+    parser.add_argument(
+        "--strategy-id",
+        default=os.getenv("STRATEGY_ID", "baseline"),
+        help="strategy_id si la alerta no lo trae",
+    )
+    args = parser.parse_args()
+
+    batcher = SignalBatcher(flush_interval_ms=args.flush_ms, max_rows=args.batch_rows)
+    server = WebhookServer(
+        batcher,
+        host=args.host,
+        port=args.port,
+        secret=os.getenv("TV_WEBHOOK_SECRET") or None,
+        default_strategy=args.strategy_id,
+    )
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        logger.info("Webhook detenido por el usuario")
+    logger.info("Estadísticas finales: %s", server.stats.snapshot())
+
+
+if __name__ == "__main__":
+    main()
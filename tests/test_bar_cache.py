@@ -0,0 +1,212 @@
+"""
+Tests para ParquetProvider y la caché local de barras (BarCache).
+"""
+
+import os
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from data_pipeline.cache import BarCache, CachedProvider, cache_key
+from data_pipeline.providers.base import Provider
+from data_pipeline.providers.parquet_provider import ParquetProvider
+
+
+def _bars(symbol, start, periods, freq="1D"):
+    ts = pd.date_range(start, periods=periods, freq=freq, tz="UTC")
+    return pd.DataFrame(
+        {
+            "ts": ts,
+            "symbol": symbol,
+            "open": 1.0,
+            "high": 2.0,
+            "low": 0.5,
+            "close": range(periods),
+            "volume": 10.0,
+        }
+    )
+
+
+class CountingProvider(Provider):
+    def __init__(self, df):
+        self.df = df
+        self.calls = []
+        self.last_errors = {}
+
+    def fetch_ohlcv(self, symbols, timeframe, start_ts, end_ts, asset):
+        self.calls.append(list(symbols))
+        return self.df[self.df["symbol"].isin(symbols)].copy()
+
+
+class ChunkedProvider(CountingProvider):
+    """Provider en streaming: un bloque por cada chunk filas, sin fetch de todo."""
+
+    def __init__(self, df, chunk):
+        super().__init__(df)
+        self.chunk = chunk
+
+    def fetch_ohlcv(self, symbols, timeframe, start_ts, end_ts, asset):
+        raise AssertionError("el streaming no debe cargar todo de una vez")
+
+    def iter_ohlcv(self, symbols, timeframe, start_ts, end_ts, asset):
+        self.calls.append(list(symbols))
+        df = self.df[self.df["symbol"].isin(symbols)]
+        for i in range(0, len(df), self.chunk):
+            yield df.iloc[i : i + self.chunk].copy()
+
+
+CLOSED = ("1d", "2024-01-01", "2024-12-31", "USA_STOCK")
+
+
+def test_cache_key_is_stable_and_range_specific() -> None:
+    key = cache_key("csv", "aapl", "1d", "2024-01-01", None)
+    assert key == cache_key("csv", "AAPL", "1d", "2024-01-01", None)
+    assert key != cache_key("csv", "AAPL", "1d", "2024-01-02", None)
+    assert key != cache_key("tradingview", "AAPL", "1d", "2024-01-01", None)
+
+
+def test_write_partitions_by_symbol_timeframe_month(tmp_path) -> None:
+    cache = BarCache(str(tmp_path))
+    key = cache.write("csv", "AAPL", "1d", None, None, _bars("AAPL", "2024-01-20", 20))
+
+    assert cache.has(key)
+    months = sorted(os.listdir(tmp_path / "symbol=AAPL" / "timeframe=1d"))
+    assert months == ["month=2024-01", "month=2024-02"]
+
+
+def test_read_pushes_down_symbol_and_ts(tmp_path) -> None:
+    cache = BarCache(str(tmp_path))
+    cache.write("csv", "AAPL", "1d", None, None, _bars("AAPL", "2024-01-01", 60))
+    cache.write("csv", "MSFT", "1d", None, None, _bars("MSFT", "2024-01-01", 60))
+
+    df = cache.read(["AAPL"], "1d", "2024-02-01", "2024-02-10")
+
+    assert set(df["symbol"]) == {"AAPL"}
+    assert len(df) == 10
+    assert df["ts"].min() == pd.Timestamp("2024-02-01", tz="UTC")
+    assert str(df["ts"].dt.tz) == "UTC"
+
+
+def test_cached_provider_only_fetches_missing_symbols(tmp_path) -> None:
+    source = CountingProvider(pd.concat([_bars("AAPL", "2024-01-01", 5), _bars("MSFT", "2024-01-01", 5)]))
+    provider = CachedProvider(source, BarCache(str(tmp_path)), name="csv:data.csv")
+
+    first = provider.fetch_ohlcv(["AAPL"], "1d", "2024-01-01", "2024-01-31", "USA_STOCK")
+    second = provider.fetch_ohlcv(["AAPL", "MSFT"], "1d", "2024-01-01", "2024-01-31", "USA_STOCK")
+
+    assert source.calls == [["AAPL"], ["MSFT"]]
+    assert len(first) == 5 and len(second) == 10
+    pd.testing.assert_frame_equal(
+        first[["ts", "close"]], second[second["symbol"] == "AAPL"][["ts", "close"]]
+    )
+
+
+def test_two_providers_sharing_a_cache_dir_do_not_mix_bars(tmp_path) -> None:
+    cache = BarCache(str(tmp_path))
+    a = _bars("AAPL", "2024-01-01", 5).assign(close=1.0)
+    b = _bars("AAPL", "2024-01-01", 5).assign(close=2.0)
+    provider_a = CachedProvider(CountingProvider(a), cache, name="csv:a.csv")
+    provider_b = CachedProvider(CountingProvider(b), cache, name="csv:b.csv")
+
+    args = (["AAPL"], "1d", "2024-01-01", "2024-01-31", "USA_STOCK")
+    provider_a.fetch_ohlcv(*args)
+    provider_b.fetch_ohlcv(*args)
+    hit_a = provider_a.fetch_ohlcv(*args)
+    hit_b = provider_b.fetch_ohlcv(*args)
+
+    assert provider_a.provider.calls == [["AAPL"]]  # la tercera llamada es un hit
+    assert hit_a["close"].tolist() == [1.0] * 5
+    assert hit_b["close"].tolist() == [2.0] * 5
+
+
+def test_parquet_provider_reads_single_file(tmp_path) -> None:
+    path = tmp_path / "bars.parquet"
+    pd.concat([_bars("AAPL", "2024-01-01", 10), _bars("MSFT", "2024-01-01", 10)]).to_parquet(path)
+
+    df = ParquetProvider(str(path)).fetch_ohlcv(["MSFT"], "1d", "2024-01-05", None, "USA_STOCK")
+
+    assert list(df.columns) == ["ts", "symbol", "open", "high", "low", "close", "volume"]
+    assert set(df["symbol"]) == {"MSFT"} and len(df) == 6
+
+
+@pytest.mark.parametrize("end_ts", [None, "2999-01-01"])
+def test_open_range_bypasses_the_cache(tmp_path, end_ts) -> None:
+    source = CountingProvider(_bars("AAPL", "2024-01-01", 5))
+    provider = CachedProvider(source, BarCache(str(tmp_path)), name="ibkr")
+
+    for _ in range(2):
+        df = provider.fetch_ohlcv(["AAPL"], "1d", "2024-01-01", end_ts, "USA_STOCK")
+
+    assert source.calls == [["AAPL"], ["AAPL"]] and len(df) == 5
+    assert os.listdir(tmp_path / "_manifest") == []
+
+
+def test_re_exported_file_invalidates_the_cache(tmp_path) -> None:
+    export = tmp_path / "aapl.csv"
+    export.write_text("v1")
+    source = CountingProvider(_bars("AAPL", "2024-01-01", 5))
+    provider = CachedProvider(
+        source, BarCache(str(tmp_path / "cache")), name=f"csv:{export}", source_path=str(export)
+    )
+
+    provider.fetch_ohlcv(["AAPL"], *CLOSED)
+    provider.fetch_ohlcv(["AAPL"], *CLOSED)
+    export.write_text("v2 con más barras")
+    provider.fetch_ohlcv(["AAPL"], *CLOSED)
+
+    assert source.calls == [["AAPL"], ["AAPL"]]
+
+
+def test_empty_and_failed_symbols_are_not_cached(tmp_path) -> None:
+    source = CountingProvider(
+        pd.concat([_bars("AAPL", "2024-01-01", 5), _bars("MSFT", "2024-01-01", 5)])
+    )
+    source.last_errors = {"MSFT": "timeout"}
+    provider = CachedProvider(source, BarCache(str(tmp_path)), name="quantconnect")
+
+    provider.fetch_ohlcv(["AAPL", "MSFT", "TSLA"], *CLOSED)
+    source.last_errors = {}
+    provider.fetch_ohlcv(["AAPL", "MSFT", "TSLA"], *CLOSED)
+
+    # AAPL queda en caché; MSFT (con error) y TSLA (vacío) se vuelven a pedir
+    assert source.calls == [["AAPL", "MSFT", "TSLA"], ["MSFT", "TSLA"]]
+    assert provider.last_errors == {}
+
+
+def test_write_does_not_register_empty_downloads(tmp_path) -> None:
+    cache = BarCache(str(tmp_path))
+    assert cache.write("ibkr", "TSLA", "1d", None, None, _bars("TSLA", "2024-01-01", 0)) is None
+    assert os.listdir(tmp_path / "_manifest") == []
+
+
+def test_iter_ohlcv_streams_chunks_and_caches_them(tmp_path) -> None:
+    df = pd.concat([_bars("AAPL", "2024-01-20", 30), _bars("MSFT", "2024-01-20", 30)])
+    source = ChunkedProvider(df, chunk=7)
+    provider = CachedProvider(source, BarCache(str(tmp_path)), name="csv:big.csv")
+
+    chunks = list(provider.iter_ohlcv(["AAPL", "MSFT"], *CLOSED))
+    assert [len(c) for c in chunks] == [7] * 8 + [4]  # bloque a bloque, sin concatenar
+
+    hit = provider.fetch_ohlcv(["AAPL", "MSFT"], *CLOSED)
+    assert source.calls == [["AAPL", "MSFT"]]
+    pd.testing.assert_frame_equal(
+        hit[["ts", "symbol", "close"]],
+        df.sort_values(["symbol", "ts"]).reset_index(drop=True)[["ts", "symbol", "close"]],
+    )
+
+
+def test_interrupted_stream_registers_nothing(tmp_path) -> None:
+    source = ChunkedProvider(_bars("AAPL", "2024-01-01", 30), chunk=10)
+    cache = BarCache(str(tmp_path))
+    provider = CachedProvider(source, cache, name="csv:big.csv")
+
+    stream = provider.iter_ohlcv(["AAPL"], *CLOSED)
+    next(stream)
+    stream.close()
+    assert os.listdir(tmp_path / "_manifest") == []
+
+    assert len(provider.fetch_ohlcv(["AAPL"], *CLOSED)) == 30
+    key = cache_key("csv:big.csv", "AAPL", *CLOSED[:3])
+    assert cache.has(key) and len(cache.part_files(key, "AAPL", "1d")) == 3
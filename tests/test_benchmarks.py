@@ -0,0 +1,159 @@
+"""
+Tests para el arnés de benchmarks (sin base de datos).
+"""
+
+from contextlib import contextmanager, nullcontext
+
+import pytest
+
+from benchmarks.database import schema_sql
+from benchmarks.harness import compare, load_results, measure, missed_targets, save_report
+from benchmarks.micro.timer import BenchmarkTimer
+from benchmarks.scenarios import Scenario, parse_scenarios
+from desk_grade import api
+
+
+class _FakeCursor:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params=None):
+        pass
+
+    def executemany(self, query, params_seq):
+        pass
+
+    def fetchone(self):
+        return None
+
+    def fetchall(self):
+        return []
+
+
+class _FakeConn:
+    def cursor(self, **kwargs):
+        return _FakeCursor()
+
+    def commit(self):
+        pass
+
+
+@contextmanager
+def _fake_session():
+    yield _FakeConn()
+
+
+def _result(median_s, queries):
+    return {"median_s": median_s, "min_s": median_s, "max_s": median_s, "queries": queries}
+
+
+def test_query_count_cuenta_sentencias_del_bloque(monkeypatch):
+    monkeypatch.setattr(api, "db_session", _fake_session)
+    api.execute("SELECT 1")
+    with api.query_count() as counter:
+        api.execute("SELECT 1")
+        api.fetch_one("SELECT 1")
+        api.fetch_all("SELECT 1")
+        api.execute_many("SELECT %s", [(1,), (2,)])
+        assert counter.value == 4
+    api.execute("SELECT 1")
+    assert counter.value == 4
+
+
+def test_measure_usa_estado_nuevo_y_cuenta_consultas(monkeypatch):
+    monkeypatch.setattr(api, "db_session", _fake_session)
+    fresh_calls = []
+
+    def fresh():
+        fresh_calls.append(1)
+        return nullcontext()
+
+    def prepare():
+        api.fetch_all("SELECT preparación")  # fuera de la medida
+        return lambda: [api.fetch_one("SELECT 1") for _ in range(3)]
+
+    result = measure(prepare, fresh, repeats=4)
+    assert len(fresh_calls) == 4
+    assert len(result["times_s"]) == 4
+    assert result["queries"] == 3
+    assert result["min_s"] <= result["median_s"] <= result["max_s"]
+
+
+def test_compare_detecta_regresiones_de_tiempo_y_consultas():
+    baseline = {
+        "u10_t5/run_cycle": _result(0.100, 50),
+        "u10_t5/step_risk": _result(0.001, 8),
+        "u10_t5/step_exits": _result(0.200, 20),
+    }
+    current = {
+        "u10_t5/run_cycle": _result(0.130, 50),  # +30 %
+        "u10_t5/step_risk": _result(0.002, 8),  # +100 % pero 1 ms: ruido
+        "u10_t5/step_exits": _result(0.210, 25),  # +5 %, más consultas
+        "u10_t5/nuevo": _result(5.0, 1000),  # sin línea base
+    }
+    regressions = compare(current, baseline, threshold_pct=20.0, min_delta_s=0.005)
+    assert [(r.key, r.metric) for r in regressions] == [
+        ("u10_t5/run_cycle", "median_s"),
+        ("u10_t5/step_exits", "queries"),
+    ]
+    assert regressions[0].change_pct == pytest.approx(30.0)
+    assert compare(current, baseline, threshold_pct=50.0, min_delta_s=0.005)[0].metric == "queries"
+
+
+def test_missed_targets_compara_la_mediana_con_el_objetivo_del_caso():
+    current = {
+        "u1000_t500/kill_switch.trigger": _result(0.140, 7),
+        "u10_t5/kill_switch.trigger": _result(0.020, 7),
+        "u1000_t500/run_cycle": _result(5.0, 900),  # sin objetivo
+    }
+    missed = missed_targets(current, {"kill_switch.trigger": 0.100})
+
+    assert [(m.key, m.metric) for m in missed] == [
+        ("u1000_t500/kill_switch.trigger", "target_s")
+    ]
+    assert missed[0].change_pct == pytest.approx(40.0)
+
+
+def test_informe_json_ida_y_vuelta(tmp_path):
+    results = {"u10_t5/run_cycle": _result(0.1, 50)}
+    path = save_report({"results": results, "git_commit": "abc"}, tmp_path / "r" / "x.json")
+    assert load_results(path) == results
+    assert load_results(tmp_path / "no_existe.json") is None
+
+
+def test_parse_scenarios():
+    assert parse_scenarios("10x5, 1000x500x100") == [
+        Scenario(10, 5, 1),
+        Scenario(1000, 500, 100),
+    ]
+    assert parse_scenarios("100x20")[0].name == "u100_t20"
+    with pytest.raises(ValueError):
+        parse_scenarios("100-20")
+    with pytest.raises(ValueError):
+        parse_scenarios("10x8x5")  # no caben en el universo
+
+
+def test_schema_sin_timescale():
+    plain = schema_sql(timescale=False)
+    assert "create_hypertable" not in plain
+    assert "EXTENSION IF NOT EXISTS timescaledb" not in plain
+    assert "CREATE TABLE IF NOT EXISTS ohlcv" in plain
+    assert "create_hypertable" in schema_sql(timescale=True)
+
+
+def test_benchmark_timer_sin_pytest_benchmark():
+    store = {}
+    timer = BenchmarkTimer("micro/suma", store, max_time=0.01)
+    assert timer(sum, range(100)) == 4950
+    stats = store["micro/suma"]
+    assert stats["rounds"] >= 5 and stats["iterations"] >= 1
+    assert 0 < stats["min_s"] <= stats["median_s"] <= stats["max_s"]
+
+    assert timer.pedantic(sum, args=([1, 2],), rounds=3) == 3
+    assert store["micro/suma"]["rounds"] == 3
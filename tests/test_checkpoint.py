@@ -0,0 +1,186 @@
+"""
+Tests para los checkpoints de ciclo.
+"""
+
+from contextlib import contextmanager
+
+import pytest
+
+from desk_grade import checkpoint
+from desk_grade.checkpoint import CycleCheckpoint, cycle_lock_key, idempotency_key
+
+
+def test_idempotency_key_is_stable() -> None:
+    """La misma combinación de ciclo/paso/partes produce siempre la misma clave."""
+    key = idempotency_key("c-1", "entries", "baseline", "AAPL")
+    assert key == "c-1:entries:baseline:AAPL"
+    assert key == idempotency_key("c-1", "entries", "baseline", "AAPL")
+    assert key != idempotency_key("c-2", "entries", "baseline", "AAPL")
+
+
+def test_mark_done_records_step(monkeypatch) -> None:
+    """mark_done persiste el paso y is_done lo refleja sin volver a consultar."""
+    calls = []
+    monkeypatch.setattr(checkpoint.api, "execute", lambda q, p=None: calls.append(p))
+
+    cp = CycleCheckpoint("c-1", "risk_cycle", {"exits"}, resumed=True)
+    assert cp.is_done("exits")
+    assert not cp.is_done("journal")
+
+    cp.mark_done("journal")
+    assert cp.is_done("journal")
+    assert calls == [("c-1", "journal")]
+    assert cp.key("entries", "AAPL") == "c-1:entries:AAPL"
+
+
+class FakeCycleDb:
+    """cycle_runs / cycle_steps en memoria y advisory locks tomados por otros procesos."""
+
+    def __init__(self, running, steps=None, busy=()):
+        self.running = list(running)  # cycle_id RUNNING, del más nuevo al más viejo
+        self.steps = steps or {}
+        self.busy = set(busy)
+        self.held = []
+        self.released = []
+
+    def install(self, monkeypatch):
+        @contextmanager
+        def transaction():
+            yield
+
+        @contextmanager
+        def advisory_lock(key1, key2):
+            cycle = next(c for c in ["new-1", *self.running] if cycle_lock_key(c) == (key1, key2))
+            acquired = cycle not in self.busy
+            if acquired:
+                self.held.append(cycle)
+            try:
+                yield acquired
+            finally:
+                if acquired:
+                    self.released.append(cycle)
+
+        def fetch_all(query, params=None):
+            if "FROM cycle_steps" in query:
+                return [{"step": s} for s in self.steps.get(params[0], [])]
+            return [{"cycle_id": c} for c in self.running]
+
+        def fetch_one(query, params=None):
+            if "INSERT INTO cycle_runs" in query:
+                return {"cycle_id": "new-1"}
+            return {"status": "RUNNING"}
+
+        monkeypatch.setattr(checkpoint.api, "transaction", transaction)
+        monkeypatch.setattr(checkpoint.api, "advisory_lock", advisory_lock)
+        monkeypatch.setattr(checkpoint.api, "execute", lambda q, p=None: None)
+        monkeypatch.setattr(checkpoint.api, "fetch_all", fetch_all)
+        monkeypatch.setattr(checkpoint.api, "fetch_one", fetch_one)
+
+
+def test_resume_skips_cycles_running_in_another_process(monkeypatch) -> None:
+    """Un ciclo RUNNING con el lock tomado sigue vivo: se reanuda el siguiente libre."""
+    db = FakeCycleDb(running=["c-live", "c-dead"], steps={"c-dead": ["exits"]}, busy={"c-live"})
+    db.install(monkeypatch)
+
+    with CycleCheckpoint.start_or_resume() as cp:
+        assert (cp.cycle_id, cp.resumed, cp.completed) == ("c-dead", True, {"exits"})
+        assert db.held == ["c-dead"] and db.released == []
+    assert db.released == ["c-dead"]
+
+
+def test_new_cycle_when_every_running_cycle_is_alive(monkeypatch) -> None:
+    db = FakeCycleDb(running=["c-live"], busy={"c-live"})
+    db.install(monkeypatch)
+
+    with CycleCheckpoint.start_or_resume() as cp:
+        assert (cp.cycle_id, cp.resumed) == ("new-1", False)
+        assert db.held == ["new-1"]
+
+    with pytest.raises(RuntimeError):
+        CycleCheckpoint.start_or_resume("c-live")
+
+
+def test_run_cycle_skips_completed_steps_on_resume(monkeypatch) -> None:
+    """Al reanudar, run_cycle sólo ejecuta los pasos que no están en cycle_steps."""
+    from scripts import run_risk_cycle as cycle
+
+    ran, marked = [], []
+    resumed = CycleCheckpoint("c-1", "risk_cycle", {"exits", "journal"}, resumed=True)
+    monkeypatch.setattr(
+        cycle.CycleCheckpoint, "start_or_resume", classmethod(lambda cls, cycle_id: resumed)
+    )
+    monkeypatch.setattr(checkpoint.api, "execute", lambda q, p=None: marked.append(p))
+
+    class FakeLifecycle:
+        def process_exited_trades(self, cycle_id=None):
+            ran.append("journal")
+
+    monkeypatch.setattr(cycle, "LifecycleEngine", FakeLifecycle)
+    monkeypatch.setattr(cycle, "ExitEngine", lambda: None)
+    monkeypatch.setattr(cycle, "_exits_step", lambda engine: ran.append("exits"))
+    monkeypatch.setattr(cycle, "_risk_gates_step", lambda engine: ran.append("risk"))
+    monkeypatch.setattr(
+        cycle, "_entries_step", lambda engine, cycle_id=None: ran.append(("entries", cycle_id))
+    )
+
+    assert cycle.run_cycle() == "c-1"
+    assert ran == ["risk", ("entries", "c-1")]
+    assert marked == [("c-1", "risk"), ("c-1", "entries"), ("c-1",)]  # pasos + finish
+
+
+def test_apply_paper_fill_with_existing_key_writes_nothing(monkeypatch) -> None:
+    """Una orden ya aplicada (misma idempotency_key) no escribe fill ni toca positions."""
+    from portfolio.order_builder import OrderIntent
+    from scripts import run_risk_cycle as cycle
+
+    statements = []
+
+    def fetch_one(query, params=None):
+        statements.append(query)
+        return None  # INSERT ... ON CONFLICT (idempotency_key) DO NOTHING RETURNING id
+
+    def write(query, params=None):
+        statements.append(query)
+
+    monkeypatch.setattr(cycle.api, "fetch_one", fetch_one)
+    monkeypatch.setattr(cycle.api, "execute", write)
+    monkeypatch.setattr(cycle, "upsert_exposure", lambda rows: statements.append("exposure"))
+
+    intent = OrderIntent(
+        symbol="AAPL", side="BUY", qty=10.0, price=190.0, strategy_id="baseline", reason="test"
+    )
+    applied = cycle._apply_paper_fill(intent, cycle_id="c-1", idempotency_key="c-1:entries:AAPL")
+
+    assert applied is False
+    assert len(statements) == 1 and "INSERT INTO orders" in statements[0]
+
+
+def test_entry_is_registered_outside_paper_mode(monkeypatch) -> None:
+    """Sin PAPER_TRADING no se escribe fill, pero la entrada se registra en el lifecycle."""
+    from scripts import run_risk_cycle as cycle
+
+    @contextmanager
+    def transaction():
+        yield
+
+    class FakeLifecycle:
+        registered = []
+
+        def is_in_cooldown(self, symbol, strategy_id):
+            return False
+
+        def register_entry(self, **kwargs):
+            self.registered.append(kwargs["symbol"])
+
+    monkeypatch.setattr(cycle, "PAPER_TRADING", False)
+    monkeypatch.setattr(cycle.api, "transaction", transaction)
+    monkeypatch.setattr(cycle, "_fetch_current_position", lambda symbol: 0.0)
+    monkeypatch.setattr(
+        cycle, "_apply_paper_fill", lambda *a, **k: pytest.fail("no debe escribir fills")
+    )
+
+    lifecycle = FakeLifecycle()
+    sig = {"symbol": "AAPL", "side": "buy"}
+    cycle._process_entry_signal(lifecycle, sig, 190.0, 2.0, 10.0, cycle_id="c-1")
+
+    assert lifecycle.registered == ["AAPL"]
@@ -0,0 +1,155 @@
+"""
+Tests para el motor de correlación móvil (portfolio.correlation).
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from portfolio import correlation
+from portfolio.correlation import (
+    CorrelationConfig,
+    CorrelationEngine,
+    RollingCovariance,
+    correlated_concentration,
+)
+
+T0 = datetime(2024, 1, 2, 14, 30, tzinfo=timezone.utc)
+
+
+def _config(**overrides):
+    values = dict(timeframe="1m", window_bars=20, min_bars=10, threshold=0.8, max_cluster_pct=0.5)
+    values.update(overrides)
+    return CorrelationConfig(**values)
+
+
+def test_rolling_covariance_igual_a_corrcoef_de_la_ventana():
+    rng = np.random.default_rng(7)
+    returns = rng.normal(0.0, 0.001, (137, 4))
+    returns[:, 1] += 0.8 * returns[:, 0]
+    rolling = RollingCovariance(4, window=30)
+    rolling.push_many(returns)
+
+    assert rolling.count == 30
+    np.testing.assert_allclose(
+        rolling.correlation(), np.corrcoef(returns[-30:], rowvar=False), atol=1e-10
+    )
+
+
+def test_rolling_covariance_sin_varianza_es_nan():
+    rolling = RollingCovariance(2, window=5)
+    for i in range(5):
+        rolling.push(np.array([0.0, 0.001 * (i % 2)]))
+    corr = rolling.correlation()
+    assert np.isnan(corr[0, 1]) and np.isnan(corr[0, 0]) and corr[1, 1] == 1.0
+
+
+def test_concentracion_agrupa_por_correlacion_con_signo():
+    corr = np.array(
+        [
+            [1.0, 0.9, 0.1],
+            [0.9, 1.0, 0.0],
+            [0.1, 0.0, 1.0],
+        ]
+    )
+    share, members = correlated_concentration(corr, [40_000, 35_000, 25_000], threshold=0.8)
+    assert members == [0, 1] and share == pytest.approx(0.75)
+
+    # Largo y corto sobre activos muy correlacionados: cobertura, no concentración
+    assert correlated_concentration(corr, [40_000, -35_000, 25_000], 0.8) == (0.0, [])
+
+
+def _bars(symbols, closes, start=0):
+    return [
+        {"symbol": s, "ts": T0 + timedelta(minutes=start + t), "close": float(closes[t, i])}
+        for t in range(closes.shape[0])
+        for i, s in enumerate(symbols)
+    ]
+
+
+def test_engine_incremental_y_persistencia(monkeypatch):
+    rng = np.random.default_rng(3)
+    common = rng.normal(0.0, 0.002, 60)
+    log_ret = np.column_stack(
+        [common + rng.normal(0, 0.0002, 60), common, rng.normal(0, 0.002, 60)]
+    )
+    closes = 100.0 * np.exp(np.cumsum(log_ret, axis=0))
+    symbols = ["AAA", "BBB", "CCC"]
+
+    calls = []
+
+    def fake_fetch_all(query, params):
+        calls.append(params)
+        _, _, since, limit = params
+        bars = _bars(symbols, closes[:fed])
+        return [b for b in bars if b["ts"] > since][-limit * len(symbols) :]
+
+    monkeypatch.setattr(correlation, "fetch_all", fake_fetch_all)
+    engine = CorrelationEngine(_config())
+
+    fed = 40
+    assert engine.refresh(["CCC", "AAA", "BBB"]) == 20  # últimas W+1 barras → W rendimientos
+    fed = 45
+    assert engine.refresh(symbols) == 5
+    assert calls[-1][2] == T0 + timedelta(minutes=39)  # sólo barras nuevas
+
+    expected = np.corrcoef(np.diff(np.log(closes[:45]), axis=0)[-20:], rowvar=False)
+    np.testing.assert_allclose(engine.correlation(), expected, atol=1e-10)
+
+    exposure = {"AAA": 50_000.0, "BBB": 30_000.0, "CCC": 20_000.0}
+    flag, share, cluster = engine.correlation_flag(exposure)
+    assert flag and cluster == ["AAA", "BBB"] and share == pytest.approx(0.8)
+
+    written = []
+    monkeypatch.setattr(
+        correlation, "copy_rows", lambda table, cols, rows, types: written.extend(rows)
+    )
+    assert engine.persist(ts=T0) == 3
+    assert [row[1] for row in written] == ["AAA|BBB", "AAA|CCC", "BBB|CCC"]
+    assert {row[2] for row in written} == {20}
+
+
+def test_engine_sin_datos_suficientes_no_activa_el_flag(monkeypatch):
+    monkeypatch.setattr(correlation, "fetch_all", lambda query, params: [])
+    engine = CorrelationEngine(_config())
+    engine.refresh(["AAA", "BBB"])
+    assert engine.correlation_flag({"AAA": 1.0, "BBB": 1.0}) == (False, 0.0, [])
+    assert engine.persist() == 0
+
+
+def test_ciclo_persiste_solo_con_barras_nuevas(monkeypatch):
+    from scripts import run_risk_cycle as cycle
+
+    class FakeEngine:
+        symbols = ["AAA", "BBB"]
+        last_close = np.array([100.0, 50.0])
+        config = _config()
+
+        def __init__(self):
+            self.new_rows = [20, 0, 1]
+            self.persisted = 0
+
+        def refresh(self, symbols):
+            return self.new_rows.pop(0)
+
+        def correlation_flag(self, net_exposure):
+            return False, 0.0, []
+
+        def persist(self):
+            self.persisted += 1
+
+    engine = FakeEngine()
+    monkeypatch.setattr(cycle, "_correlation_engine", engine)
+    monkeypatch.setattr(
+        cycle.api,
+        "fetch_all",
+        lambda query, params=None: [{"symbol": "AAA", "qty": 1}, {"symbol": "BBB", "qty": -1}],
+    )
+
+    for expected in (1, 1, 2):
+        cycle._correlation_flag_step()
+        assert engine.persisted == expected
+
+    cycle.reset_correlation_engine()
+    assert cycle._correlation_engine is None
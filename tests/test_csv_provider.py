@@ -0,0 +1,77 @@
+"""
+Tests para la lectura en streaming de CsvProvider.
+"""
+
+import pandas as pd
+import pytest
+
+from data_pipeline import loader
+from data_pipeline.loader import load_frames
+from data_pipeline.providers.csv_provider import CsvProvider
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    ts = pd.date_range("2024-01-01", periods=50, freq="1h", tz="UTC")
+    df = pd.DataFrame(
+        {
+            "ts": list(ts) * 2,
+            "symbol": ["AAPL"] * 50 + ["MSFT"] * 50,
+            "open": 1.0,
+            "high": 2.0,
+            "low": 0.5,
+            "close": 1.5,
+            "extra": "ignorada",
+        }
+    )
+    path = tmp_path / "bars.csv"
+    df.to_csv(path, index=False)
+    return str(path)
+
+
+def test_iter_ohlcv_filters_per_chunk(csv_path) -> None:
+    """Cada bloque llega filtrado, normalizado y con tipos explícitos."""
+    provider = CsvProvider(csv_path, chunksize=20)
+    frames = list(
+        provider.iter_ohlcv(
+            ["AAPL"], "1h", "2024-01-01T10:00:00Z", "2024-01-02T09:00:00Z", "USA_STOCK"
+        )
+    )
+
+    assert len(frames) == 2  # el rango pedido (filas 10-33) cae en los 2 primeros bloques
+    assert all(len(f) <= 20 for f in frames)
+    df = pd.concat(frames)
+    assert list(df.columns) == ["ts", "symbol", "open", "high", "low", "close", "volume"]
+    assert len(df) == 24 and set(df["symbol"]) == {"AAPL"}
+    assert frames[0]["symbol"].dtype == "category"
+    assert frames[0]["open"].dtype == "float64"
+    assert (df["volume"] == 0.0).all()
+
+
+def test_fetch_ohlcv_matches_streaming(csv_path) -> None:
+    """fetch_ohlcv devuelve lo mismo leyendo de una vez o por bloques."""
+    whole = CsvProvider(csv_path).fetch_ohlcv(["MSFT"], "1h", None, None, "USA_STOCK")
+    chunked = CsvProvider(csv_path, chunksize=7).fetch_ohlcv(["MSFT"], "1h", None, None, "USA_STOCK")
+    pd.testing.assert_frame_equal(whole, chunked)
+    assert len(whole) == 50
+
+
+def test_load_frames_consumes_generator(csv_path, monkeypatch) -> None:
+    """El loader escribe un lote por bloque y acumula filas y rango."""
+    batches = []
+    monkeypatch.setattr(loader.api, "execute_many", lambda q, rows: batches.append(len(rows)))
+
+    frames = CsvProvider(csv_path, chunksize=30).iter_ohlcv([], "1h", None, None, "USA_STOCK")
+    result = load_frames(frames, "1h", "csv")
+
+    assert batches == [30, 30, 30, 10]
+    assert result.rows == 100
+    assert result.first_ts == pd.Timestamp("2024-01-01", tz="UTC")
+    assert result.last_ts == pd.Timestamp("2024-01-03 01:00", tz="UTC")
+
+
+def test_missing_required_column(tmp_path) -> None:
+    path = tmp_path / "bad.csv"
+    pd.DataFrame({"ts": ["2024-01-01"], "symbol": ["AAPL"], "open": [1.0]}).to_csv(path, index=False)
+    with pytest.raises(ValueError, match="high"):
+        list(CsvProvider(str(path)).iter_ohlcv([], "1d", None, None, "USA_STOCK"))
@@ -0,0 +1,80 @@
+"""
+Tests para la ejecución por clave (serie / pool de hilos).
+"""
+
+import threading
+import time
+
+import pytest
+
+from desk_grade import metrics
+from desk_grade.executor import run_per_key
+
+
+@pytest.mark.parametrize("mode", ["sequential", "threads"])
+def test_order_is_preserved_per_key(mode: str) -> None:
+    """Los elementos de una misma clave se procesan en el orden recibido."""
+    items = [("A", 1), ("B", 1), ("A", 2), ("B", 2), ("A", 3)]
+    seen = {"A": [], "B": []}
+    lock = threading.Lock()
+
+    def work(item):
+        time.sleep(0.001)
+        with lock:
+            seen[item[0]].append(item[1])
+
+    errors = run_per_key(items, key=lambda i: i[0], fn=work, mode=mode, max_workers=4)
+
+    assert errors == {}
+    assert seen == {"A": [1, 2, 3], "B": [1, 2]}
+
+
+@pytest.mark.parametrize("mode", ["sequential", "threads"])
+def test_errors_are_collected_per_key(mode: str) -> None:
+    """Un error en una clave no impide procesar las demás."""
+    processed = []
+
+    def work(symbol):
+        if symbol == "BAD":
+            raise RuntimeError("boom")
+        processed.append(symbol)
+
+    errors = run_per_key(
+        ["AAPL", "BAD", "TSLA"], key=lambda s: s, fn=work, mode=mode, max_workers=2
+    )
+
+    assert set(errors) == {"BAD"}
+    assert isinstance(errors["BAD"], RuntimeError)
+    assert sorted(processed) == ["AAPL", "TSLA"]
+
+
+def test_threads_overlap_slow_keys() -> None:
+    """En modo threads las claves distintas se solapan en el tiempo."""
+    start = time.perf_counter()
+    run_per_key(
+        range(8), key=lambda i: i, fn=lambda _: time.sleep(0.05), mode="threads", max_workers=8
+    )
+    assert time.perf_counter() - start < 0.05 * 8 / 2
+
+
+def test_threads_publish_pool_metrics() -> None:
+    """El pool publica hilos ocupados y utilización; al terminar no queda ninguno."""
+    seen = []
+    busy_before = metrics.POOL_BUSY_SECONDS.value()
+
+    def work(_):
+        seen.append((metrics.POOL_WORKERS.value(), metrics.POOL_BUSY.value()))
+        time.sleep(0.02)
+
+    run_per_key(range(4), key=lambda i: i, fn=work, mode="threads", max_workers=2)
+
+    assert all(workers == 2 and 1 <= busy <= 2 for workers, busy in seen)
+    assert metrics.POOL_WORKERS.value() == 0 and metrics.POOL_BUSY.value() == 0
+    assert metrics.POOL_BUSY_SECONDS.value() - busy_before >= 0.08
+    assert 0.5 < metrics.POOL_UTILIZATION.value() <= 1.0
+
+
+def test_invalid_mode() -> None:
+    """Modos desconocidos se rechazan."""
+    with pytest.raises(ValueError):
+        run_per_key([1], key=lambda i: i, fn=lambda _: None, mode="async")
@@ -0,0 +1,49 @@
+"""
+Tests para la exposición vigente (portfolio.exposure).
+"""
+
+from portfolio import exposure
+from portfolio.exposure import fetch_sector_exposure, upsert_exposure, upsert_symbol_sectors
+
+
+def _record(monkeypatch):
+    statements = []
+    monkeypatch.setattr(
+        exposure, "execute", lambda query, params=None: statements.append((query, params))
+    )
+    return statements
+
+
+def test_upsert_exposure_una_sentencia_por_lote(monkeypatch):
+    statements = _record(monkeypatch)
+    upsert_exposure([("baseline", "AAPL", 10.0, 190.0), ("baseline", "MSFT", -5.0, 410.0)])
+    upsert_exposure([])
+
+    assert len(statements) == 1
+    query, params = statements[0]
+    assert "ON CONFLICT (strategy_id, symbol)" in query
+    assert params == (["baseline", "baseline"], ["AAPL", "MSFT"], [10.0, -5.0], [190.0, 410.0])
+
+
+def test_sector_exposure_es_la_posicion_vigente(monkeypatch):
+    queries = []
+
+    def fake_fetch_all(query, params=None):
+        queries.append(query)
+        return [
+            {"sector": "InformationTechnology", "net_exp": 3_850.0},
+            {"sector": "UNKNOWN", "net_exp": None},
+        ]
+
+    monkeypatch.setattr(exposure, "fetch_all", fake_fetch_all)
+
+    assert fetch_sector_exposure() == {"InformationTechnology": 3_850.0, "UNKNOWN": 0.0}
+    assert len(queries) == 1
+    assert "exposure_current" in queries[0] and "exposure_snapshots" not in queries[0]
+
+
+def test_upsert_symbol_sectors(monkeypatch):
+    statements = _record(monkeypatch)
+    upsert_symbol_sectors({"AAPL": "InformationTechnology", "XOM": "Energy"})
+
+    assert statements[0][1] == (["AAPL", "XOM"], ["InformationTechnology", "Energy"])
@@ -0,0 +1,120 @@
+"""
+Tests para la descarga histórica troceada y concurrente de IBKRProvider.
+"""
+
+import asyncio
+from datetime import timedelta
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("ib_insync")
+
+from data_pipeline.providers.ibkr_provider import (
+    HistoricalPacer,
+    IBKRProvider,
+    duration_str,
+    split_range,
+)
+
+
+class FakeIB:
+    """Cliente IB falso: devuelve una barra por hora del trozo pedido."""
+
+    def __init__(self, fail_symbol=None, latency_s=0.01):
+        self.fail_symbol = fail_symbol
+        self.latency_s = latency_s
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def connect(self, host, port, clientId):
+        pass
+
+    def disconnect(self):
+        pass
+
+    def run(self, coro):
+        return asyncio.run(coro)
+
+    async def reqHistoricalDataAsync(self, contract, endDateTime, durationStr, **kwargs):
+        self.requests.append((contract.symbol, endDateTime, durationStr, kwargs["barSizeSetting"]))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency_s)
+            if contract.symbol == self.fail_symbol:
+                raise RuntimeError("pacing violation")
+            n, unit = durationStr.split()
+            span = timedelta(days=int(n)) if unit == "D" else timedelta(seconds=int(n))
+            ts = pd.date_range(endDateTime - span, endDateTime, freq="1h")
+            return [
+                SimpleNamespace(date=t, open=1.0, high=2.0, low=0.5, close=1.5, volume=10.0)
+                for t in ts
+            ]
+        finally:
+            self.in_flight -= 1
+
+
+def _provider(ib, max_in_flight=4):
+    pacer = HistoricalPacer(max_requests=1000, window_s=1.0)
+    return IBKRProvider(max_in_flight=max_in_flight, pacer=pacer, ib=ib)
+
+
+def test_split_range_and_duration() -> None:
+    """Los trozos cubren el rango sin pasarse del máximo por petición."""
+    start = pd.Timestamp("2024-01-01", tz="UTC").to_pydatetime()
+    end = pd.Timestamp("2024-01-03 12:00", tz="UTC").to_pydatetime()
+    chunks = split_range(start, end, timedelta(days=1))
+
+    assert len(chunks) == 3
+    assert chunks[0][1] == end and chunks[-1][0] == start
+    assert all(b - a <= timedelta(days=1) for a, b in chunks)
+    assert duration_str(timedelta(hours=12)) == "43200 S"
+    assert duration_str(timedelta(days=1)) == "1 D"
+
+
+def test_fetch_ohlcv_chunks_concurrently_and_dedupes() -> None:
+    """Un rango de 1m de 5 días se pide en 5 trozos por símbolo, en paralelo."""
+    ib = FakeIB()
+    provider = _provider(ib, max_in_flight=4)
+    df = provider.fetch_ohlcv(
+        ["AAPL", "MSFT"], "1m", "2024-01-01T00:00:00Z", "2024-01-06T00:00:00Z", "USA_STOCK"
+    )
+
+    assert len(ib.requests) == 10
+    assert all(r[2] == "1 D" and r[3] == "1 min" for r in ib.requests)
+    assert 1 < ib.max_in_flight <= 4
+    # Las barras frontera entre trozos aparecen una sola vez
+    assert not df.duplicated(["symbol", "ts"]).any()
+    assert len(df[df["symbol"] == "AAPL"]) == 5 * 24 + 1
+    assert df.groupby("symbol")["ts"].is_monotonic_increasing.all()
+
+
+def test_failed_symbol_is_dropped_and_reported() -> None:
+    """Un error en cualquier trozo descarta el símbolo y lo deja en last_errors."""
+    ib = FakeIB(fail_symbol="MSFT")
+    provider = _provider(ib)
+    df = provider.fetch_ohlcv(
+        ["AAPL", "MSFT"], "1h", "2024-01-01T00:00:00Z", "2024-01-03T00:00:00Z", "USA_STOCK"
+    )
+
+    assert set(df["symbol"]) == {"AAPL"}
+    assert "pacing violation" in provider.last_errors["MSFT"]
+
+
+def test_pacer_limits_requests_per_window() -> None:
+    """Con 3 peticiones por ventana de 0.2s, la cuarta espera a que expire la ventana."""
+    pacer = HistoricalPacer(max_requests=3, window_s=0.2, burst=100, burst_window_s=0.2)
+    stamps = []
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        for i in range(4):
+            await pacer.acquire(f"S{i}")
+            stamps.append(loop.time())
+
+    asyncio.run(scenario())
+    assert stamps[2] - stamps[0] < 0.1
+    assert stamps[3] - stamps[0] >= 0.19
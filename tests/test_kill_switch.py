@@ -0,0 +1,90 @@
+"""
+Tests para el kill switch.
+"""
+
+from contextlib import contextmanager
+
+import pytest
+
+from portfolio import kill_switch
+from portfolio.kill_switch import KillSwitch, build_flatten_intents
+from portfolio.risk_layer import RiskEngine, RiskLimits
+
+
+def test_build_flatten_intents_long_and_short() -> None:
+    """Las posiciones long se cierran con SELL y las short con BUY."""
+    rows = [
+        {"symbol": "AAPL", "strategy_id": "baseline", "qty": 10.0, "price": 150.0},
+        {"symbol": "TSLA", "strategy_id": "baseline", "qty": -5.0, "price": 200.0},
+    ]
+    intents = build_flatten_intents(rows)
+
+    assert [(i.symbol, i.side, i.qty) for i in intents] == [
+        ("AAPL", "SELL", 10.0),
+        ("TSLA", "BUY", 5.0),
+    ]
+    assert all(i.reason == "KILL_SWITCH" for i in intents)
+
+
+def test_kill_switch_flag_forces_halt() -> None:
+    """Con el kill switch activo el modo es HALT aunque el resto esté OK."""
+    limits = RiskLimits(
+        max_drawdown_pct=0.2,
+        daily_loss_limit_pct=0.05,
+        weekly_loss_limit_pct=0.1,
+        vol_target=None,
+        sector_cap_pct=None,
+        sizing_mode="FIXED_FRACTIONAL",
+        fixed_fractional=0.01,
+        atr_multiplier=2.0,
+    )
+    result = RiskEngine(limits=limits).evaluate_gates(
+        equity=10000.0,
+        peak_equity=10000.0,
+        daily_pnl=0.0,
+        weekly_pnl=0.0,
+        kill_switch_flag=True,
+    )
+    assert result.mode == "HALT"
+    assert "KILL_SWITCH_ACTIVO" in result.reasons
+
+
+@pytest.mark.parametrize("n_positions", [1, 500])
+def test_trigger_uses_constant_statements_in_one_transaction(monkeypatch, n_positions) -> None:
+    """El número de sentencias no depende del número de posiciones."""
+    statements = []
+    transactions = []
+
+    @contextmanager
+    def fake_transaction():
+        transactions.append("begin")
+        yield
+        transactions.append("commit")
+
+    def fake_execute(query, params=None):
+        assert transactions[-1] == "begin"
+        statements.append(query)
+
+    def fake_fetch_all(query, params=None):
+        statements.append(query)
+        return [
+            {"symbol": f"S{i}", "strategy_id": "baseline", "qty": 1.0, "price": 10.0}
+            for i in range(n_positions)
+        ]
+
+    def fake_fetch_one(query, params=None):
+        statements.append(query)
+        return {"n": n_positions}
+
+    monkeypatch.setattr(kill_switch, "transaction", fake_transaction)
+    monkeypatch.setattr(kill_switch, "execute", fake_execute)
+    monkeypatch.setattr(kill_switch, "fetch_all", fake_fetch_all)
+    monkeypatch.setattr(kill_switch, "fetch_one", fake_fetch_one)
+
+    result = KillSwitch(paper_trading=True).trigger(reason="test")
+
+    assert transactions == ["begin", "commit"]
+    assert len(statements) == 7
+    assert "risk_state" in statements[0]
+    assert len(result.intents) == n_positions
+    assert result.trades_exited == n_positions
@@ -0,0 +1,124 @@
+"""
+Tests para la lectura de la Lean Data Library (nativa zip y CSV exportado).
+"""
+
+import zipfile
+
+import pandas as pd
+import pytest
+
+from data_pipeline.providers import lean_reader
+from data_pipeline.providers.lean_reader import prune_by_day
+from data_pipeline.providers.quantconnect_provider import QuantConnectProvider
+
+
+def _write_minute_zip(folder, day, rows):
+    folder.mkdir(parents=True, exist_ok=True)
+    content = "\n".join(",".join(str(v) for v in row) for row in rows)
+    with zipfile.ZipFile(folder / f"{day}_trade.zip", "w") as zf:
+        zf.writestr(f"{day}_aapl_minute_trade.csv", content)
+
+
+@pytest.fixture
+def lean_root(tmp_path):
+    folder = tmp_path / "equity" / "usa" / "minute" / "aapl"
+    for day in ["20240102", "20240103", "20240104", "20240105"]:
+        # 09:30 y 09:31 hora de Nueva York; precios en deci-céntimos
+        _write_minute_zip(
+            folder,
+            day,
+            [
+                (34200000, 1850000, 1860000, 1840000, 1855000, 1000),
+                (34260000, 1855000, 1870000, 1850000, 1865000, 500),
+            ],
+        )
+    return tmp_path
+
+
+def test_prune_by_day_skips_files_outside_range() -> None:
+    paths = [f"/x/2024010{d}_trade.zip" for d in range(1, 10)] + ["/x/readme.csv"]
+    kept = prune_by_day(
+        paths, pd.Timestamp("2024-01-04", tz="UTC"), pd.Timestamp("2024-01-05", tz="UTC")
+    )
+    # Un día de margen a cada lado por la zona horaria del fichero
+    assert kept == [f"/x/2024010{d}_trade.zip" for d in range(3, 7)] + ["/x/readme.csv"]
+
+
+def test_native_minute_zip_is_scaled_and_in_utc(lean_root, monkeypatch) -> None:
+    opened = []
+    real_read = lean_reader.read_lean_file
+    monkeypatch.setattr(
+        lean_reader, "read_lean_file", lambda task: opened.append(task.day) or real_read(task)
+    )
+    provider = QuantConnectProvider(data_path=str(lean_root), lean_workers=1)
+
+    df = provider.fetch_ohlcv(
+        ["AAPL"], "1m", "2024-01-03T00:00:00Z", "2024-01-03T23:59:59Z", "USA_STOCK"
+    )
+
+    assert opened == ["20240102", "20240103", "20240104"]  # 20240105 no se abre
+    assert len(df) == 2
+    assert df["ts"].iloc[0] == pd.Timestamp("2024-01-03 14:30", tz="UTC")
+    assert df["open"].iloc[0] == pytest.approx(185.0)
+    assert df["volume"].iloc[1] == 500
+
+
+def test_process_pool_matches_serial(lean_root, monkeypatch) -> None:
+    monkeypatch.setattr(lean_reader, "MIN_FILES_FOR_POOL", 2)
+    serial = QuantConnectProvider(data_path=str(lean_root), lean_workers=1)
+    pooled = QuantConnectProvider(data_path=str(lean_root), lean_workers=2)
+
+    expected = serial.fetch_ohlcv(["AAPL"], "1m", None, None, "USA_STOCK")
+    result = pooled.fetch_ohlcv(["AAPL"], "1m", None, None, "USA_STOCK")
+
+    assert len(result) == 8
+    pd.testing.assert_frame_equal(expected.reset_index(drop=True), result.reset_index(drop=True))
+
+
+def test_exported_csv_layout_still_supported(tmp_path) -> None:
+    folder = tmp_path / "forex" / "eurusd" / "1h"
+    folder.mkdir(parents=True)
+    for day in ["20240101", "20240102"]:
+        pd.DataFrame(
+            {
+                "time": [f"{day[:4]}-{day[4:6]}-{day[6:]}T00:00:00Z"],
+                "open": [1.1],
+                "high": [1.2],
+                "low": [1.0],
+                "close": [1.15],
+                "volume": [0],
+            }
+        ).to_csv(folder / f"{day}.csv", index=False)
+
+    df = QuantConnectProvider(data_path=str(tmp_path), lean_workers=1).fetch_ohlcv(
+        ["EURUSD"], "1h", "2024-01-02", None, "FOREX"
+    )
+    assert len(df) == 1 and df["symbol"].iloc[0] == "EURUSD"
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_corrupt_zip_is_skipped_and_recorded(lean_root, monkeypatch, caplog, workers) -> None:
+    monkeypatch.setattr(lean_reader, "MIN_FILES_FOR_POOL", 2)
+    corrupt = lean_root / "equity" / "usa" / "minute" / "aapl" / "20240103_trade.zip"
+    corrupt.write_bytes(b"esto no es un zip")
+    provider = QuantConnectProvider(data_path=str(lean_root), lean_workers=workers)
+
+    with caplog.at_level("WARNING", logger=lean_reader.__name__):
+        df = provider.fetch_ohlcv(["AAPL"], "1m", None, None, "USA_STOCK")
+
+    assert len(df) == 6  # los otros tres días se leen
+    assert pd.Timestamp("2024-01-03 14:30", tz="UTC") not in set(df["ts"])
+    assert list(provider.last_errors) == ["AAPL"]
+    assert provider.last_errors["AAPL"].startswith("20240103_trade.zip: BadZipFile")
+    assert "20240103_trade.zip" in caplog.text
+
+
+def test_try_read_lean_file_returns_empty_frame_with_error(tmp_path) -> None:
+    path = tmp_path / "20240102_trade.zip"
+    path.write_bytes(b"")
+    task = lean_reader.LeanFile(str(path), "AAPL", "minute_zip", "20240102", 1.0, "UTC")
+
+    result = lean_reader.try_read_lean_file(task)
+
+    assert result.task == task and result.error
+    assert result.frame.empty and list(result.frame.columns) == lean_reader.OHLCV_COLUMNS
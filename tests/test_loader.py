@@ -0,0 +1,79 @@
+"""
+Tests para la carga incremental de OHLCV.
+"""
+
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from data_pipeline import loader
+from data_pipeline.loader import fetch_watermarks, plan_incremental, upsert_ohlcv
+from desk_grade import metrics
+
+
+def test_fetch_watermarks_single_query(monkeypatch) -> None:
+    """Los watermarks de todos los símbolos salen de una única consulta."""
+    calls = []
+
+    def fake_fetch_all(query, params=None):
+        calls.append(params)
+        return [{"symbol": "AAPL", "max_ts": datetime(2024, 1, 5, 10, tzinfo=timezone.utc)}]
+
+    monkeypatch.setattr(loader.api, "fetch_all", fake_fetch_all)
+    watermarks = fetch_watermarks(["AAPL", "MSFT"], "1h")
+
+    assert calls == [("1h", ["AAPL", "MSFT"])]
+    assert watermarks == {"AAPL": pd.Timestamp("2024-01-05 10:00", tz="UTC")}
+
+
+def test_plan_incremental_groups_by_start() -> None:
+    """Con watermark se pide desde watermark - solape; sin él, desde --start."""
+    watermark = pd.Timestamp("2024-01-05 10:00", tz="UTC")
+    plan = plan_incremental(
+        ["AAPL", "MSFT", "TSLA"],
+        "1h",
+        {"AAPL": watermark, "TSLA": watermark},
+        default_start="2024-01-01",
+        overlap_bars=3,
+    )
+    assert plan == {
+        "2024-01-05T07:00:00+00:00": ["AAPL", "TSLA"],
+        "2024-01-01": ["MSFT"],
+    }
+
+
+def test_plan_incremental_overlap_never_before_start() -> None:
+    """El solape no retrocede más allá de --start."""
+    plan = plan_incremental(
+        ["AAPL"],
+        "1d",
+        {"AAPL": pd.Timestamp("2024-01-02", tz="UTC")},
+        default_start="2024-01-01",
+        overlap_bars=5,
+    )
+    assert list(plan) == ["2024-01-01T00:00:00+00:00"]
+
+
+def test_upsert_ohlcv_batches_rows(monkeypatch) -> None:
+    """Todas las filas se envían en una sola llamada con timeframe y source."""
+    batches = []
+    monkeypatch.setattr(loader.api, "execute_many", lambda q, rows: batches.append(rows))
+    df = pd.DataFrame(
+        {
+            "ts": ["2024-01-01T00:00:00Z", "2024-01-01T01:00:00Z"],
+            "symbol": ["AAPL", "AAPL"],
+            "open": [1, 2],
+            "high": [2, 3],
+            "low": [0.5, 1.5],
+            "close": [1.5, 2.5],
+            "volume": [10, 20],
+        }
+    )
+    ingested = metrics.INGEST_ROWS.labels("csv", "1h")
+    before = ingested.value()
+    assert upsert_ohlcv(df, "1h", "csv") == 2
+    assert ingested.value() - before == 2
+    assert len(batches) == 1
+    first = batches[0][0]
+    assert first[0] == "AAPL" and first[7:] == ("1h", "csv")
+    assert first[1] == datetime(2024, 1, 1, tzinfo=timezone.utc)
@@ -0,0 +1,112 @@
+"""
+Tests para el logging estructurado, la cola y el rate limiting.
+"""
+
+import io
+import json
+import logging
+import threading
+
+from desk_grade.executor import run_per_key
+from desk_grade.logging_config import (
+    JsonFormatter,
+    RateLimitFilter,
+    TextFormatter,
+    build_queue_logging,
+    current_log_context,
+    log_context,
+)
+
+
+def _logger(name, handler):
+    logger = logging.getLogger(f"test_logging.{name}")
+    logger.handlers = [handler]
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    return logger
+
+
+def _queue_logger(name, formatter, rate_per_s=0.0, burst=None):
+    stream = io.StringIO()
+    handler, listener = build_queue_logging(stream, formatter, rate_per_s, burst)
+    return _logger(name, handler), listener, stream
+
+
+def test_json_con_contexto_extra_y_excepcion():
+    logger, listener, stream = _queue_logger("json", JsonFormatter())
+    listener.start()
+    with log_context(cycle_id="c1", strategy_id="baseline"):
+        with log_context(symbol="AAPL"):
+            logger.info("Nueva entrada %s qty=%.1f", "BUY", 2.0, extra={"qty": 2.0})
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logger.exception("Error en %s", "exits")
+    listener.stop()
+
+    first, second = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert first["message"] == "Nueva entrada BUY qty=2.0"
+    assert (first["cycle_id"], first["strategy_id"], first["symbol"]) == ("c1", "baseline", "AAPL")
+    assert first["qty"] == 2.0 and first["level"] == "INFO"
+    assert "symbol" not in second
+    assert second["level"] == "ERROR" and "ValueError: boom" in second["exc"]
+
+
+def test_cola_formatea_en_el_hilo_del_listener():
+    threads = []
+
+    class _RecordingFormatter(TextFormatter):
+        def format(self, record):
+            threads.append(threading.current_thread())
+            return super().format(record)
+
+    logger, listener, stream = _queue_logger("cola", _RecordingFormatter("%(message)s"))
+    listener.start()
+    payload = {"mutable": 1}
+    with log_context(cycle_id="c2"):
+        logger.info("valor %s", payload)
+    payload["mutable"] = 2  # el mensaje ya se resolvió al encolar
+    listener.stop()
+
+    assert stream.getvalue() == "valor {'mutable': 1} [cycle_id=c2]\n"
+    assert threads and threading.current_thread() not in threads
+
+
+def test_rate_limit_por_plantilla_y_resumen_de_descartados():
+    now = [0.0]
+    limiter = RateLimitFilter(rate_per_s=1.0, burst=2, clock=lambda: now[0])
+    stream = io.StringIO()
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(TextFormatter("%(levelname)s %(message)s"))
+    handler.addFilter(limiter)
+    logger = _logger("rate", handler)
+
+    for i in range(5):
+        logger.info("Symbol %s en cooldown", f"S{i}")
+    logger.info("Otro mensaje")  # otra plantilla: cubo propio
+    logger.warning("Aviso %d", 1)  # >= WARNING nunca se limita
+    now[0] = 1.0
+    logger.info("Symbol %s en cooldown", "S9")
+
+    assert stream.getvalue().splitlines() == [
+        "INFO Symbol S0 en cooldown",
+        "INFO Symbol S1 en cooldown",
+        "INFO Otro mensaje",
+        "WARNING Aviso 1",
+        "INFO Symbol S9 en cooldown [suppressed=3]",
+    ]
+
+
+def test_contexto_se_propaga_a_los_hilos_del_pool():
+    seen = {}
+
+    def fn(symbol):
+        with log_context(**parent, symbol=symbol):
+            seen[symbol] = current_log_context()
+
+    with log_context(cycle_id="c3"):
+        parent = current_log_context()
+        run_per_key(["A", "B"], key=str, fn=fn, mode="threads", max_workers=2)
+
+    assert seen == {"A": {"cycle_id": "c3", "symbol": "A"}, "B": {"cycle_id": "c3", "symbol": "B"}}
+    assert current_log_context() == {}
@@ -0,0 +1,70 @@
+"""
+Tests para el exportador de métricas en formato Prometheus (desk_grade.metrics).
+"""
+
+import urllib.error
+import urllib.request
+
+import pytest
+
+from desk_grade.metrics import REGISTRY, Counter, Gauge, Histogram, Registry, start_metrics_server
+
+
+def test_formato_de_exposicion():
+    registry = Registry()
+    fills = registry.register(Counter("fills_total", "Fills", ["side"]))
+    open_trades = registry.register(Gauge("open_trades", "Abiertas"))
+    duration = registry.register(
+        Histogram("cycle_seconds", "Duración", ["status"], buckets=(0.5, 1, 5))
+    )
+
+    fills.labels("BUY").inc()
+    fills.labels("BUY").inc(2)
+    fills.labels('S"ELL').inc()
+    open_trades.set(42)
+    open_trades.dec()
+    for value in (0.2, 0.5, 3.0, 12.0):
+        duration.labels("ok").observe(value)
+
+    lines = registry.render().splitlines()
+    assert "# TYPE fills_total counter" in lines
+    assert 'fills_total{side="BUY"} 3' in lines
+    assert 'fills_total{side="S\\"ELL"} 1' in lines
+    assert "open_trades 41" in lines
+    assert [line for line in lines if line.startswith("cycle_seconds")] == [
+        'cycle_seconds_bucket{status="ok",le="0.5"} 2',
+        'cycle_seconds_bucket{status="ok",le="1"} 2',
+        'cycle_seconds_bucket{status="ok",le="5"} 3',
+        'cycle_seconds_bucket{status="ok",le="+Inf"} 4',
+        'cycle_seconds_sum{status="ok"} 15.7',
+        'cycle_seconds_count{status="ok"} 4',
+    ]
+    assert fills.total() == 4
+
+
+def test_etiquetas_y_contadores_invalidos():
+    counter = Counter("c_total", "c", ["side"])
+    with pytest.raises(ValueError):
+        counter.inc()  # tiene etiquetas: hay que usar labels()
+    with pytest.raises(ValueError):
+        counter.labels("BUY", "extra")
+    with pytest.raises(ValueError):
+        counter.labels("BUY").inc(-1)
+    with pytest.raises(ValueError):
+        REGISTRY.register(Counter("desk_grade_fills_total", "duplicada"))
+
+
+def test_servidor_http():
+    registry = Registry()
+    registry.register(Gauge("up_gauge", "Proceso vivo")).set(1)
+    server = start_metrics_server(port=0, host="127.0.0.1", registry=registry)
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        with urllib.request.urlopen(f"{base}/metrics", timeout=5) as response:
+            assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+            assert "up_gauge 1" in response.read().decode("utf-8")
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(f"{base}/otra", timeout=5)
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,91 @@
+"""
+Tests para el perfilado de ciclos y el visor de perfiles.
+"""
+
+import pstats
+import threading
+import time
+
+import pytest
+
+from desk_grade import profiling
+from desk_grade.executor import run_per_key
+from desk_grade.profiling import PER_THREAD_PROFILES, ProfileSchedule, profile_cycle
+from scripts.profile_view import format_top, resolve_profile, top_stacks
+
+
+def _busy_symbol(item):
+    deadline = time.perf_counter() + 0.02
+    while time.perf_counter() < deadline:
+        pass
+
+
+def _fake_cycle():
+    # Simula el paso de exits en modo threads: el trabajo ocurre en el pool
+    run_per_key(range(4), key=lambda i: i, fn=_busy_symbol, mode="threads", max_workers=4)
+    return "c0ffee-cycle"
+
+
+def test_profile_cycle_escribe_pstats_y_collapsed(tmp_path):
+    result, artifacts = profile_cycle(_fake_cycle, tmp_path, sample_interval=0.002)
+
+    assert result == "c0ffee-cycle"
+    assert artifacts.pstats_path.name.endswith("_c0ffee-cycle.pstats")
+    assert artifacts.collapsed_path.with_suffix(".pstats") == artifacts.pstats_path
+
+    # El trabajo de los hilos del pool aparece en el .pstats fusionado (hasta 3.11)
+    functions = {func for _, _, func in pstats.Stats(str(artifacts.pstats_path)).stats}
+    assert "_fake_cycle" in functions
+    if PER_THREAD_PROFILES:
+        assert "_busy_symbol" in functions
+
+    lines = artifacts.collapsed_path.read_text().splitlines()
+    assert artifacts.samples > 0 and lines
+    assert any("test_profiling:_busy_symbol" in line for line in lines)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+
+
+def test_profile_cycle_sobre_pool_sin_profiler_por_hilo(tmp_path, monkeypatch):
+    """Si cProfile no puede activarse en un hilo (3.12+), el pool no se bloquea."""
+
+    class SingleProfiler(profiling.cProfile.Profile):
+        def enable(self, *args, **kwargs):
+            if threading.current_thread() is not threading.main_thread():
+                raise ValueError("Another profiling tool is already active")
+            super().enable(*args, **kwargs)
+
+    monkeypatch.setattr(profiling, "PER_THREAD_PROFILES", True)
+    monkeypatch.setattr(profiling.cProfile, "Profile", SingleProfiler)
+
+    result, artifacts = profile_cycle(_fake_cycle, tmp_path, sample_interval=0.002)
+
+    assert result == "c0ffee-cycle"
+    assert any("_busy_symbol" in line for line in artifacts.collapsed_path.read_text().splitlines())
+
+
+def test_profile_cycle_con_error_escribe_perfil_y_propaga(tmp_path):
+    def failing():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        profile_cycle(failing, tmp_path)
+    assert [p.name.endswith("_failed.pstats") for p in tmp_path.glob("*.pstats")] == [True]
+
+
+def test_profile_schedule():
+    assert not any(ProfileSchedule.parse("").due(n) for n in range(1, 10))
+    assert [n for n in range(1, 10) if ProfileSchedule.parse("once").due(n)] == [1]
+    assert [n for n in range(1, 10) if ProfileSchedule.parse("3").due(n)] == [3, 6, 9]
+    with pytest.raises(ValueError):
+        ProfileSchedule.parse("a veces")
+
+
+def test_profile_view(tmp_path):
+    _, artifacts = profile_cycle(_fake_cycle, tmp_path, sample_interval=0.002)
+
+    assert resolve_profile(tmp_path) == artifacts.pstats_path
+    table = format_top(artifacts.pstats_path, top=10)
+    assert "cumulative" in table and "_fake_cycle" in table
+
+    stacks = top_stacks(artifacts.collapsed_path, top=3)
+    assert 0 < len(stacks) <= 3
@@ -0,0 +1,101 @@
+"""
+Tests para el cliente de la API de QuantConnect contra un servidor HTTP local.
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from data_pipeline.http import build_session
+from data_pipeline.providers.quantconnect_provider import QuantConnectProvider
+
+
+class FakeQCHandler(BaseHTTPRequestHandler):
+    """Simula /data/read: 429 la primera vez para THROTTLED, 500 siempre para BROKEN."""
+
+    calls = {}
+    in_flight = 0
+    max_in_flight = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        symbol = parse_qs(urlparse(self.path).query)["symbol"][0]
+        cls = type(self)
+        with cls.lock:
+            cls.calls[symbol] = cls.calls.get(symbol, 0) + 1
+            attempt = cls.calls[symbol]
+            cls.in_flight += 1
+            cls.max_in_flight = max(cls.max_in_flight, cls.in_flight)
+        try:
+            time.sleep(0.05)
+            if symbol == "BROKEN":
+                self._reply(500, {"error": "boom"})
+            elif symbol == "THROTTLED" and attempt == 1:
+                self._reply(429, {"error": "slow down"}, {"Retry-After": "0"})
+            else:
+                bars = [
+                    {"ts": "2024-01-02T00:00:00Z", "open": 1, "high": 2, "low": 0.5,
+                     "close": 1.5, "volume": 100},
+                ]
+                self._reply(200, {"bars": bars})
+        finally:
+            with cls.lock:
+                cls.in_flight -= 1
+
+    def _reply(self, status, body, headers=None):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def qc_server():
+    FakeQCHandler.calls = {}
+    FakeQCHandler.max_in_flight = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeQCHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def _provider(url, workers=3):
+    return QuantConnectProvider(
+        user_id="u",
+        api_key="k",
+        api_url=url,
+        api_workers=workers,
+        session=build_session(retries=2, backoff_factor=0, pool_size=workers),
+    )
+
+
+def test_retries_429_and_reports_failures(qc_server) -> None:
+    provider = _provider(qc_server)
+    df = provider.fetch_ohlcv(["AAPL", "THROTTLED", "BROKEN"], "1d", None, None, "USA_STOCK")
+
+    assert sorted(df["symbol"]) == ["AAPL", "THROTTLED"]
+    assert FakeQCHandler.calls["THROTTLED"] == 2
+    assert FakeQCHandler.calls["BROKEN"] == 3  # 1 intento + 2 reintentos
+    assert list(provider.last_errors) == ["BROKEN"]
+    assert "500" in provider.last_errors["BROKEN"]
+
+
+def test_symbols_fetched_concurrently_with_bound(qc_server) -> None:
+    symbols = [f"S{i}" for i in range(8)]
+    df = _provider(qc_server, workers=3).fetch_ohlcv(symbols, "1d", None, None, "USA_STOCK")
+
+    assert len(df) == 8
+    assert 1 < FakeQCHandler.max_in_flight <= 3
@@ -0,0 +1,123 @@
+"""
+Tests para el resample incremental de OHLCV.
+"""
+
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_pipeline import resample
+from data_pipeline.resample import bucket_ranges, resample_bars, resample_timeframe
+
+T0 = pd.Timestamp("2024-01-02 14:30", tz="UTC")
+
+
+def _minute_bars(symbol, start, n, price=100.0):
+    ts = pd.date_range(start, periods=n, freq="min")
+    close = price + np.arange(n, dtype=float)
+    return pd.DataFrame(
+        {
+            "ts": ts,
+            "symbol": symbol,
+            "open": close - 0.5,
+            "high": close + 1,
+            "low": close - 1,
+            "close": close,
+            "volume": 1.0,
+        }
+    )
+
+
+def test_resample_bars_ohlc_por_intervalo():
+    df = pd.concat([_minute_bars("MSFT", T0, 10, 50), _minute_bars("AAPL", T0, 10)])
+    # Orden de llegada desordenado: el resultado no depende de él
+    df = df.sample(frac=1, random_state=1)
+    bars = resample_bars(df, "5m").set_index(["symbol", "ts"])
+
+    first = bars.loc[("AAPL", T0)]
+    assert first["open"] == 99.5
+    assert first["high"] == 105.0
+    assert first["low"] == 99.0
+    assert first["close"] == 104.0
+    assert first["volume"] == 5.0
+    assert bars.loc[("AAPL", T0 + pd.Timedelta(minutes=5)), "close"] == 109.0
+    assert bars.loc[("MSFT", T0), "close"] == 54.0
+    assert len(bars) == 4
+
+
+def test_resample_bars_1d_usa_dia_utc():
+    bars = resample_bars(_minute_bars("AAPL", "2024-01-02 23:58", 4), "1d")
+    assert bars["ts"].tolist() == [
+        pd.Timestamp("2024-01-02", tz="UTC"),
+        pd.Timestamp("2024-01-03", tz="UTC"),
+    ]
+    assert bars["volume"].tolist() == [2.0, 2.0]
+
+
+def test_bucket_ranges_cubre_intervalos_completos():
+    ranges = bucket_ranges(
+        {"AAPL": (T0 + pd.Timedelta(minutes=7), T0 + pd.Timedelta(minutes=62))}, "1h"
+    )
+    assert ranges["AAPL"] == (
+        pd.Timestamp("2024-01-02 14:00", tz="UTC"),
+        pd.Timestamp("2024-01-02 16:00", tz="UTC"),
+    )
+
+
+def test_resample_timeframe_incremental(monkeypatch):
+    wm = datetime(2024, 1, 2, 15, tzinfo=timezone.utc)
+    ingested = datetime(2024, 1, 2, 15, 40, tzinfo=timezone.utc)
+    calls = {}
+
+    monkeypatch.setattr(resample, "get_watermark", lambda src, tf: wm)
+
+    def fake_touched(src, since, symbols):
+        calls["since"] = since
+        return {"AAPL": (T0 + pd.Timedelta(minutes=12), T0 + pd.Timedelta(minutes=13))}, ingested
+
+    def fake_source(ranges, src):
+        calls["ranges"] = ranges
+        lo, hi = ranges["AAPL"]
+        return _minute_bars("AAPL", lo, int((hi - lo) / pd.Timedelta(minutes=1)))
+
+    def fake_upsert(df, tf, source):
+        calls["upsert"] = (df, tf, source)
+        return len(df)
+
+    monkeypatch.setattr(resample, "fetch_touched_ranges", fake_touched)
+    monkeypatch.setattr(resample, "fetch_source_bars", fake_source)
+    monkeypatch.setattr(resample, "upsert_ohlcv", fake_upsert)
+    monkeypatch.setattr(resample, "set_watermark", lambda src, tf, w: calls.setdefault("wm", w))
+
+    assert resample_timeframe("15m") == 1
+    assert calls["since"] == wm - resample.DEFAULT_LOOKBACK
+    # Sólo el intervalo 14:30-14:45 que contiene las barras tocadas
+    assert calls["ranges"]["AAPL"] == (T0, T0 + pd.Timedelta(minutes=15))
+    df, tf, source = calls["upsert"]
+    assert (tf, source) == ("15m", "resample:1m")
+    assert df["ts"].tolist() == [T0]
+    assert calls["wm"] == ingested
+
+
+def test_resample_timeframe_con_symbols_no_mueve_watermark(monkeypatch):
+    monkeypatch.setattr(resample, "get_watermark", lambda src, tf: None)
+    monkeypatch.setattr(
+        resample,
+        "fetch_touched_ranges",
+        lambda src, since, symbols: ({"AAPL": (T0, T0)}, datetime.now(timezone.utc)),
+    )
+    monkeypatch.setattr(resample, "fetch_source_bars", lambda r, s: _minute_bars("AAPL", T0, 1))
+    monkeypatch.setattr(resample, "upsert_ohlcv", lambda df, tf, source: len(df))
+
+    def fail(*args):
+        raise AssertionError("no debe mover el watermark")
+
+    monkeypatch.setattr(resample, "set_watermark", fail)
+    assert resample_timeframe("5m", symbols=["AAPL"]) == 1
+
+
+def test_resample_timeframe_rechaza_destino_invalido():
+    with pytest.raises(ValueError):
+        resample_timeframe("1m", source_timeframe="5m")
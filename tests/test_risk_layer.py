@@ -2,6 +2,7 @@
 Tests básicos para el módulo de riesgo.
 """
 
+import numpy as np
 import pytest
 
 from portfolio.risk_layer import RiskEngine, RiskLimits
@@ -103,3 +104,48 @@ def test_position_sizing_atr() -> None:
     # Size: 100 / 4 = 25 unidades
     size = engine.compute_position_size(symbol="TEST", price=100.0, equity=10000.0, atr=2.0)
     assert size == pytest.approx(25.0)
+
+
+@pytest.mark.parametrize("sizing_mode", ["FIXED_FRACTIONAL", "ATR"])
+@pytest.mark.parametrize("vol_target", [None, 0.15])
+def test_position_sizes_vectorizado_igual_a_ruta_escalar(sizing_mode, vol_target) -> None:
+    """compute_position_sizes reproduce bit a bit compute_position_size + vol targeting."""
+    limits = RiskLimits(
+        max_drawdown_pct=0.2,
+        daily_loss_limit_pct=0.05,
+        weekly_loss_limit_pct=0.1,
+        vol_target=vol_target,
+        sector_cap_pct=None,
+        sizing_mode=sizing_mode,
+        fixed_fractional=0.013,
+        atr_multiplier=1.7,
+    )
+    engine = RiskEngine(limits=limits)
+
+    rng = np.random.default_rng(11)
+    n = 2_000
+    prices = rng.uniform(1.0, 900.0, n).tolist()
+    atrs = (np.asarray(prices) * rng.uniform(0.002, 0.05, n)).tolist()
+    vols = rng.uniform(0.05, 1.2, n).tolist()
+    # Datos ausentes o inválidos, como llegan desde la base de datos
+    prices[:3] = [0.0, -5.0, 10.0]
+    atrs[3:6] = [None, 0.0, -1.0]
+    vols[6:9] = [None, 0.0, float("inf")]
+    symbols = [f"S{i}" for i in range(n)]
+
+    sizes = engine.compute_position_sizes(symbols, prices, atrs, vols, 123_457.89)
+    expected = np.array(
+        [
+            engine.apply_vol_targeting(
+                base_size=engine.compute_position_size(
+                    symbol=s, price=price, equity=123_457.89, atr=atr
+                ),
+                asset_annual_vol=vol,
+            )
+            for s, price, atr, vol in zip(symbols, prices, atrs, vols)
+        ],
+        dtype=float,
+    )
+    assert sizes.tobytes() == expected.tobytes()
+    assert (sizes > 0).sum() > n // 4
+    assert not engine.compute_position_sizes(symbols, prices, atrs, vols, 0.0).any()
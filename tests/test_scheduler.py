@@ -0,0 +1,84 @@
+"""
+Tests del scheduler: espera entre ciclos y LISTEN de ohlcv_bars.
+"""
+
+from contextlib import contextmanager
+
+import pytest
+
+from desk_grade import api
+from scripts import scheduler
+
+
+class FakeConn:
+    """Conexión con notificaciones en cola; notifies() imita a psycopg."""
+
+    def __init__(self, pending):
+        self.pending = list(pending)
+        self.timeouts = []
+
+    def notifies(self, timeout=None, stop_after=None):
+        self.timeouts.append(timeout)
+        while self.pending:
+            yield type("Notify", (), {"payload": self.pending.pop(0)})()
+            if stop_after is not None:
+                return
+
+
+def test_subscription_wait_drains_queued_notifications() -> None:
+    conn = FakeConn(["lote-1", "lote-2", "lote-3"])
+    bars = api.Subscription(conn)
+
+    assert bars.wait(timeout=60) == ["lote-1", "lote-2", "lote-3"]
+    assert conn.timeouts == [60, 0]
+    assert bars.wait(timeout=5) == []
+
+
+def test_listen_stays_open_across_cycles(monkeypatch) -> None:
+    events = []
+
+    class FakeSubscription:
+        def wait(self, timeout=None):
+            events.append(("wait", timeout))
+            return ["lote"]
+
+    @contextmanager
+    def fake_subscribe(channel):
+        events.append(("listen", channel))
+        try:
+            yield FakeSubscription()
+        finally:
+            events.append(("unlisten", channel))
+
+    def fake_cycle(profile=False):
+        events.append(("cycle", None))
+        if sum(1 for e in events if e[0] == "cycle") == 3:
+            raise KeyboardInterrupt
+
+    monkeypatch.setattr(scheduler.api, "subscribe", fake_subscribe)
+    monkeypatch.setattr(scheduler, "run_risk_cycle", fake_cycle)
+
+    scheduler.scheduler_loop(interval_minutes=1, wake_on_bars=True)
+
+    # LISTEN antes del primer ciclo y una sola conexión para todo el bucle
+    assert events == [
+        ("listen", "ohlcv_bars"),
+        ("cycle", None),
+        ("wait", 60),
+        ("cycle", None),
+        ("wait", 60),
+        ("cycle", None),
+        ("unlisten", "ohlcv_bars"),
+    ]
+
+
+def test_without_wake_on_bars_only_sleeps(monkeypatch) -> None:
+    slept = []
+    monkeypatch.setattr(scheduler.time, "sleep", slept.append)
+    monkeypatch.setattr(
+        scheduler.api, "subscribe", lambda channel: pytest.fail("no debe escuchar")
+    )
+
+    scheduler.wait_for_next_cycle(30)
+
+    assert slept == [30]
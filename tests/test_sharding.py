@@ -0,0 +1,42 @@
+"""
+Tests para el particionado por shards del ciclo de riesgo.
+"""
+
+import pytest
+
+from desk_grade.sharding import ShardSpec, shard_of
+
+
+def test_shard_of_is_stable_and_in_range() -> None:
+    """El shard depende sólo de (strategy_id, symbol) y está en [0, count)."""
+    first = shard_of("baseline", "AAPL", 8)
+    assert 0 <= first < 8
+    assert shard_of("baseline", "AAPL", 8) == first
+    assert shard_of("baseline", "aapl", 8) == first
+
+
+def test_each_trade_belongs_to_exactly_one_shard() -> None:
+    """Cada (strategy_id, symbol) pertenece a un único shard."""
+    shards = [ShardSpec(i, 4) for i in range(4)]
+    symbols = [f"SYM{i}" for i in range(200)]
+    counts = [0] * 4
+    for symbol in symbols:
+        owners = [s for s in shards if s.owns("baseline", symbol)]
+        assert len(owners) == 1
+        counts[owners[0].index] += 1
+    # Reparto razonablemente equilibrado
+    assert min(counts) > 200 / 4 * 0.5
+
+
+def test_invalid_shard_spec() -> None:
+    """Índices fuera de rango se rechazan."""
+    with pytest.raises(ValueError):
+        ShardSpec(4, 4)
+    with pytest.raises(ValueError):
+        shard_of("baseline", "AAPL", 0)
+
+
+def test_lock_keys_are_distinct_per_shard() -> None:
+    """Cada shard usa una clave de advisory lock distinta."""
+    keys = {ShardSpec(i, 8).lock_key for i in range(8)}
+    assert len(keys) == 8
@@ -0,0 +1,84 @@
+"""
+Benchmark de arranque: lo que importa el CLI de ingesta (python -X importtime).
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Presupuesto generoso para máquinas de CI lentas; lo relevante es no cargar
+# dependencias pesadas de providers que no se usan.
+IMPORT_BUDGET_S = float(os.getenv("STARTUP_IMPORT_BUDGET_S", "3.0"))
+
+HEAVY_MODULES = [
+    "ib_insync",
+    "eventkit",
+    "requests",
+    "pyarrow.dataset",
+    "data_pipeline.providers.ibkr_provider",
+    "data_pipeline.providers.quantconnect_provider",
+    "data_pipeline.providers.parquet_provider",
+]
+
+
+def _run(statement: str):
+    """
+    Ejecuta statement en un intérprete nuevo con -X importtime.
+
+    Devuelve ({módulo: µs acumulados}, módulos presentes en sys.modules al final).
+    sys.modules cubre también lo importado con importlib, que importtime no lista.
+    """
+    code = f"{statement}\nimport sys\nprint('\\n'.join(sys.modules))"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cum, name = line[len("import time:"):].split("|")
+        cumulative[name.strip()] = int(cum)
+    return cumulative, set(result.stdout.split())
+
+
+def test_ingest_cli_does_not_import_unused_providers() -> None:
+    timings, modules = _run("import data_pipeline.cli.ingest_ohlcv")
+
+    loaded = [m for m in HEAVY_MODULES if m in modules]
+    assert loaded == []
+    total_s = timings["data_pipeline.cli.ingest_ohlcv"] / 1e6
+    assert total_s < IMPORT_BUDGET_S, f"import del CLI: {total_s:.2f}s"
+
+
+def test_selected_provider_is_imported_on_demand() -> None:
+    pytest.importorskip("requests")
+    _, modules = _run(
+        "from data_pipeline.providers import get_provider_class; "
+        "get_provider_class('quantconnect')"
+    )
+    assert "data_pipeline.providers.quantconnect_provider" in modules
+    assert "data_pipeline.providers.ibkr_provider" not in modules
+
+
+def test_lazy_attribute_access_keeps_public_names() -> None:
+    from data_pipeline import providers
+
+    assert providers.CsvProvider is providers.get_provider_class("csv")
+    with pytest.raises(ValueError):
+        providers.get_provider_class("bloomberg")
+
+
+def test_scheduler_does_not_import_pandas() -> None:
+    _, modules = _run("import scripts.scheduler")
+
+    assert "scripts.scheduler" in modules
+    assert "pandas" not in modules and "data_pipeline.streaming" not in modules
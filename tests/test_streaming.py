@@ -0,0 +1,159 @@
+"""
+Tests para el streaming de barras en tiempo real (feed IB falso).
+"""
+
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("ib_insync")
+
+from data_pipeline import streaming
+from data_pipeline.providers.ibkr_provider import IBKRProvider
+from data_pipeline.streaming import Bar, BarAggregator, IBKRBarStreamer, OhlcvBatchWriter
+
+T0 = datetime(2024, 1, 2, 14, 30, tzinfo=timezone.utc)
+
+
+class FakeEvent:
+    def __init__(self):
+        self.handlers = []
+
+    def __iadd__(self, handler):
+        self.handlers.append(handler)
+        return self
+
+
+class FakeFeed(list):
+    def __init__(self, contract):
+        super().__init__()
+        self.contract = contract
+        self.updateEvent = FakeEvent()
+
+    def push(self, seconds, price, volume=1.0):
+        self.append(
+            SimpleNamespace(
+                time=T0 + timedelta(seconds=seconds),
+                open_=price,
+                high=price + 1,
+                low=price - 1,
+                close=price,
+                volume=volume,
+            )
+        )
+        for handler in self.updateEvent.handlers:
+            handler(self, True)
+
+
+class FakeIB:
+    def __init__(self):
+        self.feeds = {}
+        self.cancelled = []
+
+    def connect(self, *args, **kwargs):
+        pass
+
+    def disconnect(self):
+        pass
+
+    def reqRealTimeBars(self, contract, bar_size, what_to_show, use_rth):
+        assert bar_size == 5
+        feed = FakeFeed(contract)
+        self.feeds[contract.symbol] = feed
+        return feed
+
+    def cancelRealTimeBars(self, feed):
+        self.cancelled.append(feed.contract.symbol)
+
+
+@pytest.fixture
+def captured(monkeypatch):
+    """Captura upsert/notify sin base de datos."""
+    calls = {"frames": [], "notify": []}
+
+    @contextmanager
+    def fake_transaction():
+        yield
+
+    def fake_upsert(df, timeframe, source):
+        calls["frames"].append(df.copy())
+        return len(df)
+
+    monkeypatch.setattr(streaming.api, "transaction", fake_transaction)
+    monkeypatch.setattr(streaming.api, "notify", lambda ch, p: calls["notify"].append((ch, p)))
+    monkeypatch.setattr(streaming, "upsert_ohlcv", fake_upsert)
+    return calls
+
+
+def _bar(seconds, price, volume=1.0, symbol="AAPL"):
+    return Bar(symbol, pd.Timestamp(T0 + timedelta(seconds=seconds)), price, price + 1,
+               price - 1, price, volume)
+
+
+def test_aggregator_builds_ohlc_from_5s_bars() -> None:
+    agg = BarAggregator("1m")
+    emitted = []
+    for i, price in enumerate([10, 12, 9, 11]):
+        emitted += agg.add(_bar(i * 5, price))
+    assert emitted == []
+
+    emitted = agg.add(_bar(60, 20))  # primera barra del minuto siguiente
+    assert len(emitted) == 1
+    bar = emitted[0]
+    assert bar.ts == pd.Timestamp(T0)
+    assert (bar.open, bar.high, bar.low, bar.close, bar.volume) == (10, 13, 8, 11, 4.0)
+
+
+def test_late_bar_updates_and_reemits_closed_bar() -> None:
+    agg = BarAggregator("1m")
+    agg.add(_bar(0, 10))
+    agg.add(_bar(60, 20))
+    late = agg.add(_bar(55, 30))
+    assert len(late) == 1 and late[0].close == 30 and late[0].high == 31
+
+
+def test_close_until_emits_idle_symbols() -> None:
+    agg = BarAggregator("1m")
+    agg.add(_bar(0, 10))
+    assert agg.close_until(pd.Timestamp(T0 + timedelta(seconds=59))) == []
+    assert len(agg.close_until(pd.Timestamp(T0 + timedelta(seconds=60)))) == 1
+
+
+def test_writer_flushes_by_size_and_notifies(captured) -> None:
+    writer = OhlcvBatchWriter("1m", batch_size=2, flush_interval_s=3600, notify_channel="ohlcv_bars")
+    writer.add([_bar(0, 10)])
+    assert writer.maybe_flush() == 0
+    writer.add([_bar(0, 11, symbol="MSFT")])
+    assert writer.maybe_flush() == 2
+
+    assert len(captured["frames"]) == 1
+    assert captured["notify"][0][0] == "ohlcv_bars"
+    assert '"symbols": ["AAPL", "MSFT"]' in captured["notify"][0][1]
+    assert len(writer) == 0
+
+
+def test_streamer_with_fake_feed(captured) -> None:
+    ib = FakeIB()
+    provider = IBKRProvider(ib=ib)
+    writer = OhlcvBatchWriter("1m", batch_size=100, flush_interval_s=0)
+    streamer = IBKRBarStreamer(provider, ["AAPL", "MSFT"], "USA_STOCK", writer)
+    streamer.subscribe()
+
+    for second in range(0, 125, 5):  # dos minutos completos + una barra del tercero
+        ib.feeds["AAPL"].push(second, 100 + second)
+    ib.feeds["MSFT"].push(0, 50)
+
+    # MSFT no tiene más barras: se cierra por tiempo (con margen de 10s)
+    written = streamer.tick(now=pd.Timestamp(T0 + timedelta(seconds=70)))
+    assert written == 3
+    df = pd.concat(captured["frames"])
+    aapl = df[df["symbol"] == "AAPL"].sort_values("ts")
+    assert list(aapl["open"]) == [100, 160]
+    assert list(aapl["close"]) == [155, 215]
+    assert list(aapl["volume"]) == [12.0, 12.0]
+
+    streamer.stop()
+    assert sorted(ib.cancelled) == ["AAPL", "MSFT"]
@@ -0,0 +1,107 @@
+"""
+Tests para el generador de datos de mercado sintéticos.
+"""
+
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from data_pipeline import synthetic
+from data_pipeline.synthetic import AtrTracker, SyntheticMarket, seed_synthetic
+
+START = pd.Timestamp("2024-01-01", tz="UTC")
+
+
+def _symbols(n):
+    return [f"SYN{i:04d}" for i in range(n)]
+
+
+def test_ohlc_coherente_y_continuo_entre_bloques():
+    market = SyntheticMarket(_symbols(20), seed=7)
+    chunks = list(market.iter_bars(START, START + pd.Timedelta(hours=5), chunk_bars=120))
+    assert [len(ts) for ts, _ in chunks] == [120, 120, 60]
+
+    for ts, bars in chunks:
+        assert (bars["high"] >= np.maximum(bars["open"], bars["close"])).all()
+        assert (bars["low"] <= np.minimum(bars["open"], bars["close"])).all()
+        assert (bars["low"] > 0).all() and (bars["volume"] > 0).all()
+    # Cada bloque abre en el último close del anterior
+    assert np.array_equal(chunks[1][1]["open"][0], chunks[0][1]["close"][-1])
+    assert chunks[1][0][0] == chunks[0][0][-1] + pd.Timedelta(minutes=1)
+
+
+def test_misma_semilla_mismos_datos():
+    a = SyntheticMarket(_symbols(3), seed=1).generate(50)
+    b = SyntheticMarket(_symbols(3), seed=1).generate(50)
+    assert np.array_equal(a["close"], b["close"])
+
+
+def test_volatilidad_y_correlacion_del_modelo_de_factores():
+    market = SyntheticMarket(_symbols(8), timeframe="1h", seed=3, factor_share=(0.5, 0.8))
+    bars = market.generate(40_000)
+    log_ret = np.diff(np.log(bars["close"]), axis=0)
+
+    realized_vol = log_ret.std(axis=0) / np.sqrt(market.dt)
+    np.testing.assert_allclose(realized_vol, market.vol, rtol=0.05)
+
+    realized_corr = np.corrcoef(log_ret.T)
+    assert np.abs(realized_corr - market.correlation()).max() < 0.05
+
+
+def test_atr_por_bloques_igual_que_de_una_vez():
+    market = SyntheticMarket(_symbols(4), seed=5)
+    bars = market.generate(300)
+    whole = AtrTracker(14).update(bars)
+
+    tracker = AtrTracker(14)
+    parts = [
+        tracker.update({k: v[lo:hi] for k, v in bars.items()})
+        for lo, hi in [(0, 100), (100, 250), (250, 300)]
+    ]
+    np.testing.assert_allclose(np.vstack(parts), whole)
+
+    # Referencia: ewm de Wilder sobre el true range de un símbolo
+    high, low, close = bars["high"][:, 0], bars["low"][:, 0], bars["close"][:, 0]
+    prev = np.r_[bars["open"][0, 0], close[:-1]]
+    tr = np.maximum(high - low, np.maximum(abs(high - prev), abs(low - prev)))
+    expected = pd.Series(tr).ewm(alpha=1 / 14, adjust=False).mean().to_numpy()
+    np.testing.assert_allclose(whole[:, 0], expected)
+
+
+def test_seed_synthetic_copia_por_bloque(monkeypatch):
+    copies = []
+    transactions = []
+
+    def fake_copy_rows(table, columns, rows, types=None):
+        rows = list(rows)
+        assert types is not None and len(types) == len(columns)
+        assert all(len(row) == len(columns) for row in rows)
+        copies.append((table, columns, rows))
+
+    @contextmanager
+    def fake_transaction():
+        transactions.append(len(copies))
+        yield
+
+    monkeypatch.setattr(synthetic.api, "copy_rows", fake_copy_rows)
+    monkeypatch.setattr(synthetic.api, "transaction", fake_transaction)
+
+    market = SyntheticMarket(_symbols(10), timeframe="5m", seed=11)
+    totals = seed_synthetic(
+        market, START, START + pd.Timedelta(days=2), atr_every=12, signals_per_day=24
+    )
+
+    assert len(transactions) == 2  # un bloque (y una transacción) por día
+    assert totals["ohlcv"] == 10 * 288 * 2
+    assert totals["atr_cache"] == 10 * 24 * 2
+
+    ohlcv = [row for table, _, rows in copies if table == "ohlcv" for row in rows]
+    assert len(ohlcv) == totals["ohlcv"]
+    first = ohlcv[0]
+    assert first[0] == START and first[1] == "SYN0000" and first[7:] == ("5m", "synthetic")
+
+    signals = [row for table, _, rows in copies if table == "signals_live" for row in rows]
+    assert len(signals) == totals["signals_live"] > 0
+    assert {row[2] for row in signals} <= {"BUY", "SELL"}
+    assert all(0.0 <= row[3] <= 1.0 for row in signals)
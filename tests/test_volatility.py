@@ -0,0 +1,198 @@
+"""
+Tests para la vol realizada y vol_cache (portfolio.volatility).
+"""
+
+import math
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from portfolio import volatility
+from portfolio.volatility import (
+    VolConfig,
+    advance_state,
+    bars_per_year,
+    ewma_variance,
+    fetch_annual_vols,
+    garman_klass_terms,
+    parkinson_terms,
+    refresh_vol_cache,
+)
+
+T0 = datetime(2024, 1, 2, 14, 30, tzinfo=timezone.utc)
+
+
+def _config(**overrides):
+    values = dict(timeframe="1m", halflife_bars=10.0, estimator="ewma", warmup_bars=40, min_bars=5)
+    values.update(overrides)
+    return VolConfig(**values)
+
+
+def _ohlc(n, seed=1):
+    rng = np.random.default_rng(seed)
+    close = 100.0 * np.exp(np.cumsum(rng.normal(0.0, 0.001, n)))
+    open_ = np.concatenate([[100.0], close[:-1]])
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.001, n))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.001, n))
+    return open_, high, low, close
+
+
+def test_bars_per_year():
+    assert bars_per_year("1m") == 252 * 390
+    assert bars_per_year("5m") == 252 * 78
+    assert bars_per_year("1d") == 252
+
+
+def test_bars_per_year_mercado_24h():
+    assert bars_per_year("1m", session_hours=24) == 252 * 1440
+    assert bars_per_year("1h", session_hours=24, trading_days=365) == 365 * 24
+    assert bars_per_year("1d", session_hours=24, trading_days=365) == 365
+    # Una barra más larga que la sesión cuenta como una barra por sesión
+    assert bars_per_year("4h", session_hours=2) == 252
+
+
+def test_vol_anual_mercado_24h_no_infravalorada(monkeypatch):
+    bars = _bar_rows("EURUSD", 30, 1)
+    monkeypatch.setenv("RISK_VOL_SESSION_HOURS", "24")
+    monkeypatch.setenv("RISK_VOL_TRADING_DAYS", "260")
+    forex = VolConfig.from_env()
+    assert forex.periods_per_year == 260 * 1440
+
+    _fake_db(monkeypatch, bars)
+    equity_vol = fetch_annual_vols(["EURUSD"], _config(), refresh=True)["EURUSD"]
+    calls = _fake_db(monkeypatch, bars)
+    forex_config = _config(session_hours=24.0, trading_days=260)
+    forex_vol = fetch_annual_vols(["EURUSD"], forex_config, refresh=True)["EURUSD"]
+
+    # Misma varianza por barra; con 24h la vol anual es ~1.96x la de una sesión de 6.5h
+    assert forex_vol / equity_vol == pytest.approx(math.sqrt(260 * 24 / (252 * 6.5)))
+    assert calls["upserts"][0][7] == pytest.approx(forex_vol)
+
+
+def test_ewma_variance_forma_cerrada_igual_a_recursion():
+    terms = np.random.default_rng(2).uniform(0, 1e-6, 50)
+    decay = 0.5 ** (1 / 10)
+    var = 3e-7
+    for term in terms:
+        var = decay * var + (1 - decay) * term
+    assert ewma_variance(terms, decay, 3e-7) == pytest.approx(var, rel=1e-12)
+    # Sin estado previo se siembra con la media de la muestra
+    assert ewma_variance(np.full(8, 2e-6), decay, None) == pytest.approx(2e-6)
+
+
+def test_estimadores_de_rango():
+    high, low = np.array([101.0]), np.array([99.0])
+    open_, close = np.array([99.5]), np.array([100.5])
+    hl = math.log(101 / 99) ** 2
+    assert parkinson_terms(high, low)[0] == pytest.approx(hl / (4 * math.log(2)))
+    expected_gk = 0.5 * hl - (2 * math.log(2) - 1) * math.log(100.5 / 99.5) ** 2
+    assert garman_klass_terms(open_, high, low, close)[0] == pytest.approx(expected_gk)
+
+
+def test_advance_state_incremental_igual_a_todo_de_una_vez():
+    open_, high, low, close = _ohlc(60)
+    ts = [T0 + timedelta(minutes=i) for i in range(60)]
+    decay = _config().decay
+
+    once = advance_state("AAA", None, ts, open_, high, low, close, decay)
+    step = advance_state("AAA", None, ts[:30], open_[:30], high[:30], low[:30], close[:30], decay)
+    step = advance_state(
+        "AAA", step, ts[30:], open_[30:], high[30:], low[30:], close[30:], decay
+    )
+
+    assert once.n_bars == step.n_bars == 59  # la primera barra sólo da el cierre base
+    assert (once.ts, once.close) == (step.ts, step.close)
+    # La siembra difiere (media de 29 vs 59 términos), pero su peso decae como λᵏ
+    assert step.ewma_var == pytest.approx(once.ewma_var, rel=0.05)
+    assert advance_state("AAA", step, [], *(np.empty(0),) * 4, decay) is step
+
+
+def _fake_db(monkeypatch, bars, stored=None):
+    calls = {"fetch": [], "upserts": []}
+
+    def fake_fetch_all(query, params):
+        calls["fetch"].append(params)
+        if query is volatility.VOL_STATE_SQL:
+            return list(stored or [])
+        symbols, since, _, limit = params
+        out = []
+        for symbol, start in zip(symbols, since):
+            rows = [b for b in bars if b["symbol"] == symbol and b["ts"] > start]
+            out.extend(rows[-limit:])
+        return out
+
+    monkeypatch.setattr(volatility, "fetch_all", fake_fetch_all)
+    monkeypatch.setattr(
+        volatility, "execute_many", lambda query, rows: calls["upserts"].extend(rows)
+    )
+    return calls
+
+
+def _bar_rows(symbol, n, seed):
+    open_, high, low, close = _ohlc(n, seed)
+    return [
+        {
+            "symbol": symbol,
+            "ts": T0 + timedelta(minutes=i),
+            "open": open_[i],
+            "high": high[i],
+            "low": low[i],
+            "close": close[i],
+        }
+        for i in range(n)
+    ]
+
+
+def test_refresh_y_lookup_en_bloque(monkeypatch):
+    bars = _bar_rows("AAA", 30, 1) + _bar_rows("BBB", 3, 2)
+    calls = _fake_db(monkeypatch, bars)
+    config = _config()
+
+    vols = fetch_annual_vols(["BBB", "AAA", "ZZZ"], config, refresh=True)
+
+    assert len(calls["fetch"]) == 2  # estado + barras nuevas de todos los símbolos
+    assert calls["fetch"][1][0] == ["AAA", "BBB", "ZZZ"]
+    assert [row[0] for row in calls["upserts"]] == ["AAA", "BBB"]
+    # BBB sólo tiene 2 rendimientos (< min_bars): no se usa para dimensionar
+    assert list(vols) == ["AAA"]
+    aaa = calls["upserts"][0]
+    assert aaa[10] == 29 and vols["AAA"] == pytest.approx(aaa[7])
+    assert vols["AAA"] == pytest.approx(math.sqrt(aaa[4] * bars_per_year("1m")))
+
+
+def test_refresh_incremental_lee_desde_el_ultimo_ts(monkeypatch):
+    bars = _bar_rows("AAA", 30, 1)
+    config = _config()
+    calls = _fake_db(monkeypatch, bars[:20])
+    first = refresh_vol_cache(["AAA"], config)["AAA"]
+
+    stored = [
+        {
+            "symbol": "AAA",
+            "ts": first.ts,
+            "close": first.close,
+            "ewma_var": first.ewma_var,
+            "parkinson_var": first.parkinson_var,
+            "garman_klass_var": first.garman_klass_var,
+            "n_bars": first.n_bars,
+        }
+    ]
+    calls = _fake_db(monkeypatch, bars, stored)
+    state = refresh_vol_cache(["AAA"], config)["AAA"]
+
+    assert calls["fetch"][1][1] == [first.ts]
+    assert state.n_bars == 29 and state.ts == bars[-1]["ts"]
+
+    # Sin barras nuevas no se escribe nada y el lookup es una sola consulta
+    calls = _fake_db(monkeypatch, [], stored)
+    assert fetch_annual_vols(["AAA"], config) == {
+        "AAA": first.annual_vol("ewma", bars_per_year("1m"))
+    }
+    assert len(calls["fetch"]) == 1 and calls["upserts"] == []
+
+
+def test_config_estimador_invalido(monkeypatch):
+    monkeypatch.setenv("RISK_VOL_ESTIMATOR", "yang_zhang")
+    with pytest.raises(ValueError):
+        VolConfig.from_env()
@@ -0,0 +1,182 @@
+"""
+Tests para el webhook de TradingView (servidor real en loopback, inserción falsa).
+"""
+
+import asyncio
+import json
+import threading
+from datetime import datetime, timezone
+
+import pytest
+
+from data_pipeline import webhook_server
+from data_pipeline.webhook_server import (
+    AlertError,
+    SignalBatcher,
+    WebhookServer,
+    parse_alert,
+)
+
+
+class RecordingInsert:
+    def __init__(self, fail_first: bool = False):
+        self.batches = []
+        self.fail_first = fail_first
+        self.lock = threading.Lock()
+
+    def __call__(self, rows):
+        with self.lock:
+            if self.fail_first:
+                self.fail_first = False
+                raise RuntimeError("db caída")
+            self.batches.append(list(rows))
+
+
+async def _request(port, method, path, body=None):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    payload = json.dumps(body).encode() if body is not None else b""
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: x\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode() + payload
+    )
+    await writer.drain()
+    raw = await reader.read()
+    writer.close()
+    head, _, data = raw.partition(b"\r\n\r\n")
+    status = int(head.split(b" ")[1])
+    return status, json.loads(data)
+
+
+def _alert(i, **extra):
+    return {"symbol": f"NASDAQ:S{i}", "side": "long" if i % 2 else "sell", "strength": i, **extra}
+
+
+def test_parse_alert_normaliza_campos():
+    signal = parse_alert(
+        {"ticker": "nasdaq:aapl", "action": "Buy", "time": "2024-01-02T14:30:00Z",
+         "strength": "0.5", "interval": "5"},
+        default_strategy="baseline",
+    )
+    assert signal.symbol == "AAPL"
+    assert signal.side == "BUY"
+    assert signal.ts == datetime(2024, 1, 2, 14, 30, tzinfo=timezone.utc)
+    assert signal.strength == 0.5
+    assert signal.strategy_id == "baseline"
+    assert signal.meta == {"interval": "5", "source": "tradingview_webhook"}
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        [],
+        {"side": "buy"},
+        {"symbol": "AAPL", "side": "hold"},
+        {"symbol": "AAPL", "side": "buy", "time": "ayer"},
+        {"symbol": "AAPL", "side": "buy", "strength": "mucho"},
+    ],
+)
+def test_parse_alert_rechaza_invalidas(payload):
+    with pytest.raises(AlertError):
+        parse_alert(payload)
+
+
+def test_parse_alert_exige_passphrase():
+    with pytest.raises(AlertError):
+        parse_alert({"symbol": "AAPL", "side": "buy", "passphrase": "x"}, secret="s3cret")
+    for wrong in (None, 12345, "contraseña"):
+        with pytest.raises(AlertError):
+            parse_alert({"symbol": "AAPL", "side": "buy", "passphrase": wrong}, secret="s3cret")
+    with pytest.raises(AlertError):
+        parse_alert({"symbol": "AAPL", "side": "buy"}, secret="s3cret")
+    signal = parse_alert({"symbol": "AAPL", "side": "buy", "passphrase": "s3cret"}, secret="s3cret")
+    assert "passphrase" not in signal.meta
+
+
+def test_rafaga_se_inserta_en_lotes_sin_commit_por_peticion():
+    insert = RecordingInsert()
+
+    async def scenario():
+        batcher = SignalBatcher(insert_fn=insert, flush_interval_ms=50, max_rows=10)
+        server = WebhookServer(batcher, port=0, secret="s3cret")
+        await server.start()
+        try:
+            results = await asyncio.gather(
+                *[_request(server.port, "POST", "/webhook", _alert(i, passphrase="s3cret"))
+                  for i in range(25)],
+                _request(server.port, "POST", "/webhook", {"symbol": "AAPL", "side": "buy"}),
+            )
+            await asyncio.sleep(0.2)
+            stats = await _request(server.port, "GET", "/stats")
+        finally:
+            await server.stop()
+        return results, stats
+
+    results, (status, stats) = asyncio.run(scenario())
+    assert sorted(code for code, _ in results) == [202] * 25 + [400]
+    assert status == 200
+
+    rows = [row for batch in insert.batches for row in batch]
+    assert len(rows) == 25
+    assert len(insert.batches) < 25
+    assert all(len(batch) <= 10 for batch in insert.batches)
+    assert {row[0] for row in rows} == {f"S{i}" for i in range(25)}
+    assert {row[2] for row in rows} == {"BUY", "SELL"}
+
+    assert stats["received"] == 26
+    assert stats["accepted"] == 25
+    assert stats["rejected"] == 1
+    assert stats["inserted"] == 25
+    assert stats["batches"] == len(insert.batches)
+    assert stats["pending"] == 0
+    assert stats["latency_ms_p95"] is not None
+
+
+def test_flush_fallido_conserva_filas_y_reintenta():
+    insert = RecordingInsert(fail_first=True)
+
+    async def scenario():
+        batcher = SignalBatcher(insert_fn=insert, flush_interval_ms=1000, max_rows=100)
+        for i in range(3):
+            assert batcher.add(parse_alert(_alert(i)))
+        assert await batcher.flush() == 0
+        assert len(batcher) == 3
+        assert await batcher.flush() == 3
+        return batcher.stats
+
+    stats = asyncio.run(scenario())
+    assert stats.flush_errors == 1
+    assert stats.inserted == 3
+    assert [row[0] for row in insert.batches[0]] == ["S0", "S1", "S2"]
+
+
+def test_buffer_lleno_responde_503():
+    async def scenario():
+        batcher = SignalBatcher(insert_fn=RecordingInsert(), max_rows=100, max_pending=1)
+        server = WebhookServer(batcher)
+        first = server._accept(json.dumps(_alert(1)).encode())
+        second = server._accept(json.dumps(_alert(2)).encode())
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first[0] == 202
+    assert second[0] == 503
+
+
+def test_insert_signals_usa_una_transaccion(monkeypatch):
+    from contextlib import contextmanager
+
+    from desk_grade import api
+
+    calls = []
+
+    @contextmanager
+    def fake_transaction():
+        calls.append("begin")
+        yield
+        calls.append("commit")
+
+    monkeypatch.setattr(api, "transaction", fake_transaction)
+    monkeypatch.setattr(api, "execute_many", lambda sql, rows: calls.append(len(rows)))
+
+    webhook_server.insert_signals([parse_alert(_alert(i)).as_row() for i in range(4)])
+    assert calls == ["begin", 4, "commit"]